@@ -18,6 +18,8 @@ from pathlib import Path
 
 from services.odds_api import TheOddsApiClient
 from core.config import settings
+from db.warehouse import ensure_schema
+from services.market_state import MarketStateEngine
 
 
 class HistoricalDataCollector:
@@ -36,29 +38,8 @@ class HistoricalDataCollector:
         self._ensure_db_exists()
     
     def _ensure_db_exists(self):
-        """Create database and tables if they don't exist"""
-        db_dir = Path(self.db_path).parent
-        db_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Create tables if they don't exist
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Just ensure key tables exist - schema creates them with IF NOT EXISTS
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='matches'")
-        if not cursor.fetchone():
-            # Database is new, run full schema
-            schema_path = Path(__file__).parent / "db" / "schema.sql"
-            if schema_path.exists():
-                with open(schema_path, 'r') as f:
-                    schema = f.read()
-                conn.executescript(schema)
-                print(f"[OK] Database initialized: {self.db_path}")
-            else:
-                print(f"Warning: Schema file not found at {schema_path}")
-        
-        conn.commit()
-        conn.close()
+        """Create database and any missing tables (schema is idempotent)"""
+        ensure_schema(self.db_path)
     
     async def run_daily_snapshot(
         self, 
@@ -217,7 +198,7 @@ class HistoricalDataCollector:
                     if mkt.key == market:
                         for outcome in mkt.outcomes:
                             cursor.execute("""
-                                INSERT INTO odds_snapshots
+                                INSERT OR IGNORE INTO odds_snapshots
                                 (match_id, bookmaker_key, market_key, outcome_name, 
                                  odds, snapshot_time, time_to_event_hours)
                                 VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -275,30 +256,21 @@ class HistoricalDataCollector:
         
         print(f"Collecting closing odds for {len(matches_to_close)} matches...")
         
-        # For each match, get latest odds
+        # For each match, each book's latest quote per outcome (books that
+        # skipped the most recent poll keep their last price; moved
+        # spreads/totals lines close on the line last offered)
+        market_state = MarketStateEngine(self.db_path)
         for match_id, sport_key in matches_to_close:
-            # Get latest snapshot for this match
-            cursor.execute("""
-                SELECT bookmaker_key, market_key, outcome_name, odds, snapshot_time
-                FROM odds_snapshots
-                WHERE match_id = ?
-                AND snapshot_time = (
-                    SELECT MAX(snapshot_time)
-                    FROM odds_snapshots
-                    WHERE match_id = ?
-                )
-            """, (match_id, match_id))
-            
-            latest_odds = cursor.fetchall()
+            latest_odds = market_state.closing_quotes(match_id)
             
             # Insert as closing odds
-            for bookie, market, outcome, odds, snap_time in latest_odds:
+            for market, bookie, outcome, point, odds, snap_time in latest_odds:
                 cursor.execute("""
                     INSERT OR REPLACE INTO closing_odds
                     (match_id, bookmaker_key, market_key, outcome_name, 
-                     closing_odds, snapshot_time)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (match_id, bookie, market, outcome, odds, snap_time))
+                     closing_odds, point, snapshot_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (match_id, bookie, market, outcome, odds, point, snap_time))
         
         conn.commit()
         conn.close()
@@ -27,6 +27,7 @@ class Settings(BaseSettings):
     # The Odds API
     THE_ODDS_API_KEY: Optional[str] = None
     ODDS_CACHE_MINUTES: int = 15  # Cache for 15 mins as requested
+    OUTRIGHTS_CACHE_MINUTES: int = 180  # Futures move slowly; saves quota on 20-60 runner markets
     
     # Affiliate URLs
     BET365_AFFILIATE_URL: Optional[str] = "https://www.bet365.com"
@@ -34,6 +35,21 @@ class Settings(BaseSettings):
     UNIBET_AFFILIATE_URL: Optional[str] = "https://www.unibet.com"
     PINNACLE_AFFILIATE_URL: Optional[str] = "https://www.pinnacle.com"
 
+    # Historical Data Warehouse
+    HISTORICAL_DB_PATH: str = str(API_DIR / "db" / "historical.db")
+    PARQUET_ARCHIVE_DIR: str = str(API_DIR / "db" / "archive")
+    ANALYTICS_THREADS: Optional[int] = None  # None = all cores
+    INGESTION_SINKS: str = "sqlalchemy,sqlite"  # Where live odds snapshots are written
+    SNAPSHOT_RETENTION_DAYS: int = 30  # Older snapshots are rolled into OHLC bars
+    BOOKMAKER_PRECISION_PATH: str = str(API_DIR / "db" / "bookmaker_precision.json")  # Written by services/calibration.py
+    CLV_LOOKUP_PATH: str = str(API_DIR / "db" / "clv_lookup.json")  # Written by services/clv.py
+    RISK_GRID_PATH: str = str(API_DIR / "db" / "risk_grid.npy")  # Written by services/risk_grid.py
+    LEADER_LAG_PATH: str = str(API_DIR / "db" / "leader_lag.json")  # Written by services/leader_lag.py
+    BOOK_CORRELATION_PATH: str = str(API_DIR / "db" / "book_correlation.npz")  # Written by services/book_correlation.py
+    PORTFOLIO_MAX_TOTAL_FRACTION: float = 0.25  # Combined stake across all open recommendations
+    ADMIN_API_KEY: Optional[str] = None  # X-Admin-Key for /api/v1/admin (admin routes are off when unset)
+    ANALYSIS_VERSION: str = "4"  # Bump when consensus/edge/Kelly logic changes (recommended_bets dedupe)
+
     # Bookmaker Weights (for True Odds Calculation)
     # Higher weight = sharper bookmaker (more accurate lines)
     BOOKMAKER_WEIGHTS: dict = {
@@ -65,6 +81,13 @@ class Settings(BaseSettings):
         "default": 0.010              # 1.0% for other sports
     }
 
+    # Arbitrage scanner: sports scanned together on every refresh cycle
+    ARB_SPORTS: list = [
+        "soccer_epl", "soccer_uefa_champions_league", "basketball_nba",
+        "americanfootball_nfl", "icehockey_nhl", "baseball_mlb"
+    ]
+    ARB_MAX_QUOTE_AGE_MINUTES: int = 30  # Older quotes have usually moved; they only produce phantom arbs
+
     # Security
     SECRET_KEY: str = "your-super-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
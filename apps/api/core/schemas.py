@@ -43,6 +43,7 @@ class ValueBet(BaseModel):
     bookmaker: str
     market: str
     outcome: str
+    point: Optional[float] = None  # Line for spreads/totals
     odds: float
     true_probability: float
     edge: float
@@ -71,6 +72,7 @@ class ValueBet(BaseModel):
     # Legacy fields
     affiliate_url: Optional[str] = None
     is_steam_move: Optional[bool] = False
+    steam_detected_at: Optional[datetime] = None  # When the coordinated move was first seen
     previous_odds: Optional[float] = None
     kelly_percentage: float = 0.0
     recommended_stake: float = 0.0
@@ -89,6 +91,91 @@ class PlayerProp(BaseModel):
     bookmaker: str
     match_id: str
 
+# Line movement history (odds_snapshots time series)
+class PriceSeries(BaseModel):
+    bookmaker: str
+    outcome: str
+    point: Optional[float] = None
+    times: List[int]  # Unix seconds, ascending
+    odds: List[float]
+    raw_points: int  # Points before downsampling
+
+class OddsHistory(BaseModel):
+    match_id: str
+    market: str
+    series: List[PriceSeries]
+    downsampled: bool = False
+    compacted: bool = False  # Served from OHLC bars (raw snapshots retired)
+
+class MarketSnapshot(BaseModel):
+    match_id: str
+    market: str
+    as_of: datetime
+    bookmakers: List[str]
+    outcomes: List[str]
+    points: List[Optional[float]]  # Line per outcome column (None for h2h)
+    prices: List[List[Optional[float]]]  # [bookmaker][outcome], None = no quote yet
+    quoted_at: List[List[Optional[int]]]  # Unix seconds of each quote
+
+# Cross-bookmaker arbitrage
+class ArbLeg(BaseModel):
+    outcome: str
+    point: Optional[float] = None
+    bookmaker: str
+    odds: float
+    stake_share: float  # Fraction of the total stake; every leg returns the same payout
+    stake: float
+
+class ArbOpportunity(BaseModel):
+    sport: str
+    match_id: str
+    home_team: Optional[str] = None
+    away_team: Optional[str] = None
+    commence_time: Optional[datetime] = None
+    market: str
+    implied_total: float  # Sum of 1 / best price, < 1 for an arb
+    margin: float  # Guaranteed return on the total stake: 1 / implied_total - 1
+    total_stake: float
+    payout: float
+    legs: List[ArbLeg]
+
+# Spreads/totals middle: both legs win when the result lands between the lines
+class LineMiddle(BaseModel):
+    match_id: str
+    home_team: str
+    away_team: str
+    commence_time: datetime
+    market: str
+    legs: List[ArbLeg]  # Over / home side first
+    width: float
+    middle_values: List[int]  # Totals (or home margins) on which both legs win
+    miss_return: float  # Return on the total stake when only one leg wins
+    hit_return: float  # Return when both win
+
+# Outrights / futures (league winner, top scorer): one market, many runners
+class OutrightEvent(BaseModel):
+    id: str
+    sport_key: str
+    sport_title: str
+    commence_time: datetime
+    bookmakers: List[Bookmaker] = []
+
+class OutrightBet(BaseModel):
+    event_id: str
+    sport_key: str
+    sport_title: str
+    commence_time: datetime
+    runner: str
+    bookmaker: str
+    odds: float  # Best price across books
+    true_probability: float  # De-vigged consensus
+    fair_odds: float
+    edge: float
+    books_quoted: int  # Books pricing this runner
+    runners: int  # Size of the market
+    recommended_stake_pct: Optional[float] = None
+    recommended_stake_amount: Optional[float] = None
+
 class BetRequest(BaseModel):
     match_id: str
     selection: str
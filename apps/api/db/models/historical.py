@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from db.session import Base
 from datetime import datetime
@@ -29,3 +29,8 @@ class HistoricalOdds(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     match = relationship("HistoricalMatch", back_populates="odds_history")
+
+    # One row per price point; the ingestion sink inserts ON CONFLICT DO NOTHING
+    __table_args__ = (
+        Index("uq_historical_odds_snapshot", "match_id", "bookmaker", "market_key", "outcome_name", "timestamp", unique=True),
+    )
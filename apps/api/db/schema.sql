@@ -30,9 +30,11 @@ CREATE TABLE IF NOT EXISTS matches (
     FOREIGN KEY (sport_key) REFERENCES sports(sport_key)
 );
 
-CREATE INDEX idx_matches_sport ON matches(sport_key);
-CREATE INDEX idx_matches_commence ON matches(commence_time);
-CREATE INDEX idx_matches_teams ON matches(home_team, away_team);
+CREATE INDEX IF NOT EXISTS idx_matches_sport ON matches(sport_key);
+CREATE INDEX IF NOT EXISTS idx_matches_commence ON matches(commence_time);
+CREATE INDEX IF NOT EXISTS idx_matches_teams ON matches(home_team, away_team);
+-- Upcoming matches of a sport at time T (services/market_state.py)
+CREATE INDEX IF NOT EXISTS idx_matches_sport_commence ON matches(sport_key, commence_time);
 
 -- Bookmakers
 CREATE TABLE IF NOT EXISTS bookmakers (
@@ -63,10 +65,19 @@ CREATE TABLE IF NOT EXISTS odds_snapshots (
     FOREIGN KEY (bookmaker_key) REFERENCES bookmakers(key)
 );
 
-CREATE INDEX idx_snapshots_match ON odds_snapshots(match_id);
-CREATE INDEX idx_snapshots_time ON odds_snapshots(snapshot_time);
-CREATE INDEX idx_snapshots_bookmaker ON odds_snapshots(bookmaker_key);
-CREATE INDEX idx_snapshots_market ON odds_snapshots(market_key);
+CREATE INDEX IF NOT EXISTS idx_snapshots_match ON odds_snapshots(match_id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_match_time ON odds_snapshots(match_id, snapshot_time);
+CREATE INDEX IF NOT EXISTS idx_snapshots_time ON odds_snapshots(snapshot_time);
+CREATE INDEX IF NOT EXISTS idx_snapshots_bookmaker ON odds_snapshots(bookmaker_key);
+CREATE INDEX IF NOT EXISTS idx_snapshots_market ON odds_snapshots(market_key);
+-- As-of lookups: latest quote per (bookmaker, outcome, line) at or before T,
+-- answered from the index alone (services/market_state.py)
+CREATE INDEX IF NOT EXISTS idx_snapshots_asof
+    ON odds_snapshots(match_id, market_key, bookmaker_key, outcome_name, point, snapshot_time, odds);
+-- One row per price point: writers INSERT OR IGNORE, so re-reading a cached
+-- response (or a restart clearing the ingestion dedupe window) adds nothing
+CREATE UNIQUE INDEX IF NOT EXISTS idx_snapshots_unique
+    ON odds_snapshots(match_id, bookmaker_key, market_key, outcome_name, COALESCE(point, 0), snapshot_time);
 
 -- Closing odds (final snapshot before game starts)
 CREATE TABLE IF NOT EXISTS closing_odds (
@@ -84,6 +95,26 @@ CREATE TABLE IF NOT EXISTS closing_odds (
     UNIQUE(match_id, bookmaker_key, market_key, outcome_name)
 );
 
+-- Downsampled history: one OHLC bar per (match, bookmaker, outcome, line)
+-- Raw snapshots older than the retention window are rolled up into this
+-- table (and archived to Parquet) by services/retention.py
+CREATE TABLE IF NOT EXISTS odds_bars (
+    match_id TEXT NOT NULL,
+    bookmaker_key TEXT NOT NULL,
+    market_key TEXT NOT NULL,
+    outcome_name TEXT NOT NULL,
+    point REAL NOT NULL DEFAULT 0,  -- 0 when the market has no line (h2h)
+    open_odds REAL NOT NULL,
+    high_odds REAL NOT NULL,
+    low_odds REAL NOT NULL,
+    close_odds REAL NOT NULL,
+    changes INTEGER NOT NULL,  -- Number of price moves
+    samples INTEGER NOT NULL,  -- Raw snapshots rolled up
+    first_time TIMESTAMP NOT NULL,
+    last_time TIMESTAMP NOT NULL,
+    PRIMARY KEY (match_id, bookmaker_key, market_key, outcome_name, point)
+) WITHOUT ROWID;
+
 -- ============================================
 -- VALUE BETS TRACKING
 -- ============================================
@@ -105,13 +136,17 @@ CREATE TABLE IF NOT EXISTS recommended_bets (
     clv REAL,  -- Closing Line Value, filled after match
     result TEXT,  -- 'win', 'loss', 'push', filled after match
     profit_loss REAL,  -- Actual P&L if user bet
+    analysis_version TEXT NOT NULL DEFAULT '0',  -- settings.ANALYSIS_VERSION that produced it
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (match_id) REFERENCES matches(id),
     FOREIGN KEY (bookmaker_key) REFERENCES bookmakers(key)
 );
 
-CREATE INDEX idx_recommended_match ON recommended_bets(match_id);
-CREATE INDEX idx_recommended_time ON recommended_bets(recommendation_time);
+CREATE INDEX IF NOT EXISTS idx_recommended_match ON recommended_bets(match_id);
+CREATE INDEX IF NOT EXISTS idx_recommended_time ON recommended_bets(recommendation_time);
+-- Repeated polls of the same recommendation keep the first row
+CREATE UNIQUE INDEX IF NOT EXISTS idx_recommended_unique
+    ON recommended_bets(match_id, bookmaker_key, market_key, outcome_name, analysis_version);
 
 -- ============================================
 -- BOOKMAKER PERFORMANCE TRACKING
@@ -176,7 +211,84 @@ CREATE TABLE IF NOT EXISTS collection_runs (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_collection_runs_time ON collection_runs(start_time);
+CREATE INDEX IF NOT EXISTS idx_collection_runs_time ON collection_runs(start_time);
+
+-- Historical backfill checkpoints (one row per fetched snapshot)
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+    sport_key TEXT NOT NULL,
+    snapshot_time TEXT NOT NULL,  -- Requested API date, 'YYYY-MM-DDTHH:MM:SSZ'
+    events INTEGER DEFAULT 0,
+    odds_collected INTEGER DEFAULT 0,
+    api_credits_used INTEGER DEFAULT 0,
+    run_id INTEGER,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sport_key, snapshot_time),
+    FOREIGN KEY (run_id) REFERENCES collection_runs(id)
+);
+
+-- Incremental job positions (e.g. 'results': last completed commence_time)
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    job TEXT NOT NULL,
+    sport_key TEXT NOT NULL,
+    watermark TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job, sport_key)
+);
+
+-- ============================================
+-- TRIGGERS
+-- ============================================
+
+-- Keep historical_matchups in step with results: each match is counted once,
+-- when it becomes completed. Teams are stored in sorted order (team1 < team2)
+-- so a fixture and its reverse share one row. Full rebuild: services/matchups.py
+CREATE TRIGGER IF NOT EXISTS trg_matchups_on_complete
+AFTER UPDATE OF completed ON matches
+WHEN NEW.completed AND NOT COALESCE(OLD.completed, FALSE) AND NEW.winner IS NOT NULL
+BEGIN
+    INSERT INTO historical_matchups
+        (sport_key, team1, team2, team1_wins, team2_wins, draws, total_games, last_updated)
+    VALUES (
+        NEW.sport_key,
+        MIN(NEW.home_team, NEW.away_team),
+        MAX(NEW.home_team, NEW.away_team),
+        CASE WHEN (NEW.winner = 'home') = (NEW.home_team < NEW.away_team) AND NEW.winner != 'draw' THEN 1 ELSE 0 END,
+        CASE WHEN (NEW.winner = 'home') != (NEW.home_team < NEW.away_team) AND NEW.winner != 'draw' THEN 1 ELSE 0 END,
+        CASE WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END,
+        1,
+        CURRENT_TIMESTAMP
+    )
+    ON CONFLICT(sport_key, team1, team2) DO UPDATE SET
+        team1_wins = team1_wins + excluded.team1_wins,
+        team2_wins = team2_wins + excluded.team2_wins,
+        draws = draws + excluded.draws,
+        total_games = total_games + 1,
+        last_updated = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_matchups_on_insert_completed
+AFTER INSERT ON matches
+WHEN NEW.completed AND NEW.winner IS NOT NULL
+BEGIN
+    INSERT INTO historical_matchups
+        (sport_key, team1, team2, team1_wins, team2_wins, draws, total_games, last_updated)
+    VALUES (
+        NEW.sport_key,
+        MIN(NEW.home_team, NEW.away_team),
+        MAX(NEW.home_team, NEW.away_team),
+        CASE WHEN (NEW.winner = 'home') = (NEW.home_team < NEW.away_team) AND NEW.winner != 'draw' THEN 1 ELSE 0 END,
+        CASE WHEN (NEW.winner = 'home') != (NEW.home_team < NEW.away_team) AND NEW.winner != 'draw' THEN 1 ELSE 0 END,
+        CASE WHEN NEW.winner = 'draw' THEN 1 ELSE 0 END,
+        1,
+        CURRENT_TIMESTAMP
+    )
+    ON CONFLICT(sport_key, team1, team2) DO UPDATE SET
+        team1_wins = team1_wins + excluded.team1_wins,
+        team2_wins = team2_wins + excluded.team2_wins,
+        draws = draws + excluded.draws,
+        total_games = total_games + 1,
+        last_updated = CURRENT_TIMESTAMP;
+END;
 
 -- ============================================
 -- VIEWS FOR COMMON QUERIES
@@ -228,6 +340,14 @@ INSERT OR IGNORE INTO sports (sport_key, sport_title, active) VALUES
 ('americanfootball_nfl', 'NFL', TRUE),
 ('icehockey_nhl', 'NHL', TRUE);
 
+-- Outright (futures) markets, priced by services/outrights.py; the full list
+-- is refreshed from /sports by OutrightsEngine.sync_sports
+INSERT OR IGNORE INTO sports (sport_key, sport_title, has_outrights, active) VALUES
+('americanfootball_nfl_super_bowl_winner', 'NFL Super Bowl Winner', TRUE, TRUE),
+('basketball_nba_championship_winner', 'NBA Championship Winner', TRUE, TRUE),
+('icehockey_nhl_championship_winner', 'NHL Championship Winner', TRUE, TRUE),
+('baseball_mlb_world_series_winner', 'MLB World Series Winner', TRUE, TRUE);
+
 -- Insert major bookmakers
 INSERT OR IGNORE INTO bookmakers (key, title, region, reliability_score) VALUES
 -- US Books
@@ -0,0 +1,82 @@
+"""
+Historical warehouse (historical.db) helpers
+
+schema.sql is idempotent, so applying it on every open both bootstraps a new
+database and adds tables introduced after an existing one was created.
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from core.config import settings
+
+SCHEMA_PATH = Path(__file__).parent / "schema.sql"
+
+# Columns added to tables after release; CREATE TABLE IF NOT EXISTS does not
+# add them to existing databases, so they are ALTERed in before schema.sql runs
+COLUMN_MIGRATIONS = [
+    ("recommended_bets", "analysis_version", "TEXT NOT NULL DEFAULT '0'"),
+]
+
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """Open historical.db, creating its directory if needed"""
+    path = Path(db_path or settings.HISTORICAL_DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return sqlite3.connect(str(path))
+
+
+def ensure_schema(db_path: Optional[str] = None) -> None:
+    """Create any missing tables, indexes and views"""
+    conn = connect(db_path)
+    try:
+        _migrate_columns(conn)
+        _dedupe_snapshots(conn)
+        conn.executescript(SCHEMA_PATH.read_text())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _migrate_columns(conn: sqlite3.Connection) -> None:
+    for table, column, decl in COLUMN_MIGRATIONS:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if columns and column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _dedupe_snapshots(conn: sqlite3.Connection) -> None:
+    """Drop duplicate snapshot rows once, so idx_snapshots_unique can be built on old databases"""
+    tables = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name IN ('odds_snapshots', 'idx_snapshots_unique')"
+    )}
+    if tables == {"odds_snapshots"}:
+        conn.execute("""
+            DELETE FROM odds_snapshots
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM odds_snapshots
+                GROUP BY match_id, bookmaker_key, market_key, outcome_name, COALESCE(point, 0), snapshot_time
+            )
+        """)
+
+
+def get_watermark(conn: sqlite3.Connection, job: str, sport_key: str) -> Optional[datetime]:
+    """Last position a sync job reached for a sport (None if never run)"""
+    row = conn.execute(
+        "SELECT watermark FROM sync_watermarks WHERE job = ? AND sport_key = ?",
+        (job, sport_key)
+    ).fetchone()
+    return datetime.fromisoformat(row[0]) if row else None
+
+
+def set_watermark(conn: sqlite3.Connection, job: str, sport_key: str, value: datetime) -> None:
+    """Advance a sync job's watermark (never moves it backwards)"""
+    conn.execute("""
+        INSERT INTO sync_watermarks (job, sport_key, watermark, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(job, sport_key) DO UPDATE SET
+            watermark = MAX(watermark, excluded.watermark),
+            updated_at = CURRENT_TIMESTAMP
+    """, (job, sport_key, value))
@@ -37,6 +37,28 @@ async def startup_event():
         print(f"⚠️ Database initialization error: {e}")
         print("Continuing anyway - will use mock data")
 
+    # Write-behind queue for live odds snapshots
+    try:
+        from services.ingestion import get_ingestion_queue
+        await get_ingestion_queue().start()
+    except Exception as e:
+        print(f"⚠️ Snapshot ingestion disabled: {e}")
+
+    # Write-behind log of every recommendation (CLV / model evaluation)
+    try:
+        from services.recommendations import get_recommendation_queue
+        await get_recommendation_queue().start()
+    except Exception as e:
+        print(f"⚠️ Recommendation logging disabled: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued odds snapshots and recommendations before exiting"""
+    from services.ingestion import get_ingestion_queue
+    from services.recommendations import get_recommendation_queue
+    await get_ingestion_queue().stop()
+    await get_recommendation_queue().stop()
+
 @app.get("/")
 async def root():
     return {"message": "Value Betting Radar API is running"}
@@ -50,11 +72,12 @@ async def health_check():
         "project": settings.PROJECT_NAME
     }
 
-from routers import odds, bets, auth, advanced
+from routers import odds, bets, auth, advanced, admin
 app.include_router(odds.router, prefix="/api/v1/odds", tags=["odds"])
 app.include_router(bets.router, prefix="/api/v1/bets", tags=["bets"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(advanced.router, prefix="/api/v1/advanced", tags=["advanced"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,47 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from core.config import settings
+from core.schemas import MarketSnapshot
+from services.market_state import MarketStateEngine
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Admin routes need X-Admin-Key = settings.ADMIN_API_KEY (disabled when unset)"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if x_admin_key != settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+market_state = MarketStateEngine()
+
+@router.get("/market-state/match/{match_id}", response_model=MarketSnapshot)
+async def get_match_state(
+    match_id: str,
+    as_of: Optional[datetime] = None,
+    market: str = "h2h"
+):
+    """
+    Every bookmaker's latest quote per outcome for a match at `as_of`
+    (ISO timestamp, default now).
+    """
+    state = await asyncio.to_thread(market_state.match_state, match_id, as_of, market)
+    if state is None:
+        raise HTTPException(status_code=404, detail="No odds snapshots for this match")
+    return state.to_schema()
+
+@router.get("/market-state/sport/{sport_key}", response_model=List[MarketSnapshot])
+async def get_sport_state(
+    sport_key: str,
+    as_of: Optional[datetime] = None,
+    market: str = "h2h"
+):
+    """
+    Price matrices for every match of a sport that had not started at `as_of`.
+    """
+    states = await asyncio.to_thread(market_state.sport_state, sport_key, as_of, market)
+    return [state.to_schema() for state in states]
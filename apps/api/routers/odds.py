@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends
-from typing import List
-from core.schemas import ValueBet
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import List, Optional
+from core.schemas import ArbOpportunity, LineMiddle, OddsHistory, OutrightBet, ValueBet
+from services.arbitrage import SOURCES, ArbScanner
+from services.line_history import LineHistoryService
 from services.odds_service import OddsService
 
 router = APIRouter()
 odds_service = OddsService()
+history_service = LineHistoryService()
+arb_scanner = ArbScanner()
 
 @router.get("/live", response_model=List[ValueBet])
 async def get_live_value_bets(
@@ -16,6 +21,43 @@ async def get_live_value_bets(
     """
     return await odds_service.get_value_bets(sport=sport, region=region)
 
+@router.get("/lines", response_model=List[ValueBet])
+async def get_line_value_bets(
+    sport: str = "basketball_nba",
+    region: str = "us",
+    markets: str = "spreads,totals"
+):
+    """
+    Get spreads/totals value bets (consensus per line, interpolated across
+    alternate lines).
+    """
+    analysis = await odds_service.get_line_markets(sport=sport, region=region, markets=markets)
+    return analysis.value_bets
+
+@router.get("/middles", response_model=List[LineMiddle])
+async def get_middles(
+    sport: str = "basketball_nba",
+    region: str = "us",
+    markets: str = "spreads,totals"
+):
+    """
+    Get spreads/totals middles: lines at two books that both win when the
+    result lands between them.
+    """
+    analysis = await odds_service.get_line_markets(sport=sport, region=region, markets=markets)
+    return analysis.middles
+
+@router.get("/outrights", response_model=List[OutrightBet])
+async def get_outrights(
+    sport: Optional[str] = None,
+    region: str = "uk"
+):
+    """
+    Get outright (futures) value bets. Without a sport, every active
+    has_outrights sport is scanned.
+    """
+    return await odds_service.get_outrights(sport=sport, region=region)
+
 @router.get("/props")
 async def get_player_props(
     sport: str = "soccer_epl",
@@ -43,3 +85,50 @@ async def get_correct_scores(
     except Exception as e:
         print(f"Error fetching correct scores: {e}")
         return []
+
+@router.get("/arbs", response_model=List[ArbOpportunity])
+async def get_arbitrage(
+    sport: Optional[List[str]] = Query(None),
+    region: str = "uk,eu,us",
+    markets: str = "h2h",
+    source: str = "live",
+    stake: float = Query(100.0, gt=0),
+    min_margin: float = 0.0
+):
+    """
+    Cross-bookmaker arbitrage across all configured sports (or the given
+    `sport` keys), with the stake split that pays out equally.
+    """
+    if source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of {SOURCES}")
+    return await arb_scanner.scan(
+        sports=sport, region=region, markets=markets, source=source,
+        total_stake=stake, min_margin=min_margin
+    )
+
+@router.get("/history/{match_id}", response_model=OddsHistory)
+async def get_odds_history(
+    match_id: str,
+    request: Request,
+    response: Response,
+    market: str = "h2h",
+    points: int = Query(200, ge=3, le=5000),
+    bookmaker: Optional[str] = None
+):
+    """
+    Get per-bookmaker, per-outcome price history for a match,
+    downsampled to at most `points` points per series.
+    """
+    etag = await asyncio.to_thread(history_service.fingerprint, match_id, market, points, bookmaker)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="No odds history for this match")
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    history = await asyncio.to_thread(
+        history_service.get_history, match_id, market, points, bookmaker, etag
+    )
+    response.headers.update(headers)
+    return history
@@ -4,6 +4,9 @@ Automated Scheduler for Historical Data Collection
 Runs:
 - Daily snapshot at 2:00 AM (all sports, H2H market)
 - Closing odds collection every 30 minutes
+- Snapshot retention (OHLC roll-up) at 3:00 AM
+- Results sync (scores, matchup priors, CLV settlement) every hour
+- Bookmaker calibration (consensus precision table) at 4:00 AM
 
 Usage:
     python scheduler.py
@@ -16,6 +19,10 @@ import time
 import asyncio
 from datetime import datetime, timezone
 from collect_historical import HistoricalDataCollector
+from services.retention import SnapshotRetentionJob
+from services.results_sync import ResultsSync
+from services.calibration import BookmakerCalibrationJob
+from services.clv import CLVEngine
 
 
 def run_daily_collection():
@@ -41,9 +48,50 @@ def run_closing_odds():
         print(f"Error in closing odds collection: {e}")
 
 
+def run_retention():
+    """Roll snapshots of old matches into OHLC bars"""
+    print(f"[{datetime.now(timezone.utc)}] Running snapshot retention...")
+    try:
+        result = SnapshotRetentionJob().run()
+        print(f"Retention completed: {result}")
+    except Exception as e:
+        print(f"Error in snapshot retention: {e}")
+
+
+def run_results_sync():
+    """Mark finished matches completed with scores and winner"""
+    print(f"[{datetime.now(timezone.utc)}] Syncing results...")
+    try:
+        # New results settle recommendations and refresh the CLV lookup
+        sync = ResultsSync(on_completed=[lambda match_ids: CLVEngine().run()])
+        result = asyncio.run(sync.run([
+            'soccer_epl',
+            'soccer_uefa_champions_league',
+            'basketball_nba',
+            'americanfootball_nfl'
+        ]))
+        if result.completed > 0:
+            print(f"Results synced for {result.completed} matches")
+    except Exception as e:
+        print(f"Error in results sync: {e}")
+
+
+def run_calibration():
+    """Re-measure bookmaker accuracy and publish the precision table"""
+    print(f"[{datetime.now(timezone.utc)}] Calibrating bookmakers...")
+    try:
+        rows = BookmakerCalibrationJob().run()
+        print(f"Calibration completed: {len(rows)} bookmaker/sport/market rows")
+    except Exception as e:
+        print(f"Error in bookmaker calibration: {e}")
+
+
 # Schedule jobs
 schedule.every().day.at("02:00").do(run_daily_collection)  # 2 AM daily
 schedule.every(30).minutes.do(run_closing_odds)  # Every 30 minutes
+schedule.every().day.at("03:00").do(run_retention)  # After the daily snapshot
+schedule.every().hour.do(run_results_sync)  # Skips sports with nothing pending
+schedule.every().day.at("04:00").do(run_calibration)  # Consensus hot-reloads the table
 
 print("=" * 60)
 print("Historical Data Collection Scheduler")
@@ -51,6 +99,9 @@ print("=" * 60)
 print("\nScheduled jobs:")
 print("  - Daily snapshot: 2:00 AM UTC")
 print("  - Closing odds: Every 30 minutes")
+print("  - Snapshot retention: 3:00 AM UTC")
+print("  - Results sync: Every hour")
+print("  - Bookmaker calibration: 4:00 AM UTC")
 print("\nScheduler is running. Press Ctrl+C to stop.")
 print("=" * 60)
 
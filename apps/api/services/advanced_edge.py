@@ -81,8 +81,14 @@ class AdvancedEdgeCalculator:
     - Liquidity risk (will the bet get filled?)
     - Execution risk (will bookmaker honor it?)
     - Alpha decay (edge disappears as sharp money moves in)
+    
+    Penalty weights are tunable with services/sweep.py.
     """
     
+    def __init__(self, uncertainty_weight: float = 1.0, liquidity_weight: float = 0.01):
+        self.uncertainty_weight = uncertainty_weight  # Edge given up per unit of posterior std error
+        self.liquidity_weight = liquidity_weight  # Edge given up in a fully illiquid market
+    
     def calculate_comprehensive_edge(
         self,
         bet_odds: float,
@@ -110,14 +116,14 @@ class AdvancedEdgeCalculator:
         # 2. Uncertainty penalty
         # Higher variance = less confident = require higher edge
         # PHASE 2: Standard penalties for robust model (7,000+ matches)
-        uncertainty_penalty = 1.0 * true_prob.std_error
+        uncertainty_penalty = self.uncertainty_weight * true_prob.std_error
         
         # 3. Market liquidity factor
         liquidity_factor = self._calculate_liquidity_factor(market_data)
         
         # Illiquid markets penalize edge
         # PHASE 2: Standard 1% penalty for mature model
-        liquidity_penalty = (1 - liquidity_factor) * 0.01
+        liquidity_penalty = (1 - liquidity_factor) * self.liquidity_weight
         
         # 4. Bookmaker fill probability
         # Unreliable bookmakers may not honor large bets
@@ -0,0 +1,489 @@
+"""
+Analytics Engine (Embedded DuckDB)
+
+Runs heavy read-only workloads off the OLTP path:
+1. Per-bookmaker calibration (closing odds vs results)
+2. Overround trends over time
+3. CLV aggregation over recommended bets
+
+DuckDB attaches historical.db read-only (sqlite scanner) and unions in any
+Parquet partitions from the archive, so queries run multi-threaded and
+vectorized without an external service. sqlite3 stays the write path.
+
+The sqlite scanner is never downloaded at runtime: it ships as the pinned
+duckdb-extension-sqlite-scanner package (requirements.txt). When it cannot be
+loaded, AnalyticsEngine raises AnalyticsUnavailable and callers fall back to
+sqlite3 (sqlite_calibration) or skip the DuckDB-only step.
+"""
+
+import importlib.util
+import math
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import sys
+
+import duckdb
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+
+
+class AnalyticsUnavailable(RuntimeError):
+    """DuckDB's sqlite scanner extension is not installed"""
+
+
+@dataclass
+class BookmakerCalibration:
+    """Calibration of one bookmaker's closing prices against results"""
+    bookmaker_key: str
+    sport_key: str
+    market_key: str
+    total_bets: int  # Number of (match, outcome) pairs priced
+    avg_implied_prob: float  # Mean de-vigged closing probability
+    avg_actual_prob: float  # Mean observed outcome (win rate)
+    calibration_error: float  # |implied - actual|
+    brier_score: float
+    log_loss: float
+    avg_overround: float
+
+
+@dataclass
+class OverroundPoint:
+    """Average bookmaker margin for one time bucket"""
+    sport_key: str
+    bookmaker_key: str
+    bucket: datetime
+    avg_overround: float
+    markets: int  # Priced markets in the bucket
+
+
+@dataclass
+class CLVAggregate:
+    """Closing line value of recommendations for one bookmaker/sport/market"""
+    bookmaker_key: str
+    sport_key: str
+    market_key: str
+    total_bets: int
+    avg_clv: float
+    positive_clv_rate: float
+    win_rate: Optional[float]  # None until results are settled
+    total_profit: float
+
+
+# Archived snapshots are written as
+# <archive>/odds_snapshots/sport_key=<sport>/month=<YYYY-MM>/*.parquet
+SNAPSHOT_COLUMNS = (
+    "match_id, bookmaker_key, market_key, outcome_name, "
+    "odds, point, snapshot_time, time_to_event_hours"
+)
+
+# De-vigged closing probability per outcome, joined to the result and
+# bucketed into probability deciles so calibration error is the binned
+# |implied - actual| gap (ECE). Shared by DuckDB and the sqlite3 baseline.
+CALIBRATION_SQL = """
+    WITH priced AS (
+        SELECT
+            co.bookmaker_key,
+            m.sport_key,
+            co.market_key,
+            1.0 / co.closing_odds AS implied,
+            SUM(1.0 / co.closing_odds) OVER (
+                PARTITION BY co.match_id, co.bookmaker_key, co.market_key
+            ) AS book_sum,
+            CASE
+                WHEN co.outcome_name = m.home_team THEN 'home'
+                WHEN co.outcome_name = m.away_team THEN 'away'
+                ELSE 'draw'
+            END = m.winner AS won
+        FROM {closing} co
+        JOIN matches m ON m.id = co.match_id
+        WHERE m.completed AND m.winner IS NOT NULL
+        AND co.closing_odds > 1.0
+        {filters}
+    ),
+    scored AS (
+        SELECT
+            bookmaker_key, sport_key, market_key, book_sum,
+            implied / book_sum AS p,
+            {clip} AS p_clip,
+            CASE WHEN won THEN 1.0 ELSE 0.0 END AS y
+        FROM priced
+    ),
+    binned AS (
+        SELECT
+            bookmaker_key, sport_key, market_key,
+            {decile} AS bin,
+            COUNT(*) AS n,
+            SUM(p) AS sum_p,
+            SUM(y) AS sum_y,
+            SUM((p - y) * (p - y)) AS sum_brier,
+            -SUM(y * LN(p_clip) + (1.0 - y) * LN(1.0 - p_clip)) AS sum_log_loss,
+            SUM(book_sum) AS sum_book
+        FROM scored
+        GROUP BY bookmaker_key, sport_key, market_key, {decile}
+    )
+    SELECT
+        bookmaker_key,
+        sport_key,
+        market_key,
+        SUM(n) AS total_bets,
+        SUM(sum_p) / SUM(n) AS avg_implied_prob,
+        SUM(sum_y) / SUM(n) AS avg_actual_prob,
+        SUM(ABS(sum_p - sum_y)) / SUM(n) AS calibration_error,
+        SUM(sum_brier) / SUM(n) AS brier_score,
+        SUM(sum_log_loss) / SUM(n) AS log_loss,
+        SUM(sum_book) / SUM(n) - 1.0 AS avg_overround
+    FROM binned
+    GROUP BY bookmaker_key, sport_key, market_key
+    ORDER BY sport_key, market_key, brier_score
+"""
+
+
+class AnalyticsEngine:
+    """
+    Embedded DuckDB over the historical warehouse
+
+    Usage:
+        engine = AnalyticsEngine()
+        for row in engine.bookmaker_calibration(sport='basketball_nba'):
+            print(row.bookmaker_key, row.brier_score)
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        archive_dir: Optional[str] = None,
+        threads: Optional[int] = None
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.archive_dir = Path(archive_dir or settings.PARQUET_ARCHIVE_DIR)
+        self.threads = threads or settings.ANALYTICS_THREADS or os.cpu_count() or 1
+
+        self.conn = duckdb.connect(":memory:")
+        self.conn.execute(f"SET threads = {int(self.threads)}")
+        self._attach_sources()
+        self._create_views()
+
+    def _attach_sources(self):
+        """Attach historical.db read-only through the sqlite scanner"""
+        self._load_sqlite_scanner()
+        # sqlite3 stores timestamps as ISO text; read everything as VARCHAR
+        # and cast once in the typed views below
+        self.conn.execute("SET GLOBAL sqlite_all_varchar = true")
+        # ATTACH takes no bound parameters; quote the path as a literal
+        path = self.db_path.replace("'", "''")
+        self.conn.execute(f"ATTACH '{path}' AS hist (TYPE sqlite, READ_ONLY)")
+
+    def _load_sqlite_scanner(self):
+        """LOAD the pinned extension package (or an already installed copy); never INSTALL"""
+        candidates = ["sqlite"]
+        spec = importlib.util.find_spec("duckdb_extension_sqlite_scanner")
+        if spec and spec.origin:
+            packaged = (
+                Path(spec.origin).parent / "extensions" / f"v{duckdb.__version__}" / "sqlite_scanner.duckdb_extension"
+            )
+            if packaged.exists():
+                candidates.insert(0, f"'{packaged}'")
+
+        self.conn.execute("SET autoinstall_known_extensions = false")
+        errors = []
+        for extension in candidates:
+            try:
+                self.conn.execute(f"LOAD {extension}")
+                return
+            except duckdb.Error as e:
+                errors.append(str(e).splitlines()[0])
+        self.conn.close()
+        raise AnalyticsUnavailable(
+            f"DuckDB sqlite scanner for v{duckdb.__version__} is not installed "
+            f"(pip install duckdb-extension-sqlite-scanner=={duckdb.__version__}): {errors[-1]}"
+        )
+
+    def _archive_glob(self) -> Optional[str]:
+        """Glob over archived snapshot partitions, if any exist"""
+        root = self.archive_dir / "odds_snapshots"
+        if not root.exists() or not any(root.rglob("*.parquet")):
+            return None
+        return str(root / "**" / "*.parquet")
+
+    def _create_views(self):
+        """Typed views over the attached tables (and the Parquet archive)"""
+        self.conn.execute("""
+            CREATE OR REPLACE VIEW matches AS
+            SELECT
+                id,
+                sport_key,
+                TRY_CAST(commence_time AS TIMESTAMP) AS commence_time,
+                home_team,
+                away_team,
+                COALESCE(TRY_CAST(completed AS BOOLEAN), FALSE) AS completed,
+                TRY_CAST(home_score AS INTEGER) AS home_score,
+                TRY_CAST(away_score AS INTEGER) AS away_score,
+                winner
+            FROM hist.matches
+        """)
+
+        live_snapshots = """
+            SELECT
+                match_id,
+                bookmaker_key,
+                market_key,
+                outcome_name,
+                TRY_CAST(odds AS DOUBLE) AS odds,
+                TRY_CAST(point AS DOUBLE) AS point,
+                TRY_CAST(snapshot_time AS TIMESTAMP) AS snapshot_time,
+                TRY_CAST(time_to_event_hours AS DOUBLE) AS time_to_event_hours
+            FROM hist.odds_snapshots
+        """
+        archive = self._archive_glob()
+        if archive:
+            self.conn.execute(f"""
+                CREATE OR REPLACE VIEW snapshots AS
+                {live_snapshots}
+                UNION ALL
+                SELECT {SNAPSHOT_COLUMNS}
+                FROM read_parquet('{archive}', hive_partitioning = true, union_by_name = true)
+            """)
+        else:
+            self.conn.execute(f"CREATE OR REPLACE VIEW snapshots AS {live_snapshots}")
+
+        self.conn.execute("""
+            CREATE OR REPLACE VIEW closing AS
+            SELECT
+                match_id,
+                bookmaker_key,
+                market_key,
+                outcome_name,
+                TRY_CAST(closing_odds AS DOUBLE) AS closing_odds,
+                TRY_CAST(point AS DOUBLE) AS point,
+                TRY_CAST(snapshot_time AS TIMESTAMP) AS snapshot_time
+            FROM hist.closing_odds
+        """)
+
+        self.conn.execute("""
+            CREATE OR REPLACE VIEW recommendations AS
+            SELECT
+                match_id,
+                bookmaker_key,
+                market_key,
+                outcome_name,
+                TRY_CAST(recommended_odds AS DOUBLE) AS recommended_odds,
+                TRY_CAST(true_probability AS DOUBLE) AS true_probability,
+                TRY_CAST(edge AS DOUBLE) AS edge,
+                TRY_CAST(recommendation_time AS TIMESTAMP) AS recommendation_time,
+                TRY_CAST(closing_odds AS DOUBLE) AS closing_odds,
+                TRY_CAST(clv AS DOUBLE) AS clv,
+                result,
+                TRY_CAST(profit_loss AS DOUBLE) AS profit_loss
+            FROM hist.recommended_bets
+        """)
+
+    def bookmaker_calibration(
+        self,
+        sport: Optional[str] = None,
+        market: Optional[str] = "h2h",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[BookmakerCalibration]:
+        """
+        Brier score, log-loss and calibration error per bookmaker
+
+        Closing prices are de-vigged multiplicatively within each
+        (match, bookmaker, market) before scoring.
+        """
+        filters, params = self._match_filters(sport, market, start, end)
+        sql = CALIBRATION_SQL.format(
+            closing="closing",
+            filters=filters,
+            clip="LEAST(GREATEST(implied / book_sum, 1e-6), 1.0 - 1e-6)",
+            decile="CAST(FLOOR(p * 10) AS INTEGER)"
+        )
+
+        rows = self.conn.execute(sql, params).fetchall()
+        return [BookmakerCalibration(*row) for row in rows]
+
+    def overround_trend(
+        self,
+        sport: Optional[str] = None,
+        bookmaker: Optional[str] = None,
+        market: str = "h2h",
+        bucket: str = "day"
+    ) -> List[OverroundPoint]:
+        """Average margin per (sport, bookmaker, time bucket) from snapshots"""
+        if bucket not in ("hour", "day", "week", "month"):
+            raise ValueError(f"Unsupported bucket: {bucket}")
+
+        filters = ["s.market_key = ?"]
+        params: list = [market]
+        if sport:
+            filters.append("m.sport_key = ?")
+            params.append(sport)
+        if bookmaker:
+            filters.append("s.bookmaker_key = ?")
+            params.append(bookmaker)
+
+        rows = self.conn.execute(f"""
+            WITH books AS (
+                SELECT
+                    m.sport_key,
+                    s.bookmaker_key,
+                    s.snapshot_time,
+                    SUM(1.0 / s.odds) - 1.0 AS overround
+                FROM snapshots s
+                JOIN matches m ON m.id = s.match_id
+                WHERE s.odds > 1.0 AND {' AND '.join(filters)}
+                GROUP BY m.sport_key, s.bookmaker_key, s.match_id, s.snapshot_time
+            )
+            SELECT
+                sport_key,
+                bookmaker_key,
+                date_trunc('{bucket}', snapshot_time) AS bucket,
+                AVG(overround) AS avg_overround,
+                COUNT(*) AS markets
+            FROM books
+            GROUP BY ALL
+            ORDER BY sport_key, bookmaker_key, bucket
+        """, params).fetchall()
+        return [OverroundPoint(*row) for row in rows]
+
+    def clv_summary(
+        self,
+        sport: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> List[CLVAggregate]:
+        """CLV, win rate and P&L of settled recommendations"""
+        filters = ["r.clv IS NOT NULL"]
+        params: list = []
+        if sport:
+            filters.append("m.sport_key = ?")
+            params.append(sport)
+        if since:
+            filters.append("r.recommendation_time >= ?")
+            params.append(since)
+
+        rows = self.conn.execute(f"""
+            SELECT
+                r.bookmaker_key,
+                m.sport_key,
+                r.market_key,
+                COUNT(*) AS total_bets,
+                AVG(r.clv) AS avg_clv,
+                AVG(CASE WHEN r.clv > 0 THEN 1.0 ELSE 0.0 END) AS positive_clv_rate,
+                AVG(CASE r.result WHEN 'win' THEN 1.0 WHEN 'loss' THEN 0.0 END) AS win_rate,
+                COALESCE(SUM(r.profit_loss), 0.0) AS total_profit
+            FROM recommendations r
+            JOIN matches m ON m.id = r.match_id
+            WHERE {' AND '.join(filters)}
+            GROUP BY ALL
+            ORDER BY sport_key, avg_clv DESC
+        """, params).fetchall()
+        return [CLVAggregate(*row) for row in rows]
+
+    @staticmethod
+    def _match_filters(
+        sport: Optional[str],
+        market: Optional[str],
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ):
+        """Build the optional WHERE fragment shared by result-joined queries"""
+        clauses = []
+        params: list = []
+        if sport:
+            clauses.append("AND m.sport_key = ?")
+            params.append(sport)
+        if market:
+            clauses.append("AND co.market_key = ?")
+            params.append(market)
+        if start:
+            clauses.append("AND m.commence_time >= ?")
+            params.append(start)
+        if end:
+            clauses.append("AND m.commence_time < ?")
+            params.append(end)
+        return "\n        ".join(clauses), params
+
+    def close(self):
+        self.conn.close()
+
+
+# sqlite dialect of CALIBRATION_SQL (baseline, and fallback without DuckDB)
+SQLITE_CALIBRATION_FORMAT = {
+    "closing": "closing_odds",
+    "clip": "MIN(MAX(implied / book_sum, 1e-6), 1.0 - 1e-6)",
+    "decile": "CAST(p * 10 AS INTEGER)"  # sqlite truncates on cast
+}
+
+
+def sqlite_calibration(
+    conn: sqlite3.Connection,
+    sport: Optional[str] = None,
+    market: Optional[str] = "h2h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> List[BookmakerCalibration]:
+    """bookmaker_calibration computed by sqlite3 directly on historical.db"""
+    filters, params = AnalyticsEngine._match_filters(sport, market, start, end)
+    conn.create_function("LN", 1, math.log)  # Not every sqlite build ships math functions
+    rows = conn.execute(
+        CALIBRATION_SQL.format(filters=filters, **SQLITE_CALIBRATION_FORMAT), params
+    ).fetchall()
+    return [BookmakerCalibration(*row) for row in rows]
+
+
+def benchmark_calibration(db_path: Optional[str] = None, runs: int = 3) -> Dict[str, float]:
+    """
+    Time the calibration workload on sqlite3 vs DuckDB
+
+    Returns best-of-N wall time in seconds for each engine.
+    """
+    db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+
+    # sqlite3 baseline: same query, sqlite dialect and table names
+    conn = sqlite3.connect(db_path)
+    sqlite_times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        sqlite_calibration(conn, market="h2h")
+        sqlite_times.append(time.perf_counter() - t0)
+    conn.close()
+
+    engine = AnalyticsEngine(db_path=db_path)
+    duckdb_times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        engine.bookmaker_calibration(market="h2h")
+        duckdb_times.append(time.perf_counter() - t0)
+    engine.close()
+
+    return {
+        "sqlite3": min(sqlite_times),
+        "duckdb": min(duckdb_times),
+        "speedup": min(sqlite_times) / max(min(duckdb_times), 1e-9)
+    }
+
+
+# Example usage / benchmark
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Analytics Engine - Benchmark (calibration workload)")
+    print("=" * 60)
+
+    result = benchmark_calibration()
+    print(f"sqlite3: {result['sqlite3'] * 1000:.1f} ms")
+    print(f"DuckDB:  {result['duckdb'] * 1000:.1f} ms ({result['speedup']:.1f}x)")
+
+    engine = AnalyticsEngine()
+    for row in engine.bookmaker_calibration()[:10]:
+        print(
+            f"{row.sport_key:<28} {row.bookmaker_key:<14} n={row.total_bets:<5} "
+            f"brier={row.brier_score:.4f} logloss={row.log_loss:.4f} "
+            f"cal_err={row.calibration_error:.4f}"
+        )
@@ -0,0 +1,307 @@
+"""
+Cross-Bookmaker Arbitrage Scanner
+
+Finds surebets across the whole live slate in one refresh cycle:
+1. Every configured sport is fetched concurrently: the live odds client
+   (served from the Redis odds cache while it is warm) or the latest
+   snapshot per book in historical.db via the as-of engine
+2. Each (match, market, line) becomes a (bookmakers x outcomes) price
+   matrix; quotes older than ARB_MAX_QUOTE_AGE_MINUTES, and spreads/totals
+   quotes that carry no point, are dropped
+3. All matrices are padded into one (markets, bookmakers, outcomes) array,
+   so best price per outcome, implied total and margin for the entire
+   slate are a single argmax / sum pass
+4. Stakes are split in proportion to 1 / price, which pays the same amount
+   whichever outcome wins
+
+Usage:
+    scanner = ArbScanner()
+    arbs = await scanner.scan(total_stake=100)
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import ArbLeg, ArbOpportunity, Match
+from db.warehouse import connect
+from services.market_state import MarketState, MarketStateEngine
+from services.odds_api import TheOddsApiClient
+
+SOURCES = ("live", "history")
+LINE_MARKETS = ("spreads", "totals")  # Only quotes on the same point settle against each other
+
+MATCH_INFO_SQL = """
+    SELECT id, home_team, away_team, commence_time
+    FROM matches
+    WHERE id IN ({placeholders})
+"""
+
+
+@dataclass
+class MarketQuotes:
+    """Best-price input for one (match, market, line)"""
+    sport: str
+    match_id: str
+    market: str
+    bookmakers: List[str]
+    outcomes: List[Tuple[str, Optional[float]]]  # (name, point)
+    prices: np.ndarray  # (bookmakers, outcomes), NaN = no quote
+    home_team: Optional[str] = None
+    away_team: Optional[str] = None
+    commence_time: Optional[datetime] = None
+
+
+def _line_key(market: str, outcome: str, point: Optional[float], home_team: Optional[str]) -> Optional[float]:
+    """
+    Outcomes that settle against each other: totals share a point, spreads
+    pair home -x with away +x (keyed by the home side's line)
+    """
+    if point is None:
+        return None
+    if market == "spreads":
+        return point if outcome == home_team else -point
+    return point
+
+
+def _group(
+    sport: str,
+    match_id: str,
+    market: str,
+    quotes: Iterable[Tuple[str, str, Optional[float], float]],
+    home_team: Optional[str] = None,
+    away_team: Optional[str] = None,
+    commence_time: Optional[datetime] = None
+) -> List[MarketQuotes]:
+    """
+    (bookmaker, outcome, point, odds) quotes -> one MarketQuotes per line;
+    line-market quotes without a point are dropped rather than pooled into
+    one cross-line group
+    """
+    lines: Dict[Optional[float], List[Tuple]] = {}
+    for quote in quotes:
+        if market in LINE_MARKETS and quote[2] is None:
+            continue
+        lines.setdefault(_line_key(market, quote[1], quote[2], home_team), []).append(quote)
+
+    grouped = []
+    for line_quotes in lines.values():
+        bookmakers = sorted({q[0] for q in line_quotes})
+        outcomes = sorted({(q[1], q[2]) for q in line_quotes}, key=lambda o: (o[0], o[1] or 0.0))
+        prices = np.full((len(bookmakers), len(outcomes)), np.nan)
+        b_index = {b: i for i, b in enumerate(bookmakers)}
+        o_index = {o: j for j, o in enumerate(outcomes)}
+        for book, outcome, point, odds in line_quotes:
+            prices[b_index[book], o_index[(outcome, point)]] = odds
+        grouped.append(MarketQuotes(
+            sport, match_id, market, bookmakers, outcomes, prices, home_team, away_team, commence_time
+        ))
+    return grouped
+
+
+def markets_from_matches(matches: Sequence[Match], now: datetime, max_age: timedelta) -> List[MarketQuotes]:
+    """Price matrices from live Match objects, skipping stale bookmakers"""
+    markets = []
+    for match in matches:
+        if match.commence_time <= now:
+            continue
+        by_market: Dict[str, List[Tuple]] = {}
+        for bookmaker in match.bookmakers:
+            if now - bookmaker.last_update > max_age:
+                continue
+            for market in bookmaker.markets:
+                by_market.setdefault(market.key, []).extend(
+                    (bookmaker.key, o.name, o.point, o.price) for o in market.outcomes
+                )
+        for market_key, quotes in by_market.items():
+            markets += _group(
+                match.sport_key, match.id, market_key, quotes,
+                match.home_team, match.away_team, match.commence_time
+            )
+    return markets
+
+
+def markets_from_states(
+    sport: str,
+    states: Sequence[MarketState],
+    info: Dict[str, Tuple],
+    now: datetime,
+    max_age: timedelta
+) -> List[MarketQuotes]:
+    """Price matrices from as-of market states, skipping stale quotes"""
+    oldest = int((now - max_age).timestamp())
+    markets = []
+    for state in states:
+        fresh = (state.quoted_at >= oldest) & ~np.isnan(state.prices)
+        quotes = [
+            (state.bookmakers[i], state.outcomes[j][0], state.outcomes[j][1], float(state.prices[i, j]))
+            for i, j in zip(*np.nonzero(fresh))
+        ]
+        home, away, commence = info.get(state.match_id, (None, None, None))
+        markets += _group(sport, state.match_id, state.market, quotes, home, away, commence)
+    return markets
+
+
+def find_arbs(markets: Sequence[MarketQuotes], total_stake: float = 100.0, min_margin: float = 0.0) -> List[ArbOpportunity]:
+    """
+    Every market whose best prices across books imply less than 100%,
+    best margin first. One vectorized pass over the whole slate.
+    """
+    if not markets:
+        return []
+
+    n_books = max(len(m.bookmakers) for m in markets)
+    n_outcomes = np.array([len(m.outcomes) for m in markets])
+    cube = np.full((len(markets), max(n_books, 1), max(n_outcomes.max(), 1)), -np.inf)
+    for k, market in enumerate(markets):
+        b, o = market.prices.shape
+        cube[k, :b, :o] = np.where(np.isnan(market.prices), -np.inf, market.prices)
+
+    best_book = cube.argmax(axis=1)  # (markets, outcomes)
+    best = np.take_along_axis(cube, best_book[:, None, :], axis=1)[:, 0, :]
+    outcome_mask = np.arange(cube.shape[2])[None, :] < n_outcomes[:, None]
+    priced = outcome_mask & (best > 1.0)
+    complete = (n_outcomes >= 2) & np.all(priced | ~outcome_mask, axis=1)
+
+    inverse = np.divide(1.0, best, out=np.zeros_like(best), where=priced)
+    implied = inverse.sum(axis=1)
+    margin = np.full(len(markets), -np.inf)
+    np.divide(1.0, implied, out=margin, where=complete)
+    margin[complete] -= 1.0
+    shares = np.divide(inverse, implied[:, None], out=np.zeros_like(inverse), where=complete[:, None])
+
+    arbs = []
+    for k in np.nonzero(margin > min_margin)[0]:
+        market = markets[k]
+        legs = [
+            ArbLeg(
+                outcome=name,
+                point=point,
+                bookmaker=market.bookmakers[best_book[k, j]],
+                odds=float(best[k, j]),
+                stake_share=round(float(shares[k, j]), 6),
+                stake=round(total_stake * float(shares[k, j]), 2)
+            )
+            for j, (name, point) in enumerate(market.outcomes)
+        ]
+        arbs.append(ArbOpportunity(
+            sport=market.sport,
+            match_id=market.match_id,
+            home_team=market.home_team,
+            away_team=market.away_team,
+            commence_time=market.commence_time,
+            market=market.market,
+            implied_total=round(float(implied[k]), 6),
+            margin=round(float(margin[k]), 6),
+            total_stake=total_stake,
+            payout=round(total_stake / float(implied[k]), 2),
+            legs=legs
+        ))
+    arbs.sort(key=lambda a: a.margin, reverse=True)
+    return arbs
+
+
+class ArbScanner:
+    """
+    Surebet scan over every configured sport
+
+    Usage:
+        scanner = ArbScanner()
+        arbs = await scanner.scan(sports=["soccer_epl"], source="history")
+    """
+
+    def __init__(
+        self,
+        api_client: Optional[TheOddsApiClient] = None,
+        market_state: Optional[MarketStateEngine] = None,
+        max_quote_age_minutes: Optional[int] = None
+    ):
+        self.api_client = api_client or TheOddsApiClient()
+        self.market_state = market_state or MarketStateEngine()
+        self.max_age = timedelta(minutes=max_quote_age_minutes or settings.ARB_MAX_QUOTE_AGE_MINUTES)
+
+    async def scan(
+        self,
+        sports: Optional[List[str]] = None,
+        region: str = "uk,eu,us",
+        markets: str = "h2h",
+        source: str = "live",
+        total_stake: float = 100.0,
+        min_margin: float = 0.0
+    ) -> List[ArbOpportunity]:
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source '{source}' (expected one of {SOURCES})")
+        sports = sports or list(settings.ARB_SPORTS)
+        now = datetime.now(timezone.utc)
+
+        if source == "live":
+            slate = await self._live_markets(sports, region, markets, now)
+        else:
+            slate = await asyncio.to_thread(self._history_markets, sports, markets, now)
+
+        arbs = find_arbs(slate, total_stake, min_margin)
+        print(f"[ARB] {len(slate)} markets across {len(sports)} sports, {len(arbs)} arbs")
+        return arbs
+
+    async def _live_markets(self, sports: List[str], region: str, markets: str, now: datetime) -> List[MarketQuotes]:
+        results = await asyncio.gather(
+            *(self.api_client.get_odds(sport=sport, regions=region, markets=markets) for sport in sports),
+            return_exceptions=True
+        )
+        slate = []
+        for sport, result in zip(sports, results):
+            if isinstance(result, Exception):
+                print(f"[ARB] {sport}: {result}")
+                continue
+            slate += markets_from_matches(result, now, self.max_age)
+        return slate
+
+    def _history_markets(self, sports: List[str], markets: str, now: datetime) -> List[MarketQuotes]:
+        states = {
+            (sport, market): self.market_state.sport_state(sport, now, market)
+            for sport in sports for market in markets.split(",")
+        }
+        info = self._match_info({s.match_id for sport_states in states.values() for s in sport_states})
+        slate = []
+        for (sport, _), sport_states in states.items():
+            slate += markets_from_states(sport, sport_states, info, now, self.max_age)
+        return slate
+
+    def _match_info(self, match_ids: Iterable[str]) -> Dict[str, Tuple]:
+        match_ids = list(match_ids)
+        if not match_ids:
+            return {}
+        conn = connect(self.market_state.db_path)
+        try:
+            rows = conn.execute(
+                MATCH_INFO_SQL.format(placeholders=",".join("?" * len(match_ids))), match_ids
+            ).fetchall()
+        finally:
+            conn.close()
+        return {match_id: (home, away, commence) for match_id, home, away, commence in rows}
+
+
+if __name__ == "__main__":
+    # Manual execution
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scan the slate for cross-bookmaker arbitrage")
+    parser.add_argument("--sports", nargs="*", default=None)
+    parser.add_argument("--source", choices=SOURCES, default="live")
+    parser.add_argument("--region", default="uk,eu,us")
+    parser.add_argument("--stake", type=float, default=100.0)
+    args = parser.parse_args()
+
+    found = asyncio.run(ArbScanner().scan(args.sports, args.region, source=args.source, total_stake=args.stake))
+    for arb in found:
+        legs = ", ".join(f"{l.outcome} @ {l.odds} ({l.bookmaker}, {l.stake})" for l in arb.legs)
+        print(f"{arb.margin:+.2%} {arb.match_id} {arb.market}: {legs}")
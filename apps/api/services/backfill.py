@@ -0,0 +1,387 @@
+"""
+Historical Backfill Engine
+
+Unified, resumable importer for The Odds API historical endpoint:
+1. Token-bucket rate limiter shared by N concurrent workers
+2. Persistent checkpoint of completed (sport, snapshot) pairs
+3. Snapshots already in odds_snapshots are skipped before any request
+4. Stops cleanly when the credit quota runs low (rerun resumes)
+
+Each snapshot's odds and its checkpoint row are committed in one
+transaction, so a crash never leaves a half-imported snapshot behind.
+"""
+
+import asyncio
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import sys
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema
+
+HISTORICAL_ODDS_URL = "https://api.the-odds-api.com/v4/historical/sports/{sport}/odds"
+API_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter
+
+    Allows bursts up to `capacity` requests, refilling at `rate` tokens/sec.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+@dataclass
+class BackfillJob:
+    """One historical snapshot to fetch"""
+    sport: str
+    snapshot_time: datetime
+
+    @property
+    def date_str(self) -> str:
+        return self.snapshot_time.astimezone(timezone.utc).strftime(API_DATE_FORMAT)
+
+
+@dataclass
+class BackfillResult:
+    """Summary of a backfill run"""
+    scheduled: int = 0
+    skipped: int = 0
+    completed: int = 0
+    failed: int = 0
+    events: int = 0
+    odds: int = 0
+    credits: int = 0
+    quota_exhausted: bool = False
+    errors: List[str] = field(default_factory=list)
+
+
+class BackfillEngine:
+    """
+    Parallel, resumable, rate-limited historical backfill
+
+    Usage:
+        engine = BackfillEngine(workers=8, requests_per_second=5)
+        jobs = daily_schedule(['basketball_nba', 'soccer_epl'], days=90)
+        result = await engine.run(jobs)
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        workers: int = 4,
+        requests_per_second: float = 2.0,
+        regions: str = "us",
+        markets: str = "h2h",
+        min_remaining_credits: int = 50,
+        max_retries: int = 3,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.workers = workers
+        self.limiter = TokenBucket(rate=requests_per_second)
+        self.regions = regions
+        self.markets = markets
+        self.min_remaining_credits = min_remaining_credits
+        self.max_retries = max_retries
+        self.transport = transport  # Injectable for tests
+
+        # Historical endpoint: 10 credits per region per market
+        self.credits_per_call = 10 * len(regions.split(",")) * len(markets.split(","))
+
+        ensure_schema(self.db_path)
+
+    async def run(self, jobs: Iterable[BackfillJob]) -> BackfillResult:
+        """Fetch and store every job not already checkpointed"""
+        jobs = list(jobs)
+        result = BackfillResult(scheduled=len(jobs))
+
+        conn = connect(self.db_path)
+        try:
+            pending = self._filter_pending(conn, jobs)
+            result.skipped = len(jobs) - len(pending)
+            print(f"[BACKFILL] {len(jobs)} snapshots scheduled, {result.skipped} already present, "
+                  f"{len(pending)} to fetch with {self.workers} workers")
+
+            if not pending:
+                return result
+
+            run_id = self._start_run(conn)
+            queue: asyncio.Queue = asyncio.Queue()
+            for job in pending:
+                queue.put_nowait(job)
+
+            stop = asyncio.Event()
+            async with httpx.AsyncClient(timeout=30.0, transport=self.transport) as client:
+                workers = [
+                    asyncio.create_task(self._worker(client, conn, queue, stop, run_id, result))
+                    for _ in range(min(self.workers, len(pending)))
+                ]
+                await asyncio.gather(*workers)
+
+            self._finish_run(conn, run_id, result)
+        finally:
+            conn.close()
+
+        print(f"[BACKFILL] Done: {result.completed} fetched, {result.failed} failed, "
+              f"{result.odds} odds, {result.credits} credits"
+              + (" (stopped: quota low)" if result.quota_exhausted else ""))
+        return result
+
+    async def _worker(
+        self,
+        client: httpx.AsyncClient,
+        conn: sqlite3.Connection,
+        queue: asyncio.Queue,
+        stop: asyncio.Event,
+        run_id: int,
+        result: BackfillResult
+    ):
+        while not stop.is_set():
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                events, remaining = await self._fetch(client, job)
+                odds = self._store_snapshot(conn, job, events, run_id)
+                result.completed += 1
+                result.events += len(events)
+                result.odds += odds
+                result.credits += self.credits_per_call
+
+                if result.completed % 10 == 0:
+                    print(f"    Progress: {result.completed}/{result.scheduled - result.skipped} snapshots")
+
+                if remaining is not None and remaining < self.min_remaining_credits:
+                    result.quota_exhausted = True
+                    result.errors.append(f"Only {remaining:.0f} API credits left")
+                    stop.set()
+
+            except Exception as e:
+                result.failed += 1
+                result.errors.append(f"{job.sport} @ {job.date_str}: {e}")
+                print(f"    Error at {job.sport} {job.date_str}: {e}")
+
+    async def _fetch(
+        self,
+        client: httpx.AsyncClient,
+        job: BackfillJob
+    ) -> Tuple[List[Dict], Optional[float]]:
+        """
+        Fetch one historical snapshot, retrying on 429 / transient errors
+
+        Returns the events and the remaining credit quota (if reported).
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+
+            try:
+                response = await client.get(
+                    HISTORICAL_ODDS_URL.format(sport=job.sport),
+                    params={
+                        "apiKey": settings.THE_ODDS_API_KEY,
+                        "regions": self.regions,
+                        "markets": self.markets,
+                        "oddsFormat": "decimal",
+                        "date": job.date_str
+                    }
+                )
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                await asyncio.sleep(float(response.headers.get("retry-after", 2 ** attempt)))
+                continue
+
+            response.raise_for_status()
+
+            remaining = response.headers.get("x-requests-remaining")
+            data = response.json()
+            events = data if isinstance(data, list) else data.get("data", [])
+            return events, float(remaining) if remaining is not None else None
+
+        return [], None
+
+    def _filter_pending(self, conn: sqlite3.Connection, jobs: List[BackfillJob]) -> List[BackfillJob]:
+        """Drop jobs already checkpointed or already present in odds_snapshots"""
+        done: Set[Tuple[str, str]] = set(conn.execute(
+            "SELECT sport_key, snapshot_time FROM backfill_checkpoints"
+        ).fetchall())
+
+        # Snapshots imported before checkpoints existed
+        for sport in {job.sport for job in jobs}:
+            rows = conn.execute("""
+                SELECT DISTINCT os.snapshot_time
+                FROM odds_snapshots os
+                JOIN matches m ON m.id = os.match_id
+                WHERE m.sport_key = ?
+            """, (sport,)).fetchall()
+            for (snapshot_time,) in rows:
+                try:
+                    parsed = datetime.fromisoformat(str(snapshot_time).replace("Z", "+00:00"))
+                except ValueError:
+                    continue
+                if parsed.tzinfo is None:
+                    parsed = parsed.replace(tzinfo=timezone.utc)
+                done.add((sport, parsed.strftime(API_DATE_FORMAT)))
+
+        seen: Set[Tuple[str, str]] = set()
+        pending = []
+        for job in jobs:
+            key = (job.sport, job.date_str)
+            if key in done or key in seen:
+                continue
+            seen.add(key)
+            pending.append(job)
+        return pending
+
+    def _store_snapshot(
+        self,
+        conn: sqlite3.Connection,
+        job: BackfillJob,
+        events: List[Dict],
+        run_id: int
+    ) -> int:
+        """Store one snapshot and its checkpoint atomically"""
+        snapshot_time = job.snapshot_time.astimezone(timezone.utc)
+        match_rows = []
+        odds_rows = []
+
+        for event in events:
+            try:
+                commence_time = datetime.fromisoformat(event['commence_time'].replace('Z', '+00:00'))
+                match_rows.append((event['id'], job.sport, event['home_team'], event['away_team'], commence_time))
+                time_to_event = (commence_time - snapshot_time).total_seconds() / 3600
+
+                for bookmaker in event.get('bookmakers', []):
+                    for market in bookmaker.get('markets', []):
+                        for outcome in market.get('outcomes', []):
+                            odds_rows.append((
+                                event['id'],
+                                bookmaker['key'],
+                                market['key'],
+                                outcome['name'],
+                                outcome['price'],
+                                outcome.get('point'),
+                                snapshot_time,
+                                time_to_event
+                            ))
+            except (KeyError, ValueError) as e:
+                print(f"      Error parsing {event.get('id')}: {e}")
+                continue
+
+        with conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO matches (
+                    id, sport_key, home_team, away_team, commence_time
+                ) VALUES (?, ?, ?, ?, ?)
+            """, match_rows)
+            conn.executemany("""
+                INSERT OR IGNORE INTO odds_snapshots (
+                    match_id, bookmaker_key, market_key, outcome_name,
+                    odds, point, snapshot_time, time_to_event_hours
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, odds_rows)
+            conn.execute("""
+                INSERT OR REPLACE INTO backfill_checkpoints (
+                    sport_key, snapshot_time, events, odds_collected,
+                    api_credits_used, run_id
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (job.sport, job.date_str, len(match_rows), len(odds_rows),
+                  self.credits_per_call, run_id))
+
+        return len(odds_rows)
+
+    def _start_run(self, conn: sqlite3.Connection) -> int:
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO collection_runs (run_type, start_time, status)
+                VALUES ('backfill', ?, 'running')
+            """, (datetime.now(timezone.utc),))
+        return cursor.lastrowid
+
+    def _finish_run(self, conn: sqlite3.Connection, run_id: int, result: BackfillResult):
+        status = 'completed' if result.failed == 0 and not result.quota_exhausted else 'partial'
+        with conn:
+            conn.execute("""
+                UPDATE collection_runs
+                SET end_time = ?,
+                    status = ?,
+                    matches_processed = ?,
+                    odds_collected = ?,
+                    api_credits_used = ?,
+                    error_message = ?
+                WHERE id = ?
+            """, (
+                datetime.now(timezone.utc),
+                status,
+                result.events,
+                result.odds,
+                result.credits,
+                "; ".join(result.errors[:10]) or None,
+                run_id
+            ))
+
+
+def daily_schedule(
+    sports: List[str],
+    days: int = 90,
+    hours: Tuple[int, ...] = (12,),
+    now: Optional[datetime] = None
+) -> List[BackfillJob]:
+    """Snapshots at the given UTC hours for each of the last `days` days"""
+    now = now or datetime.now(timezone.utc)
+    jobs = []
+    for sport in sports:
+        for days_ago in range(days):
+            date = now - timedelta(days=days_ago)
+            for hour in hours:
+                snapshot_time = date.replace(hour=hour, minute=0, second=0, microsecond=0)
+                if snapshot_time <= now:
+                    jobs.append(BackfillJob(sport=sport, snapshot_time=snapshot_time))
+    return sorted(jobs, key=lambda j: j.snapshot_time, reverse=True)  # Most recent first
+
+
+async def main():
+    """90-day daily backfill for the main sports"""
+    engine = BackfillEngine(workers=8, requests_per_second=5.0)
+    jobs = daily_schedule(['basketball_nba', 'americanfootball_nfl', 'soccer_epl'], days=90)
+    await engine.run(jobs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
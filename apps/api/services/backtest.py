@@ -0,0 +1,528 @@
+"""
+Historical Backtester
+
+Replays odds_snapshots through the live pipeline:
+1. Work is sharded by (sport, month of kickoff); each shard streams its
+   h2h snapshots in snapshot_time order from one cursor, chunk_rows at a
+   time, so memory is bounded by the open markets, not the history
+2. At every timestamp the market state (match -> bookmaker -> outcome ->
+   price) is updated and the changed matches are run through the same
+   consensus -> edge -> Kelly code as the live endpoint
+   (OddsService.find_value_bets)
+3. The first signal per (match, outcome) is taken as a bet and settled
+   against matches.winner once the match has finished (kickoff +
+   MATCH_DURATION_HOURS), with CLV against that bookmaker's de-vigged
+   closing price (the state at kickoff)
+4. Shards run in a process pool and return fraction-of-bankroll ledgers;
+   the parent compounds one bankroll through all of them in time order
+
+No lookahead: priors and the compounded bankroll only count results of
+matches that have finished before the replay time, and the published
+CLV / bookmaker precision tables are not used.
+
+Usage:
+    python -m services.backtest --sports soccer_epl basketball_nba --start 2025-01-01 --end 2025-07-01
+"""
+
+import argparse
+import heapq
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import Bookmaker, Market, Match, Outcome
+from db.warehouse import connect
+
+SHARDS_SQL = """
+    SELECT DISTINCT sport_key, substr(commence_time, 1, 7) AS month
+    FROM matches
+    WHERE completed AND winner IS NOT NULL
+      AND commence_time >= ? AND commence_time < ?
+    ORDER BY month, sport_key
+"""
+
+SHARD_MATCHES_SQL = """
+    SELECT id, commence_time, home_team, away_team, winner
+    FROM matches
+    WHERE sport_key = ? AND completed AND winner IS NOT NULL
+      AND commence_time >= ? AND commence_time < ?
+"""
+
+# Results that become known during a shard, including matches that kicked
+# off just before it and finish inside it
+SHARD_RESULTS_SQL = """
+    SELECT id, commence_time, home_team, away_team, winner
+    FROM matches
+    WHERE sport_key = ? AND completed AND winner IS NOT NULL
+      AND commence_time >= ? AND commence_time < ?
+"""
+
+# A result is only known once the match is over (kickoff + typical length)
+MATCH_DURATION_HOURS = {
+    "soccer": 2.0,
+    "basketball": 2.5,
+    "icehockey": 3.0,
+    "americanfootball": 3.5,
+    "baseball": 3.5,
+    "default": 3.5
+}
+
+SHARD_SNAPSHOTS_SQL = """
+    SELECT s.snapshot_time, s.match_id, s.bookmaker_key, s.outcome_name, s.odds
+    FROM odds_snapshots s
+    JOIN matches m ON m.id = s.match_id
+    WHERE m.sport_key = ? AND m.completed AND m.winner IS NOT NULL
+      AND m.commence_time >= ? AND m.commence_time < ?
+      AND s.market_key = 'h2h'
+      AND s.snapshot_time < m.commence_time
+    ORDER BY s.snapshot_time
+"""
+
+# historical_matchups as it stood at a point in time (see services/matchups.py)
+PRIORS_AS_OF_SQL = """
+    SELECT
+        MIN(home_team, away_team) AS team1,
+        MAX(home_team, away_team) AS team2,
+        SUM(CASE WHEN winner != 'draw' AND (winner = 'home') = (home_team < away_team) THEN 1 ELSE 0 END),
+        SUM(CASE WHEN winner != 'draw' AND (winner = 'home') != (home_team < away_team) THEN 1 ELSE 0 END),
+        SUM(CASE WHEN winner = 'draw' THEN 1 ELSE 0 END),
+        COUNT(*)
+    FROM matches
+    WHERE sport_key = ? AND completed AND winner IS NOT NULL AND commence_time < ?
+    GROUP BY team1, team2
+"""
+
+
+@dataclass
+class BacktestBet:
+    """One simulated bet (fraction is of the bankroll when placed)"""
+    sport: str
+    match_id: str
+    bookmaker: str
+    outcome: str
+    odds: float
+    probability: float
+    edge: float
+    fraction: float
+    placed_at: str
+    settled_at: str
+    won: bool
+    closing_odds: Optional[float] = None  # Same book, de-vigged
+    clv: Optional[float] = None
+    stake: float = 0.0  # Filled when the bankroll is compounded
+    profit: float = 0.0
+
+
+class Candidate(NamedTuple):
+    """
+    One priced outcome with positive raw edge at one replay timestamp,
+    before any threshold or staking rule (input to services/sweep.py)
+    """
+    sport: str
+    match_id: str
+    outcome: str
+    bookmaker: str
+    odds: float
+    probability: float
+    std_error: float
+    liquidity_factor: float
+    fill_probability: float
+    confidence: str  # Credible-interval grade A/B/C/D
+    placed_at: str
+    settled_at: str
+    won: bool
+    clv: Optional[float]
+
+
+@dataclass
+class BacktestResult:
+    """Bankroll and P&L over the whole replay"""
+    start_bankroll: float
+    final_bankroll: float
+    bets: int
+    wins: int
+    staked: float
+    profit: float
+    roi: float
+    max_drawdown: float  # Peak-to-trough, fraction of peak equity
+    mean_clv: Optional[float]
+    by_sport: Dict[str, Dict] = field(default_factory=dict)
+    shards: int = 0
+    snapshots: int = 0
+    elapsed_seconds: float = 0.0
+
+
+class _AsOfPriors:
+    """MatchupPriors stand-in that only knows results settled so far"""
+
+    def __init__(self, conn, sport: str, before: str):
+        self._rows: Dict[Tuple[str, str], List[int]] = {
+            (team1, team2): [w1, w2, draws, total]
+            for team1, team2, w1, w2, draws, total in conn.execute(PRIORS_AS_OF_SQL, (sport, before))
+        }
+
+    def add(self, home_team: str, away_team: str, winner: str):
+        team1, team2 = min(home_team, away_team), max(home_team, away_team)
+        row = self._rows.setdefault((team1, team2), [0, 0, 0, 0])
+        if winner == "draw":
+            row[2] += 1
+        else:
+            row[0 if (winner == "home") == (home_team < away_team) else 1] += 1
+        row[3] += 1
+
+    def get(self, sport: str, team_a: str, team_b: str) -> Optional[Tuple[int, int, int, int]]:
+        if team_a <= team_b:
+            row = self._rows.get((team_a, team_b))
+            return tuple(row) if row else None
+        row = self._rows.get((team_b, team_a))
+        if row is None:
+            return None
+        w1, w2, draws, total = row
+        return (w2, w1, draws, total)
+
+
+class _NoCLV:
+    """CLVLookup stand-in: the published table is built from future results"""
+
+    def get(self, sport: str, bookmaker_key: str) -> Optional[float]:
+        return None
+
+
+def _month_bounds(month: str) -> Tuple[str, str]:
+    year, mon = int(month[:4]), int(month[5:7])
+    nxt = f"{year + 1}-01" if mon == 12 else f"{year}-{mon + 1:02d}"
+    return f"{month}-01", f"{nxt}-01"
+
+
+def _match_duration(sport: str) -> timedelta:
+    group = sport.split("_")[0]
+    return timedelta(hours=MATCH_DURATION_HOURS.get(group, MATCH_DURATION_HOURS["default"]))
+
+
+def _shift(timestamp: str, delta: timedelta) -> str:
+    """Move a stored timestamp string, keeping its format so string comparison still orders it"""
+    moved = datetime.fromisoformat(timestamp.replace("Z", "+00:00")) + delta
+    text = moved.isoformat(sep="T" if "T" in timestamp else " ")
+    return text.replace("+00:00", "Z") if timestamp.endswith("Z") else text
+
+
+def _pipeline(conn, sport: str, start: str):
+    """OddsService wired for replay (as-of priors, no published tables)"""
+    from services.odds_service import OddsService
+
+    service = OddsService()
+    # Matches kicking off within a match length of the shard start finish inside it
+    service.bayesian.matchups = _AsOfPriors(conn, sport, _shift(start, -_match_duration(sport)))
+    service.bayesian.measured_precision = {}
+    service.bayesian._precision_checked_at = float("inf")  # Never load the published table
+    service.bayesian.leader_lag.sports = {}
+    service.bayesian.book_correlation.tables = {}
+    service.clv_lookup = _NoCLV()
+    return service
+
+
+def _winner_outcome(outcome: str, match: tuple) -> bool:
+    _, _, home, away, winner = match
+    if winner == "home":
+        return outcome == home
+    if winner == "away":
+        return outcome == away
+    return outcome not in (home, away)
+
+
+def _fair_close(book: Dict[str, float], outcome: str) -> Optional[float]:
+    if outcome not in book or len(book) < 2:
+        return None
+    return book[outcome] * sum(1.0 / p for p in book.values())
+
+
+def _replay_shard(args) -> Tuple[list, int]:
+    """
+    Replay one (sport, month) shard; module-level so the process pool can pickle it
+
+    collect="bets" returns BacktestBets, collect="candidates" returns a
+    Candidate for every positive-edge quote at every timestamp.
+    """
+    from services.dynamic_kelly import RiskTolerance
+
+    db_path, sport, month, chunk_rows, risk_tolerance, collect = args
+    start, end = _month_bounds(month)
+    risk = RiskTolerance(risk_tolerance)
+
+    conn = connect(db_path)
+    try:
+        matches = {row[0]: row for row in conn.execute(SHARD_MATCHES_SQL, (sport, start, end))}
+        kickoffs = sorted((row[1], match_id) for match_id, row in matches.items())
+        duration = _match_duration(sport)
+        finishes = sorted(
+            (_shift(row[1], duration), row)
+            for row in conn.execute(SHARD_RESULTS_SQL, (sport, _shift(start, -duration), end))
+        )
+        service = _pipeline(conn, sport, start)
+        priors = service.bayesian.matchups
+
+        state: Dict[str, Dict[str, Dict[str, float]]] = {}
+        open_bets: Dict[str, list] = {}
+        placed = set()
+        bets: list = []
+        rows_read = 0
+
+        def settle_until(now: Optional[str]):
+            while kickoffs and (now is None or kickoffs[0][0] <= now):
+                _, match_id = heapq.heappop(kickoffs)
+                books = state.pop(match_id, {})
+                for bet in open_bets.pop(match_id, []):
+                    close = _fair_close(books.get(bet.bookmaker, {}), bet.outcome)
+                    clv = bet.odds / close - 1 if close else None
+                    if collect == "candidates":
+                        bet = bet._replace(clv=clv)
+                    else:
+                        bet.closing_odds, bet.clv = close, clv
+                    bets.append(bet)
+            while finishes and (now is None or finishes[0][0] <= now):
+                _, (_, _, home, away, winner) = heapq.heappop(finishes)
+                priors.add(home, away, winner)
+
+        def evaluate(now: str, dirty: set):
+            slate = [
+                Match(
+                    id=match_id, sport_key=sport, sport_title=sport,
+                    commence_time=matches[match_id][1],
+                    home_team=matches[match_id][2], away_team=matches[match_id][3],
+                    bookmakers=[
+                        Bookmaker(key=key, title=key, last_update=now, markets=[Market(
+                            key="h2h", outcomes=[Outcome(name=n, price=p) for n, p in quotes.items()]
+                        )])
+                        for key, quotes in state[match_id].items()
+                    ]
+                )
+                for match_id in dirty if match_id in state
+            ]
+            if collect == "candidates":
+                with redirect_stdout(io.StringIO()):
+                    for match in slate:
+                        fixture = matches[match.id]
+                        for bookie, outcome, consensus, edge in service.analyze_match(match, sport):
+                            if edge.raw_edge <= 0:
+                                continue
+                            open_bets.setdefault(match.id, []).append(Candidate(
+                                sport, match.id, outcome.name, bookie.key, outcome.price,
+                                consensus.probability, consensus.std_error,
+                                edge.liquidity_factor, edge.fill_probability, edge.confidence,
+                                now, _shift(fixture[1], duration), _winner_outcome(outcome.name, fixture), None
+                            ))
+                return
+
+            with redirect_stdout(io.StringIO()):  # The pipeline logs every calculation
+                value_bets, keys = service.find_value_bets(slate, sport, bankroll=1.0, risk_enum=risk)
+
+            best: Dict[Tuple[str, str], Tuple] = {}
+            for bet, key in zip(value_bets, keys):
+                signal = (bet.match_id, bet.outcome)
+                if signal in placed or not bet.kelly_fraction or bet.kelly_fraction < 1e-6:
+                    continue
+                if signal not in best or bet.kelly_fraction > best[signal][0].kelly_fraction:
+                    best[signal] = (bet, key)
+
+            for (match_id, outcome), (bet, key) in best.items():
+                placed.add((match_id, outcome))
+                open_bets.setdefault(match_id, []).append(BacktestBet(
+                    sport=sport, match_id=match_id, bookmaker=key, outcome=outcome,
+                    odds=bet.odds, probability=bet.true_probability, edge=bet.edge,
+                    fraction=bet.kelly_fraction, placed_at=now,
+                    settled_at=_shift(matches[match_id][1], duration),
+                    won=_winner_outcome(outcome, matches[match_id])
+                ))
+
+        cursor = conn.execute(SHARD_SNAPSHOTS_SQL, (sport, start, end))
+        current, dirty = None, set()
+        while True:
+            chunk = cursor.fetchmany(chunk_rows)
+            for snapshot_time, match_id, bookmaker, outcome, odds in chunk:
+                if snapshot_time != current:
+                    if dirty:
+                        evaluate(current, dirty)
+                        dirty = set()
+                    settle_until(snapshot_time)
+                    current = snapshot_time
+                if not 1.01 <= odds <= 100.0:
+                    continue
+                state.setdefault(match_id, {}).setdefault(bookmaker, {})[outcome] = odds
+                dirty.add(match_id)
+            rows_read += len(chunk)
+            if len(chunk) < chunk_rows:
+                break
+        if dirty:
+            evaluate(current, dirty)
+        settle_until(None)
+    finally:
+        conn.close()
+
+    return bets, rows_read
+
+
+def compound(bets: List[BacktestBet], bankroll: float) -> Tuple[float, float]:
+    """
+    Stake every bet from one bankroll in time order (in place)
+
+    Stakes are fraction x equity at placement (equity counts open stakes
+    at cost); returns (final bankroll, max drawdown).
+    """
+    events = sorted(
+        [(b.placed_at, 1, i) for i, b in enumerate(bets)] +
+        [(b.settled_at, 0, i) for i, b in enumerate(bets)]  # Settle before placing at the same instant
+    )
+    cash, open_stakes = bankroll, 0.0
+    peak, max_drawdown = bankroll, 0.0
+    for _, is_place, i in events:
+        bet = bets[i]
+        if is_place:
+            bet.stake = min(bet.fraction * (cash + open_stakes), cash)
+            cash -= bet.stake
+            open_stakes += bet.stake
+        else:
+            open_stakes -= bet.stake
+            bet.profit = bet.stake * (bet.odds - 1) if bet.won else -bet.stake
+            cash += bet.stake + bet.profit
+            equity = cash + open_stakes
+            peak = max(peak, equity)
+            max_drawdown = max(max_drawdown, 1 - equity / peak)
+    return cash + open_stakes, max_drawdown
+
+
+class Backtester:
+    """
+    Sharded, streaming replay of historical.db
+
+    Usage:
+        result, bets = Backtester().run(["soccer_epl"], "2025-01-01", "2025-07-01")
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        chunk_rows: int = 50_000,
+        risk_tolerance: str = "moderate"
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_rows = chunk_rows
+        self.risk_tolerance = risk_tolerance
+
+    def shards(self, sports: Optional[Sequence[str]], start: str, end: str) -> List[Tuple[str, str]]:
+        """(sport, 'YYYY-MM') pairs with settled matches in [start, end)"""
+        conn = connect(self.db_path)
+        try:
+            rows = conn.execute(SHARDS_SQL, (start, end)).fetchall()
+        finally:
+            conn.close()
+        return [(sport, month) for sport, month in rows if not sports or sport in sports]
+
+    def replay(self, sports: Optional[Sequence[str]] = None, start: str = "1970-01-01",
+               end: str = "9999-12-31", collect: str = "bets") -> Tuple[list, int, int]:
+        """Signals (or candidates) and settlements for every shard: (records, shards, snapshots read)"""
+        shards = self.shards(sports, start, end)
+        tasks = [
+            (self.db_path, sport, month, self.chunk_rows, self.risk_tolerance, collect)
+            for sport, month in shards
+        ]
+
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+                results = list(pool.map(_replay_shard, tasks))
+        else:
+            results = [_replay_shard(task) for task in tasks]
+
+        # Shards cover whole months of kickoffs, so bets kicking off outside [start, end) are dropped here
+        bets = [
+            b for shard_bets, _ in results for b in shard_bets
+            if start <= _shift(b.settled_at, -_match_duration(b.sport)) < end
+        ]
+        return bets, len(shards), sum(rows for _, rows in results)
+
+    def run(
+        self,
+        sports: Optional[Sequence[str]] = None,
+        start: str = "1970-01-01",
+        end: str = "9999-12-31",
+        bankroll: float = 1000.0
+    ) -> Tuple[BacktestResult, List[BacktestBet]]:
+        t0 = time.perf_counter()
+        bets, shards, snapshots = self.replay(sports, start, end)
+        final, max_drawdown = compound(bets, bankroll)
+
+        by_sport: Dict[str, Dict] = {}
+        for bet in bets:
+            s = by_sport.setdefault(bet.sport, {"bets": 0, "wins": 0, "staked": 0.0, "profit": 0.0, "clv": []})
+            s["bets"] += 1
+            s["wins"] += bet.won
+            s["staked"] += bet.stake
+            s["profit"] += bet.profit
+            if bet.clv is not None:
+                s["clv"].append(bet.clv)
+        for s in by_sport.values():
+            clvs = s.pop("clv")
+            s["roi"] = s["profit"] / s["staked"] if s["staked"] else 0.0
+            s["mean_clv"] = sum(clvs) / len(clvs) if clvs else None
+
+        staked = sum(b.stake for b in bets)
+        profit = sum(b.profit for b in bets)
+        clvs = [b.clv for b in bets if b.clv is not None]
+        result = BacktestResult(
+            start_bankroll=bankroll,
+            final_bankroll=final,
+            bets=len(bets),
+            wins=sum(b.won for b in bets),
+            staked=staked,
+            profit=profit,
+            roi=profit / staked if staked else 0.0,
+            max_drawdown=max_drawdown,
+            mean_clv=sum(clvs) / len(clvs) if clvs else None,
+            by_sport=by_sport,
+            shards=shards,
+            snapshots=snapshots,
+            elapsed_seconds=time.perf_counter() - t0
+        )
+        print(
+            f"[BACKTEST] {shards} shards, {snapshots:,} snapshots, {result.bets} bets: "
+            f"bankroll {bankroll:.2f} -> {final:.2f} (ROI {result.roi:.2%}, "
+            f"max drawdown {max_drawdown:.1%}) in {result.elapsed_seconds:.1f}s"
+        )
+        return result, bets
+
+
+# Manual execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay historical odds through the value-bet pipeline")
+    parser.add_argument("--db", default=None, help="Path to historical.db")
+    parser.add_argument("--sports", nargs="*", default=None, help="Sport keys (default: all)")
+    parser.add_argument("--start", default="1970-01-01", help="First kickoff date (inclusive)")
+    parser.add_argument("--end", default=datetime.utcnow().strftime("%Y-%m-%d"), help="Last kickoff date (exclusive)")
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--risk", default="moderate", choices=["conservative", "moderate", "aggressive"])
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size")
+    parser.add_argument("--output", default=None, help="Write the summary and bet ledger as JSON")
+    args = parser.parse_args()
+
+    result, bets = Backtester(args.db, workers=args.workers, risk_tolerance=args.risk).run(
+        args.sports, args.start, args.end, args.bankroll
+    )
+    for sport, s in sorted(result.by_sport.items()):
+        print(f"  {sport}: {s['bets']} bets, ROI {s['roi']:.2%}, profit {s['profit']:.2f}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {"summary": asdict(result), "bets": [asdict(b) for b in bets]}, indent=2
+        ))
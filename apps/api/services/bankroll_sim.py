@@ -0,0 +1,225 @@
+"""
+Bankroll Simulator (Monte Carlo)
+
+Simulates bankroll paths for a set of bets staked as a fraction of the
+current bankroll:
+1. Each path draws its own "true" probability per bet from the posterior
+   (Beta with the consensus mean and variance), so model uncertainty is
+   part of the risk, then plays the bets in rotation for `horizon` bets
+2. Paths are simulated as NumPy blocks (steps x paths) in log-wealth space:
+   cumulative sums, running peaks and first-passage times are array ops
+3. Large runs are split into fixed-size chunks with independent seeds
+   (SeedSequence.spawn) and spread over a process pool; results do not
+   depend on the number of workers
+
+Reports drawdown-probability curves, ruin probability (peak-to-trough
+drawdown of ruin_level or more), probability and time to double, and
+growth. risk_of_ruin() is the cached single-bet fast path used by
+DynamicKellyCalculator.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DRAWDOWN_LEVELS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+CHUNK_PATHS = 50_000  # Paths per chunk (and per seed)
+BLOCK_STEPS = 64  # Steps simulated per array block (bounds memory)
+
+
+@dataclass
+class SimulatedBet:
+    """One bet in the rotation"""
+    odds: float
+    probability: float  # Posterior mean
+    fraction: float  # Stake as a fraction of current bankroll
+    variance: float = 0.0  # Posterior variance (0 = probability known exactly)
+
+
+@dataclass
+class SimulationResult:
+    """Summary over all simulated paths"""
+    paths: int
+    horizon: int
+    ruin_level: float
+    ruin_probability: float  # P(max drawdown >= ruin_level)
+    drawdown_curve: Dict[float, float]  # level -> P(max drawdown >= level)
+    doubling_probability: float  # P(bankroll doubles within the horizon)
+    median_bets_to_double: Optional[float]  # Among paths that doubled
+    mean_log_growth: float  # Per bet
+    final_quantiles: Dict[int, float] = field(default_factory=dict)  # Percentile -> final bankroll multiple
+
+
+def _posterior_probabilities(rng, bets: Sequence[SimulatedBet], n_paths: int) -> np.ndarray:
+    """(n_bets, n_paths) true probabilities drawn from each bet's Beta posterior"""
+    probs = np.empty((len(bets), n_paths))
+    for i, bet in enumerate(bets):
+        p = min(max(bet.probability, 1e-6), 1 - 1e-6)
+        concentration = p * (1 - p) / bet.variance - 1 if bet.variance > 0 else 0.0
+        if concentration > 0:
+            probs[i] = rng.beta(p * concentration, (1 - p) * concentration, n_paths)
+        else:
+            probs[i] = p
+    return probs
+
+
+def _simulate_chunk(args) -> dict:
+    """Simulate one chunk of paths; module-level so the process pool can pickle it"""
+    bets, n_paths, horizon, seed, levels, target_multiple = args
+    rng = np.random.default_rng(seed)
+
+    probs = _posterior_probabilities(rng, bets, n_paths)
+    fractions = np.array([b.fraction for b in bets])
+    win = np.log1p(fractions * (np.array([b.odds for b in bets]) - 1.0))
+    lose = np.log1p(-np.minimum(fractions, 1.0 - 1e-12))
+
+    log_wealth = np.zeros(n_paths)
+    peak = np.zeros(n_paths)
+    max_drawdown = np.zeros(n_paths)  # In log space
+    doubled_at = np.full(n_paths, -1, dtype=np.int64)
+    log_target = np.log(target_multiple)
+
+    for start in range(0, horizon, BLOCK_STEPS):
+        steps = min(BLOCK_STEPS, horizon - start)
+        bet_idx = (start + np.arange(steps)) % len(bets)
+        won = rng.random((steps, n_paths)) < probs[bet_idx]
+        path = log_wealth + np.cumsum(np.where(won, win[bet_idx, None], lose[bet_idx, None]), axis=0)
+
+        peaks = np.maximum(peak, np.maximum.accumulate(path, axis=0))
+        max_drawdown = np.maximum(max_drawdown, (peaks - path).max(axis=0))
+
+        hit = path >= log_target
+        first = hit.argmax(axis=0)
+        newly = (doubled_at < 0) & hit.any(axis=0)
+        doubled_at[newly] = start + first[newly] + 1
+
+        log_wealth, peak = path[-1], peaks[-1]
+
+    thresholds = -np.log1p(-np.asarray(levels))  # Drawdown fraction -> log drop
+    return {
+        "paths": n_paths,
+        "drawdown_counts": (max_drawdown[:, None] >= thresholds[None, :]).sum(axis=0),
+        "doubling_times": np.bincount(doubled_at[doubled_at > 0], minlength=horizon + 1),
+        "log_wealth": log_wealth.astype(np.float32)
+    }
+
+
+class BankrollSimulator:
+    """
+    Vectorized Monte Carlo over bankroll paths
+
+    Usage:
+        sim = BankrollSimulator(seed=42)
+        result = sim.run([SimulatedBet(2.10, 0.52, 0.02, 0.0004)], paths=1_000_000)
+    """
+
+    def __init__(self, seed: int = 0, workers: Optional[int] = None, parallel_threshold: int = 200_000):
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold  # Smaller runs stay in-process
+
+    def run(
+        self,
+        bets: List[SimulatedBet],
+        paths: int = 100_000,
+        horizon: int = 1000,
+        ruin_level: float = 0.5,
+        target_multiple: float = 2.0,
+        levels: Sequence[float] = DRAWDOWN_LEVELS
+    ) -> SimulationResult:
+        levels = tuple(sorted(set(levels) | {ruin_level}))
+        sizes = [CHUNK_PATHS] * (paths // CHUNK_PATHS)
+        if paths % CHUNK_PATHS:
+            sizes.append(paths % CHUNK_PATHS)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        tasks = [(list(bets), size, horizon, seed, levels, target_multiple) for size, seed in zip(sizes, seeds)]
+
+        if self.workers > 1 and len(tasks) > 1 and paths >= self.parallel_threshold:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+                chunks = list(pool.map(_simulate_chunk, tasks))
+        else:
+            chunks = [_simulate_chunk(task) for task in tasks]
+
+        return self._combine(chunks, horizon, ruin_level, levels)
+
+    @staticmethod
+    def _combine(chunks: List[dict], horizon: int, ruin_level: float, levels: Sequence[float]) -> SimulationResult:
+        total = sum(c["paths"] for c in chunks)
+        drawdown = sum(c["drawdown_counts"] for c in chunks) / total
+        doubling_times = sum(c["doubling_times"] for c in chunks)
+        log_wealth = np.concatenate([c["log_wealth"] for c in chunks]).astype(float)
+
+        doubled = int(doubling_times.sum())
+        median_time = None
+        if doubled:
+            median_time = float(np.searchsorted(np.cumsum(doubling_times), doubled / 2))
+
+        curve = {round(level, 4): float(p) for level, p in zip(levels, drawdown)}
+        return SimulationResult(
+            paths=total,
+            horizon=horizon,
+            ruin_level=ruin_level,
+            ruin_probability=curve[round(ruin_level, 4)],
+            drawdown_curve=curve,
+            doubling_probability=doubled / total,
+            median_bets_to_double=median_time,
+            mean_log_growth=float(log_wealth.mean() / horizon),
+            final_quantiles={
+                q: float(np.exp(v)) for q, v in zip((5, 50, 95), np.percentile(log_wealth, [5, 50, 95]))
+            }
+        )
+
+
+@lru_cache(maxsize=4096)
+def _cached_ruin(odds: float, probability: float, fraction: float, variance: float,
+                 ruin_level: float, horizon: int, paths: int) -> float:
+    result = BankrollSimulator(seed=0, workers=1).run(
+        [SimulatedBet(odds, probability, fraction, variance)],
+        paths=paths, horizon=horizon, ruin_level=ruin_level, levels=(ruin_level,)
+    )
+    return result.ruin_probability
+
+
+def risk_of_ruin(
+    odds: float,
+    probability: float,
+    fraction: float,
+    variance: float = 0.0,
+    ruin_level: float = 0.5,
+    horizon: int = 250,
+    paths: int = 2000
+) -> float:
+    """
+    P(a ruin_level drawdown within `horizon` repeats of this bet)
+
+    Inputs are rounded (odds 0.01, probability 0.001, fraction 0.0005,
+    variance 1e-5) so nearby bets share a cached, seeded simulation.
+    """
+    if fraction <= 0:
+        return 0.0
+    return _cached_ruin(
+        round(odds, 2), round(probability, 3), round(fraction * 2000) / 2000,
+        round(variance, 5), ruin_level, horizon, paths
+    )
+
+
+# Example usage / benchmark
+if __name__ == "__main__":
+    import time
+
+    bets = [SimulatedBet(1.95, 0.55, 0.03, 0.0005), SimulatedBet(3.40, 0.32, 0.01, 0.001)]
+    t0 = time.perf_counter()
+    result = BankrollSimulator(seed=42).run(bets, paths=1_000_000, horizon=500)
+    print(f"{result.paths:,} paths x {result.horizon} bets in {time.perf_counter() - t0:.1f}s")
+    print(f"Ruin ({result.ruin_level:.0%} drawdown): {result.ruin_probability:.4f}")
+    print(f"Doubling: {result.doubling_probability:.3f}, median {result.median_bets_to_double} bets")
+    print(f"Drawdown curve: {result.drawdown_curve}")
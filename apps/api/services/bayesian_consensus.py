@@ -9,13 +9,19 @@ Hierarchical Bayesian model for calculating true probabilities:
 This is significantly more sophisticated than simple weighted averages.
 """
 
+import json
+import time
 import numpy as np
 from scipy.stats import beta as beta_dist
 from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional
-import sqlite3
 from pathlib import Path
 
+from core.config import settings
+from services.book_correlation import BookCorrelation
+from services.leader_lag import LeaderLagTable
+from services.matchups import MatchupPriors
+
 
 @dataclass
 class BayesianResult:
@@ -74,9 +80,22 @@ class BayesianConsensus:
     - Provides confidence scores for bet quality
     """
     
-    def __init__(self, db_path: str = "db/historical.db"):
+    def __init__(
+        self,
+        db_path: str = "db/historical.db",
+        precision_path: Optional[str] = None,
+        leader_lag_path: Optional[str] = None,
+        correlation_path: Optional[str] = None
+    ):
         self.db_path = db_path
+        self.precision_path = Path(precision_path or settings.BOOKMAKER_PRECISION_PATH)
+        self.leader_lag = LeaderLagTable(leader_lag_path)  # Published by services/leader_lag.py
+        self.book_correlation = BookCorrelation(correlation_path)  # Published by services/book_correlation.py
+        self.measured_precision: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._precision_mtime: Optional[float] = None
+        self._precision_checked_at = float('-inf')
         self.bookmaker_precision = self._load_bookmaker_precision()
+        self.matchups = MatchupPriors(db_path)
     
     def _load_bookmaker_precision(self) -> Dict[str, float]:
         """
@@ -84,8 +103,13 @@ class BayesianConsensus:
         
         Precision = 1 / variance of prediction errors
         Higher precision = more weight in Bayesian updating
+        
+        Measured per-sport precision comes from the calibration job
+        (services/calibration.py); these defaults cover books and sports
+        without enough settled history.
         """
-        # Default precisions (will be updated as we collect data)
+        self._reload_measured_precision()
+        
         defaults = {
             'pinnacle': 10.0,      # Very sharp
             'bookmaker': 10.0,
@@ -103,11 +127,43 @@ class BayesianConsensus:
             'default': 3.0
         }
         
-        # TODO: Update from historical performance in database
-        # After 30+ days of data, calculate actual accuracy
-        
         return defaults
     
+    def _reload_measured_precision(self, check_interval: float = 60.0):
+        """Pick up a newly published precision table (checked at most once a minute)"""
+        now = time.monotonic()
+        if now - self._precision_checked_at < check_interval:
+            return
+        self._precision_checked_at = now
+        
+        try:
+            mtime = self.precision_path.stat().st_mtime
+        except OSError:
+            return
+        if mtime == self._precision_mtime:
+            return
+        
+        try:
+            data = json.loads(self.precision_path.read_text())
+            self.measured_precision = data.get("precision", {})
+            self._precision_mtime = mtime
+            print(f"[BAYESIAN] Loaded bookmaker precision for period ending {data.get('period_end')}")
+        except (OSError, ValueError) as e:
+            print(f"Error loading bookmaker precision: {e}")
+    
+    def _precision_for(self, sport: str, bookie_key: str, market: str = 'h2h') -> float:
+        """
+        Measured precision for this sport/market, else the default, scaled
+        by leader/follower weight (books that copy others add less information)
+        """
+        bookie_key = bookie_key.lower()
+        measured = self.measured_precision.get(sport, {}).get(market, {})
+        if bookie_key in measured:
+            precision = measured[bookie_key]
+        else:
+            precision = self.bookmaker_precision.get(bookie_key, self.bookmaker_precision['default'])
+        return precision * self.leader_lag.weight(sport, bookie_key)
+    
     def calculate_true_probability(
         self,
         sport: str,
@@ -131,34 +187,32 @@ class BayesianConsensus:
         """
         print(f"\n[BAYESIAN] Calculating for {outcome_name} ({home_team} vs {away_team})")
         print(f"[BAYESIAN] Input odds: {len(bookmaker_odds)} bookmakers")
+        self._reload_measured_precision()
+        
         # Step 1: Get historical prior
         prior = self._get_historical_prior(sport, home_team, away_team, outcome_name)
         print(f"[BAYESIAN] Prior: alpha={prior.alpha:.2f}, beta={prior.beta:.2f}, games={prior.total_games}")
         
         # Step 2: Bayesian updating with bookmaker odds
-        alpha = prior.alpha
-        beta_param = prior.beta
+        bookies = [odds_data.get('bookie', 'default') for odds_data in bookmaker_odds]
         
-        for odds_data in bookmaker_odds:
-            bookie_key = odds_data.get('bookie', 'default')
-            price = odds_data['price']
-            
-            # Get bookmaker precision (accuracy)
-            precision = self.bookmaker_precision.get(
-                bookie_key.lower(), 
-                self.bookmaker_precision['default']
-            )
-            
-            # Convert odds to implied probability
-            implied_prob = 1.0 / price
-            
-            # Effective sample size from this bookmaker
-            # More accurate bookmakers contribute more "pseudo-observations"
-            n_effective = precision * 10
-            
-            # Beta-Binomial conjugate prior update
-            alpha += implied_prob * n_effective
-            beta_param += (1 - implied_prob) * n_effective
+        # Get bookmaker precision (accuracy) and implied probabilities
+        precision = np.array([self._precision_for(sport, bookie_key) for bookie_key in bookies])
+        implied_prob = np.array([1.0 / odds_data['price'] for odds_data in bookmaker_odds])
+        
+        # Correlated books (copies, shared feeds) are not independent evidence:
+        # scale everyone's pseudo-observations by the independent share
+        independence = self.book_correlation.independence(sport, bookies, precision)
+        if independence < 1.0:
+            print(f"[BAYESIAN] Correlated books: {independence:.0%} of the evidence is independent")
+        
+        # Effective sample size per bookmaker
+        # More accurate bookmakers contribute more "pseudo-observations"
+        n_effective = precision * 10 * independence
+        
+        # Beta-Binomial conjugate prior update
+        alpha = prior.alpha + float(implied_prob @ n_effective)
+        beta_param = prior.beta + float((1 - implied_prob) @ n_effective)
         
         # Step 3: Calculate posterior statistics
         posterior_mean = alpha / (alpha + beta_param)
@@ -192,49 +246,31 @@ class BayesianConsensus:
         """
         Calculate informed prior from historical matchup data
         
+        Reads the pre-aggregated historical_matchups mirror (no scan of matches)
         Returns Beta distribution parameters based on past games
         If no historical data, returns uninformed prior Beta(1, 1)
         """
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Query historical head-to-head results
-            cursor.execute("""
-                SELECT COUNT(*) as total,
-                       SUM(CASE WHEN winner = ? THEN 1 ELSE 0 END) as wins
-                FROM matches
-                WHERE sport_key = ?
-                AND ((home_team = ? AND away_team = ?)
-                     OR (home_team = ? AND away_team = ?))
-                AND completed = TRUE
-            """, (
-                self._outcome_to_side(outcome_name, home_team, away_team),
-                sport,
-                home_team, away_team,
-                away_team, home_team
-            ))
+        record = self.matchups.get(sport, home_team, away_team)
+        
+        if record and record[3] > 0:
+            home_wins, away_wins, draws, total_games = record
+            wins = {
+                'home': home_wins,
+                'away': away_wins,
+                'draw': draws
+            }[self._outcome_to_side(outcome_name, home_team, away_team)]
             
-            result = cursor.fetchone()
-            conn.close()
+            # Add pseudo-counts to prevent extreme priors
+            # Jeffrey's prior: add 0.5 to both
+            alpha = wins + 0.5
+            beta = (total_games - wins) + 0.5
             
-            if result and result[0] > 0:
-                total_games, wins = result
-                
-                # Add pseudo-counts to prevent extreme priors
-                # Jeffrey's prior: add 0.5 to both
-                alpha = wins + 0.5
-                beta = (total_games - wins) + 0.5
-                
-                return HistoricalPrior(
-                    alpha=alpha,
-                    beta=beta,
-                    total_games=total_games,
-                    win_rate=wins / total_games if total_games > 0 else 0.5
-                )
-            
-        except Exception as e:
-            print(f"Error loading historical prior: {e}")
+            return HistoricalPrior(
+                alpha=alpha,
+                beta=beta,
+                total_games=total_games,
+                win_rate=wins / total_games
+            )
         
         # Uninformed prior (uniform distribution)
         return HistoricalPrior(
@@ -0,0 +1,203 @@
+"""
+Bookmaker Correlation Job
+
+Books that copy a market maker or share a trading feed make the same
+errors, so they should not count as independent evidence in the consensus:
+1. The last pre-kickoff h2h quote per (match, bookmaker, outcome) is
+   de-vigged (multiplicative) into a (match-outcome x bookmaker) array
+2. Each book's residual is its probability minus the leave-one-out mean of
+   the other books on the same outcome
+3. Pairwise correlations of residuals come from masked matrix products over
+   all observations at once (pairwise-complete; pairs with fewer than
+   min_overlap shared outcomes stay 0). Negative values are clipped to 0
+4. Matrices per sport are published atomically as one .npz and loaded once
+   at startup by BayesianConsensus
+
+With precision weights w and correlation R of the books quoting a market,
+independence = (w . w) / (w' R w) is 1 for uncorrelated books and 1/n for n
+copies of one book; it scales every book's pseudo-observations.
+
+Usage:
+    BookCorrelationJob(period_days=180).run()
+    correlation = BookCorrelation()
+    correlation.independence("soccer_epl", ["pinnacle", "bet365"], [10.0, 7.0])
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Sequence, Tuple
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema
+
+LAST_QUOTES_SQL = """
+    SELECT s.match_id, s.outcome_name, s.bookmaker_key, s.odds, MAX(s.snapshot_time)
+    FROM matches m
+    JOIN odds_snapshots s
+      ON s.match_id = m.id AND s.market_key = 'h2h' AND s.snapshot_time < m.commence_time
+    WHERE m.sport_key = ? AND m.commence_time >= ? AND m.commence_time < ? AND s.odds > 1.0
+    GROUP BY s.match_id, s.bookmaker_key, s.outcome_name
+"""
+
+
+def residual_correlation(residuals: np.ndarray, min_overlap: int = 30) -> np.ndarray:
+    """Pairwise-complete correlation of an (observations, books) array with NaN gaps"""
+    mask = np.isfinite(residuals).astype(float)
+    x = np.nan_to_num(residuals)
+    n = mask.T @ mask
+    sum_a = x.T @ mask  # [a, b]: sum of a's residuals where both quote
+    sum_sq = (x * x).T @ mask
+    cross = x.T @ x
+
+    cov = n * cross - sum_a * sum_a.T
+    var = (n * sum_sq - sum_a ** 2) * (n * sum_sq - sum_a ** 2).T
+    corr = np.divide(cov, np.sqrt(var), out=np.zeros_like(cov), where=(var > 0) & (n >= min_overlap))
+    corr = np.clip(corr, 0.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+class BookCorrelationJob:
+    """
+    Offline estimate of bookmaker residual correlations per sport
+
+    Usage:
+        job = BookCorrelationJob(period_days=180)
+        matrices = job.run()
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        matrix_path: Optional[str] = None,
+        period_days: int = 180,
+        min_overlap: int = 30
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.matrix_path = Path(matrix_path or settings.BOOK_CORRELATION_PATH)
+        self.period_days = period_days
+        self.min_overlap = min_overlap  # Shared outcomes needed before a pair's correlation is trusted
+        ensure_schema(self.db_path)
+
+    def run(self, sports: Optional[Sequence[str]] = None, end: Optional[datetime] = None) -> Dict[str, Tuple[list, np.ndarray]]:
+        end = (end or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=self.period_days)
+
+        conn = connect(self.db_path)
+        try:
+            if sports is None:
+                sports = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT sport_key FROM matches WHERE commence_time >= ? AND commence_time < ?",
+                    (start, end)
+                )]
+            matrices = {}
+            for sport in sports:
+                rows = conn.execute(LAST_QUOTES_SQL, (sport, start, end)).fetchall()
+                if rows:
+                    books, residuals = self.residuals(rows)
+                    if len(books) >= 2:
+                        matrices[sport] = (books, residual_correlation(residuals, self.min_overlap))
+        finally:
+            conn.close()
+
+        self._publish(matrices)
+        print(f"[BOOK CORRELATION] {len(matrices)} sports for {start.date()} - {end.date()}")
+        return matrices
+
+    @staticmethod
+    def residuals(rows) -> Tuple[list, np.ndarray]:
+        """(books, residuals[match-outcome, book]) from (match, outcome, bookmaker, odds, time) rows"""
+        match_ids, outcomes, bookmaker_keys, odds, _ = zip(*rows)
+        books, book = np.unique(np.asarray(bookmaker_keys), return_inverse=True)
+        _, market = np.unique(np.asarray(match_ids), return_inverse=True)
+        _, row = np.unique(np.char.add(np.char.add(np.asarray(match_ids), "|"), np.asarray(outcomes)), return_inverse=True)
+        implied = 1.0 / np.asarray(odds, dtype=float)
+
+        # Multiplicative de-vig within each (match, bookmaker) book
+        _, book_market = np.unique(market * len(books) + book, return_inverse=True)
+        prob = implied / np.bincount(book_market, weights=implied)[book_market]
+
+        grid = np.full((row.max() + 1, len(books)), np.nan)
+        grid[row, book] = prob
+        quoted = np.isfinite(grid)
+        count = quoted.sum(axis=1, keepdims=True)
+        total = np.nansum(grid, axis=1, keepdims=True)
+        others = np.divide(total - grid, count - 1, out=np.full_like(grid, np.nan), where=quoted & (count >= 3))
+        return books.tolist(), grid - others
+
+    def _publish(self, matrices: Dict[str, Tuple[list, np.ndarray]]):
+        """Write all sports to one .npz atomically"""
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"sports": np.asarray(list(matrices), dtype=str)}
+        for i, (books, corr) in enumerate(matrices.values()):
+            arrays[f"books_{i}"] = np.asarray(books, dtype=str)
+            arrays[f"corr_{i}"] = corr
+        tmp = self.matrix_path.with_suffix(".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.matrix_path)
+
+
+class BookCorrelation:
+    """
+    Reader for the published correlation matrices, loaded once at startup
+
+    Books or sports without a measurement are treated as independent.
+    """
+
+    def __init__(self, matrix_path: Optional[str] = None):
+        self.matrix_path = Path(matrix_path or settings.BOOK_CORRELATION_PATH)
+        self.tables: Dict[str, Tuple[Dict[str, int], np.ndarray]] = {}
+        try:
+            with np.load(self.matrix_path) as data:
+                for i, sport in enumerate(data["sports"]):
+                    books = data[f"books_{i}"]
+                    self.tables[str(sport)] = ({str(b): j for j, b in enumerate(books)}, data[f"corr_{i}"])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading bookmaker correlations: {e}")
+
+    def matrix(self, sport: str, bookmakers: Sequence[str]) -> np.ndarray:
+        """Correlation among `bookmakers` (identity where unmeasured)"""
+        n = len(bookmakers)
+        result = np.eye(n)
+        table = self.tables.get(sport)
+        if table is None or n < 2:
+            return result
+        index, corr = table
+        positions = np.array([index.get(b.lower(), -1) for b in bookmakers])
+        known = np.nonzero(positions >= 0)[0]
+        result[np.ix_(known, known)] = corr[np.ix_(positions[known], positions[known])]
+        same = np.equal.outer(np.asarray(bookmakers), np.asarray(bookmakers))
+        result[same] = 1.0  # The same book listed twice is one source
+        return result
+
+    def independence(self, sport: str, bookmakers: Sequence[str], weights: Sequence[float]) -> float:
+        """Share of the weighted evidence that is independent, in (0, 1]"""
+        weights = np.asarray(weights, dtype=float)
+        if len(weights) < 2:
+            return 1.0
+        shared = weights @ self.matrix(sport, bookmakers) @ weights
+        return float(weights @ weights / shared) if shared > 0 else 1.0
+
+
+if __name__ == "__main__":
+    # Manual execution
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Estimate bookmaker residual correlations")
+    parser.add_argument("--sports", nargs="*", default=None)
+    parser.add_argument("--period-days", type=int, default=180)
+    args = parser.parse_args()
+
+    for sport, (books, corr) in BookCorrelationJob(period_days=args.period_days).run(args.sports).items():
+        print(f"\n{sport}")
+        for book, row in zip(books, corr):
+            print(f"  {book:>14} " + " ".join(f"{c:.2f}" for c in row))
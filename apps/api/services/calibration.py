@@ -0,0 +1,163 @@
+"""
+Bookmaker Calibration Job
+
+Measures how well each bookmaker's closing prices predict results and turns
+that into the precision table used by BayesianConsensus:
+1. One vectorized pass over closing_odds ⨝ matches for every
+   (bookmaker, sport) h2h market: Brier, log-loss, calibration error,
+   overround. Only h2h is measured: CALIBRATION_SQL settles outcomes by
+   team name and de-vigs per (match, bookmaker, market), which is
+   meaningless for Over/Under and handicap outcomes across alternate lines.
+   DuckDB is used when its sqlite scanner loads, sqlite3 otherwise
+2. Rows are written to bookmaker_performance for the measurement period
+3. Precision per (sport, market, bookmaker) is derived from excess Brier
+   over the sharpest book and published atomically as JSON
+
+Precision model:
+    excess = max(brier - best_brier, VARIANCE_FLOOR)   # error variance vs truth
+    n_eff = p(1 - p) / excess                          # Beta pseudo-observations
+    precision = n_eff / 10                             # consensus uses precision * 10
+
+so the sharpest book lands on 10 (the old Pinnacle default) and softer
+books scale down with their extra squared error.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema
+from services.analytics import AnalyticsUnavailable, BookmakerCalibration, sqlite_calibration
+
+VARIANCE_FLOOR = 0.0025  # Sharpest book's assumed error variance (precision 10)
+MIN_PRECISION = 1.0
+MAX_PRECISION = 15.0
+CALIBRATED_MARKET = "h2h"  # The only market CALIBRATION_SQL can settle
+
+
+def precision_table(
+    rows: List[BookmakerCalibration],
+    min_bets: int = 100
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """{sport: {market: {bookmaker: precision}}} from calibration rows"""
+    groups: Dict[tuple, List[BookmakerCalibration]] = {}
+    for row in rows:
+        if row.total_bets >= min_bets:
+            groups.setdefault((row.sport_key, row.market_key), []).append(row)
+
+    table: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (sport, market), books in groups.items():
+        best = min(b.brier_score for b in books)
+        for b in books:
+            excess = max(b.brier_score - best, VARIANCE_FLOOR)
+            spread = b.avg_implied_prob * (1 - b.avg_implied_prob)
+            precision = min(MAX_PRECISION, max(MIN_PRECISION, spread / excess / 10))
+            table.setdefault(sport, {}).setdefault(market, {})[b.bookmaker_key] = round(precision, 3)
+    return table
+
+
+class BookmakerCalibrationJob:
+    """
+    Rolling-window calibration of bookmaker closing lines
+
+    Usage:
+        job = BookmakerCalibrationJob(period_days=90)
+        rows = job.run()
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        precision_path: Optional[str] = None,
+        period_days: int = 90,
+        min_bets: int = 100,
+        engine: str = "duckdb"
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.precision_path = Path(precision_path or settings.BOOKMAKER_PRECISION_PATH)
+        self.period_days = period_days
+        self.min_bets = min_bets  # Outcomes needed before a book's precision is trusted
+        self.engine = engine  # 'duckdb' or 'sqlite'
+        ensure_schema(self.db_path)
+
+    def run(self, end: Optional[datetime] = None) -> List[BookmakerCalibration]:
+        end = (end or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=self.period_days)
+
+        rows = self._measure(start, end)
+        self._store_performance(rows, start, end)
+
+        table = precision_table(rows, self.min_bets)
+        self._publish(table, start, end)
+
+        print(f"[CALIBRATION] {len(rows)} bookmaker/sport/market rows for "
+              f"{start.date()} - {end.date()}, precision for "
+              f"{sum(len(b) for m in table.values() for b in m.values())} books")
+        return rows
+
+    def _measure(self, start: datetime, end: datetime) -> List[BookmakerCalibration]:
+        if self.engine == "duckdb":
+            from services.analytics import AnalyticsEngine
+
+            try:
+                engine = AnalyticsEngine(db_path=self.db_path)
+            except AnalyticsUnavailable as e:
+                print(f"[CALIBRATION] {e}; falling back to sqlite3")
+            else:
+                try:
+                    return engine.bookmaker_calibration(market=CALIBRATED_MARKET, start=start, end=end)
+                finally:
+                    engine.close()
+
+        conn = connect(self.db_path)
+        try:
+            return sqlite_calibration(conn, market=CALIBRATED_MARKET, start=start, end=end)
+        finally:
+            conn.close()
+
+    def _store_performance(self, rows: List[BookmakerCalibration], start: datetime, end: datetime):
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO bookmaker_performance
+                    (bookmaker_key, sport_key, market_key,
+                     measurement_period_start, measurement_period_end,
+                     total_bets, avg_implied_prob, avg_actual_prob,
+                     calibration_error, brier_score, log_loss, avg_overround)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        r.bookmaker_key, r.sport_key, r.market_key,
+                        start.date().isoformat(), end.date().isoformat(),
+                        r.total_bets, r.avg_implied_prob, r.avg_actual_prob,
+                        r.calibration_error, r.brier_score, r.log_loss, r.avg_overround
+                    )
+                    for r in rows
+                ])
+        finally:
+            conn.close()
+
+    def _publish(self, table: Dict, start: datetime, end: datetime):
+        """Write the precision table atomically so readers never see half a file"""
+        self.precision_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.precision_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "period_start": start.date().isoformat(),
+            "period_end": end.date().isoformat(),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "precision": table
+        }, indent=2))
+        os.replace(tmp, self.precision_path)
+
+
+# Manual execution
+if __name__ == "__main__":
+    BookmakerCalibrationJob().run()
@@ -0,0 +1,270 @@
+"""
+Closing Line Value (CLV) Engine
+
+Settles recommended_bets in bulk:
+1. Pending recommendations after the watermark are joined set-wise to
+   closing_odds (with each book's closing overround) and match results
+2. CLV and P&L are computed as NumPy arrays, written back with one
+   executemany per run
+3. A shrunk per-(sport, bookmaker) average CLV is published as JSON for
+   the edge calculator (CLVLookup), so the request path never aggregates
+
+CLV = recommended_odds / fair closing odds - 1, where the fair close is
+the same bookmaker's closing price with its margin removed (multiplicative).
+"""
+
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema, get_watermark, set_watermark
+
+WATERMARK_JOB = "clv"
+ALL_SPORTS = "*"
+
+
+@dataclass
+class CLVResult:
+    """Summary of a CLV settlement run"""
+    scanned: int = 0
+    clv_filled: int = 0
+    results_filled: int = 0
+    lookup_entries: int = 0
+
+
+# Pending recommendations with their closing line and result, in one pass
+PENDING_SQL = """
+    WITH books AS (
+        SELECT match_id, bookmaker_key, market_key, SUM(1.0 / closing_odds) AS book_sum
+        FROM closing_odds
+        WHERE closing_odds > 1.0
+        AND match_id IN (
+            SELECT match_id FROM recommended_bets
+            WHERE recommendation_time >= ? AND (clv IS NULL OR result IS NULL)
+        )
+        GROUP BY match_id, bookmaker_key, market_key
+    )
+    SELECT
+        r.id,
+        r.recommended_odds,
+        COALESCE(r.recommended_stake, 1.0),
+        co.closing_odds,
+        b.book_sum,
+        r.market_key = 'h2h' AND m.completed AND m.winner IS NOT NULL AS settled,
+        CASE
+            WHEN r.outcome_name = m.home_team THEN 'home'
+            WHEN r.outcome_name = m.away_team THEN 'away'
+            ELSE 'draw'
+        END = m.winner AS won,
+        -- Two-way moneylines (everything but soccer) are refunded on a tie
+        m.winner = 'draw' AND m.sport_key NOT LIKE 'soccer%'
+            AND r.outcome_name IN (m.home_team, m.away_team) AS push
+    FROM recommended_bets r
+    JOIN matches m ON m.id = r.match_id
+    LEFT JOIN closing_odds co
+        ON co.match_id = r.match_id
+        AND co.bookmaker_key = r.bookmaker_key
+        AND co.market_key = r.market_key
+        AND co.outcome_name = r.outcome_name
+    LEFT JOIN books b
+        ON b.match_id = r.match_id
+        AND b.bookmaker_key = r.bookmaker_key
+        AND b.market_key = r.market_key
+    WHERE r.recommendation_time >= ?
+    AND (r.clv IS NULL OR r.result IS NULL)
+"""
+
+
+class CLVEngine:
+    """
+    Incremental CLV / P&L settlement for recommended_bets
+
+    Usage:
+        engine = CLVEngine()
+        result = engine.run()
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        lookup_path: Optional[str] = None,
+        give_up_days: int = 14,
+        shrinkage: float = 50.0
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.lookup_path = Path(lookup_path or settings.CLV_LOOKUP_PATH)
+        self.give_up = timedelta(days=give_up_days)  # Unsettled this long after kickoff: stop waiting
+        self.shrinkage = shrinkage  # Pseudo-bets of zero CLV added to each lookup average
+        ensure_schema(self.db_path)
+
+    def run(self, now: Optional[datetime] = None) -> CLVResult:
+        now = now or datetime.now(timezone.utc)
+        result = CLVResult()
+
+        conn = connect(self.db_path)
+        try:
+            watermark = get_watermark(conn, WATERMARK_JOB, ALL_SPORTS) or datetime.min.replace(tzinfo=timezone.utc)
+            rows = conn.execute(PENDING_SQL, (watermark, watermark)).fetchall()
+            result.scanned = len(rows)
+
+            if rows:
+                updates = self._settle(rows)
+                with conn:
+                    conn.executemany("""
+                        UPDATE recommended_bets
+                        SET closing_odds = COALESCE(closing_odds, ?),
+                            clv = COALESCE(clv, ?),
+                            result = COALESCE(result, ?),
+                            profit_loss = COALESCE(profit_loss, ?)
+                        WHERE id = ?
+                    """, updates)
+                result.clv_filled = sum(1 for u in updates if u[1] is not None)
+                result.results_filled = sum(1 for u in updates if u[2] is not None)
+
+            with conn:
+                self._advance_watermark(conn, now)
+
+            lookup = self._build_lookup(conn)
+        finally:
+            conn.close()
+
+        self._publish(lookup)
+        result.lookup_entries = sum(len(books) for books in lookup.values())
+        print(f"[CLV] Scanned {result.scanned} pending recommendations: "
+              f"{result.clv_filled} CLV, {result.results_filled} results")
+        return result
+
+    def _settle(self, rows):
+        """Vectorized CLV and P&L; returns executemany parameter tuples"""
+        ids = [r[0] for r in rows]
+        odds = np.array([r[1] for r in rows], dtype=float)
+        stake = np.array([r[2] for r in rows], dtype=float)
+        closing = np.array([np.nan if r[3] is None else r[3] for r in rows], dtype=float)
+        book_sum = np.array([np.nan if r[4] is None else r[4] for r in rows], dtype=float)
+        settled = np.array([bool(r[5]) for r in rows])
+        won = np.array([bool(r[6]) for r in rows])
+        push = np.array([bool(r[7]) for r in rows])
+
+        # Fair closing odds = closing odds * book overround
+        clv = odds / (closing * book_sum) - 1.0
+
+        outcome = np.where(push, 'push', np.where(won, 'win', 'loss'))
+        profit = np.where(push, 0.0, np.where(won, stake * (odds - 1.0), -stake))
+
+        has_close = ~np.isnan(clv)
+        return [
+            (
+                float(closing[i]) if has_close[i] else None,
+                float(clv[i]) if has_close[i] else None,
+                str(outcome[i]) if settled[i] else None,
+                float(profit[i]) if settled[i] else None,
+                ids[i]
+            )
+            for i in range(len(ids))
+        ]
+
+    def _advance_watermark(self, conn: sqlite3.Connection, now: datetime):
+        """
+        Move to the oldest recommendation still waiting on a close or result
+
+        Recommendations for matches that kicked off more than give_up_days
+        ago are no longer waited for (e.g. no closing line was captured).
+        """
+        row = conn.execute("""
+            SELECT MIN(r.recommendation_time)
+            FROM recommended_bets r
+            JOIN matches m ON m.id = r.match_id
+            WHERE (r.clv IS NULL OR r.result IS NULL)
+            AND m.commence_time >= ?
+        """, (now - self.give_up,)).fetchone()
+
+        if row and row[0] is not None:
+            set_watermark(conn, WATERMARK_JOB, ALL_SPORTS, datetime.fromisoformat(row[0]))
+        else:
+            latest = conn.execute("SELECT MAX(recommendation_time) FROM recommended_bets").fetchone()
+            if latest and latest[0] is not None:
+                set_watermark(conn, WATERMARK_JOB, ALL_SPORTS, datetime.fromisoformat(latest[0]))
+
+    def _build_lookup(self, conn: sqlite3.Connection) -> Dict[str, Dict[str, Dict]]:
+        """{sport: {bookmaker: {'clv': shrunk mean, 'bets': n}}}"""
+        lookup: Dict[str, Dict[str, Dict]] = {}
+        for sport, bookmaker, n, total_clv in conn.execute("""
+            SELECT m.sport_key, r.bookmaker_key, COUNT(*), SUM(r.clv)
+            FROM recommended_bets r
+            JOIN matches m ON m.id = r.match_id
+            WHERE r.clv IS NOT NULL
+            GROUP BY m.sport_key, r.bookmaker_key
+        """):
+            # Shrink toward zero so a handful of bets can't swing the edge
+            lookup.setdefault(sport, {})[bookmaker] = {
+                'clv': round(total_clv / (n + self.shrinkage), 6),
+                'bets': n
+            }
+        return lookup
+
+    def _publish(self, lookup: Dict):
+        """Write the lookup atomically so readers never see half a file"""
+        self.lookup_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.lookup_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "clv": lookup
+        }, indent=2))
+        os.replace(tmp, self.lookup_path)
+
+
+class CLVLookup:
+    """
+    Request-path reader for the published CLV table
+
+    Reloads when the file changes (checked at most every check_interval).
+    """
+
+    def __init__(self, lookup_path: Optional[str] = None, check_interval: float = 60.0):
+        self.lookup_path = Path(lookup_path or settings.CLV_LOOKUP_PATH)
+        self.check_interval = check_interval
+        self.table: Dict[str, Dict[str, Dict]] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = float('-inf')
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        try:
+            mtime = self.lookup_path.stat().st_mtime
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            self.table = json.loads(self.lookup_path.read_text()).get("clv", {})
+            self._mtime = mtime
+        except (OSError, ValueError) as e:
+            print(f"Error loading CLV lookup: {e}")
+
+    def get(self, sport: str, bookmaker_key: str) -> Optional[float]:
+        """Historical CLV for this sport/bookmaker, or None if never measured"""
+        self._refresh()
+        entry = self.table.get(sport, {}).get(bookmaker_key.lower())
+        return entry['clv'] if entry else None
+
+
+# Manual execution
+if __name__ == "__main__":
+    CLVEngine().run()
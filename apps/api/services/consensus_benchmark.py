@@ -0,0 +1,414 @@
+"""
+Consensus Benchmark Harness
+
+Replays settled closing lines from historical.db through every consensus
+model so the choice per sport rests on measured numbers:
+1. Closing h2h prices ⨝ results are loaded once into MarketSamples
+   (markets without a complete Pinnacle line are skipped so every model
+   scores the same set)
+2. Each model prices every market; per-market latency and total
+   throughput are timed
+3. Log-loss and Brier per (model, sport) use the same per-outcome scoring
+   as the bookmaker calibration job
+4. Results are written as JSON; --baseline compares against an earlier
+   run and exits non-zero on a regression
+
+Models:
+    bayesian          BayesianConsensus (what OddsService uses)
+    power             power-method de-vig of every book, averaged (batched)
+    pinnacle          power-method de-vig of Pinnacle only
+    weighted_average  BOOKMAKER_WEIGHTS-weighted mean of normalized implied
+                      probabilities (the pre-Bayesian consensus)
+
+The Bayesian prior comes from the historical_matchups mirror with the
+scored match removed (leave-one-out); later matches of the same pairing
+are still counted, so its numbers are slightly optimistic.
+
+The published precision, leader-lag and book-correlation tables are fitted
+on these same closing lines, so they are left out by default (as in
+services/backtest.py); --published-tables scores the bayesian model with
+them, in-sample, and records that in the results file.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from services.bayesian_consensus import BayesianConsensus
+from services.math import BatchDevig
+
+SHARP_BOOK = "pinnacle"
+PROB_CLIP = 1e-6  # Same clipping as the calibration SQL
+
+SAMPLES_SQL = """
+    SELECT
+        m.id, m.sport_key, m.home_team, m.away_team, m.winner,
+        co.bookmaker_key, co.outcome_name, co.closing_odds
+    FROM closing_odds co
+    JOIN matches m ON m.id = co.match_id
+    WHERE m.completed AND m.winner IS NOT NULL
+    AND co.market_key = 'h2h'
+    AND co.closing_odds > 1.0
+    {filters}
+    ORDER BY m.commence_time, m.id
+"""
+
+
+@dataclass
+class MarketSample:
+    """One settled h2h market with every book's closing prices"""
+    match_id: str
+    sport_key: str
+    home_team: str
+    away_team: str
+    outcomes: List[str]
+    winner_index: int
+    prices: Dict[str, List[float]] = field(default_factory=dict)  # bookmaker -> odds per outcome
+
+
+@dataclass
+class ModelScore:
+    """Speed and accuracy of one model on one sport"""
+    model: str
+    sport_key: str
+    markets: int
+    log_loss: float
+    brier_score: float
+    markets_per_sec: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_p99_ms: float
+    batch_markets_per_sec: Optional[float] = None  # Whole-sport batch, if the model has one
+
+
+def load_samples(
+    db_path: Optional[str] = None,
+    sport: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[MarketSample]:
+    """Settled h2h markets with a complete Pinnacle closing line"""
+    filters, params = [], []
+    if sport:
+        filters.append("AND m.sport_key = ?")
+        params.append(sport)
+    if start:
+        filters.append("AND m.commence_time >= ?")
+        params.append(start)
+    if end:
+        filters.append("AND m.commence_time < ?")
+        params.append(end)
+
+    conn = sqlite3.connect(str(db_path or settings.HISTORICAL_DB_PATH))
+    try:
+        rows = conn.execute(SAMPLES_SQL.format(filters="\n    ".join(filters)), params).fetchall()
+    finally:
+        conn.close()
+
+    grouped: Dict[str, dict] = {}
+    for match_id, sport_key, home, away, winner, bookmaker, outcome, odds in rows:
+        g = grouped.setdefault(match_id, {
+            "meta": (sport_key, home, away, winner), "books": {}
+        })
+        g["books"].setdefault(bookmaker, {})[outcome] = odds
+
+    samples = []
+    for match_id, g in grouped.items():
+        sport_key, home, away, winner = g["meta"]
+        sharp = g["books"].get(SHARP_BOOK)
+        if not sharp or home not in sharp or away not in sharp:
+            continue
+
+        outcomes = [home, away] + sorted(o for o in sharp if o not in (home, away))
+        winner_name = {"home": home, "away": away}.get(winner)
+        if winner_name is None:
+            winner_name = next((o for o in outcomes[2:] if o.lower() in ("draw", "tie")), None)
+        if winner_name is None:
+            continue  # Draw result on a two-way line: nothing to score
+
+        samples.append(MarketSample(
+            match_id=match_id,
+            sport_key=sport_key,
+            home_team=home,
+            away_team=away,
+            outcomes=outcomes,
+            winner_index=outcomes.index(winner_name),
+            # Only books that priced every outcome of the sharp line
+            prices={
+                book: [quotes[o] for o in outcomes]
+                for book, quotes in g["books"].items()
+                if all(o in quotes for o in outcomes)
+            }
+        ))
+        if limit and len(samples) >= limit:
+            break
+    return samples
+
+
+class _LeaveOneOutPriors:
+    """historical_matchups lookups with the scored match's own result removed"""
+
+    def __init__(self, priors):
+        self.priors = priors
+        self.sample: Optional[MarketSample] = None
+
+    def get(self, sport: str, team_a: str, team_b: str):
+        record = self.priors.get(sport, team_a, team_b)
+        s = self.sample
+        if not record or s is None or {team_a, team_b} != {s.home_team, s.away_team}:
+            return record
+
+        a_wins, b_wins, draws, total = record
+        winner = s.outcomes[s.winner_index]
+        if winner == team_a:
+            a_wins -= 1
+        elif winner == team_b:
+            b_wins -= 1
+        else:
+            draws -= 1
+        return (max(a_wins, 0), max(b_wins, 0), max(draws, 0), max(total - 1, 0))
+
+
+class ConsensusBenchmark:
+    """
+    Speed and accuracy of the consensus models on settled closing lines
+
+    Usage:
+        bench = ConsensusBenchmark()
+        scores = bench.run()
+        bench.write(scores, "consensus_benchmark.json")
+    """
+
+    def __init__(self, db_path: Optional[str] = None, published_tables: bool = False):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.published_tables = published_tables
+        self.bayesian = BayesianConsensus(db_path=self.db_path)
+        if not published_tables:
+            # Fitted on the closing lines being scored: out-of-sample only without them
+            self.bayesian.measured_precision = {}
+            self.bayesian._precision_checked_at = float("inf")  # Never load the published table
+            self.bayesian.leader_lag.sports = {}
+            self.bayesian.book_correlation.tables = {}
+        self._priors = _LeaveOneOutPriors(self.bayesian.matchups)
+        self.bayesian.matchups = self._priors
+        self.models: Dict[str, Callable[[MarketSample], List[float]]] = {
+            "bayesian": self._bayesian,
+            "power": self._power,
+            "pinnacle": self._pinnacle,
+            "weighted_average": self._weighted_average
+        }
+
+    # Models: each returns probabilities aligned with sample.outcomes
+
+    def _bayesian(self, sample: MarketSample) -> List[float]:
+        self._priors.sample = sample
+        outcomes_odds = {
+            outcome: [
+                {
+                    "bookie": book,
+                    "price": prices[i],
+                    "weight": settings.BOOKMAKER_WEIGHTS.get(book, settings.BOOKMAKER_WEIGHTS["default"])
+                }
+                for book, prices in sample.prices.items()
+            ]
+            for i, outcome in enumerate(sample.outcomes)
+        }
+        results = self.bayesian.calculate_consensus_probabilities(
+            sample.sport_key, sample.home_team, sample.away_team, outcomes_odds
+        )
+        return [results[o].probability for o in sample.outcomes]
+
+    def _power(self, sample: MarketSample) -> List[float]:
+        return self._power_batch([sample])[0]
+
+    @staticmethod
+    def _power_batch(samples: List[MarketSample]) -> List[List[float]]:
+        """Every book of every market de-vigged in one BatchDevig call"""
+        markets, owners = [], []
+        for i, sample in enumerate(samples):
+            for prices in sample.prices.values():
+                markets.append(prices)
+                owners.append(i)
+
+        sums = [np.zeros(len(s.outcomes)) for s in samples]
+        counts = [0] * len(samples)
+        for owner, probs in zip(owners, BatchDevig.calculate(markets, method="power")):
+            if probs:
+                sums[owner] += probs
+                counts[owner] += 1
+        return [(sums[i] / max(counts[i], 1)).tolist() for i in range(len(samples))]
+
+    @staticmethod
+    def _pinnacle(sample: MarketSample) -> List[float]:
+        return BatchDevig.calculate([sample.prices[SHARP_BOOK]], method="power")[0]
+
+    @staticmethod
+    def _weighted_average(sample: MarketSample) -> List[float]:
+        total = np.zeros(len(sample.outcomes))
+        weight_sum = 0.0
+        for book, prices in sample.prices.items():
+            implied = 1.0 / np.array(prices)
+            weight = settings.BOOKMAKER_WEIGHTS.get(book, settings.BOOKMAKER_WEIGHTS["default"])
+            total += weight * implied / implied.sum()
+            weight_sum += weight
+        return (total / weight_sum).tolist()
+
+    # Harness
+
+    def run(
+        self,
+        samples: Optional[List[MarketSample]] = None,
+        models: Optional[List[str]] = None
+    ) -> List[ModelScore]:
+        samples = samples if samples is not None else load_samples(self.db_path)
+        by_sport: Dict[str, List[MarketSample]] = {}
+        for sample in samples:
+            by_sport.setdefault(sample.sport_key, []).append(sample)
+
+        scores = []
+        for name in models or list(self.models):
+            for sport, sport_samples in sorted(by_sport.items()):
+                scores.append(self._score(name, sport, sport_samples))
+                print(f"[BENCHMARK] {name:<16} {sport:<28} n={len(sport_samples):<6} "
+                      f"logloss={scores[-1].log_loss:.4f} brier={scores[-1].brier_score:.4f} "
+                      f"{scores[-1].markets_per_sec:,.0f} markets/s")
+        return scores
+
+    def _score(self, name: str, sport: str, samples: List[MarketSample]) -> ModelScore:
+        model = self.models[name]
+        latencies = np.empty(len(samples))
+        predictions = []
+
+        # The Bayesian model logs every calculation; keep that out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            t_start = time.perf_counter()
+            for i, sample in enumerate(samples):
+                t0 = time.perf_counter()
+                predictions.append(model(sample))
+                latencies[i] = time.perf_counter() - t0
+            elapsed = time.perf_counter() - t_start
+
+        batch_rate = None
+        if name == "power":
+            t0 = time.perf_counter()
+            self._power_batch(samples)
+            batch_rate = len(samples) / max(time.perf_counter() - t0, 1e-9)
+
+        log_loss, brier = score_predictions(predictions, [s.winner_index for s in samples])
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if len(samples) else (0.0, 0.0, 0.0)
+        return ModelScore(
+            model=name,
+            sport_key=sport,
+            markets=len(samples),
+            log_loss=round(log_loss, 6),
+            brier_score=round(brier, 6),
+            markets_per_sec=round(len(samples) / max(elapsed, 1e-9), 1),
+            latency_p50_ms=round(float(p50), 4),
+            latency_p95_ms=round(float(p95), 4),
+            latency_p99_ms=round(float(p99), 4),
+            batch_markets_per_sec=round(batch_rate, 1) if batch_rate else None
+        )
+
+    @staticmethod
+    def best_by_sport(scores: List[ModelScore]) -> Dict[str, str]:
+        """Lowest log-loss model per sport"""
+        best: Dict[str, ModelScore] = {}
+        for s in scores:
+            if s.sport_key not in best or s.log_loss < best[s.sport_key].log_loss:
+                best[s.sport_key] = s
+        return {sport: s.model for sport, s in best.items()}
+
+    def write(self, scores: List[ModelScore], output_path: str):
+        """Machine-readable results, written atomically"""
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "db_path": self.db_path,
+            "published_tables": self.published_tables,  # True: bayesian scores are in-sample
+            "best_by_sport": self.best_by_sport(scores),
+            "scores": [s.__dict__ for s in scores]
+        }, indent=2))
+        os.replace(tmp, path)
+
+
+def score_predictions(predictions: List[List[float]], winners: List[int]) -> Tuple[float, float]:
+    """Mean per-outcome log-loss and Brier (same scoring as bookmaker calibration)"""
+    if not predictions:
+        return 0.0, 0.0
+    p = np.concatenate([np.asarray(pred, dtype=float) for pred in predictions])
+    y = np.concatenate([np.eye(len(pred))[w] for pred, w in zip(predictions, winners)])
+    clipped = np.clip(p, PROB_CLIP, 1.0 - PROB_CLIP)
+    log_loss = -np.mean(y * np.log(clipped) + (1.0 - y) * np.log(1.0 - clipped))
+    brier = np.mean((p - y) ** 2)
+    return float(log_loss), float(brier)
+
+
+def find_regressions(
+    current: Dict,
+    baseline: Dict,
+    max_loss_increase: float = 0.002,
+    max_slowdown: float = 0.5
+) -> List[str]:
+    """
+    Compare two benchmark files
+
+    A regression is a log-loss increase above max_loss_increase, or
+    throughput below (1 - max_slowdown) of the baseline, for any
+    (model, sport) present in both runs.
+    """
+    previous = {(s["model"], s["sport_key"]): s for s in baseline.get("scores", [])}
+    problems = []
+    for s in current.get("scores", []):
+        old = previous.get((s["model"], s["sport_key"]))
+        if not old:
+            continue
+        label = f"{s['model']}/{s['sport_key']}"
+        if s["log_loss"] - old["log_loss"] > max_loss_increase:
+            problems.append(f"{label}: log-loss {old['log_loss']:.4f} -> {s['log_loss']:.4f}")
+        if s["markets_per_sec"] < old["markets_per_sec"] * (1.0 - max_slowdown):
+            problems.append(f"{label}: {old['markets_per_sec']:,.0f} -> {s['markets_per_sec']:,.0f} markets/s")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark consensus models on closing lines")
+    parser.add_argument("--db", default=None, help="Path to historical.db")
+    parser.add_argument("--sport", default=None, help="Only this sport")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum markets")
+    parser.add_argument("--models", default=None, help="Comma-separated subset of models")
+    parser.add_argument("--output", default="consensus_benchmark.json", help="Results file")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--published-tables", action="store_true",
+                        help="Use the published precision / leader-lag / correlation tables (in-sample)")
+    args = parser.parse_args()
+
+    bench = ConsensusBenchmark(db_path=args.db, published_tables=args.published_tables)
+    samples = load_samples(bench.db_path, sport=args.sport, limit=args.limit)
+    scores = bench.run(samples, models=args.models.split(",") if args.models else None)
+    bench.write(scores, args.output)
+    print(f"[BENCHMARK] Best by sport: {bench.best_by_sport(scores)}")
+
+    if args.baseline:
+        current = json.loads(Path(args.output).read_text())
+        regressions = find_regressions(current, json.loads(Path(args.baseline).read_text()))
+        for problem in regressions:
+            print(f"[BENCHMARK] REGRESSION {problem}")
+        sys.exit(1 if regressions else 0)
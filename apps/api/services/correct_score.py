@@ -0,0 +1,260 @@
+"""
+Correct Score Engine (Poisson / Dixon-Coles)
+
+Prices the correct_score market from the match odds instead of guessing:
+1. Consensus: every book's h2h and totals prices are de-vigged in one
+   BatchDevig call and averaged with BOOKMAKER_WEIGHTS, giving
+   P(home), P(draw), P(away) and P(over L) per totals line
+2. Goal rates: home/away Poisson rates and the Dixon-Coles low-score
+   correlation rho are fitted to that consensus by a deterministic two-stage
+   grid search. Each stage builds the score matrix for every grid point at
+   once (outer product of Poisson pmfs times the Dixon-Coles tau terms) and
+   reads all market probabilities off it with one einsum against masks
+3. Without a totals market, rho is fixed and the total goal rate is pulled
+   towards the league average, since h2h alone cannot separate them
+4. Fitted models are cached per match and reused until the consensus moves
+5. Each book's correct_score quote is scored against the matrix:
+   edge = P(score) * odds - 1
+
+Usage:
+    engine = CorrectScoreEngine()
+    model = engine.model(match)
+    bets = engine.price(match, model, quotes)  # AdvancedMarketsService.get_correct_score_odds
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.special import gammaln
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import Match, MarketType
+from services.math import BatchDevig
+
+MAX_GOALS = 10  # Score matrix covers 0..MAX_GOALS per side
+COARSE_RATES = np.round(np.arange(0.1, 4.01, 0.1), 4)
+COARSE_RHOS = np.round(np.arange(-0.2, 0.101, 0.05), 4)
+FINE_STEP = 0.005
+FINE_RHO_STEP = 0.01
+DEFAULT_RHO = -0.05  # Used when no totals market constrains it
+DEFAULT_TOTAL_GOALS = {
+    "soccer_epl": 2.8,
+    "soccer_uefa_champions_league": 2.9,
+    "default": 2.6
+}
+TOTAL_PRIOR_WEIGHT = 1e-3  # Loss per squared goal away from the league average (h2h-only fits)
+
+SCORE_PATTERN = re.compile(r"(\d+)\s*[-:]\s*(\d+)")
+
+
+def poisson_pmf(rates: np.ndarray, max_goals: int = MAX_GOALS) -> np.ndarray:
+    """(..., max_goals + 1) Poisson probabilities of 0..max_goals"""
+    goals = np.arange(max_goals + 1)
+    rates = np.asarray(rates, dtype=float)[..., None]
+    return np.exp(goals * np.log(rates) - rates - gammaln(goals + 1))
+
+
+def score_matrix(home_rate, away_rate, rho, max_goals: int = MAX_GOALS) -> np.ndarray:
+    """
+    Dixon-Coles score probabilities [..., home goals, away goals] for
+    broadcastable rate/rho arrays, renormalised over the truncated grid
+    """
+    home_rate, away_rate, rho = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (home_rate, away_rate, rho))
+    )
+    matrix = poisson_pmf(home_rate, max_goals)[..., :, None] * poisson_pmf(away_rate, max_goals)[..., None, :]
+    matrix[..., 0, 0] *= 1 - home_rate * away_rate * rho
+    matrix[..., 0, 1] *= 1 + home_rate * rho
+    matrix[..., 1, 0] *= 1 + away_rate * rho
+    matrix[..., 1, 1] *= 1 - rho
+    matrix = np.clip(matrix, 0.0, None)
+    return matrix / matrix.sum(axis=(-2, -1), keepdims=True)
+
+
+def market_masks(lines: Sequence[float], max_goals: int = MAX_GOALS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (masks, push masks) over the score grid for [home, draw, away, over L...];
+    whole-number lines are conditioned on no push
+    """
+    h, a = np.meshgrid(np.arange(max_goals + 1), np.arange(max_goals + 1), indexing="ij")
+    total = h + a
+    masks = [h > a, h == a, h < a] + [total > line for line in lines]
+    pushes = [np.zeros_like(h, dtype=bool)] * 3 + [total == line for line in lines]
+    return np.asarray(masks, dtype=float), np.asarray(pushes, dtype=float)
+
+
+def parse_score(name: str, home_team: str, away_team: str) -> Optional[Tuple[int, int]]:
+    """(home goals, away goals) from a correct_score outcome name, None for 'any other'"""
+    found = SCORE_PATTERN.search(name)
+    if not found:
+        return None
+    first, second = int(found.group(1)), int(found.group(2))
+    if away_team and away_team in name and home_team not in name:
+        return second, first  # "Chelsea 2-1" is the away side's score first
+    return first, second
+
+
+@dataclass
+class ScoreModel:
+    match_id: str
+    home_rate: float
+    away_rate: float
+    rho: float
+    matrix: np.ndarray  # (MAX_GOALS + 1, MAX_GOALS + 1) P(home goals, away goals)
+    fit_error: float  # RMS gap to the consensus probabilities
+
+    def probability(self, home_goals: int, away_goals: int) -> float:
+        size = self.matrix.shape[0]
+        if home_goals >= size or away_goals >= size:
+            return 0.0
+        return float(self.matrix[home_goals, away_goals])
+
+
+class CorrectScoreEngine:
+    """
+    Goal-rate fit from match odds and correct-score pricing
+
+    Usage:
+        engine = CorrectScoreEngine()
+        model = engine.model(match)  # h2h (+ totals) bookmakers on the match
+    """
+
+    def __init__(self, max_goals: int = MAX_GOALS, cache_size: int = 512):
+        self.max_goals = max_goals
+        self.cache_size = cache_size
+        self._models: "OrderedDict[str, Tuple[Tuple, ScoreModel]]" = OrderedDict()
+
+    @staticmethod
+    def consensus(match: Match) -> Tuple[Optional[np.ndarray], Dict[float, float]]:
+        """Weighted de-vigged (home, draw, away) and {line: P(over)} across books"""
+        markets, weights, kinds = [], [], []
+        for bookie in match.bookmakers:
+            weight = settings.BOOKMAKER_WEIGHTS.get(bookie.key, settings.BOOKMAKER_WEIGHTS["default"])
+            for market in bookie.markets:
+                prices = {o.name: o for o in market.outcomes}
+                if market.key == MarketType.H2H:
+                    draw = next((o for o in market.outcomes if o.name.lower() in ("draw", "tie")), None)
+                    home, away = prices.get(match.home_team), prices.get(match.away_team)
+                    if home and away and draw:
+                        markets.append([home.price, draw.price, away.price])
+                        weights.append(weight)
+                        kinds.append(None)
+                elif market.key == MarketType.TOTALS:
+                    overs = {o.point: o.price for o in market.outcomes if o.name.lower() == "over"}
+                    unders = {o.point: o.price for o in market.outcomes if o.name.lower() == "under"}
+                    for line in sorted(set(overs) & set(unders) - {None}):
+                        markets.append([overs[line], unders[line]])
+                        weights.append(weight)
+                        kinds.append(float(line))
+        if not markets:
+            return None, {}
+
+        fair = BatchDevig.calculate(markets)
+        h2h, h2h_weight = np.zeros(3), 0.0
+        totals: Dict[float, List[float]] = {}
+        for probs, weight, kind in zip(fair, weights, kinds):
+            if not probs:
+                continue
+            if kind is None:
+                h2h += weight * np.asarray(probs)
+                h2h_weight += weight
+            else:
+                entry = totals.setdefault(kind, [0.0, 0.0])
+                entry[0] += weight * probs[0]
+                entry[1] += weight
+        p_h2h = h2h / h2h_weight if h2h_weight else None
+        return p_h2h, {line: s / w for line, (s, w) in sorted(totals.items())}
+
+    def fit(self, match_id: str, sport: str, p_h2h: np.ndarray, totals: Dict[float, float]) -> ScoreModel:
+        """Deterministic two-stage grid fit of (home rate, away rate, rho)"""
+        lines = list(totals)
+        target = np.concatenate([p_h2h, [totals[line] for line in lines]])
+        masks, pushes = market_masks(lines, self.max_goals)
+        prior_total = DEFAULT_TOTAL_GOALS.get(sport, DEFAULT_TOTAL_GOALS["default"])
+
+        def loss(home_rate, away_rate, rho):
+            matrix = score_matrix(home_rate, away_rate, rho, self.max_goals)
+            hit = np.einsum("...ij,sij->...s", matrix, masks)
+            push = np.einsum("...ij,sij->...s", matrix, pushes)
+            error = ((hit / (1.0 - push) - target) ** 2).sum(axis=-1)
+            if not lines:
+                error = error + TOTAL_PRIOR_WEIGHT * (home_rate + away_rate - prior_total) ** 2
+            return error
+
+        # Stage 1: coarse (home, away, rho) grid
+        rhos = COARSE_RHOS if lines else np.array([DEFAULT_RHO])
+        grid = np.meshgrid(COARSE_RATES, COARSE_RATES, rhos, indexing="ij")
+        errors = loss(*grid)
+        i, j, k = np.unravel_index(np.argmin(errors), errors.shape)
+
+        # Stage 2: fine grid around the coarse optimum
+        step = COARSE_RATES[1] - COARSE_RATES[0]
+        offsets = np.arange(-step, step + FINE_STEP / 2, FINE_STEP)
+        home = np.clip(COARSE_RATES[i] + offsets, 0.02, None)
+        away = np.clip(COARSE_RATES[j] + offsets, 0.02, None)
+        if lines:
+            rho_step = COARSE_RHOS[1] - COARSE_RHOS[0]
+            rhos = np.round(rhos[k] + np.arange(-rho_step, rho_step + FINE_RHO_STEP / 2, FINE_RHO_STEP), 4)
+        else:
+            rhos = rhos[k:k + 1]
+        errors = loss(*np.meshgrid(home, away, rhos, indexing="ij"))
+        i, j, k = np.unravel_index(np.argmin(errors), errors.shape)
+
+        return ScoreModel(
+            match_id=match_id,
+            home_rate=round(float(home[i]), 4),
+            away_rate=round(float(away[j]), 4),
+            rho=float(rhos[k]),
+            matrix=score_matrix(home[i], away[j], rhos[k], self.max_goals),
+            fit_error=float(np.sqrt(errors[i, j, k] / len(target)))
+        )
+
+    def model(self, match: Match) -> Optional[ScoreModel]:
+        """Score model for a match, refitted only when its consensus changes"""
+        p_h2h, totals = self.consensus(match)
+        if p_h2h is None:
+            return None
+
+        key = tuple(np.round(p_h2h, 4)) + tuple((line, round(p, 4)) for line, p in totals.items())
+        cached = self._models.get(match.id)
+        if cached and cached[0] == key:
+            self._models.move_to_end(match.id)
+            return cached[1]
+
+        model = self.fit(match.id, match.sport_key, p_h2h, totals)
+        self._models[match.id] = (key, model)
+        if len(self._models) > self.cache_size:
+            self._models.popitem(last=False)
+        return model
+
+    def price(self, match: Match, model: ScoreModel, quotes: List[Dict]) -> List[Dict]:
+        """Edge of every correct_score quote ({'score', 'odds', 'bookmaker'}) against the model"""
+        priced = []
+        for quote in quotes:
+            score = parse_score(quote["score"], match.home_team, match.away_team)
+            if score is None or not quote.get("odds") or quote["odds"] <= 1.0:
+                continue
+            probability = model.probability(*score)
+            if probability <= 0.0:
+                continue
+            edge = probability * quote["odds"] - 1.0
+            priced.append({
+                "match_id": match.id,
+                "match_name": f"{match.home_team} vs {match.away_team}",
+                "score": f"{score[0]}-{score[1]}",
+                "odds": quote["odds"],
+                "bookmaker": quote["bookmaker"],
+                "true_probability": round(probability, 4),
+                "fair_odds": round(1.0 / probability, 2),
+                "edge": round(edge * 100, 1),  # Percent, as the endpoint always reported
+                "is_mock": False
+            })
+        return priced
@@ -1,19 +1,19 @@
 import asyncio
-from datetime import datetime
-from sqlalchemy.orm import Session
-from db.session import SessionLocal
-from db.models.historical import HistoricalMatch, HistoricalOdds
+from datetime import datetime, timezone
+from typing import Optional
 from services.odds_api import TheOddsApiClient
+from services.ingestion import IngestionQueue, SQLAlchemySink, normalize_matches
 from core.config import settings
 
 class DataCollector:
-    def __init__(self):
+    def __init__(self, queue: Optional[IngestionQueue] = None):
         self.api_client = TheOddsApiClient()
-        self.db = SessionLocal()
+        # Writes go through the write-behind queue (batched, off the request path)
+        self.queue = queue or IngestionQueue(sinks=[SQLAlchemySink()])
 
     async def collect_odds(self, sport_key: str = "soccer_epl", regions: str = "uk,eu,us"):
         """
-        Fetches current odds for a sport and saves them to the historical database.
+        Fetches current odds for a sport and queues them for the historical database.
         """
         print(f"Starting data collection for {sport_key}...")
         try:
@@ -23,43 +23,12 @@ class DataCollector:
                 print(f"No matches found for {sport_key}.")
                 return
 
-            for match_data in matches:
-                # 1. Update or Create Match
-                match = self.db.query(HistoricalMatch).filter(HistoricalMatch.id == match_data.id).first()
-                if not match:
-                    match = HistoricalMatch(
-                        id=match_data.id,
-                        sport_key=match_data.sport_key,
-                        sport_title=match_data.sport_title,
-                        home_team=match_data.home_team,
-                        away_team=match_data.away_team,
-                        commence_time=match_data.commence_time
-                    )
-                    self.db.add(match)
-                    self.db.commit() # Commit to get ID if needed (though ID is string here)
-                
-                # 2. Save Odds Snapshots
-                for bookmaker in match_data.bookmakers:
-                    for market in bookmaker.markets:
-                        for outcome in market.outcomes:
-                            odds_entry = HistoricalOdds(
-                                match_id=match.id,
-                                bookmaker=bookmaker.title,
-                                market_key=market.key,
-                                outcome_name=outcome.name,
-                                price=outcome.price,
-                                timestamp=datetime.utcnow()
-                            )
-                            self.db.add(odds_entry)
-            
-            self.db.commit()
-            print(f"Successfully saved data for {len(matches)} matches in {sport_key}.")
+            records = normalize_matches(matches, snapshot_time=datetime.now(timezone.utc))
+            queued = await self.queue.enqueue(records)
+            print(f"Queued {queued} odds for {len(matches)} matches in {sport_key}.")
 
         except Exception as e:
             print(f"Error collecting data for {sport_key}: {e}")
-            self.db.rollback()
-        finally:
-            self.db.close()
 
     async def collect_all_sports(self):
         """
@@ -73,8 +42,15 @@ class DataCollector:
             "tennis_atp_wimbledon"
         ]
         
-        for sport in sports:
-            await self.collect_odds(sport_key=sport)
+        await self.queue.start()
+        try:
+            await asyncio.gather(*(self.collect_odds(sport_key=sport) for sport in sports))
+        finally:
+            # Drain and flush everything before returning
+            await self.queue.stop()
+            await self.api_client.close()
+        
+        print(f"Saved {self.queue.records_written} odds in {self.queue.batches_written} batches.")
 
 # For manual execution
 if __name__ == "__main__":
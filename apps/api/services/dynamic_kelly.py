@@ -6,14 +6,14 @@ Optimal bet sizing with:
 - Risk tolerance scaling
 - Risk of ruin constraints
 - Geometric growth rate optimization
-- Portfolio correlation awareness
+- Portfolio correlation awareness (joint sizing in services/portfolio_kelly.py)
 
 Returns optimal stake with full risk analysis.
 """
 
 import numpy as np
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
 from enum import Enum
 import sys
 from pathlib import Path
@@ -23,6 +23,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.bayesian_consensus import BayesianResult
 from services.advanced_edge import EdgeAnalysis
+from services.bankroll_sim import risk_of_ruin
+from services.risk_grid import RiskGrid
+from services.portfolio_kelly import PortfolioBet, PortfolioKelly
 
 
 class RiskTolerance(Enum):
@@ -70,6 +73,20 @@ class DynamicKellyCalculator:
     - D grade (poor): 0% Kelly (no bet)
     """
     
+    CONFIDENCE_MULTIPLIERS = {'A': 0.50, 'B': 0.25, 'C': 0.10, 'D': 0.00}
+    RISK_MULTIPLIERS = {
+        RiskTolerance.CONSERVATIVE: 0.5,
+        RiskTolerance.MODERATE: 1.0,
+        RiskTolerance.AGGRESSIVE: 1.5
+    }
+    
+    def __init__(self, risk_grid: Optional[RiskGrid] = None, confidence_multipliers: Optional[Dict[str, float]] = None):
+        # Quality grade -> Kelly fraction (tunable with services/sweep.py)
+        self.confidence_multipliers = {**self.CONFIDENCE_MULTIPLIERS, **(confidence_multipliers or {})}
+        # Precomputed (odds, prob, fraction, variance) risk grid; without it
+        # risk falls back to the cached per-bet simulation
+        self.risk_grid = risk_grid or RiskGrid.load()
+    
     def calculate_optimal_stake(
         self,
         odds: float,
@@ -138,8 +155,9 @@ class DynamicKellyCalculator:
         
         # Risk of ruin
         risk_of_ruin = self._calculate_risk_of_ruin(
+            odds=odds,
+            probability=p,
             f=capped_fraction,
-            edge=edge_analysis.raw_edge,
             variance=true_prob.variance,
             target_drawdown=0.5
         )
@@ -173,6 +191,55 @@ class DynamicKellyCalculator:
             recommendation_reasoning=reasoning
         )
     
+    def size_portfolio(
+        self,
+        value_bets: List,
+        bankroll: float,
+        max_total_fraction: Optional[float] = None,
+        variances: Optional[Sequence[float]] = None
+    ) -> List:
+        """
+        Re-size a set of ValueBets jointly (in place)
+        
+        Each bet's isolated stake is its cap; the portfolio optimizer only
+        scales bets back where they overlap on the same match or where the
+        combined stake would exceed the total cap. Scaled-back bets get
+        their risk of ruin recomputed from the posterior variance (aligned
+        with value_bets), or None when it is not given.
+        """
+        sized = [(b, variances[i] if variances is not None else None)
+                 for i, b in enumerate(value_bets) if b.kelly_fraction]
+        if not sized:
+            return value_bets
+        
+        allocation = PortfolioKelly(max_total_fraction=max_total_fraction).optimize([
+            PortfolioBet(
+                match_id=b.match_id,
+                outcome=b.outcome,
+                odds=b.odds,
+                probability=b.true_probability,
+                max_fraction=b.kelly_fraction
+            )
+            for b, _ in sized
+        ])
+        
+        for (bet, variance), fraction in zip(sized, allocation.fractions):
+            if fraction != bet.kelly_fraction:
+                bet.risk_of_ruin = None if variance is None else self._calculate_risk_of_ruin(
+                    odds=bet.odds,
+                    probability=bet.true_probability,
+                    f=fraction,
+                    variance=variance,
+                    target_drawdown=0.5
+                )
+            bet.kelly_fraction = fraction
+            bet.recommended_stake_pct = fraction * 100
+            bet.kelly_percentage = fraction * 100
+            bet.recommended_stake_amount = bankroll * fraction
+            bet.recommended_stake = bankroll * fraction
+        
+        return value_bets
+    
     def _get_confidence_multiplier(self, quality_score: str) -> float:
         """
         Get Kelly fraction multiplier based on bet quality
@@ -182,13 +249,7 @@ class DynamicKellyCalculator:
         C = 0.10 (tenth Kelly)
         D = 0.00 (no bet)
         """
-        multipliers = {
-            'A': 0.50,
-            'B': 0.25,
-            'C': 0.10,
-            'D': 0.00
-        }
-        return multipliers.get(quality_score, 0.10)
+        return self.confidence_multipliers.get(quality_score, 0.10)
     
     def _get_risk_multiplier(self, risk_tolerance: RiskTolerance) -> float:
         """
@@ -198,39 +259,48 @@ class DynamicKellyCalculator:
         Moderate: 1.0x (standard)
         Aggressive: 1.5x (higher risk for higher growth)
         """
-        multipliers = {
-            RiskTolerance.CONSERVATIVE: 0.5,
-            RiskTolerance.MODERATE: 1.0,
-            RiskTolerance.AGGRESSIVE: 1.5
-        }
-        return multipliers.get(risk_tolerance, 1.0)
+        return self.RISK_MULTIPLIERS.get(risk_tolerance, 1.0)
     
     def _calculate_risk_of_ruin(
         self,
+        odds: float,
+        probability: float,
         f: float,
-        edge: float,
         variance: float,
         target_drawdown: float
     ) -> float:
         """
-        Approximate risk of losing target% of bankroll
+        Probability of a target% drawdown from repeating this bet
         
-        Using simplified gambler's ruin formula
+        Interpolated from the precomputed risk grid when the bet lies inside
+        it; otherwise a seeded Monte Carlo over the posterior
+        (services/bankroll_sim.py), cached per rounded inputs
         """
-        if edge <= 0:
-            return 1.0  # Certain ruin with negative edge
+        grid = self.risk_grid
+        if (
+            grid is not None
+            and grid.meta.get("ruin_level") == target_drawdown
+            and grid.covers(odds, probability, f, variance)
+        ):
+            return float(grid.query(odds, probability, f, variance)["drawdown_risk"])
         
-        # Theoretical Kelly optimal
-        kelly_optimal = edge / variance if variance > 0 else 0
+        return risk_of_ruin(
+            odds=odds,
+            probability=probability,
+            fraction=f,
+            variance=variance,
+            ruin_level=target_drawdown
+        )
+    
+    def risk_metrics(self, odds, probability, fraction, variance) -> Optional[dict]:
+        """
+        Vectorized drawdown risk, growth and doubling time for many bets
         
-        # Over-betting penalty
-        if f > kelly_optimal and kelly_optimal > 0:
-            over_bet_ratio = f / kelly_optimal
-            base_risk = 0.05  # 5% base risk at optimal Kelly
-            return min(1.0, base_risk * (over_bet_ratio ** 2))
-        else:
-            # Under-betting is safer
-            return max(0.001, 0.05 * (f / kelly_optimal if kelly_optimal > 0 else 0))
+        Arrays broadcast together; None if no risk grid is available.
+        """
+        if self.risk_grid is None:
+            return None
+        return self.risk_grid.query(odds, probability, fraction, variance)
     
     def _generate_reasoning(
         self,
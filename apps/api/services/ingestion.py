@@ -0,0 +1,343 @@
+"""
+Odds Snapshot Ingestion Queue
+
+Async write-behind path for odds snapshots:
+1. Producers (collectors, the live odds path) enqueue normalized records
+2. A single consumer drains them into batches (size- or latency-bounded)
+3. Each batch is upserted with one executemany per table into every sink;
+   rows already stored (same price point, same snapshot time) are skipped by
+   the sinks' unique indexes, so the in-memory dedupe is only a fast path
+
+Sinks:
+- SQLAlchemySink: HistoricalMatch / HistoricalOdds via the async session
+- SQLiteSink: matches / odds_snapshots in historical.db (off the event loop)
+
+The queue is bounded, so producers wait (backpressure) instead of growing
+memory without limit when the database falls behind.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import sys
+from pathlib import Path
+
+from sqlalchemy import insert, select
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import Match
+from db.warehouse import connect, ensure_schema
+
+
+@dataclass(frozen=True)
+class OddsSnapshotRecord:
+    """One outcome price from one bookmaker at one point in time"""
+    match_id: str
+    sport_key: str
+    sport_title: str
+    home_team: str
+    away_team: str
+    commence_time: datetime
+    bookmaker_key: str
+    bookmaker_title: str
+    market_key: str
+    outcome_name: str
+    price: float
+    point: Optional[float]
+    snapshot_time: datetime
+
+    @property
+    def dedupe_key(self) -> Tuple:
+        return (self.match_id, self.bookmaker_key, self.market_key,
+                self.outcome_name, self.point, self.snapshot_time)
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def normalize_matches(
+    matches: List[Match],
+    snapshot_time: Optional[datetime] = None
+) -> List[OddsSnapshotRecord]:
+    """
+    Flatten API matches into snapshot records
+
+    Without an explicit snapshot_time each bookmaker's own last_update is
+    used, so re-reading the same (cached) response yields identical records.
+    """
+    records = []
+    for match in matches:
+        for bookmaker in match.bookmakers:
+            taken_at = _utc(snapshot_time or bookmaker.last_update)
+            for market in bookmaker.markets:
+                for outcome in market.outcomes:
+                    records.append(OddsSnapshotRecord(
+                        match_id=match.id,
+                        sport_key=match.sport_key,
+                        sport_title=match.sport_title,
+                        home_team=match.home_team,
+                        away_team=match.away_team,
+                        commence_time=_utc(match.commence_time),
+                        bookmaker_key=bookmaker.key,
+                        bookmaker_title=bookmaker.title,
+                        market_key=market.key,
+                        outcome_name=outcome.name,
+                        price=outcome.price,
+                        point=outcome.point,
+                        snapshot_time=taken_at
+                    ))
+    return records
+
+
+class SQLAlchemySink:
+    """Batch upsert into HistoricalMatch / HistoricalOdds"""
+
+    name = "sqlalchemy"
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from db.session import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+
+    async def write(self, batch: List[OddsSnapshotRecord]):
+        from db.models.historical import HistoricalMatch, HistoricalOdds
+
+        matches: Dict[str, OddsSnapshotRecord] = {}
+        for record in batch:
+            matches.setdefault(record.match_id, record)
+
+        async with self.session_factory() as session:
+            existing = set((await session.execute(
+                select(HistoricalMatch.id).where(HistoricalMatch.id.in_(list(matches)))
+            )).scalars())
+
+            new_matches = [
+                {
+                    "id": r.match_id,
+                    "sport_key": r.sport_key,
+                    "sport_title": r.sport_title,
+                    "home_team": r.home_team,
+                    "away_team": r.away_team,
+                    "commence_time": r.commence_time.replace(tzinfo=None)
+                }
+                for match_id, r in matches.items() if match_id not in existing
+            ]
+            if new_matches:
+                await session.execute(insert(HistoricalMatch), new_matches)
+
+            # Dialect insert for ON CONFLICT DO NOTHING against HistoricalOdds' unique index
+            if session.bind.dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            await session.execute(upsert(HistoricalOdds).on_conflict_do_nothing(), [
+                {
+                    "match_id": r.match_id,
+                    "bookmaker": r.bookmaker_title,
+                    "market_key": r.market_key,
+                    "outcome_name": r.outcome_name,
+                    "price": r.price,
+                    "timestamp": r.snapshot_time.replace(tzinfo=None)
+                }
+                for r in batch
+            ])
+            await session.commit()
+
+
+class SQLiteSink:
+    """Batch upsert into historical.db (matches / odds_snapshots)"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        ensure_schema(self.db_path)
+
+    async def write(self, batch: List[OddsSnapshotRecord]):
+        # sqlite3 is blocking; keep it off the event loop
+        await asyncio.to_thread(self._write_sync, batch)
+
+    def _write_sync(self, batch: List[OddsSnapshotRecord]):
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany("""
+                    INSERT OR IGNORE INTO matches
+                    (id, sport_key, commence_time, home_team, away_team)
+                    VALUES (?, ?, ?, ?, ?)
+                """, list({
+                    r.match_id: (r.match_id, r.sport_key, r.commence_time, r.home_team, r.away_team)
+                    for r in batch
+                }.values()))
+                conn.executemany("""
+                    INSERT OR IGNORE INTO odds_snapshots
+                    (match_id, bookmaker_key, market_key, outcome_name,
+                     odds, point, snapshot_time, time_to_event_hours)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        r.match_id, r.bookmaker_key, r.market_key, r.outcome_name,
+                        r.price, r.point, r.snapshot_time,
+                        (r.commence_time - r.snapshot_time).total_seconds() / 3600
+                    )
+                    for r in batch
+                ])
+        finally:
+            conn.close()
+
+
+class IngestionQueue:
+    """
+    Bounded write-behind queue with a single batching consumer
+
+    Usage:
+        queue = IngestionQueue(sinks=[SQLiteSink()])
+        await queue.start()
+        await queue.enqueue(normalize_matches(matches))
+        await queue.stop()  # Drains and flushes
+    """
+
+    def __init__(
+        self,
+        sinks: List,
+        max_batch: int = 1000,
+        max_latency: float = 1.0,
+        max_pending: int = 20000,
+        dedupe_window: int = 200000
+    ):
+        self.sinks = sinks
+        self.max_batch = max_batch
+        self.max_latency = max_latency  # Seconds a record may wait before flush
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.dedupe_window = dedupe_window
+        self._seen: Dict[Tuple, None] = {}
+        self._consumer: Optional[asyncio.Task] = None
+
+        self.records_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self.records_dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._consumer is not None and not self._consumer.done()
+
+    async def start(self):
+        if not self.running:
+            self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        """Flush everything still queued, then stop the consumer"""
+        if self._consumer is None:
+            return
+        await self.queue.join()
+        self._consumer.cancel()
+        try:
+            await self._consumer
+        except asyncio.CancelledError:
+            pass
+        self._consumer = None
+
+    async def enqueue(self, records: Iterable[OddsSnapshotRecord]) -> int:
+        """
+        Queue records for writing; waits while the queue is full
+
+        Records already seen (same price point at the same snapshot time)
+        are dropped, so polling a cached response does not multiply rows.
+        """
+        queued = 0
+        for record in records:
+            key = record.dedupe_key
+            if key in self._seen:
+                continue
+            self._seen[key] = None
+            await self.queue.put(record)
+            queued += 1
+
+        if len(self._seen) > self.dedupe_window:
+            # Dicts keep insertion order: forget the oldest half
+            for key in list(self._seen)[: self.dedupe_window // 2]:
+                del self._seen[key]
+        return queued
+
+    def enqueue_nowait(self, records: Iterable) -> int:
+        """
+        Queue records without ever waiting (for request handlers)
+
+        When the queue is full the remaining records are dropped and
+        counted in records_dropped instead of delaying the caller.
+        """
+        queued = 0
+        for record in records:
+            key = record.dedupe_key
+            if key in self._seen:
+                continue
+            try:
+                self.queue.put_nowait(record)
+            except asyncio.QueueFull:
+                self.records_dropped += 1
+                continue
+            self._seen[key] = None
+            queued += 1
+
+        if len(self._seen) > self.dedupe_window:
+            for key in list(self._seen)[: self.dedupe_window // 2]:
+                del self._seen[key]
+        return queued
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _flush(self, batch: List[OddsSnapshotRecord]):
+        """Write a batch to every sink; it counts as written only if all of them succeed"""
+        failed = False
+        for sink in self.sinks:
+            try:
+                await sink.write(batch)
+            except Exception as e:
+                failed = True
+                self.write_errors += 1
+                print(f"[INGEST] {sink.name} write failed ({len(batch)} records): {e}")
+        if not failed:
+            self.records_written += len(batch)
+            self.batches_written += 1
+
+
+_ingestion_queue: Optional[IngestionQueue] = None
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    """Process-wide queue used by the live odds path"""
+    global _ingestion_queue
+    if _ingestion_queue is None:
+        sinks = []
+        for name in settings.INGESTION_SINKS.split(","):
+            name = name.strip()
+            if name == "sqlalchemy":
+                sinks.append(SQLAlchemySink())
+            elif name == "sqlite":
+                sinks.append(SQLiteSink())
+        _ingestion_queue = IngestionQueue(sinks=sinks)
+    return _ingestion_queue
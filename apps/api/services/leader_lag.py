@@ -0,0 +1,273 @@
+"""
+Bookmaker Leader-Lag Job
+
+Measures which books move first and which copy them, per sport:
+1. h2h snapshots of matches in the period are binned onto a grid of
+   bin_minutes before kickoff, per (match, outcome) series and bookmaker,
+   forward-filled and differenced into implied-probability changes
+2. Series are processed in chunks as a dense (books, series, bins) array;
+   one rfft along time and an einsum give the cross-spectrum of every book
+   pair, summed over series. A single irfft turns it into cross-correlations
+   at every lag, normalised by each book's total squared change
+3. Per pair the peak correlation within +/- max_lag_minutes and its lag are
+   kept (positive lag = row book leads column book); a book's leadership is
+   its mean signed peak correlation against the others
+4. The compact matrix is published atomically as JSON and read at startup by
+   the steam detector (leaders count as sharp) and BayesianConsensus
+   (followers add little independent information)
+
+Usage:
+    job = LeaderLagJob(period_days=90)
+    table = job.run()
+    matrix = LeaderLagTable()
+    matrix.leaders("soccer_epl")
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema
+
+LEADER_MIN_SCORE = 0.1  # Leadership needed to count as a leader
+LEADERSHIP_WEIGHT = 0.5  # Consensus precision multiplier is 1 + LEADERSHIP_WEIGHT * leadership
+
+SERIES_SQL = """
+    SELECT s.match_id || '|' || s.outcome_name, s.bookmaker_key,
+           CAST(strftime('%s', m.commence_time) AS INTEGER) - CAST(strftime('%s', s.snapshot_time) AS INTEGER),
+           s.odds
+    FROM matches m
+    JOIN odds_snapshots s ON s.match_id = m.id AND s.market_key = 'h2h'
+    WHERE m.sport_key = ? AND m.commence_time >= ? AND m.commence_time < ?
+      AND s.snapshot_time < m.commence_time AND s.odds > 1.0
+"""
+
+
+def cross_correlation(changes: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Summed lagged cross-products of a (books, series, bins) array:
+    out[a, b, max_lag + k] = sum over series and t of x[a, t] * x[b, t + k]
+    """
+    n_bins = changes.shape[2]
+    n_fft = 1 << int(np.ceil(np.log2(max(n_bins + max_lag, 2))))  # No circular wrap within +/- max_lag
+    spectrum = np.fft.rfft(changes, n=n_fft, axis=2)
+    cross = np.einsum("asf,bsf->abf", np.conj(spectrum), spectrum)
+    full = np.fft.irfft(cross, n=n_fft, axis=2)
+    return np.concatenate([full[:, :, n_fft - max_lag:], full[:, :, :max_lag + 1]], axis=2)
+
+
+def price_changes(
+    series: np.ndarray,
+    books: np.ndarray,
+    bins: np.ndarray,
+    prob: np.ndarray,
+    n_series: int,
+    n_books: int,
+    n_bins: int
+) -> np.ndarray:
+    """
+    (books, series, bins) implied-probability changes from time-ordered
+    quotes; the last quote in a bin wins and gaps are forward-filled, so a
+    change lands in the bin where the book moved
+    """
+    grid = np.full((n_books, n_series, n_bins), np.nan)
+    order = np.lexsort((bins, books, series))  # Stable: rows arrive in time order
+    series, books, bins, prob = series[order], books[order], bins[order], prob[order]
+    last = np.r_[(series[1:] != series[:-1]) | (books[1:] != books[:-1]) | (bins[1:] != bins[:-1]), True]
+    grid[books[last], series[last], bins[last]] = prob[last]
+
+    filled = np.isfinite(grid)
+    index = np.where(filled, np.arange(n_bins), 0)
+    np.maximum.accumulate(index, axis=2, out=index)
+    grid = np.take_along_axis(grid, index, axis=2)
+    changes = np.diff(grid, axis=2, prepend=np.nan)
+    return np.nan_to_num(changes, nan=0.0)
+
+
+class LeaderLagJob:
+    """
+    Offline leader/follower measurement over odds_snapshots
+
+    Usage:
+        job = LeaderLagJob(period_days=90, bin_minutes=5, max_lag_minutes=60)
+        table = job.run()
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        matrix_path: Optional[str] = None,
+        period_days: int = 90,
+        bin_minutes: int = 5,
+        max_lag_minutes: int = 60,
+        horizon_hours: int = 48,
+        chunk_series: int = 256,
+        min_series: int = 20
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.matrix_path = Path(matrix_path or settings.LEADER_LAG_PATH)
+        self.period_days = period_days
+        self.bin_seconds = bin_minutes * 60
+        self.max_lag = max(1, max_lag_minutes // bin_minutes)
+        self.n_bins = horizon_hours * 3600 // self.bin_seconds  # Only the last horizon_hours before kickoff
+        self.chunk_series = chunk_series
+        self.min_series = min_series  # Series needed before a sport's matrix is published
+        ensure_schema(self.db_path)
+
+    def run(self, sports: Optional[Sequence[str]] = None, end: Optional[datetime] = None) -> Dict[str, Dict]:
+        end = (end or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=self.period_days)
+
+        conn = connect(self.db_path)
+        try:
+            if sports is None:
+                sports = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT sport_key FROM matches WHERE commence_time >= ? AND commence_time < ?",
+                    (start, end)
+                )]
+            table = {}
+            for sport in sports:
+                rows = conn.execute(SERIES_SQL, (sport, start, end)).fetchall()
+                entry = self.measure(rows)
+                if entry is not None:
+                    table[sport] = entry
+        finally:
+            conn.close()
+
+        self._publish(table, start, end)
+        print(f"[LEADER LAG] {len(table)} sports for {start.date()} - {end.date()}")
+        return table
+
+    def measure(self, rows: List[tuple]) -> Optional[Dict]:
+        """Leader/follower matrix from (series, bookmaker, seconds before kickoff, odds) rows"""
+        if not rows:
+            return None
+        series_keys, bookmaker_keys, before, odds = zip(*rows)
+        series_names, series = np.unique(np.asarray(series_keys), return_inverse=True)
+        bookmakers, books = np.unique(np.asarray(bookmaker_keys), return_inverse=True)
+        before = np.asarray(before, dtype=np.int64)
+        keep = (before >= 0) & (before < self.n_bins * self.bin_seconds)
+        if len(series_names) < self.min_series or len(bookmakers) < 2:
+            return None
+
+        bins = self.n_bins - 1 - before // self.bin_seconds
+        prob = 1.0 / np.asarray(odds, dtype=float)
+        order = np.argsort(-before[keep], kind="stable")  # Oldest quote first
+        series, books, bins, prob = (a[keep][order] for a in (series, books, bins, prob))
+
+        n_books = len(bookmakers)
+        lags = 2 * self.max_lag + 1
+        products = np.zeros((n_books, n_books, lags))
+        energy = np.zeros(n_books)
+        for s0 in range(0, len(series_names), self.chunk_series):
+            chunk = (series >= s0) & (series < s0 + self.chunk_series)
+            if not chunk.any():
+                continue
+            changes = price_changes(
+                series[chunk] - s0, books[chunk], bins[chunk], prob[chunk],
+                min(self.chunk_series, len(series_names) - s0), n_books, self.n_bins
+            )
+            products += cross_correlation(changes, self.max_lag)
+            energy += np.einsum("asb,asb->a", changes, changes)
+
+        norm = np.sqrt(np.outer(energy, energy))
+        corr = np.divide(products, norm[:, :, None], out=np.zeros_like(products), where=norm[:, :, None] > 0)
+        peak = corr.argmax(axis=2)
+        strength = np.take_along_axis(corr, peak[:, :, None], axis=2)[:, :, 0]
+        lag_bins = np.where(strength > 0, peak - self.max_lag, 0)
+        np.fill_diagonal(strength, 0.0)
+        np.fill_diagonal(lag_bins, 0)
+
+        leadership = (np.sign(lag_bins) * strength).sum(axis=1) / max(n_books - 1, 1)
+        return {
+            "bookmakers": bookmakers.tolist(),
+            "lag_minutes": (lag_bins * self.bin_seconds // 60).tolist(),
+            "correlation": np.round(strength, 4).tolist(),
+            "leadership": {b: round(float(s), 4) for b, s in zip(bookmakers, leadership)},
+            "series": int(len(series_names))
+        }
+
+    def _publish(self, table: Dict, start: datetime, end: datetime):
+        """Write the matrix atomically so readers never see half a file"""
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.matrix_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "period_start": start.date().isoformat(),
+            "period_end": end.date().isoformat(),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "bin_minutes": self.bin_seconds // 60,
+            "sports": table
+        }))
+        os.replace(tmp, self.matrix_path)
+
+
+class LeaderLagTable:
+    """
+    Reader for the published leader/follower matrix, loaded once at startup
+
+    Sports without a published matrix return empty leaders and weight 1.0.
+    """
+
+    def __init__(self, matrix_path: Optional[str] = None):
+        self.matrix_path = Path(matrix_path or settings.LEADER_LAG_PATH)
+        self.sports: Dict[str, Dict] = {}
+        try:
+            self.sports = json.loads(self.matrix_path.read_text()).get("sports", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error loading leader-lag matrix: {e}")
+
+    def leadership(self, sport: str, bookmaker_key: str) -> Optional[float]:
+        """Mean signed peak correlation (> 0 leads, < 0 follows), None if unmeasured"""
+        return self.sports.get(sport, {}).get("leadership", {}).get(bookmaker_key.lower())
+
+    def leaders(self, sport: str, min_score: float = LEADER_MIN_SCORE) -> List[str]:
+        scores = self.sports.get(sport, {}).get("leadership", {})
+        return sorted((b for b, s in scores.items() if s >= min_score), key=lambda b: -scores[b])
+
+    def lag_minutes(self, sport: str, leader: str, follower: str) -> Optional[int]:
+        """Minutes by which `follower` trails `leader` at peak correlation"""
+        entry = self.sports.get(sport)
+        if not entry:
+            return None
+        try:
+            i, j = entry["bookmakers"].index(leader), entry["bookmakers"].index(follower)
+        except ValueError:
+            return None
+        return entry["lag_minutes"][i][j]
+
+    def weight(self, sport: str, bookmaker_key: str) -> float:
+        """Consensus precision multiplier: leaders up, followers down"""
+        score = self.leadership(sport, bookmaker_key)
+        if score is None:
+            return 1.0
+        return float(np.clip(1.0 + LEADERSHIP_WEIGHT * score, 0.5, 1.5))
+
+
+if __name__ == "__main__":
+    # Manual execution
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure bookmaker leader/follower lags")
+    parser.add_argument("--sports", nargs="*", default=None)
+    parser.add_argument("--period-days", type=int, default=90)
+    parser.add_argument("--bin-minutes", type=int, default=5)
+    parser.add_argument("--max-lag-minutes", type=int, default=60)
+    args = parser.parse_args()
+
+    result = LeaderLagJob(
+        period_days=args.period_days, bin_minutes=args.bin_minutes, max_lag_minutes=args.max_lag_minutes
+    ).run(args.sports)
+    for sport, entry in result.items():
+        ranked = sorted(entry["leadership"].items(), key=lambda kv: -kv[1])
+        print(f"{sport} ({entry['series']} series): " + ", ".join(f"{b} {s:+.2f}" for b, s in ranked))
@@ -0,0 +1,222 @@
+"""
+Line Movement History
+
+Per-bookmaker, per-outcome price series for one match:
+1. Raw points are read in time order straight off idx_snapshots_match_time
+2. Each series is downsampled with LTTB (Largest-Triangle-Three-Buckets)
+3. Responses are keyed by a cheap fingerprint (row count + latest snapshot
+   of the requested market and bookmaker) that doubles as the HTTP ETag, so unchanged charts cost one index probe
+
+Matches already compacted by services/retention.py fall back to their OHLC
+bars (open at first_time, close at last_time).
+"""
+
+import hashlib
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import OddsHistory, PriceSeries
+from db.warehouse import connect, ensure_schema
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Returns the indices of the points to keep (always includes the first
+    and last point). Series shorter than threshold are returned whole.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(float)
+    y = y.astype(float)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    # Bucket edges over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 2 < len(edges):
+            nxt_start, nxt_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x = x[nxt_start:nxt_end].mean()
+            avg_y = y[nxt_start:nxt_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # Triangle area between the previous pick, each candidate and the average
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
+
+
+class LineHistoryService:
+    """
+    Reads odds_snapshots / odds_bars for the history endpoint
+
+    Usage:
+        service = LineHistoryService()
+        etag = service.fingerprint(match_id, "h2h", points=200)
+        history = service.get_history(match_id, "h2h", points=200)
+    """
+
+    def __init__(self, db_path: Optional[str] = None, cache_size: int = 256):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, OddsHistory]" = OrderedDict()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            ensure_schema(self.db_path)
+            self._schema_ready = True
+        return connect(self.db_path)
+
+    @staticmethod
+    def _scope(match_id: str, market: str, bookmaker: Optional[str]) -> Tuple[str, List[str]]:
+        """WHERE clause shared by the fingerprint and the series it describes"""
+        if bookmaker:
+            return "match_id = ? AND market_key = ? AND bookmaker_key = ?", [match_id, market, bookmaker]
+        return "match_id = ? AND market_key = ?", [match_id, market]
+
+    def fingerprint(
+        self,
+        match_id: str,
+        market: str = "h2h",
+        points: int = 200,
+        bookmaker: Optional[str] = None
+    ) -> Optional[str]:
+        """ETag for the current history, or None if the match has no data in this market (and book)"""
+        scope, params = self._scope(match_id, market, bookmaker)
+        conn = self._connect()
+        try:
+            # Both aggregates are answered from idx_snapshots_asof alone
+            count, latest = conn.execute(f"""
+                SELECT COUNT(*), MAX(snapshot_time)
+                FROM odds_snapshots
+                WHERE {scope}
+            """, params).fetchone()
+            if count == 0:
+                count, latest = conn.execute(f"""
+                    SELECT COUNT(*), MAX(last_time)
+                    FROM odds_bars
+                    WHERE {scope}
+                """, params).fetchone()
+                if count == 0:
+                    return None
+        finally:
+            conn.close()
+
+        key = f"{match_id}|{market}|{points}|{bookmaker or ''}|{count}|{latest}"
+        return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+    def get_history(
+        self,
+        match_id: str,
+        market: str = "h2h",
+        points: int = 200,
+        bookmaker: Optional[str] = None,
+        etag: Optional[str] = None
+    ) -> Optional[OddsHistory]:
+        etag = etag or self.fingerprint(match_id, market, points, bookmaker)
+        if etag is None:
+            return None
+        if etag in self._cache:
+            self._cache.move_to_end(etag)
+            return self._cache[etag]
+
+        raw, compacted = self._load_series(match_id, market, bookmaker)
+
+        series = []
+        downsampled = False
+        for (book, outcome, point), (times, odds) in raw.items():
+            t = np.asarray(times, dtype=np.int64)
+            o = np.asarray(odds, dtype=float)
+            idx = lttb(t, o, points)
+            downsampled = downsampled or len(idx) < len(t)
+            series.append(PriceSeries(
+                bookmaker=book,
+                outcome=outcome,
+                point=point,
+                times=t[idx].tolist(),
+                odds=o[idx].tolist(),
+                raw_points=len(t)
+            ))
+
+        history = OddsHistory(
+            match_id=match_id,
+            market=market,
+            series=series,
+            downsampled=downsampled,
+            compacted=compacted
+        )
+        self._cache[etag] = history
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return history
+
+    def _load_series(
+        self,
+        match_id: str,
+        market: str,
+        bookmaker: Optional[str]
+    ) -> Tuple[Dict[Tuple, Tuple[List[int], List[float]]], bool]:
+        """Group rows into {(bookmaker, outcome, point): (unix_times, odds)}"""
+        scope, params = self._scope(match_id, market, bookmaker)
+        conn = self._connect()
+        try:
+            # ORDER BY snapshot_time walks the index, so no sort step
+            rows = conn.execute(f"""
+                SELECT bookmaker_key, outcome_name, point,
+                       CAST(strftime('%s', snapshot_time) AS INTEGER), odds
+                FROM odds_snapshots
+                WHERE {scope}
+                ORDER BY snapshot_time
+            """, params).fetchall()
+            compacted = False
+
+            if not rows:
+                bars = conn.execute(f"""
+                    SELECT bookmaker_key, outcome_name, point,
+                           CAST(strftime('%s', first_time) AS INTEGER), open_odds,
+                           CAST(strftime('%s', last_time) AS INTEGER), close_odds
+                    FROM odds_bars
+                    WHERE {scope}
+                """, params).fetchall()
+                compacted = bool(bars)
+                rows = []
+                for book, outcome, point, t_open, o_open, t_close, o_close in bars:
+                    # Bars store 0 for "no line"; series use None like the API
+                    point = point or None
+                    rows.append((book, outcome, point, t_open, o_open))
+                    if t_close != t_open:
+                        rows.append((book, outcome, point, t_close, o_close))
+        finally:
+            conn.close()
+
+        grouped: Dict[Tuple, Tuple[List[int], List[float]]] = {}
+        for book, outcome, point, ts, price in rows:
+            times, odds = grouped.setdefault((book, outcome, point), ([], []))
+            times.append(ts)
+            odds.append(price)
+        return grouped, compacted
@@ -0,0 +1,310 @@
+"""
+Spreads & Totals Engine (line-aware consensus)
+
+Handicap and over/under markets are priced per line, and books hang
+different (and alternate) lines, so consensus has to be built per line:
+1. Every quote is flattened onto a common axis: a threshold x on the
+   settling quantity (total goals/points, or home margin for spreads) and
+   a side (+1 = over / home covers, -1 = under / away covers), grouped by
+   (match, market) with alternate_* markets folded into their base market
+2. Each book's two-way pair at a line is de-vigged in one BatchDevig pass;
+   a line with >= MIN_ANCHOR_BOOKS books becomes an anchor whose consensus
+   is the weighted mean logit of P(over), made monotone in x (weighted PAV)
+3. Consensus at any line is logit-linear interpolation between neighbouring
+   anchors (extrapolated at most MAX_EXTRAPOLATION past the outermost one),
+   so a book hanging an odd line is still scored against the market
+4. Every book's (line, price) is scored in one array pass: edge = p * odds - 1
+5. Middles: per match, best price per threshold on each side in a sorted
+   lines index; every under threshold finds the lower over thresholds with
+   one searchsorted, and pairs that win together on at least one integer
+   result are reported
+
+Whole-number lines are scored conditional on no push.
+
+Usage:
+    engine = LineEngine()
+    analysis = engine.analyze(matches, sport="soccer_epl")
+    analysis.value_bets, analysis.middles
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import ArbLeg, LineMiddle, Match, ValueBet
+from services.math import BatchDevig, PowerMethod
+
+LINE_MARKETS = {
+    "spreads": "spreads",
+    "alternate_spreads": "spreads",
+    "totals": "totals",
+    "alternate_totals": "totals",
+}
+MIN_ANCHOR_BOOKS = 2  # Books needed at a line before it anchors the consensus curve
+MAX_EXTRAPOLATION = 1.0  # Furthest a line may sit beyond the outermost anchor (points/goals)
+MAX_MIDDLE_COST = 0.05  # Report middles losing at most 5% of the stake when they miss
+
+
+@dataclass
+class LineQuotes:
+    """Side quotes of a slate, flattened onto (group, threshold, side)"""
+    groups: List[Tuple[int, str]]  # (match index, market)
+    group: np.ndarray
+    bookmaker: List[Tuple[str, str]]  # (key, title) per quote
+    name: List[str]
+    point: np.ndarray
+    side: np.ndarray  # +1 over / home, -1 under / away
+    threshold: np.ndarray
+    price: np.ndarray
+    pairs: np.ndarray  # (n_pairs, 2) quote indices: over side, under side
+
+
+@dataclass
+class LineAnalysis:
+    value_bets: List[ValueBet] = field(default_factory=list)
+    middles: List[LineMiddle] = field(default_factory=list)
+
+
+def flatten(matches: Sequence[Match]) -> LineQuotes:
+    """
+    Side quotes for every spreads/totals line in the slate
+
+    Totals: over/under at point x. Spreads: home covers when the home margin
+    exceeds -point, away covers when it is below its own point, so a normal
+    pair (home -h, away +h) shares threshold x = h.
+    """
+    groups: Dict[Tuple[int, str], int] = {}
+    group, bookmaker, name, point, side, threshold, price = [], [], [], [], [], [], []
+    open_pairs: Dict[Tuple[int, str, float], List[Optional[int]]] = {}
+
+    for m, match in enumerate(matches):
+        for book in match.bookmakers:
+            for market in book.markets:
+                base = LINE_MARKETS.get(market.key)
+                if base is None:
+                    continue
+                g = groups.setdefault((m, base), len(groups))
+                for outcome in market.outcomes:
+                    if outcome.point is None or not 1.01 < outcome.price < 100.0:
+                        continue
+                    if base == "totals":
+                        s = {"over": 1, "under": -1}.get(outcome.name.lower())
+                        x = outcome.point
+                    elif outcome.name == match.home_team:
+                        s, x = 1, -outcome.point
+                    elif outcome.name == match.away_team:
+                        s, x = -1, outcome.point
+                    else:
+                        s = None
+                    if s is None:
+                        continue
+
+                    pair = open_pairs.setdefault((g, book.key, x), [None, None])
+                    pair[0 if s > 0 else 1] = len(price)
+                    group.append(g)
+                    bookmaker.append((book.key, book.title))
+                    name.append(outcome.name)
+                    point.append(outcome.point)
+                    side.append(s)
+                    threshold.append(x)
+                    price.append(outcome.price)
+
+    pairs = [p for p in open_pairs.values() if p[0] is not None and p[1] is not None]
+    return LineQuotes(
+        groups=list(groups),
+        group=np.asarray(group, dtype=np.int64),
+        bookmaker=bookmaker,
+        name=name,
+        point=np.asarray(point, dtype=float),
+        side=np.asarray(side, dtype=np.int64),
+        threshold=np.asarray(threshold, dtype=float),
+        price=np.asarray(price, dtype=float),
+        pairs=np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    )
+
+
+def _decreasing(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted pool-adjacent-violators fit, non-increasing"""
+    blocks: List[List[float]] = []  # [mean, weight, length]
+    for v, w in zip(values, weights):
+        blocks.append([v, w, 1])
+        while len(blocks) > 1 and blocks[-2][0] < blocks[-1][0]:
+            v2, w2, n2 = blocks.pop()
+            v1, w1, n1 = blocks.pop()
+            blocks.append([(v1 * w1 + v2 * w2) / (w1 + w2), w1 + w2, n1 + n2])
+    return np.repeat([b[0] for b in blocks], [b[2] for b in blocks])
+
+
+class LineEngine:
+    """
+    Consensus, value and middles for spreads/totals
+
+    Usage:
+        engine = LineEngine()
+        analysis = engine.analyze(matches, "basketball_nba", bankroll=1000)
+    """
+
+    def __init__(self, devig_method: str = "power", min_anchor_books: int = MIN_ANCHOR_BOOKS):
+        self.devig_method = devig_method
+        self.min_anchor_books = min_anchor_books
+
+    def consensus(self, quotes: LineQuotes) -> np.ndarray:
+        """P(over side wins) at every quote's line; NaN where the market is too thin"""
+        p_over = np.full(len(quotes.price), np.nan)
+        if len(quotes.pairs) == 0:
+            return p_over
+
+        over, under = quotes.pairs[:, 0], quotes.pairs[:, 1]
+        implied = 1.0 / np.column_stack([quotes.price[over], quotes.price[under]])
+        fair = BatchDevig.calculate_array(implied, np.ones_like(implied, dtype=bool), self.devig_method)[:, 0]
+        fair = np.clip(fair, 1e-6, 1 - 1e-6)
+        logit = np.log(fair / (1 - fair))
+        weights = np.array([
+            settings.BOOKMAKER_WEIGHTS.get(quotes.bookmaker[i][0], settings.BOOKMAKER_WEIGHTS["default"])
+            for i in over
+        ])
+
+        # Anchors: one row per (group, line), sorted by group then line
+        keys, inverse = np.unique(
+            np.column_stack([quotes.group[over], quotes.threshold[over]]), axis=0, return_inverse=True
+        )
+        inverse = inverse.ravel()
+        books = np.bincount(inverse, minlength=len(keys))
+        weight = np.bincount(inverse, weights=weights, minlength=len(keys))
+        mean = np.bincount(inverse, weights=weights * logit, minlength=len(keys)) / weight
+        anchored = books >= self.min_anchor_books
+
+        for g in np.unique(quotes.group):
+            rows = anchored & (keys[:, 0] == g)
+            if not rows.any():
+                continue
+            ax = keys[rows, 1]
+            al = _decreasing(mean[rows], weight[rows])
+            at = np.nonzero(quotes.group == g)[0]
+            x = quotes.threshold[at]
+
+            values = np.interp(x, ax, al)
+            if len(ax) >= 2:
+                low, high = x < ax[0], x > ax[-1]
+                values[low] = al[0] + (al[1] - al[0]) / (ax[1] - ax[0]) * (x[low] - ax[0])
+                values[high] = al[-1] + (al[-1] - al[-2]) / (ax[-1] - ax[-2]) * (x[high] - ax[-1])
+                values[(ax[0] - x > MAX_EXTRAPOLATION) | (x - ax[-1] > MAX_EXTRAPOLATION)] = np.nan
+            else:
+                values[x != ax[0]] = np.nan
+            p_over[at] = 1.0 / (1.0 + np.exp(-values))
+        return p_over
+
+    def score(self, quotes: LineQuotes, p_over: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(probability, edge) of every quote's side"""
+        probability = np.where(quotes.side > 0, p_over, 1.0 - p_over)
+        return probability, probability * quotes.price - 1.0
+
+    def middles(self, matches: Sequence[Match], quotes: LineQuotes, total_stake: float = 100.0,
+                max_cost: float = MAX_MIDDLE_COST) -> List[LineMiddle]:
+        """Over/under (home/away) pairs across books that can both win"""
+        found = []
+        for g, (m, market) in enumerate(quotes.groups):
+            over_x, over_i = self._best_by_line(quotes, g, 1)
+            under_x, under_i = self._best_by_line(quotes, g, -1)
+            if not len(over_x) or not len(under_x):
+                continue
+
+            # Sorted-lines index: over thresholds below each under threshold
+            stops = np.searchsorted(over_x, under_x, side="left")
+            for u, stop in enumerate(stops):
+                for o in range(stop):
+                    hits = list(range(math.floor(over_x[o]) + 1, math.ceil(under_x[u])))
+                    if not hits:
+                        continue
+                    legs = (over_i[o], under_i[u])
+                    implied = sum(1.0 / quotes.price[i] for i in legs)
+                    if 1.0 / implied - 1.0 < -max_cost:
+                        continue
+                    found.append(self._middle(matches[m], market, quotes, legs, implied, hits, total_stake))
+        found.sort(key=lambda mid: (-len(mid.middle_values), -mid.miss_return))
+        return found
+
+    @staticmethod
+    def _best_by_line(quotes: LineQuotes, g: int, side: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted thresholds and the quote index of the best price at each"""
+        rows = np.nonzero((quotes.group == g) & (quotes.side == side))[0]
+        if not len(rows):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        order = rows[np.lexsort((-quotes.price[rows], quotes.threshold[rows]))]
+        x = quotes.threshold[order]
+        first = np.r_[True, x[1:] != x[:-1]]
+        return x[first], order[first]
+
+    @staticmethod
+    def _middle(match: Match, market: str, quotes: LineQuotes, legs: Tuple[int, int],
+                implied: float, hits: List[int], total_stake: float) -> LineMiddle:
+        return LineMiddle(
+            match_id=match.id,
+            home_team=match.home_team,
+            away_team=match.away_team,
+            commence_time=match.commence_time,
+            market=market,
+            legs=[
+                ArbLeg(
+                    outcome=quotes.name[i],
+                    point=float(quotes.point[i]),
+                    bookmaker=quotes.bookmaker[i][1],
+                    odds=float(quotes.price[i]),
+                    stake_share=round(1.0 / quotes.price[i] / implied, 6),
+                    stake=round(total_stake / quotes.price[i] / implied, 2)
+                )
+                for i in legs
+            ],
+            width=float(quotes.threshold[legs[1]] - quotes.threshold[legs[0]]),
+            middle_values=hits,
+            miss_return=round(1.0 / implied - 1.0, 6),
+            hit_return=round(2.0 / implied - 1.0, 6)
+        )
+
+    def analyze(self, matches: Sequence[Match], sport: str, bankroll: float = 1000.0,
+                total_stake: float = 100.0) -> LineAnalysis:
+        quotes = flatten(matches)
+        if not len(quotes.price):
+            return LineAnalysis()
+
+        p_over = self.consensus(quotes)
+        probability, edge = self.score(quotes, p_over)
+        threshold = settings.EDGE_THRESHOLDS.get(sport, settings.EDGE_THRESHOLDS["default"])
+
+        value_bets = []
+        for i in np.nonzero(np.nan_to_num(edge, nan=-1.0) > threshold)[0]:
+            m, market = quotes.groups[quotes.group[i]]
+            match = matches[m]
+            point = float(quotes.point[i])
+            label = f"{quotes.name[i]} {point:+g}" if market == "spreads" else f"{quotes.name[i]} {point:g}"
+            stake = PowerMethod.calculate_kelly_stake(float(quotes.price[i]), float(probability[i]), bankroll)
+            value_bets.append(ValueBet(
+                match_id=match.id,
+                home_team=match.home_team,
+                away_team=match.away_team,
+                commence_time=match.commence_time,
+                bookmaker=quotes.bookmaker[i][1],
+                market=market,
+                outcome=label,
+                point=point,
+                odds=float(quotes.price[i]),
+                true_probability=round(float(probability[i]), 6),
+                edge=round(float(edge[i]), 6),
+                expected_value=round(float(edge[i]), 6),
+                raw_edge=round(float(edge[i]), 6),
+                kelly_percentage=stake["kelly_percentage"],
+                recommended_stake=stake["recommended_stake"],
+                recommended_stake_pct=stake["kelly_percentage"],
+                recommended_stake_amount=stake["recommended_stake"]
+            ))
+        value_bets.sort(key=lambda b: b.edge, reverse=True)
+
+        return LineAnalysis(value_bets, self.middles(matches, quotes, total_stake))
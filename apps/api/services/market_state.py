@@ -0,0 +1,305 @@
+"""
+As-Of Market State
+
+"What did every book quote at time T": the (bookmaker x outcome) price
+matrix for a match, or for every upcoming match of a sport:
+1. One-off queries are a single GROUP BY over idx_snapshots_asof
+   (match, market, bookmaker, outcome, line, time, odds): SQLite returns
+   the row holding MAX(snapshot_time) per series straight from the index
+2. Repeated queries on one match (backtests, debugging) load its series
+   once into a sorted in-memory time index; any number of timestamps is
+   then one np.searchsorted over (series, time) keys
+3. Timelines are cached per match and keyed by a (row count, latest
+   snapshot) fingerprint, so new snapshots invalidate them
+
+Usage:
+    engine = MarketStateEngine()
+    state = engine.match_state("abc123", as_of=datetime(2025, 3, 1, 15, tzinfo=timezone.utc))
+    slate = engine.sport_state("soccer_epl", as_of=...)
+"""
+
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import MarketSnapshot
+from db.warehouse import connect, ensure_schema
+
+SERIES_SHIFT = 1 << 34  # Room for unix seconds in the low bits of a (series, time) key
+
+MATCH_QUOTES_SQL = """
+    SELECT market_key, bookmaker_key, outcome_name, point, odds, MAX(snapshot_time)
+    FROM odds_snapshots
+    WHERE match_id = ? AND snapshot_time <= ? {market_filter}
+    GROUP BY market_key, bookmaker_key, outcome_name, point
+"""
+
+# Closing line: one row per (market, bookmaker, outcome) like retention.CLOSING_SQL,
+# so a spreads/totals line the book has since moved off is not reported
+CLOSING_QUOTES_SQL = """
+    SELECT market_key, bookmaker_key, outcome_name, point, odds, snapshot_time
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY market_key, bookmaker_key, outcome_name
+            ORDER BY snapshot_time DESC, id DESC
+        ) AS rn
+        FROM odds_snapshots
+        WHERE match_id = ? AND snapshot_time <= ?
+    )
+    WHERE rn = 1
+"""
+
+SPORT_QUOTES_SQL = """
+    SELECT s.match_id, s.bookmaker_key, s.outcome_name, s.point, s.odds,
+           CAST(strftime('%s', MAX(s.snapshot_time)) AS INTEGER)
+    FROM matches m
+    JOIN odds_snapshots s
+      ON s.match_id = m.id AND s.market_key = ? AND s.snapshot_time <= ?
+    WHERE m.sport_key = ? AND m.commence_time > ?
+    GROUP BY s.match_id, s.bookmaker_key, s.outcome_name, s.point
+"""
+
+TIMELINE_SQL = """
+    SELECT bookmaker_key, outcome_name, point,
+           CAST(strftime('%s', snapshot_time) AS INTEGER), odds
+    FROM odds_snapshots
+    WHERE match_id = ? AND market_key = ?
+    ORDER BY bookmaker_key, outcome_name, point, snapshot_time
+"""
+
+
+def _utc(as_of: Optional[datetime]) -> datetime:
+    if as_of is None:
+        return datetime.now(timezone.utc)
+    if as_of.tzinfo is None:
+        return as_of.replace(tzinfo=timezone.utc)
+    return as_of.astimezone(timezone.utc)
+
+
+@dataclass
+class MarketState:
+    """Price matrix for one match and market at one instant"""
+    match_id: str
+    market: str
+    as_of: datetime
+    bookmakers: List[str]
+    outcomes: List[Tuple[str, Optional[float]]]  # (name, line)
+    prices: np.ndarray  # (bookmakers, outcomes), NaN = no quote yet
+    quoted_at: np.ndarray  # (bookmakers, outcomes) unix seconds, -1 = no quote
+
+    def price(self, bookmaker: str, outcome: str, point: Optional[float] = None) -> Optional[float]:
+        try:
+            value = self.prices[self.bookmakers.index(bookmaker), self.outcomes.index((outcome, point))]
+        except ValueError:
+            return None
+        return None if np.isnan(value) else float(value)
+
+    def best_prices(self) -> Dict[Tuple[str, Optional[float]], Tuple[Optional[str], Optional[float]]]:
+        """(bookmaker, price) of the best quote per outcome"""
+        best = {}
+        for j, outcome in enumerate(self.outcomes):
+            column = self.prices[:, j]
+            if np.isnan(column).all():
+                best[outcome] = (None, None)
+            else:
+                i = int(np.nanargmax(column))
+                best[outcome] = (self.bookmakers[i], float(column[i]))
+        return best
+
+    def to_schema(self) -> MarketSnapshot:
+        return MarketSnapshot(
+            match_id=self.match_id,
+            market=self.market,
+            as_of=self.as_of,
+            bookmakers=self.bookmakers,
+            outcomes=[name for name, _ in self.outcomes],
+            points=[point for _, point in self.outcomes],
+            prices=[[None if np.isnan(p) else float(p) for p in row] for row in self.prices],
+            quoted_at=[[None if t < 0 else int(t) for t in row] for row in self.quoted_at]
+        )
+
+
+def _build_state(match_id: str, market: str, as_of: datetime, quotes: List[Tuple]) -> MarketState:
+    """quotes: (bookmaker, outcome, point, odds, unix_time)"""
+    bookmakers = sorted({q[0] for q in quotes})
+    outcomes = sorted({(q[1], q[2]) for q in quotes}, key=lambda o: (o[0], o[1] is not None, o[1] or 0.0))
+    prices = np.full((len(bookmakers), len(outcomes)), np.nan)
+    quoted_at = np.full(prices.shape, -1, dtype=np.int64)
+    b_index = {b: i for i, b in enumerate(bookmakers)}
+    o_index = {o: j for j, o in enumerate(outcomes)}
+    for book, outcome, point, odds, ts in quotes:
+        i, j = b_index[book], o_index[(outcome, point)]
+        prices[i, j] = odds
+        quoted_at[i, j] = ts
+    return MarketState(match_id, market, as_of, bookmakers, outcomes, prices, quoted_at)
+
+
+class MatchTimeline:
+    """
+    Every quote of one match/market, sorted by (series, time)
+
+    at() / at_many() find each series' latest quote at or before T with a
+    single searchsorted over integer (series, time) keys.
+    """
+
+    def __init__(self, match_id: str, market: str, rows: Sequence[Tuple]):
+        self.match_id = match_id
+        self.market = market
+        series: List[Tuple[str, str, Optional[float]]] = []
+        keys, odds = [], []
+        for book, outcome, point, ts, price in rows:  # Already in (series, time) order
+            if not series or series[-1] != (book, outcome, point):
+                series.append((book, outcome, point))
+            keys.append((len(series) - 1) * SERIES_SHIFT + ts)
+            odds.append(price)
+
+        self.series = series
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.odds = np.asarray(odds, dtype=float)
+        self.starts = np.searchsorted(self.keys, np.arange(len(series), dtype=np.int64) * SERIES_SHIFT)
+
+        self.bookmakers = sorted({s[0] for s in series})
+        self.outcomes = sorted({(s[1], s[2]) for s in series}, key=lambda o: (o[0], o[1] is not None, o[1] or 0.0))
+        b_index = {b: i for i, b in enumerate(self.bookmakers)}
+        o_index = {o: j for j, o in enumerate(self.outcomes)}
+        self._cell = np.array(
+            [b_index[s[0]] * len(self.outcomes) + o_index[(s[1], s[2])] for s in series], dtype=np.int64
+        )
+
+    def at_many(self, times: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Prices and quote times for unix timestamps `times`:
+        two (len(times), bookmakers, outcomes) arrays (NaN / -1 = no quote)
+        """
+        times = np.asarray(times, dtype=np.int64)
+        n_series = len(self.series)
+        shape = (len(times), len(self.bookmakers), len(self.outcomes))
+        prices = np.full((len(times), shape[1] * shape[2]), np.nan)
+        quoted_at = np.full(prices.shape, -1, dtype=np.int64)
+        if n_series == 0:
+            return prices.reshape(shape), quoted_at.reshape(shape)
+
+        queries = np.arange(n_series, dtype=np.int64)[None, :] * SERIES_SHIFT + times[:, None]
+        idx = np.searchsorted(self.keys, queries, side="right") - 1
+        valid = idx >= self.starts[None, :]
+        rows, cols = np.nonzero(valid)
+        hits = idx[rows, cols]
+        prices[rows, self._cell[cols]] = self.odds[hits]
+        quoted_at[rows, self._cell[cols]] = self.keys[hits] - cols * SERIES_SHIFT
+        return prices.reshape(shape), quoted_at.reshape(shape)
+
+    def at(self, as_of: Optional[datetime] = None) -> MarketState:
+        as_of = _utc(as_of)
+        prices, quoted_at = self.at_many([int(as_of.timestamp())])
+        return MarketState(
+            self.match_id, self.market, as_of, list(self.bookmakers), list(self.outcomes), prices[0], quoted_at[0]
+        )
+
+
+class MarketStateEngine:
+    """
+    As-of queries over odds_snapshots
+
+    Usage:
+        engine = MarketStateEngine()
+        state = engine.match_state(match_id, as_of)  # Cached timeline
+        rows = engine.quotes_as_of(match_id, as_of)  # All markets, one query
+        slate = engine.sport_state("soccer_epl", as_of)
+    """
+
+    def __init__(self, db_path: Optional[str] = None, cache_size: int = 512):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.cache_size = cache_size
+        self._timelines: "OrderedDict[Tuple[str, str], Tuple[Tuple, MatchTimeline]]" = OrderedDict()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            ensure_schema(self.db_path)  # Creates the as-of indexes on older databases
+            self._schema_ready = True
+        return connect(self.db_path)
+
+    def timeline(self, match_id: str, market: str = "h2h") -> Optional[MatchTimeline]:
+        """Sorted time index for one match, reloaded only when new snapshots arrive"""
+        conn = self._connect()
+        try:
+            # Both aggregates are answered from the (match_id, snapshot_time) index
+            fingerprint = conn.execute("""
+                SELECT COUNT(*), MAX(snapshot_time)
+                FROM odds_snapshots
+                WHERE match_id = ?
+            """, (match_id,)).fetchone()
+            if fingerprint[0] == 0:
+                return None
+
+            cached = self._timelines.get((match_id, market))
+            if cached and cached[0] == fingerprint:
+                self._timelines.move_to_end((match_id, market))
+                return cached[1]
+
+            timeline = MatchTimeline(match_id, market, conn.execute(TIMELINE_SQL, (match_id, market)).fetchall())
+        finally:
+            conn.close()
+
+        self._timelines[(match_id, market)] = (fingerprint, timeline)
+        if len(self._timelines) > self.cache_size:
+            self._timelines.popitem(last=False)
+        return timeline
+
+    def match_state(self, match_id: str, as_of: Optional[datetime] = None, market: str = "h2h") -> Optional[MarketState]:
+        """Price matrix for one match at as_of (default: now); None if the match has no snapshots"""
+        timeline = self.timeline(match_id, market)
+        if timeline is None or not timeline.series:
+            return None
+        return timeline.at(as_of)
+
+    def quotes_as_of(self, match_id: str, as_of: Optional[datetime] = None, market: Optional[str] = None) -> List[Tuple]:
+        """
+        Latest quote per (market, bookmaker, outcome, line) at or before as_of:
+        (market, bookmaker, outcome, point, odds, snapshot_time) rows
+        """
+        params = [match_id, _utc(as_of)]
+        market_filter = ""
+        if market:
+            market_filter = "AND market_key = ?"
+            params.append(market)
+        conn = self._connect()
+        try:
+            return conn.execute(MATCH_QUOTES_SQL.format(market_filter=market_filter), params).fetchall()
+        finally:
+            conn.close()
+
+    def closing_quotes(self, match_id: str, as_of: Optional[datetime] = None) -> List[Tuple]:
+        """
+        Each book's latest quote per (market, outcome) at or before as_of, on
+        whatever line it was last offered: rows shaped like quotes_as_of
+        """
+        conn = self._connect()
+        try:
+            return conn.execute(CLOSING_QUOTES_SQL, (match_id, _utc(as_of))).fetchall()
+        finally:
+            conn.close()
+
+    def sport_state(self, sport: str, as_of: Optional[datetime] = None, market: str = "h2h") -> List[MarketState]:
+        """Price matrices for every match of a sport not yet started at as_of"""
+        as_of = _utc(as_of)
+        conn = self._connect()
+        try:
+            rows = conn.execute(SPORT_QUOTES_SQL, (market, as_of, sport, as_of)).fetchall()
+        finally:
+            conn.close()
+
+        by_match: Dict[str, List[Tuple]] = {}
+        for match_id, *quote in rows:
+            by_match.setdefault(match_id, []).append(tuple(quote))
+        return [_build_state(match_id, market, as_of, quotes) for match_id, quotes in sorted(by_match.items())]
@@ -0,0 +1,120 @@
+"""
+Head-to-Head Matchup Priors
+
+historical_matchups is the pre-aggregated source for Bayesian priors:
+1. Incremental: triggers in db/schema.sql count each match once, when it
+   is marked completed (or inserted already completed)
+2. One-shot rebuild from matches (after imports / schema upgrades)
+3. MatchupPriors keeps an in-memory mirror so priors cost a dict lookup
+
+Teams are stored in sorted order (team1 < team2); lookups reorient.
+
+Usage:
+    python -m services.matchups --rebuild
+"""
+
+import argparse
+import sqlite3
+import time
+from typing import Dict, Optional, Tuple
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema
+
+
+REBUILD_SQL = """
+    INSERT INTO historical_matchups
+        (sport_key, team1, team2, team1_wins, team2_wins, draws, total_games, last_updated)
+    SELECT
+        sport_key,
+        MIN(home_team, away_team) AS team1,
+        MAX(home_team, away_team) AS team2,
+        SUM(CASE WHEN winner != 'draw' AND (winner = 'home') = (home_team < away_team) THEN 1 ELSE 0 END),
+        SUM(CASE WHEN winner != 'draw' AND (winner = 'home') != (home_team < away_team) THEN 1 ELSE 0 END),
+        SUM(CASE WHEN winner = 'draw' THEN 1 ELSE 0 END),
+        COUNT(*),
+        CURRENT_TIMESTAMP
+    FROM matches
+    WHERE completed AND winner IS NOT NULL
+    GROUP BY sport_key, team1, team2
+"""
+
+
+def rebuild_matchups(db_path: Optional[str] = None) -> int:
+    """Recompute historical_matchups from matches; returns the row count"""
+    db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+    ensure_schema(db_path)
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM historical_matchups")
+            conn.execute(REBUILD_SQL)
+        return conn.execute("SELECT COUNT(*) FROM historical_matchups").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class MatchupPriors:
+    """
+    In-memory mirror of historical_matchups
+
+    The whole table is loaded at once (one row per pairing, so it stays
+    small) and reloaded after refresh_seconds so new results show up.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, refresh_seconds: float = 300.0):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.refresh_seconds = refresh_seconds
+        self._rows: Dict[Tuple[str, str, str], Tuple[int, int, int, int]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def reload(self):
+        rows = {}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                for sport, team1, team2, w1, w2, draws, total in conn.execute("""
+                    SELECT sport_key, team1, team2, team1_wins, team2_wins, draws, total_games
+                    FROM historical_matchups
+                """):
+                    rows[(sport, team1, team2)] = (w1, w2, draws, total)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error loading historical matchups: {e}")
+        self._rows = rows
+        self._loaded_at = time.monotonic()
+
+    def get(self, sport: str, team_a: str, team_b: str) -> Optional[Tuple[int, int, int, int]]:
+        """
+        (team_a wins, team_b wins, draws, total games) or None if never met
+        """
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.reload()
+
+        if team_a <= team_b:
+            return self._rows.get((sport, team_a, team_b))
+        row = self._rows.get((sport, team_b, team_a))
+        if row is None:
+            return None
+        w1, w2, draws, total = row
+        return (w2, w1, draws, total)
+
+
+# Manual execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain historical_matchups")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute from matches")
+    parser.add_argument("--db", default=None, help="Path to historical.db")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        count = rebuild_matchups(args.db)
+        print(f"[MATCHUPS] Rebuilt {count} matchups")
+    else:
+        parser.print_help()
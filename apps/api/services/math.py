@@ -1,5 +1,173 @@
 import numpy as np
-from scipy.optimize import newton
+
+
+class BatchDevig:
+    """
+    Remove the bookmaker margin from many markets at once
+
+    Markets (lists of decimal odds, any number of outcomes) are packed into a
+    zero-padded (n_markets, max_outcomes) array of implied probabilities with
+    a validity mask, and every method runs as array operations over all rows:
+
+    - power:          p = pi^k, sum(p) = 1       (vectorized Halley on k)
+    - shin:           Shin (1993) insider model  (vectorized Newton on z)
+    - odds_ratio:     p/(1-p) = (pi/(1-pi)) / c  (vectorized Newton on c)
+    - additive:       p = pi - (sum(pi) - 1) / n
+    - multiplicative: p = pi / sum(pi)
+
+    2-way markets use closed forms where they exist (Shin reduces to additive,
+    odds ratio has c = sqrt(o1 * o2)). Rows that fail to converge or produce
+    invalid probabilities fall back to multiplicative individually; the rest
+    of the batch is unaffected.
+    """
+
+    METHODS = ("power", "shin", "odds_ratio", "additive", "multiplicative")
+
+    @staticmethod
+    def pad(markets: list[list[float]]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pack markets into (implied, mask, valid)
+
+        Markets with fewer than 2 prices or any price <= 1.0 are marked
+        invalid (all-zero row) and return [] from calculate().
+        """
+        width = max((len(m) for m in markets), default=0)
+        odds = np.ones((len(markets), max(width, 1)))
+        mask = np.zeros_like(odds, dtype=bool)
+        for i, market in enumerate(markets):
+            odds[i, :len(market)] = market
+            mask[i, :len(market)] = True
+
+        valid = (mask.sum(axis=1) >= 2) & np.all(~mask | (odds > 1.0), axis=1)
+        mask &= valid[:, None]
+        implied = np.where(mask, 1.0 / np.where(mask, odds, 1.0), 0.0)
+        return implied, mask, valid
+
+    @classmethod
+    def calculate(
+        cls,
+        markets: list[list[float]],
+        method: str = "power",
+        max_iter: int = 50,
+        tol: float = 1e-12
+    ) -> list[list[float]]:
+        """True probabilities per market (same order and lengths as the input)"""
+        implied, mask, valid = cls.pad(markets)
+        probs = cls.calculate_array(implied, mask, method, max_iter, tol)
+        return [
+            probs[i, :len(market)].tolist() if valid[i] else []
+            for i, market in enumerate(markets)
+        ]
+
+    @classmethod
+    def calculate_array(
+        cls,
+        implied: np.ndarray,
+        mask: np.ndarray,
+        method: str = "power",
+        max_iter: int = 50,
+        tol: float = 1e-12
+    ) -> np.ndarray:
+        """De-vig a padded implied-probability array; padded cells stay 0"""
+        if method not in cls.METHODS:
+            raise ValueError(f"Unknown de-vig method: {method}")
+
+        n = mask.sum(axis=1)
+        total = implied.sum(axis=1)
+        active = n >= 2
+
+        multiplicative = np.where(mask, implied / np.where(active, total, 1.0)[:, None], 0.0)
+        if method == "multiplicative":
+            return multiplicative
+
+        if method == "additive":
+            probs = np.where(mask, implied - ((total - 1.0) / np.maximum(n, 1))[:, None], 0.0)
+            ok = np.all(~mask | (probs > 0), axis=1)
+        elif method == "power":
+            probs, ok = cls._power(implied, mask, max_iter, tol)
+        elif method == "shin":
+            probs, ok = cls._shin(implied, mask, n, total, max_iter, tol)
+        else:
+            probs, ok = cls._odds_ratio(implied, mask, n, max_iter, tol)
+
+        # Per-row fallback: only the rows that failed are normalized instead
+        ok &= np.all(np.isfinite(probs), axis=1)
+        ok &= np.abs(probs.sum(axis=1) - 1.0) < 1e-6
+        return np.where((ok | ~active)[:, None], probs, multiplicative)
+
+    @staticmethod
+    def _power(implied, mask, max_iter, tol):
+        """Halley iteration on k for sum(pi^k) = 1, all rows at once"""
+        log_pi = np.where(mask, np.log(np.where(mask, implied, 1.0)), 0.0)
+        k = np.ones(implied.shape[0])
+        converged = ~mask.any(axis=1)
+
+        for _ in range(max_iter):
+            pk = np.where(mask, np.exp(k[:, None] * log_pi), 0.0)
+            f = pk.sum(axis=1) - 1.0
+            converged |= np.abs(f) < tol
+            if converged.all():
+                break
+
+            f1 = (pk * log_pi).sum(axis=1)
+            f2 = (pk * log_pi * log_pi).sum(axis=1)
+            denom = 2.0 * f1 * f1 - f * f2
+            step = np.where(denom != 0, 2.0 * f * f1 / np.where(denom != 0, denom, 1.0), 0.0)
+            k = np.where(converged, k, k - step)
+
+        probs = np.where(mask, np.exp(k[:, None] * log_pi), 0.0)
+        return probs, converged & (k > 0)
+
+    @staticmethod
+    def _shin(implied, mask, n, total, max_iter, tol):
+        """Newton on the insider share z; 2-way rows use the closed form"""
+        a = np.where(mask, implied ** 2 / np.where(total > 0, total, 1.0)[:, None], 0.0)
+        z = np.zeros(implied.shape[0])
+        converged = n <= 2
+
+        for _ in range(max_iter):
+            zc = z[:, None]
+            roots = np.sqrt(zc ** 2 + 4.0 * (1.0 - zc) * a)
+            p = np.where(mask, (roots - zc) / (2.0 * (1.0 - zc)), 0.0)
+            f = p.sum(axis=1) - 1.0
+            converged |= np.abs(f) < tol
+            if converged.all():
+                break
+
+            droots = (zc - 2.0 * a) / np.where(roots > 0, roots, 1.0)
+            dp = ((droots - 1.0) * (1.0 - zc) + roots - zc) / (2.0 * (1.0 - zc) ** 2)
+            f1 = np.where(mask, dp, 0.0).sum(axis=1)
+            z = np.where(converged, z, z - f / np.where(f1 != 0, f1, 1.0))
+
+        zc = z[:, None]
+        shin = np.where(mask, (np.sqrt(zc ** 2 + 4.0 * (1.0 - zc) * a) - zc) / (2.0 * (1.0 - zc)), 0.0)
+        # For two outcomes Shin's probabilities equal the additive method's
+        additive = np.where(mask, implied - ((total - 1.0) / 2.0)[:, None], 0.0)
+        probs = np.where((n == 2)[:, None], additive, shin)
+        return probs, converged & (z >= 0) & (z < 1)
+
+    @staticmethod
+    def _odds_ratio(implied, mask, n, max_iter, tol):
+        """Newton on c for sum(o / (c + o)) = 1; 2-way rows: c = sqrt(o1 * o2)"""
+        odds_ratio = np.where(mask, implied / np.where(mask, 1.0 - implied, 1.0), 0.0)
+
+        two_way = n == 2
+        c_closed = np.sqrt(np.prod(np.where(mask, odds_ratio, 1.0), axis=1))
+        c = np.where(two_way, c_closed, 1.0)
+        converged = two_way | ~mask.any(axis=1)
+
+        for _ in range(max_iter):
+            share = np.where(mask, odds_ratio / (c[:, None] + odds_ratio), 0.0)
+            f = share.sum(axis=1) - 1.0
+            converged |= np.abs(f) < tol
+            if converged.all():
+                break
+            f1 = -np.where(mask, odds_ratio / (c[:, None] + odds_ratio) ** 2, 0.0).sum(axis=1)
+            c = np.where(converged, c, c - f / np.where(f1 != 0, f1, -1.0))
+
+        probs = np.where(mask, odds_ratio / (c[:, None] + odds_ratio), 0.0)
+        return probs, converged & (c > 0)
+
 
 class PowerMethod:
     @staticmethod
@@ -8,28 +176,12 @@ class PowerMethod:
         Calculates true probabilities from bookmaker odds using the Power Method.
         Solves for k where sum(1/odds^k) = 1.
         """
-        if not odds or any(o <= 1.0 for o in odds):
-            return []
+        return BatchDevig.calculate([odds], method="power")[0] if odds else []
 
-        # Target function: sum(p_implied^k) - 1 = 0
-        # where p_implied = 1/odd
-        implied_probs = np.array([1.0 / o for o in odds])
-        
-        def equation(k):
-            return np.sum(np.power(implied_probs, k)) - 1.0
-
-        try:
-            # Solve for k using Newton-Raphson method
-            # Initial guess k=1 (which would mean no margin if sum=1)
-            k = newton(equation, x0=1.0, maxiter=50)
-            
-            # Calculate true probabilities: p_true = p_implied^k
-            true_probs = np.power(implied_probs, k)
-            return true_probs.tolist()
-        except RuntimeError:
-            # Convergence failed, fallback to basic normalization
-            total_implied = np.sum(implied_probs)
-            return (implied_probs / total_implied).tolist()
+    @staticmethod
+    def calculate_true_probabilities_batch(markets: list[list[float]]) -> list[list[float]]:
+        """Power-method probabilities for many markets in one vectorized solve"""
+        return BatchDevig.calculate(markets, method="power")
 
     @staticmethod
     def calculate_edge(soft_odds: float, true_prob: float) -> float:
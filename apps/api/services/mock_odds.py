@@ -148,6 +148,8 @@ class MockOddsService:
         matches = self.get_live_matches(sport_key=sport)
         value_bets = []
 
+        # Collect every sharp market first so the whole slate is de-vigged in one batch
+        sharp = []
         for match in matches:
             # Find sharp bookmaker (Pinnacle)
             pinnacle = next((b for b in match.bookmakers if b.key == "pinnacle"), None)
@@ -158,10 +160,12 @@ class MockOddsService:
             if not pinnacle_market:
                 continue
 
-            # Calculate true probabilities
-            sharp_odds = [o.price for o in pinnacle_market.outcomes]
-            true_probs = PowerMethod.calculate_true_probabilities(sharp_odds)
-            
+            sharp.append((match, [o.price for o in pinnacle_market.outcomes]))
+
+        # Calculate true probabilities
+        all_true_probs = PowerMethod.calculate_true_probabilities_batch([odds for _, odds in sharp])
+
+        for (match, _), true_probs in zip(sharp, all_true_probs):
             if not true_probs:
                 continue
 
@@ -1,7 +1,7 @@
 import httpx
 from typing import List, Optional
 from core.config import settings
-from core.schemas import Match, Bookmaker, Market, Outcome, MarketType
+from core.schemas import Match, Bookmaker, Market, Outcome, MarketType, OutrightEvent
 from datetime import datetime
 
 import json
@@ -20,31 +20,56 @@ class TheOddsApiClient:
             print("Warning: No API key provided for The Odds API.")
             return []
 
-        # Try cache first
-        redis = await get_redis()
-        cache_key = f"odds:{sport}:{regions}:{markets}"
-        
+        data = await self._fetch(
+            f"/sports/{sport}/odds",
+            {"regions": regions, "markets": markets, "oddsFormat": "decimal"},
+            cache_key=f"odds:{sport}:{regions}:{markets}",
+            ttl_seconds=settings.ODDS_CACHE_MINUTES * 60
+        )
+        return self._parse_matches(data or [])
+
+    async def get_sports(self) -> List[dict]:
+        """In-season sports ({key, title, has_outrights, active, ...}); free of quota"""
+        if not self.api_key:
+            print("Warning: No API key provided for The Odds API.")
+            return []
+        return await self._fetch("/sports", {}) or []
+
+    async def get_outrights(self, sport: str, regions: str = "uk,eu") -> List[OutrightEvent]:
+        """
+        Futures markets (league winner, top scorer, ...) for a has_outrights sport
+
+        Outright prices move slowly, so responses are cached for
+        OUTRIGHTS_CACHE_MINUTES instead of ODDS_CACHE_MINUTES.
+        """
+        if not self.api_key:
+            print("Warning: No API key provided for The Odds API.")
+            return []
+
+        data = await self._fetch(
+            f"/sports/{sport}/odds",
+            {"regions": regions, "markets": "outrights", "oddsFormat": "decimal"},
+            cache_key=f"outrights:{sport}:{regions}",
+            ttl_seconds=settings.OUTRIGHTS_CACHE_MINUTES * 60
+        )
+        return self._parse_outrights(data or [])
+
+    async def _fetch(self, path: str, params: dict, cache_key: Optional[str] = None, ttl_seconds: int = 0):
+        """GET an API path (raw JSON), through the Redis cache when a key is given"""
+        redis = await get_redis() if cache_key else None
+
         if redis:
             try:
                 cached_data = await redis.get(cache_key)
                 if cached_data:
                     print(f"Using cached odds for {cache_key}")
-                    data = json.loads(cached_data)
-                    return self._parse_matches(data, markets)
+                    return json.loads(cached_data)
             except Exception as e:
                 print(f"Redis error: {e}")
 
         try:
-            print(f"Fetching fresh odds from API for {sport} ({markets})...")
-            response = await self.client.get(
-                f"/sports/{sport}/odds",
-                params={
-                    "apiKey": self.api_key,
-                    "regions": regions,
-                    "markets": markets,
-                    "oddsFormat": "decimal",
-                }
-            )
+            print(f"Fetching fresh odds from API: {path}...")
+            response = await self.client.get(path, params={"apiKey": self.api_key, **params})
             response.raise_for_status()
             
             # Log quota usage
@@ -57,43 +82,19 @@ class TheOddsApiClient:
             # Cache the raw response data
             if redis and data:
                 try:
-                    await redis.setex(
-                        cache_key,
-                        settings.ODDS_CACHE_MINUTES * 60,
-                        json.dumps(data)
-                    )
+                    await redis.setex(cache_key, ttl_seconds, json.dumps(data))
                 except Exception as e:
                     print(f"Failed to cache odds: {e}")
 
-            return self._parse_matches(data)
+            return data
         except Exception as e:
-            print(f"Error fetching odds: {e}")
-            return []
+            print(f"Error fetching {path}: {e}")
+            return None
 
     def _parse_matches(self, data: List[dict]) -> List[Match]:
         matches = []
         for item in data:
             try:
-                bookmakers = []
-                for bookie in item.get("bookmakers", []):
-                    markets = []
-                    for market in bookie.get("markets", []):
-                        outcomes = [
-                            Outcome(name=o["name"], price=o["price"])
-                            for o in market.get("outcomes", [])
-                        ]
-                        markets.append(Market(
-                            key=market.get("key", "h2h"),
-                            outcomes=outcomes
-                        ))
-                    
-                    bookmakers.append(Bookmaker(
-                        key=bookie["key"],
-                        title=bookie["title"],
-                        last_update=datetime.fromisoformat(bookie["last_update"].replace("Z", "+00:00")),
-                        markets=markets
-                    ))
-
                 matches.append(Match(
                     id=item["id"],
                     sport_key=item["sport_key"],
@@ -101,12 +102,51 @@ class TheOddsApiClient:
                     commence_time=datetime.fromisoformat(item["commence_time"].replace("Z", "+00:00")),
                     home_team=item["home_team"],
                     away_team=item["away_team"],
-                    bookmakers=bookmakers
+                    bookmakers=self._parse_bookmakers(item)
                 ))
             except Exception as e:
                 print(f"Error parsing match {item.get('id')}: {e}")
                 continue
         return matches
 
+    def _parse_outrights(self, data: List[dict]) -> List[OutrightEvent]:
+        events = []
+        for item in data:
+            try:
+                events.append(OutrightEvent(
+                    id=item["id"],
+                    sport_key=item["sport_key"],
+                    sport_title=item["sport_title"],
+                    commence_time=datetime.fromisoformat(item["commence_time"].replace("Z", "+00:00")),
+                    bookmakers=self._parse_bookmakers(item)
+                ))
+            except Exception as e:
+                print(f"Error parsing outright {item.get('id')}: {e}")
+                continue
+        return events
+
+    @staticmethod
+    def _parse_bookmakers(item: dict) -> List[Bookmaker]:
+        bookmakers = []
+        for bookie in item.get("bookmakers", []):
+            markets = []
+            for market in bookie.get("markets", []):
+                outcomes = [
+                    Outcome(name=o["name"], price=o["price"], point=o.get("point"))
+                    for o in market.get("outcomes", [])
+                ]
+                markets.append(Market(
+                    key=market.get("key", "h2h"),
+                    outcomes=outcomes
+                ))
+            
+            bookmakers.append(Bookmaker(
+                key=bookie["key"],
+                title=bookie["title"],
+                last_update=datetime.fromisoformat(bookie["last_update"].replace("Z", "+00:00")),
+                markets=markets
+            ))
+        return bookmakers
+
     async def close(self):
         await self.client.aclose()
@@ -7,11 +7,21 @@ Now uses:
 - Dynamic Kelly (replaces fixed 25%)
 """
 
-from typing import List
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 from core.config import settings
-from core.schemas import ValueBet, MarketType
+from core.schemas import Match, OutrightBet, ValueBet, MarketType
 from services.mock_odds import MockOddsService
 from services.odds_api import TheOddsApiClient
+from services.ingestion import get_ingestion_queue, normalize_matches
+from services.clv import CLVLookup
+from services.recommendations import RecommendationRecord, get_recommendation_queue
+from services.lines import LineAnalysis, LineEngine
+from services.correct_score import CorrectScoreEngine
+from services.outrights import OutrightsEngine
+from services.advanced_markets import AdvancedMarketsService
+from services.steam import SteamDetector
 
 # Phase 1: Advanced Mathematics
 from services.bayesian_consensus import BayesianConsensus
@@ -28,6 +38,13 @@ class OddsService:
         self.bayesian = BayesianConsensus()
         self.edge_calculator = AdvancedEdgeCalculator()
         self.kelly_calculator = DynamicKellyCalculator()
+        self.line_engine = LineEngine()  # Spreads/totals
+        self.correct_score_engine = CorrectScoreEngine()  # Caches fitted score matrices per match
+        self.advanced_markets = AdvancedMarketsService()
+        self.outrights_engine = OutrightsEngine()
+        self._outrights_cache: Dict[Tuple, Tuple[datetime, List[OutrightBet]]] = {}  # Expiry, bets
+        self.steam_detector = SteamDetector(leader_lag=self.bayesian.leader_lag)  # Fed by every live refresh
+        self.clv_lookup = CLVLookup()  # Published by the CLV settlement job
 
     async def get_value_bets(
         self, 
@@ -53,6 +70,13 @@ class OddsService:
             print(f"No live matches available for {sport}")
             return []
 
+        # Write-behind: snapshots are persisted by the ingestion consumer
+        ingestion_queue = get_ingestion_queue()
+        if ingestion_queue.running:
+            await ingestion_queue.enqueue(normalize_matches(matches))
+
+        self.steam_detector.observe(matches)
+
         # Convert risk tolerance string to enum
         risk_enum = RiskTolerance.MODERATE
         if risk_tolerance.lower() == "conservative":
@@ -60,214 +84,337 @@ class OddsService:
         elif risk_tolerance.lower() == "aggressive":
             risk_enum = RiskTolerance.AGGRESSIVE
 
-        value_bets = []
+        value_bets, bookmaker_keys = self.find_value_bets(matches, sport, bankroll, risk_enum)
+
+        # Record what we recommended (fire-and-forget, never delays the response)
+        recommendation_queue = get_recommendation_queue()
+        if recommendation_queue.running and value_bets:
+            recommendation_queue.enqueue_nowait(
+                RecommendationRecord.from_value_bet(bet, sport, key)
+                for bet, key in zip(value_bets, bookmaker_keys)
+            )
         
-        for match in matches:
-            # Step 1: Prepare odds data for Bayesian consensus
-            outcome_odds = {}
+        # Print debug info
+        if value_bets:
+            print(f"\nValue Bets Found (Bayesian Model): {len(value_bets)}")
+            best_bet = max(value_bets, key=lambda x: x.risk_adjusted_edge)
+            print(f"Best bet: {best_bet.outcome} @ {best_bet.odds}")
+            print(f"  Raw Edge: {best_bet.raw_edge * 100:.2f}%")
+            print(f"  Risk-Adjusted: {best_bet.risk_adjusted_edge * 100:.2f}%")
+            print(f"  Quality: {best_bet.quality_score}")
+            print(f"  Confidence: {best_bet.confidence_score}")
+            print(f"  Recommended Stake: ${best_bet.recommended_stake_amount:.2f} ({best_bet.recommended_stake_pct:.2f}%)")
+        else:
+            print(f"\nNo value bets found for {sport} (after Bayesian + risk adjustments)")
+        
+        return value_bets
+    
+    
+    def analyze_match(self, match: Match, sport: str) -> List[Tuple]:
+        """
+        Steps 1-4 for one match: Bayesian consensus, liquidity and the
+        risk-adjusted edge of every priced h2h outcome
+
+        Returns (bookmaker, outcome, BayesianResult, EdgeAnalysis) tuples,
+        before any threshold; the parameter sweep (services/sweep.py)
+        replays these.
+        """
+        # Step 1: Prepare odds data for Bayesian consensus
+        outcome_odds = {}
+        
+        for bookie in match.bookmakers:
+            market = next((m for m in bookie.markets if m.key == MarketType.H2H), None)
+            if not market:
+                continue
             
-            for bookie in match.bookmakers:
-                market = next((m for m in bookie.markets if m.key == MarketType.H2H), None)
-                if not market:
+            for outcome in market.outcomes:
+                # Validate odds (filter garbage data)
+                if outcome.price > 100.0 or outcome.price < 1.01:
                     continue
                 
+                if outcome.name not in outcome_odds:
+                    outcome_odds[outcome.name] = []
+                
+                outcome_odds[outcome.name].append({
+                    "bookie": bookie.key,
+                    "price": outcome.price,
+                    "weight": settings.BOOKMAKER_WEIGHTS.get(
+                        bookie.key, 
+                        settings.BOOKMAKER_WEIGHTS["default"]
+                    )
+                })
+        
+        if not outcome_odds:
+            return []
+        
+        # Step 2: Calculate Bayesian consensus probabilities
+        try:
+            bayesian_results = self.bayesian.calculate_consensus_probabilities(
+                sport=sport,
+                home_team=match.home_team,
+                away_team=match.away_team,
+                outcomes_odds=outcome_odds
+            )
+        except Exception as e:
+            print(f"Bayesian calculation error: {e}")
+            return []
+        
+        # Step 3: Create market data for liquidity scoring
+        all_bookmakers = []
+        all_prices = []
+        
+        for bookie in match.bookmakers:
+            market = next((m for m in bookie.markets if m.key == MarketType.H2H), None)
+            if market:
                 for outcome in market.outcomes:
-                    # Validate odds (filter garbage data)
-                    if outcome.price > 100.0 or outcome.price < 1.01:
-                        continue
-                    
-                    if outcome.name not in outcome_odds:
-                        outcome_odds[outcome.name] = []
-                    
-                    outcome_odds[outcome.name].append({
-                        "bookie": bookie.key,
-                        "price": outcome.price,
-                        "weight": settings.BOOKMAKER_WEIGHTS.get(
-                            bookie.key, 
-                            settings.BOOKMAKER_WEIGHTS["default"]
-                        )
-                    })
-            
-            if not outcome_odds:
-                continue
-            
-            # Step 2: Calculate Bayesian consensus probabilities
-            try:
-                bayesian_results = self.bayesian.calculate_consensus_probabilities(
-                    sport=sport,
-                    home_team=match.home_team,
-                    away_team=match.away_team,
-                    outcomes_odds=outcome_odds
-                )
-            except Exception as e:
-                print(f"Bayesian calculation error: {e}")
-                continue
-            
-            # Step 3: Create market data for liquidity scoring
-            all_bookmakers = []
-            all_prices = []
-            
-            for bookie in match.bookmakers:
-                market = next((m for m in bookie.markets if m.key == MarketType.H2H), None)
-                if market:
-                    for outcome in market.outcomes:
-                        if 1.01 < outcome.price < 100.0:
-                            all_bookmakers.append({
-                                'bookie': bookie.key,
-                                'price': outcome.price
-                            })
-                            all_prices.append(outcome.price)
-            
-            if not all_prices:
+                    if 1.01 < outcome.price < 100.0:
+                        all_bookmakers.append({
+                            'bookie': bookie.key,
+                            'price': outcome.price
+                        })
+                        all_prices.append(outcome.price)
+        
+        if not all_prices:
+            return []
+        
+        spread_pct = (max(all_prices) - min(all_prices)) / min(all_prices)
+        avg_overround = sum(1/p for p in all_prices) / len(all_prices) - 1.0
+        
+        market_data = MarketData(
+            bookmakers=all_bookmakers,
+            num_bookmakers=len(set(b['bookie'] for b in all_bookmakers)),
+            spread_percentage=spread_pct,
+            avg_overround=avg_overround
+        )
+        
+        # Step 4: Advanced edge for every priced outcome
+        analysis = []
+        for bookie in match.bookmakers:
+            market = next((m for m in bookie.markets if m.key == MarketType.H2H), None)
+            if not market:
                 continue
             
-            spread_pct = (max(all_prices) - min(all_prices)) / min(all_prices)
-            avg_overround = sum(1/p for p in all_prices) / len(all_prices) - 1.0
-            
-            market_data = MarketData(
-                bookmakers=all_bookmakers,
-                num_bookmakers=len(set(b['bookie'] for b in all_bookmakers)),
-                spread_percentage=spread_pct,
-                avg_overround=avg_overround
-            )
-            
-            # Step 4: Find value bets with advanced edge calculation
-            for bookie in match.bookmakers:
-                market = next((m for m in bookie.markets if m.key == MarketType.H2H), None)
-                if not market:
+            for outcome in market.outcomes:
+                # Get Bayesian result for this outcome
+                bayesian_result = bayesian_results.get(outcome.name)
+                if not bayesian_result:
                     continue
                 
-                for outcome in market.outcomes:
-                    # Get Bayesian result for this outcome
-                    bayesian_result = bayesian_results.get(outcome.name)
-                    if not bayesian_result:
-                        continue
-                    
-                    # Validate odds
-                    if outcome.price > 100.0 or outcome.price < 1.01:
-                        continue
-                    
-                    # Get bookmaker reliability
-                    # TODO: Load from historical performance once we have data
-                    bookie_reliability_map = {
-                        'pinnacle': 1.0,
-                        'draftkings': 0.92,
-                        'fanduel': 0.90,
-                        'betfair': 0.95,
-                        'bet365': 0.88,
-                        'default': 0.75
-                    }
-                    bookie_reliability = bookie_reliability_map.get(
-                        bookie.key.lower(),
-                        bookie_reliability_map['default']
+                # Validate odds
+                if outcome.price > 100.0 or outcome.price < 1.01:
+                    continue
+                
+                # Get bookmaker reliability
+                # TODO: Load from historical performance once we have data
+                bookie_reliability_map = {
+                    'pinnacle': 1.0,
+                    'draftkings': 0.92,
+                    'fanduel': 0.90,
+                    'betfair': 0.95,
+                    'bet365': 0.88,
+                    'default': 0.75
+                }
+                bookie_reliability = bookie_reliability_map.get(
+                    bookie.key.lower(),
+                    bookie_reliability_map['default']
+                )
+                
+                # Calculate advanced edge
+                try:
+                    edge_analysis = self.edge_calculator.calculate_comprehensive_edge(
+                        bet_odds=outcome.price,
+                        true_prob=bayesian_result,
+                        market_data=market_data,
+                        bookie_reliability=bookie_reliability,
+                        historical_clv=self.clv_lookup.get(sport, bookie.key)
                     )
-                    
-                    # Calculate advanced edge
+                except Exception as e:
+                    print(f"Edge calculation error: {e}")
+                    continue
+                
+                analysis.append((bookie, outcome, bayesian_result, edge_analysis))
+        
+        return analysis
+    
+    def find_value_bets(
+        self,
+        matches: List[Match],
+        sport: str,
+        bankroll: float = 1000.0,
+        risk_enum: RiskTolerance = RiskTolerance.MODERATE
+    ) -> Tuple[List[ValueBet], List[str]]:
+        """
+        Consensus -> edge -> Kelly over a slate of matches (no I/O)
+
+        Shared by the live endpoint and the historical backtester
+        (services/backtest.py). Returns the value bets and, per bet, the
+        bookmaker key.
+        """
+        value_bets = []
+        bookmaker_keys = []  # ValueBet only carries the title; the log needs the key
+        variances = []  # Posterior variance per bet, for risk of ruin after portfolio sizing
+        
+        for match in matches:
+            for bookie, outcome, bayesian_result, edge_analysis in self.analyze_match(match, sport):
+                # Get sport-specific edge threshold
+                edge_threshold = settings.EDGE_THRESHOLDS.get(
+                    sport,
+                    settings.EDGE_THRESHOLDS['default']
+                )
+            
+                # Only recommend if risk-adjusted edge exceeds threshold
+                if edge_analysis.risk_adjusted_edge > edge_threshold:
+                
+                    # Calculate Kelly stake recommendation
                     try:
-                        edge_analysis = self.edge_calculator.calculate_comprehensive_edge(
-                            bet_odds=outcome.price,
+                        stake_rec = self.kelly_calculator.calculate_optimal_stake(
+                            odds=outcome.price,
                             true_prob=bayesian_result,
-                            market_data=market_data,
-                            bookie_reliability=bookie_reliability,
-                            historical_clv=None  # Will add after we collect CLV data
+                            edge_analysis=edge_analysis,
+                            bankroll=bankroll,
+                            risk_tolerance=risk_enum
                         )
                     except Exception as e:
-                        print(f"Edge calculation error: {e}")
+                        print(f"Kelly calculation error: {e}")
                         continue
+                
+                    # Generate affiliate URL
+                    affiliate_url = None
+                    if "bet365" in bookie.key.lower():
+                        affiliate_url = settings.BET365_AFFILIATE_URL
+                    elif "williamhill" in bookie.key.lower():
+                        affiliate_url = settings.WILLIAMHILL_AFFILIATE_URL
+                    elif "unibet" in bookie.key.lower():
+                        affiliate_url = settings.UNIBET_AFFILIATE_URL
+                    elif "pinnacle" in bookie.key.lower():
+                        affiliate_url = settings.PINNACLE_AFFILIATE_URL
+                
+                    steam = self.steam_detector.signal(match.id, outcome.name)
+                
+                    # Create ValueBet with ALL new Phase 1 fields
+                    value_bet = ValueBet(
+                        match_id=match.id,
+                        home_team=match.home_team,
+                        away_team=match.away_team,
+                        commence_time=match.commence_time,
+                        bookmaker=bookie.title,
+                        market="h2h",
+                        outcome=outcome.name,
+                        odds=outcome.price,
                     
-                    # Get sport-specific edge threshold
-                    edge_threshold = settings.EDGE_THRESHOLDS.get(
-                        sport,
-                        settings.EDGE_THRESHOLDS['default']
-                    )
+                        # Core probability/edge (now Bayesian)
+                        true_probability=bayesian_result.probability,
+                        edge=edge_analysis.risk_adjusted_edge,  # Use risk-adjusted!
+                        expected_value=edge_analysis.ev_per_dollar,
                     
-                    # Only recommend if risk-adjusted edge exceeds threshold
-                    if edge_analysis.risk_adjusted_edge > edge_threshold:
-                        
-                        # Calculate Kelly stake recommendation
-                        try:
-                            stake_rec = self.kelly_calculator.calculate_optimal_stake(
-                                odds=outcome.price,
-                                true_prob=bayesian_result,
-                                edge_analysis=edge_analysis,
-                                bankroll=bankroll,
-                                risk_tolerance=risk_enum
-                            )
-                        except Exception as e:
-                            print(f"Kelly calculation error: {e}")
-                            continue
-                        
-                        # Generate affiliate URL
-                        affiliate_url = None
-                        if "bet365" in bookie.key.lower():
-                            affiliate_url = settings.BET365_AFFILIATE_URL
-                        elif "williamhill" in bookie.key.lower():
-                            affiliate_url = settings.WILLIAMHILL_AFFILIATE_URL
-                        elif "unibet" in bookie.key.lower():
-                            affiliate_url = settings.UNIBET_AFFILIATE_URL
-                        elif "pinnacle" in bookie.key.lower():
-                            affiliate_url = settings.PINNACLE_AFFILIATE_URL
-                        
-                        # Create ValueBet with ALL new Phase 1 fields
-                        value_bet = ValueBet(
-                            match_id=match.id,
-                            home_team=match.home_team,
-                            away_team=match.away_team,
-                            commence_time=match.commence_time,
-                            bookmaker=bookie.title,
-                            market="h2h",
-                            outcome=outcome.name,
-                            odds=outcome.price,
-                            
-                            # Core probability/edge (now Bayesian)
-                            true_probability=bayesian_result.probability,
-                            edge=edge_analysis.risk_adjusted_edge,  # Use risk-adjusted!
-                            expected_value=edge_analysis.ev_per_dollar,
-                            
-                            # NEW: Bayesian fields
-                            probability_ci_lower=bayesian_result.credible_interval[0],
-                            probability_ci_upper=bayesian_result.credible_interval[1],
-                            confidence_score=bayesian_result.confidence_score,
-                            effective_samples=bayesian_result.effective_samples,
-                            
-                            # NEW: Advanced edge fields
-                            raw_edge=edge_analysis.raw_edge,
-                            risk_adjusted_edge=edge_analysis.risk_adjusted_edge,
-                            uncertainty_penalty=edge_analysis.uncertainty_penalty,
-                            liquidity_factor=edge_analysis.liquidity_factor,
-                            quality_score=edge_analysis.quality_score,
-                            
-                            # NEW: Kelly recommendation fields
-                            recommended_stake_pct=stake_rec.kelly_percentage,
-                            recommended_stake_amount=stake_rec.stake_amount,
-                            kelly_fraction=stake_rec.fraction,
-                            risk_of_ruin=stake_rec.risk_of_ruin,
-                            
-                            # Legacy fields
-                            affiliate_url=affiliate_url,
-                            is_steam_move=edge_analysis.raw_edge > 0.10,  # High raw edge = possible steam
-                            kelly_percentage=stake_rec.kelly_percentage,
-                            recommended_stake=stake_rec.stake_amount,
-                            is_mock=False
-                        )
-                        
-                        value_bets.append(value_bet)
-        
-        # Print debug info
+                        # NEW: Bayesian fields
+                        probability_ci_lower=bayesian_result.credible_interval[0],
+                        probability_ci_upper=bayesian_result.credible_interval[1],
+                        confidence_score=bayesian_result.confidence_score,
+                        effective_samples=bayesian_result.effective_samples,
+                    
+                        # NEW: Advanced edge fields
+                        raw_edge=edge_analysis.raw_edge,
+                        risk_adjusted_edge=edge_analysis.risk_adjusted_edge,
+                        uncertainty_penalty=edge_analysis.uncertainty_penalty,
+                        liquidity_factor=edge_analysis.liquidity_factor,
+                        quality_score=edge_analysis.quality_score,
+                    
+                        # NEW: Kelly recommendation fields
+                        recommended_stake_pct=stake_rec.kelly_percentage,
+                        recommended_stake_amount=stake_rec.stake_amount,
+                        kelly_fraction=stake_rec.fraction,
+                        risk_of_ruin=stake_rec.risk_of_ruin,
+                    
+                        # Legacy fields
+                        affiliate_url=affiliate_url,
+                        is_steam_move=steam is not None,
+                        steam_detected_at=steam.detected_at if steam else None,
+                        previous_odds=self.steam_detector.previous_price(match.id, bookie.key, outcome.name),
+                        kelly_percentage=stake_rec.kelly_percentage,
+                        recommended_stake=stake_rec.stake_amount,
+                        is_mock=False
+                    )
+                
+                    value_bets.append(value_bet)
+                    bookmaker_keys.append(bookie.key)
+                    variances.append(bayesian_result.variance)
+
+        # Size all recommendations jointly (same-match overlap, total bankroll cap)
         if value_bets:
-            print(f"\nValue Bets Found (Bayesian Model): {len(value_bets)}")
-            best_bet = max(value_bets, key=lambda x: x.risk_adjusted_edge)
-            print(f"Best bet: {best_bet.outcome} @ {best_bet.odds}")
-            print(f"  Raw Edge: {best_bet.raw_edge * 100:.2f}%")
-            print(f"  Risk-Adjusted: {best_bet.risk_adjusted_edge * 100:.2f}%")
-            print(f"  Quality: {best_bet.quality_score}")
-            print(f"  Confidence: {best_bet.confidence_score}")
-            print(f"  Recommended Stake: ${best_bet.recommended_stake_amount:.2f} ({best_bet.recommended_stake_pct:.2f}%)")
-        else:
-            print(f"\nNo value bets found for {sport} (after Bayesian + risk adjustments)")
-        
-        return value_bets
+            self.kelly_calculator.size_portfolio(value_bets, bankroll, variances=variances)
+
+        return value_bets, bookmaker_keys
     
+    async def get_line_markets(
+        self,
+        sport: str = "basketball_nba",
+        region: str = "us",
+        markets: str = "spreads,totals",
+        bankroll: float = 1000.0
+    ) -> LineAnalysis:
+        """
+        Value bets and middles on spreads/totals, scored against a per-line
+        consensus that interpolates across alternate lines (services/lines.py)
+        """
+        if not settings.THE_ODDS_API_KEY:
+            print("Warning: No API key configured")
+            return LineAnalysis()
+
+        matches = await self.api_client.get_odds(sport=sport, regions=region, markets=markets)
+        if not matches:
+            print(f"No live {markets} markets available for {sport}")
+            return LineAnalysis()
+
+        ingestion_queue = get_ingestion_queue()
+        if ingestion_queue.running:
+            await ingestion_queue.enqueue(normalize_matches(matches))
+
+        analysis = self.line_engine.analyze(matches, sport, bankroll)
+        print(f"Line markets ({markets}): {len(analysis.value_bets)} value bets, {len(analysis.middles)} middles")
+        return analysis
+    
+    async def get_outrights(
+        self,
+        sport: Optional[str] = None,
+        region: str = "uk",
+        bankroll: float = 1000.0
+    ) -> List[OutrightBet]:
+        """
+        Value bets on outright (futures) markets, de-vigged in one batch across
+        every event and book (services/outrights.py)
+
+        Without a sport, every active has_outrights sport in the sports table
+        is scanned. Results are kept for OUTRIGHTS_CACHE_MINUTES.
+        """
+        if not settings.THE_ODDS_API_KEY:
+            print("Warning: No API key configured")
+            return []
+
+        now = datetime.now(timezone.utc)
+        cache_key = (sport, region, bankroll)
+        cached = self._outrights_cache.get(cache_key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        if sport:
+            sports = [sport]
+        else:
+            listed = await self.api_client.get_sports()
+            if listed:
+                await asyncio.to_thread(self.outrights_engine.sync_sports, listed)
+            sports = await asyncio.to_thread(self.outrights_engine.outright_sports)
+
+        results = await asyncio.gather(*(self.api_client.get_outrights(s, region) for s in sports))
+        events = [event for sport_events in results for event in sport_events]
+        if not events:
+            print(f"No outright markets available ({', '.join(sports) or 'no sports'})")
+            return []
+
+        bets = await asyncio.to_thread(self.outrights_engine.analyze, events, bankroll)
+        self._outrights_cache[cache_key] = (now + timedelta(minutes=settings.OUTRIGHTS_CACHE_MINUTES), bets)
+        print(f"Outrights: {len(events)} markets across {len(sports)} sports, {len(bets)} value bets")
+        return bets
     
     async def get_player_props(self, sport: str = "basketball_nba", region: str = "us") -> List[dict]:
         """
@@ -418,86 +565,37 @@ class OddsService:
         """
         Get correct score betting opportunities
         
-        Returns list of score bets with edge calculations
+        Every fixture's correct_score quotes are priced against a Dixon-Coles
+        score matrix fitted to the h2h + totals consensus (services/correct_score.py)
         """
         if not settings.THE_ODDS_API_KEY:
             print("Warning: No API key configured")
             return []
         
         try:
-            # Get H2H odds first
-            matches = await self.api_client.get_odds(sport=sport, regions=region)
+            matches = await self.api_client.get_odds(sport=sport, regions=region, markets="h2h,totals")
             
             if not matches:
                 print(f"No matches available for correct scores ({sport})")
                 return []
             
-            all_scores = []
+            # One event-odds request per fixture, all in flight together
+            quotes = await asyncio.gather(
+                *(self.advanced_markets.get_correct_score_odds(sport, match.id) for match in matches),
+                return_exceptions=True
+            )
             
-            # Limit to first 5 matches
-            for match in matches[:5]:
-                match_name = f"{match.home_team} vs {match.away_team}"
-                
-                # Look for correct score markets
-                for bookmaker in match.bookmakers:
-                    # Note: Not all bookmakers offer correct score via API
-                    # This is a simplified version - in production you'd want
-                    # to use a dedic ated correct score endpoint if available
-                    
-                    # For now, we'll generate some common scorelines with
-                    # estimated odds based on H2H probabilities
-                    h2h_market = next((m for m in bookmaker.markets if m.key == MarketType.H2H), None)
-                    if not h2h_market:
-                        continue
-                    
-                    # Extract H2H odds
-                    home_outcome = next((o for o in h2h_market.outcomes if o.name == match.home_team), None)
-                    away_outcome = next((o for o in h2h_market.outcomes if o.name == match.away_team), None)
-                    
-                    if not home_outcome or not away_outcome:
+            def price_all() -> List[dict]:
+                priced = []
+                for match, match_quotes in zip(matches, quotes):
+                    if isinstance(match_quotes, Exception) or not match_quotes:
                         continue
-                    
-                    # Simple heuristic to generate likely scores
-                    # This would be replaced with actual correct score market data
-                    common_scores = [
-                        ('1-0', 7.0, 'home_win'),
-                        ('2-0', 9.0, 'home_win'),
-                        ('2-1', 8.5, 'home_win'),
-                        ('0-1', 8.0, 'away_win'),
-                        ('0-2', 11.0, 'away_win'),
-                        ('1-2', 9.5, 'away_win'),
-                        ('1-1', 6.5, 'draw'),
-                        ('0-0', 8.0, 'draw'),
-                        ('2-2', 12.0, 'draw')
-                    ]
-                    
-                    for score, base_odds, score_type in common_scores:
-                        # Add +/- 20% variance to base odds for realism
-                        import random
-                        odds_variance = random.uniform(0.9, 1.1)
-                        final_odds = round(base_odds * odds_variance, 1)
-                        
-                        # Simple edge: compare to H2H implied probability
-                        if score_type == 'home_win' and home_outcome:
-                            h2h_prob = 1 / home_outcome.price
-                            score_implied = 1 / final_odds
-                            edge = max(0, (score_implied - h2h_prob * 0.15) * 100)  # Score bets typically have more vig
-                        elif score_type == 'away_win' and away_outcome:
-                            h2h_prob = 1 / away_outcome.price
-                            score_implied = 1 / final_odds
-                            edge = max(0, (score_implied - h2h_prob * 0.15) * 100)
-                        else:
-                            edge = random.uniform(0, 3.0)  # Draw scores
-                        
-                        if edge > 0.5:  # Only show if edge > 0.5%
-                            all_scores.append({
-                                'score': score,
-                                'odds': final_odds,
-                                'bookmaker': bookmaker.title,
-                                'edge': round(edge, 1),
-                                'match_name': match_name,
-                                'is_mock': False  # Based on real H2H data
-                            })
+                    model = self.correct_score_engine.model(match)
+                    if model is not None:
+                        priced.extend(self.correct_score_engine.price(match, model, match_quotes))
+                return priced
+            
+            all_scores = [s for s in await asyncio.to_thread(price_all) if s['edge'] > 0.5]
             
             # Sort by edge
             all_scores.sort(key=lambda x: x['edge'], reverse=True)
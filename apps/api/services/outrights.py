@@ -0,0 +1,197 @@
+"""
+Outrights Engine (futures: league winner, top scorer, ...)
+
+Outright markets have 20-60 runners per book instead of 2-3 outcomes, so
+they are de-vigged and scored as arrays rather than per market:
+1. Sports come from the `sports` table (has_outrights = TRUE), refreshed
+   from the API's /sports list by sync_sports
+2. Each event becomes a (books x runners) price board over the union of
+   runners; books pricing less than MIN_COVERAGE of the field or with an
+   overround above MAX_OVERROUND are left out of the consensus
+3. Every book row of every event is de-vigged in ONE BatchDevig call (power
+   method, vectorized Halley on k over the padded array)
+4. A book pricing only part of the field spreads all its probability over
+   those runners; its row is rescaled to the consensus mass of the runners
+   it prices, and the weighted consensus (BOOKMAKER_WEIGHTS) is recomputed
+5. Each runner is scored at its best price across books:
+   edge = p * best odds - 1, for runners priced by >= MIN_BOOKS books and
+   with p >= MIN_PROBABILITY (deep longshots are mostly de-vig error)
+
+Usage:
+    engine = OutrightsEngine()
+    sports = engine.outright_sports()
+    bets = engine.analyze(await client.get_outrights(sports[0]))
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import Bookmaker, OutrightBet, OutrightEvent
+from db.warehouse import connect, ensure_schema
+from services.math import BatchDevig, PowerMethod
+
+MIN_BOOKS = 2  # Books pricing a runner before it is scored
+MIN_COVERAGE = 0.8  # Share of the field a book must price to enter the consensus
+MAX_OVERROUND = 1.6  # Boards priced above this are stale or partial
+MIN_PROBABILITY = 0.002  # Consensus below this is dominated by de-vig error
+MIN_EDGE = 0.03  # Outright margins (and their de-vig error) are far wider than h2h
+
+OUTRIGHT_SPORTS_SQL = "SELECT sport_key FROM sports WHERE has_outrights AND active ORDER BY sport_key"
+UPSERT_SPORT_SQL = """
+    INSERT INTO sports (sport_key, sport_title, has_outrights, active) VALUES (?, ?, ?, ?)
+    ON CONFLICT(sport_key) DO UPDATE SET
+        sport_title = excluded.sport_title,
+        has_outrights = excluded.has_outrights,
+        active = excluded.active
+"""
+
+
+@dataclass
+class OutrightBoard:
+    """One outright event as a (books x runners) price array"""
+    event: OutrightEvent
+    runners: List[str]
+    bookmakers: List[Bookmaker]
+    odds: np.ndarray  # NaN where a book does not price a runner
+
+
+def build_board(event: OutrightEvent) -> Optional[OutrightBoard]:
+    quotes = []
+    for bookie in event.bookmakers:
+        market = next((m for m in bookie.markets if m.key == "outrights"), None)
+        if market and market.outcomes:
+            quotes.append((bookie, {o.name: o.price for o in market.outcomes}))
+    if not quotes:
+        return None
+
+    runners = sorted({name for _, prices in quotes for name in prices})
+    odds = np.array([[prices.get(r, np.nan) for r in runners] for _, prices in quotes], dtype=float)
+    odds[~(odds > 1.0)] = np.nan
+    return OutrightBoard(event, runners, [bookie for bookie, _ in quotes], odds)
+
+
+class OutrightsEngine:
+    """
+    Batched de-vig and value scoring for outright markets
+
+    Usage:
+        engine = OutrightsEngine()
+        bets = engine.analyze(events, bankroll=1000.0)
+    """
+
+    def __init__(self, db_path: Optional[str] = None, devig_method: str = "power",
+                 min_books: int = MIN_BOOKS, min_edge: float = MIN_EDGE):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.devig_method = devig_method
+        self.min_books = min_books
+        self.min_edge = min_edge
+
+    def outright_sports(self) -> List[str]:
+        """Active sports flagged has_outrights in the sports table"""
+        ensure_schema(self.db_path)
+        conn = connect(self.db_path)
+        try:
+            return [row[0] for row in conn.execute(OUTRIGHT_SPORTS_SQL)]
+        finally:
+            conn.close()
+
+    def sync_sports(self, sports: Sequence[dict]) -> int:
+        """Upsert the API's /sports list so new futures markets are picked up"""
+        rows = [
+            (s["key"], s.get("title") or s["key"], bool(s.get("has_outrights")), bool(s.get("active", True)))
+            for s in sports if s.get("key")
+        ]
+        ensure_schema(self.db_path)
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany(UPSERT_SPORT_SQL, rows)
+        finally:
+            conn.close()
+        return len(rows)
+
+    def consensus(self, boards: Sequence[OutrightBoard]) -> List[np.ndarray]:
+        """Consensus probability per runner of each board (NaN: too few books)"""
+        if not boards:
+            return []
+
+        # One padded (all book rows of all boards, widest field) array
+        width = max(len(b.runners) for b in boards)
+        offsets = np.cumsum([0] + [len(b.bookmakers) for b in boards])
+        implied = np.zeros((offsets[-1], width))
+        mask = np.zeros((offsets[-1], width), dtype=bool)
+        for board, start in zip(boards, offsets):
+            quoted = np.isfinite(board.odds)
+            rows = slice(start, start + len(board.bookmakers))
+            implied[rows, :len(board.runners)] = np.where(quoted, 1.0 / np.where(quoted, board.odds, 1.0), 0.0)
+            mask[rows, :len(board.runners)] = quoted
+
+        coverage = mask.sum(axis=1) / np.repeat([len(b.runners) for b in boards], np.diff(offsets))
+        usable = (coverage >= MIN_COVERAGE) & (implied.sum(axis=1) <= MAX_OVERROUND)
+        mask &= usable[:, None]
+        probs = BatchDevig.calculate_array(np.where(mask, implied, 0.0), mask, self.devig_method)
+
+        results = []
+        for board, start in zip(boards, offsets):
+            n = len(board.runners)
+            rows = slice(start, start + len(board.bookmakers))
+            p, quoted = probs[rows, :n], mask[rows, :n]
+            weights = np.array([
+                settings.BOOKMAKER_WEIGHTS.get(b.key, settings.BOOKMAKER_WEIGHTS["default"])
+                for b in board.bookmakers
+            ])[:, None] * quoted
+
+            consensus = self._weighted(p, weights)
+            # Partial boards: a book's probabilities only cover the runners it prices
+            scale = np.where(quoted, np.nan_to_num(consensus), 0.0).sum(axis=1, keepdims=True)
+            consensus = self._weighted(p * np.where(scale > 0, scale, 1.0), weights)
+
+            consensus[quoted.sum(axis=0) < self.min_books] = np.nan
+            results.append(consensus)
+        return results
+
+    @staticmethod
+    def _weighted(p: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        total = weights.sum(axis=0)
+        consensus = np.divide((weights * p).sum(axis=0), total, out=np.full(p.shape[1], np.nan), where=total > 0)
+        mass = np.nansum(consensus)
+        return consensus / mass if mass > 0 else consensus
+
+    def analyze(self, events: Sequence[OutrightEvent], bankroll: float = 1000.0) -> List[OutrightBet]:
+        boards = [b for b in map(build_board, events) if b is not None]
+        bets = []
+        for board, consensus in zip(boards, self.consensus(boards)):
+            priced = np.isfinite(board.odds)
+            best_book = np.argmax(np.where(priced, board.odds, -np.inf), axis=0)
+            best = board.odds[best_book, np.arange(len(board.runners))]
+            edge = consensus * best - 1.0
+
+            scored = np.isfinite(edge) & (consensus >= MIN_PROBABILITY) & (edge > self.min_edge)
+            for r in np.nonzero(scored)[0]:
+                stake = PowerMethod.calculate_kelly_stake(float(best[r]), float(consensus[r]), bankroll)
+                bets.append(OutrightBet(
+                    event_id=board.event.id,
+                    sport_key=board.event.sport_key,
+                    sport_title=board.event.sport_title,
+                    commence_time=board.event.commence_time,
+                    runner=board.runners[r],
+                    bookmaker=board.bookmakers[best_book[r]].title,
+                    odds=float(best[r]),
+                    true_probability=round(float(consensus[r]), 6),
+                    fair_odds=round(1.0 / float(consensus[r]), 2),
+                    edge=round(float(edge[r]), 6),
+                    books_quoted=int(priced[:, r].sum()),
+                    runners=len(board.runners),
+                    recommended_stake_pct=stake["kelly_percentage"],
+                    recommended_stake_amount=stake["recommended_stake"]
+                ))
+        bets.sort(key=lambda b: b.edge, reverse=True)
+        return bets
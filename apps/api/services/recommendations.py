@@ -0,0 +1,144 @@
+"""
+Recommendation Log
+
+Every ValueBet returned by the live pipeline is recorded in
+recommended_bets (historical.db) so CLV and model accuracy can be measured:
+1. OddsService turns its ValueBets into RecommendationRecords
+2. They are queued with enqueue_nowait: the HTTP response never waits and a
+   full queue drops records rather than slowing requests
+3. A background IngestionQueue consumer batches them into one executemany
+
+Rows are unique on (match, bookmaker, market, outcome, analysis version),
+so repeated polls of the same recommendation keep the first row.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import ValueBet
+from db.warehouse import connect, ensure_schema
+from services.ingestion import IngestionQueue
+
+
+@dataclass(frozen=True)
+class RecommendationRecord:
+    """One recommended bet as it was presented"""
+    match_id: str
+    sport_key: str
+    home_team: str
+    away_team: str
+    commence_time: datetime
+    bookmaker_key: str
+    market_key: str
+    outcome_name: str
+    recommended_odds: float
+    true_probability: float
+    edge: float
+    kelly_fraction: Optional[float]
+    recommended_stake: Optional[float]
+    recommendation_time: datetime
+    analysis_version: str
+
+    @property
+    def dedupe_key(self) -> Tuple:
+        return (self.match_id, self.bookmaker_key, self.market_key,
+                self.outcome_name, self.analysis_version)
+
+    @classmethod
+    def from_value_bet(
+        cls,
+        bet: ValueBet,
+        sport_key: str,
+        bookmaker_key: str,
+        analysis_version: Optional[str] = None
+    ) -> "RecommendationRecord":
+        # ValueBet carries the bookmaker title; the key comes from the caller
+        return cls(
+            match_id=bet.match_id,
+            sport_key=sport_key,
+            home_team=bet.home_team,
+            away_team=bet.away_team,
+            commence_time=bet.commence_time,
+            bookmaker_key=bookmaker_key,
+            market_key=bet.market,
+            outcome_name=bet.outcome,
+            recommended_odds=bet.odds,
+            true_probability=bet.true_probability,
+            edge=bet.edge,
+            kelly_fraction=bet.kelly_fraction,
+            recommended_stake=bet.recommended_stake_amount,
+            recommendation_time=bet.timestamp,
+            analysis_version=analysis_version or settings.ANALYSIS_VERSION
+        )
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+class RecommendationSink:
+    """Batch insert into recommended_bets (historical.db)"""
+
+    name = "recommendations"
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        ensure_schema(self.db_path)
+
+    async def write(self, batch: List[RecommendationRecord]):
+        # sqlite3 is blocking; keep it off the event loop
+        await asyncio.to_thread(self._write_sync, batch)
+
+    def _write_sync(self, batch: List[RecommendationRecord]):
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                # CLV settlement joins through matches, so make sure the row exists
+                conn.executemany("""
+                    INSERT OR IGNORE INTO matches
+                    (id, sport_key, commence_time, home_team, away_team)
+                    VALUES (?, ?, ?, ?, ?)
+                """, list({
+                    r.match_id: (r.match_id, r.sport_key, _utc(r.commence_time), r.home_team, r.away_team)
+                    for r in batch
+                }.values()))
+                conn.executemany("""
+                    INSERT OR IGNORE INTO recommended_bets
+                    (match_id, bookmaker_key, market_key, outcome_name,
+                     recommended_odds, true_probability, edge, kelly_fraction,
+                     recommended_stake, recommendation_time, analysis_version)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        r.match_id, r.bookmaker_key, r.market_key, r.outcome_name,
+                        r.recommended_odds, r.true_probability, r.edge, r.kelly_fraction,
+                        r.recommended_stake, _utc(r.recommendation_time), r.analysis_version
+                    )
+                    for r in batch
+                ])
+        finally:
+            conn.close()
+
+
+_recommendation_queue: Optional[IngestionQueue] = None
+
+
+def get_recommendation_queue() -> IngestionQueue:
+    """Process-wide queue used by the live odds path"""
+    global _recommendation_queue
+    if _recommendation_queue is None:
+        _recommendation_queue = IngestionQueue(
+            sinks=[RecommendationSink()],
+            max_batch=500,
+            max_latency=2.0,
+            max_pending=10000
+        )
+    return _recommendation_queue
@@ -0,0 +1,251 @@
+"""
+Results Sync
+
+Fills matches.completed / home_score / away_score / winner from The Odds
+API scores endpoint:
+1. One bulk scores request per sport, windowed from a persistent watermark
+   (last completed commence_time) so finished games are fetched once
+2. Sports with nothing awaiting a result are skipped without a request
+3. Each sport's results are applied with one executemany in one transaction
+4. Newly completed match ids are handed to downstream hooks
+
+historical_matchups is updated by the schema triggers inside the same
+transaction; other consumers register via on_completed.
+"""
+
+import asyncio
+import math
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import sys
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema, get_watermark, set_watermark
+
+SCORES_URL = "https://api.the-odds-api.com/v4/sports/{sport}/scores"
+MAX_DAYS_FROM = 3  # Scores endpoint only looks back 3 days
+WATERMARK_JOB = "results"
+
+
+@dataclass
+class ResultsSyncResult:
+    """Summary of a results sync run"""
+    sports_checked: int = 0
+    requests: int = 0
+    events: int = 0
+    completed: int = 0
+    completed_ids: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+def parse_result(event: Dict) -> Optional[Tuple[int, int, str]]:
+    """(home_score, away_score, winner) for a finished event, else None"""
+    if not event.get("completed") or not event.get("scores"):
+        return None
+
+    scores = {s["name"]: s["score"] for s in event["scores"]}
+    try:
+        home = int(float(scores[event["home_team"]]))
+        away = int(float(scores[event["away_team"]]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    winner = 'home' if home > away else 'away' if away > home else 'draw'
+    return home, away, winner
+
+
+class ResultsSync:
+    """
+    Watermarked bulk results sync
+
+    Usage:
+        sync = ResultsSync(on_completed=[lambda ids: ...])
+        result = await sync.run(['basketball_nba', 'soccer_epl'])
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        on_completed: Optional[List[Callable[[List[str]], None]]] = None,
+        settle_after_hours: float = 2.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.on_completed = on_completed or []
+        self.settle_after = timedelta(hours=settle_after_hours)  # Earliest a game can be final
+        self.transport = transport  # Injectable for tests
+        ensure_schema(self.db_path)
+
+    async def run(self, sports: List[str], now: Optional[datetime] = None) -> ResultsSyncResult:
+        now = now or datetime.now(timezone.utc)
+        result = ResultsSyncResult()
+
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                run_id = conn.execute("""
+                    INSERT INTO collection_runs (run_type, start_time, status)
+                    VALUES ('results', ?, 'running')
+                """, (now,)).lastrowid
+
+            async with httpx.AsyncClient(timeout=30.0, transport=self.transport) as client:
+                # Requests run concurrently; sqlite writes stay on this task
+                windows = {sport: self._window(conn, sport, now) for sport in sports}
+                pending = [sport for sport, days in windows.items() if days]
+                responses = await asyncio.gather(
+                    *(self._fetch(client, sport, windows[sport]) for sport in pending),
+                    return_exceptions=True
+                )
+
+            result.sports_checked = len(sports)
+            result.requests = len(pending)
+            for sport, events in zip(pending, responses):
+                if isinstance(events, Exception):
+                    result.errors.append(f"{sport}: {events}")
+                    print(f"[RESULTS] {sport} failed: {events}")
+                    continue
+                result.events += len(events)
+                result.completed_ids.extend(self._apply(conn, sport, events))
+
+            result.completed = len(result.completed_ids)
+            with conn:
+                conn.execute("""
+                    UPDATE collection_runs
+                    SET end_time = ?, status = ?, matches_processed = ?,
+                        api_credits_used = ?, error_message = ?
+                    WHERE id = ?
+                """, (
+                    datetime.now(timezone.utc),
+                    'completed' if not result.errors else 'partial',
+                    result.completed,
+                    2 * result.requests,  # daysFrom requests cost 2 credits
+                    "; ".join(result.errors) or None,
+                    run_id
+                ))
+        finally:
+            conn.close()
+
+        if result.completed_ids:
+            for hook in self.on_completed:
+                try:
+                    hook(result.completed_ids)
+                except Exception as e:
+                    print(f"[RESULTS] Downstream update failed: {e}")
+
+        print(f"[RESULTS] {result.completed} matches completed from {result.requests} requests")
+        return result
+
+    def _window(self, conn: sqlite3.Connection, sport: str, now: datetime) -> int:
+        """
+        daysFrom to request for a sport, or 0 if nothing awaits a result
+
+        Only matches after the watermark that should have finished by now
+        are considered; older gaps beyond 3 days cannot be recovered here.
+        """
+        earliest = now - timedelta(days=MAX_DAYS_FROM)
+        watermark = get_watermark(conn, WATERMARK_JOB, sport)
+        if watermark is not None:
+            # Overlap a day so late-finishing games before the watermark still land
+            earliest = max(earliest, watermark - timedelta(days=1))
+
+        row = conn.execute("""
+            SELECT MIN(commence_time)
+            FROM matches
+            WHERE sport_key = ?
+            AND NOT COALESCE(completed, FALSE)
+            AND commence_time <= ?
+            AND commence_time >= ?
+        """, (sport, now - self.settle_after, earliest)).fetchone()
+
+        if not row or row[0] is None:
+            return 0
+        oldest = datetime.fromisoformat(row[0])
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        days = math.floor((now - oldest).total_seconds() / 86400) + 1
+        return max(1, min(MAX_DAYS_FROM, days))
+
+    async def _fetch(self, client: httpx.AsyncClient, sport: str, days_from: int) -> List[Dict]:
+        response = await client.get(
+            SCORES_URL.format(sport=sport),
+            params={
+                "apiKey": settings.THE_ODDS_API_KEY,
+                "daysFrom": days_from,
+                "dateFormat": "iso"
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _apply(self, conn: sqlite3.Connection, sport: str, events: List[Dict]) -> List[str]:
+        """Write one sport's results in a single transaction; returns newly completed ids"""
+        finished = []
+        for event in events:
+            parsed = parse_result(event)
+            if parsed:
+                finished.append((event, parsed))
+        if not finished:
+            return []
+
+        with conn:
+            # Events we never snapshotted still count toward priors / calibration
+            conn.executemany("""
+                INSERT OR IGNORE INTO matches
+                (id, sport_key, commence_time, home_team, away_team)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (
+                    event["id"],
+                    sport,
+                    datetime.fromisoformat(event["commence_time"].replace("Z", "+00:00")),
+                    event["home_team"],
+                    event["away_team"]
+                )
+                for event, _ in finished
+            ])
+
+            ids = [event["id"] for event, _ in finished]
+            placeholders = ",".join("?" * len(ids))
+            newly_completed = [row[0] for row in conn.execute(f"""
+                SELECT id FROM matches
+                WHERE id IN ({placeholders}) AND NOT COALESCE(completed, FALSE)
+            """, ids)]
+
+            conn.executemany("""
+                UPDATE matches
+                SET completed = TRUE,
+                    home_score = ?,
+                    away_score = ?,
+                    winner = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND NOT COALESCE(completed, FALSE)
+            """, [
+                (home, away, winner, event["id"])
+                for event, (home, away, winner) in finished
+            ])
+
+            latest = max(
+                datetime.fromisoformat(event["commence_time"].replace("Z", "+00:00"))
+                for event, _ in finished
+            )
+            set_watermark(conn, WATERMARK_JOB, sport, latest)
+
+        return newly_completed
+
+
+async def main():
+    """Sync results for the main sports"""
+    sync = ResultsSync()
+    await sync.run(['basketball_nba', 'americanfootball_nfl', 'soccer_epl', 'soccer_uefa_champions_league'])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,290 @@
+"""
+Snapshot Retention & Downsampling
+
+Keeps odds_snapshots (and its indexes / the latest_odds view) small:
+1. Matches that started more than SNAPSHOT_RETENTION_DAYS ago are selected
+2. Their exact closing prices are written to closing_odds first (CLV safe)
+3. Raw rows are rolled into one OHLC bar per (match, bookmaker, outcome, line)
+4. Raw rows are archived to Parquet, then deleted from historical.db.
+   Archiving is best-effort: if DuckDB cannot write the batch (e.g. its
+   sqlite scanner is not installed) the failure is logged, archiving is
+   skipped for the rest of the run and compaction still goes ahead, so
+   odds_snapshots never grows unbounded
+
+Only whole matches are compacted, so every bar is final and never merged.
+"""
+
+import shutil
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from db.warehouse import connect, ensure_schema
+
+
+@dataclass
+class RetentionResult:
+    """Summary of a retention run"""
+    matches_compacted: int = 0
+    snapshots_removed: int = 0
+    bars_written: int = 0
+    closing_rows_added: int = 0
+    archived: bool = False
+    archive_error: Optional[str] = None  # Why archiving was skipped, if it was
+
+
+# Rolls the snapshots of every match in retention_batch into bars
+BARS_SQL = """
+    WITH ordered AS (
+        SELECT
+            os.match_id,
+            os.bookmaker_key,
+            os.market_key,
+            os.outcome_name,
+            COALESCE(os.point, 0) AS point,
+            os.odds,
+            os.snapshot_time,
+            LAG(os.odds) OVER w AS prev_odds,
+            ROW_NUMBER() OVER w AS rn_first,
+            ROW_NUMBER() OVER (
+                PARTITION BY os.match_id, os.bookmaker_key, os.market_key,
+                             os.outcome_name, COALESCE(os.point, 0)
+                ORDER BY os.snapshot_time DESC, os.id DESC
+            ) AS rn_last
+        FROM odds_snapshots os
+        JOIN retention_batch b ON b.match_id = os.match_id
+        WINDOW w AS (
+            PARTITION BY os.match_id, os.bookmaker_key, os.market_key,
+                         os.outcome_name, COALESCE(os.point, 0)
+            ORDER BY os.snapshot_time, os.id
+        )
+    )
+    INSERT OR REPLACE INTO odds_bars (
+        match_id, bookmaker_key, market_key, outcome_name, point,
+        open_odds, high_odds, low_odds, close_odds,
+        changes, samples, first_time, last_time
+    )
+    SELECT
+        match_id, bookmaker_key, market_key, outcome_name, point,
+        MAX(CASE WHEN rn_first = 1 THEN odds END),
+        MAX(odds),
+        MIN(odds),
+        MAX(CASE WHEN rn_last = 1 THEN odds END),
+        SUM(CASE WHEN prev_odds IS NOT NULL AND prev_odds != odds THEN 1 ELSE 0 END),
+        COUNT(*),
+        MIN(snapshot_time),
+        MAX(snapshot_time)
+    FROM ordered
+    GROUP BY match_id, bookmaker_key, market_key, outcome_name, point
+"""
+
+# Last pre-kickoff price per (match, bookmaker, market, outcome), kept exact
+CLOSING_SQL = """
+    INSERT OR IGNORE INTO closing_odds (
+        match_id, bookmaker_key, market_key, outcome_name,
+        closing_odds, point, snapshot_time
+    )
+    SELECT match_id, bookmaker_key, market_key, outcome_name, odds, point, snapshot_time
+    FROM (
+        SELECT
+            os.*,
+            ROW_NUMBER() OVER (
+                PARTITION BY os.match_id, os.bookmaker_key, os.market_key, os.outcome_name
+                ORDER BY os.snapshot_time DESC, os.id DESC
+            ) AS rn
+        FROM odds_snapshots os
+        JOIN retention_batch b ON b.match_id = os.match_id
+        JOIN matches m ON m.id = os.match_id
+        WHERE os.snapshot_time <= m.commence_time
+    )
+    WHERE rn = 1
+"""
+
+
+class SnapshotRetentionJob:
+    """
+    Compact old snapshots into OHLC bars
+
+    Usage:
+        job = SnapshotRetentionJob(max_age_days=30)
+        result = job.run()
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_age_days: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        archive: bool = True,
+        batch_size: int = 500,
+        vacuum: bool = True
+    ):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.max_age_days = max_age_days if max_age_days is not None else settings.SNAPSHOT_RETENTION_DAYS
+        self.archive_dir = Path(archive_dir or settings.PARQUET_ARCHIVE_DIR)
+        self.archive = archive
+        self.batch_size = batch_size
+        self.vacuum = vacuum
+        ensure_schema(self.db_path)
+
+    def run(self, now: Optional[datetime] = None) -> RetentionResult:
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=self.max_age_days)
+        result = RetentionResult()
+
+        conn = connect(self.db_path)
+        try:
+            match_ids = self._expired_matches(conn, cutoff)
+            print(f"[RETENTION] {len(match_ids)} matches older than {self.max_age_days} days")
+
+            with conn:
+                run_id = conn.execute("""
+                    INSERT INTO collection_runs (run_type, start_time, status)
+                    VALUES ('retention', ?, 'running')
+                """, (datetime.now(timezone.utc),)).lastrowid
+
+            try:
+                for start in range(0, len(match_ids), self.batch_size):
+                    batch = match_ids[start:start + self.batch_size]
+                    self._compact_batch(conn, batch, result)
+            except Exception as e:
+                with conn:
+                    conn.execute("""
+                        UPDATE collection_runs
+                        SET end_time = ?, status = 'failed', error_message = ?,
+                            matches_processed = ?, odds_collected = ?
+                        WHERE id = ?
+                    """, (datetime.now(timezone.utc), str(e),
+                          result.matches_compacted, result.snapshots_removed, run_id))
+                raise
+
+            with conn:
+                conn.execute("""
+                    UPDATE collection_runs
+                    SET end_time = ?, status = 'completed',
+                        matches_processed = ?, odds_collected = ?
+                    WHERE id = ?
+                """, (datetime.now(timezone.utc),
+                      result.matches_compacted, result.snapshots_removed, run_id))
+
+            if result.snapshots_removed and self.vacuum:
+                # Return freed pages to the OS so the file stays cache-sized
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+
+        print(f"[RETENTION] Compacted {result.matches_compacted} matches: "
+              f"{result.snapshots_removed} snapshots -> {result.bars_written} bars, "
+              f"{result.closing_rows_added} closing rows added")
+        return result
+
+    def _expired_matches(self, conn: sqlite3.Connection, cutoff: datetime) -> List[str]:
+        rows = conn.execute("""
+            SELECT m.id
+            FROM matches m
+            WHERE m.commence_time < ?
+            AND EXISTS (SELECT 1 FROM odds_snapshots os WHERE os.match_id = m.id)
+            ORDER BY m.commence_time
+        """, (cutoff,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _compact_batch(self, conn: sqlite3.Connection, match_ids: List[str], result: RetentionResult):
+        staging = None
+        if self.archive and result.archive_error is None:
+            # Raw rows go to a staging dir first; it is only published once
+            # the delete below commits, so a crash never duplicates history
+            try:
+                staging = self._archive_batch(match_ids)
+                result.archived = True
+            except Exception as e:
+                result.archive_error = str(e)
+                print(f"[RETENTION] Archiving skipped, compacting without Parquet copy: {e}")
+
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS retention_batch (match_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM retention_batch")
+            conn.executemany("INSERT INTO retention_batch VALUES (?)", [(m,) for m in match_ids])
+
+            closing_before = conn.total_changes
+            conn.execute(CLOSING_SQL)
+            result.closing_rows_added += conn.total_changes - closing_before
+
+            # rowcount is not reported for WITH ... INSERT statements
+            bars_before = conn.total_changes
+            conn.execute(BARS_SQL)
+            result.bars_written += conn.total_changes - bars_before
+
+            deleted = conn.execute("""
+                DELETE FROM odds_snapshots
+                WHERE match_id IN (SELECT match_id FROM retention_batch)
+            """)
+            result.snapshots_removed += deleted.rowcount
+            result.matches_compacted += len(match_ids)
+
+        if staging is not None:
+            self._publish_archive(staging)
+
+    def _archive_batch(self, match_ids: List[str]) -> Path:
+        """Write the batch's raw snapshots to hive-partitioned Parquet (staging)"""
+        from services.analytics import AnalyticsEngine
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+        staging = self.archive_dir / f".staging_{stamp}"
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+        engine = AnalyticsEngine(db_path=self.db_path, archive_dir=str(self.archive_dir), threads=None)
+        try:
+            engine.conn.execute(
+                "CREATE OR REPLACE TEMP TABLE retention_batch AS SELECT unnest(?::VARCHAR[]) AS match_id",
+                [match_ids]
+            )
+            engine.conn.execute(f"""
+                COPY (
+                    SELECT
+                        s.match_id,
+                        s.bookmaker_key,
+                        s.market_key,
+                        s.outcome_name,
+                        TRY_CAST(s.odds AS DOUBLE) AS odds,
+                        TRY_CAST(s.point AS DOUBLE) AS point,
+                        TRY_CAST(s.snapshot_time AS TIMESTAMP) AS snapshot_time,
+                        TRY_CAST(s.time_to_event_hours AS DOUBLE) AS time_to_event_hours,
+                        m.sport_key,
+                        strftime(TRY_CAST(m.commence_time AS TIMESTAMP), '%Y-%m') AS month
+                    FROM hist.odds_snapshots s
+                    JOIN hist.matches m ON m.id = s.match_id
+                    JOIN retention_batch b ON b.match_id = s.match_id
+                ) TO '{staging}' (
+                    FORMAT parquet,
+                    PARTITION_BY (sport_key, month),
+                    FILENAME_PATTERN 'retention_{stamp}_{{i}}'
+                )
+            """)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        finally:
+            engine.close()
+        return staging
+
+    def _publish_archive(self, staging: Path):
+        """Move staged partitions into <archive>/odds_snapshots/"""
+        target_root = self.archive_dir / "odds_snapshots"
+        for file in staging.rglob("*.parquet"):
+            target = target_root / file.relative_to(staging)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            file.replace(target)
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+# Manual execution
+if __name__ == "__main__":
+    SnapshotRetentionJob().run()
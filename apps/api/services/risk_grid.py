@@ -0,0 +1,213 @@
+"""
+Precomputed Risk Grid
+
+Makes per-ValueBet risk metrics nearly free on the request path:
+1. Offline, drawdown risk is simulated (services/bankroll_sim.py model)
+   on a grid over (odds, probability, Kelly fraction, posterior variance);
+   all fractions of a cell share the same random draws
+2. The grid is stored as one .npy array (memory-mapped on load) plus a
+   JSON sidecar with the axes and simulation settings
+3. Queries are vectorized multilinear interpolation over the 4 axes
+
+Channels: drawdown risk (P of a ruin_level peak-to-trough drawdown within
+the horizon) and expected log growth per bet; doubling time is derived
+from the interpolated growth (ln 2 / g).
+
+Build: python -m services.risk_grid --build
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from services.bankroll_sim import BLOCK_STEPS, SimulatedBet, _posterior_probabilities
+
+ODDS_AXIS = tuple(np.round(np.geomspace(1.1, 10.0, 14), 4))
+PROBABILITY_AXIS = tuple(np.round(np.linspace(0.05, 0.95, 19), 4))
+FRACTION_AXIS = (0.0, 0.0025, 0.005, 0.01, 0.015, 0.02, 0.03, 0.04, 0.05, 0.06, 0.08, 0.10)
+VARIANCE_AXIS = (0.0, 0.00025, 0.001, 0.0025, 0.01)
+
+CHANNELS = ("drawdown_risk", "growth")
+
+
+def _simulate_cell(args) -> np.ndarray:
+    """Drawdown risk for every fraction of one (odds, probability, variance) cell"""
+    odds, probability, variance, fractions, paths, horizon, ruin_level, seed = args
+    rng = np.random.default_rng(seed)
+    fractions = np.asarray(fractions)
+
+    probs = _posterior_probabilities(rng, [SimulatedBet(odds, probability, 0.0, variance)], paths)[0]
+    win = np.log1p(fractions * (odds - 1.0))
+    lose = np.log1p(-fractions)
+
+    log_wealth = np.zeros((paths, len(fractions)))
+    peak = np.zeros_like(log_wealth)
+    max_drawdown = np.zeros_like(log_wealth)
+    for start in range(0, horizon, BLOCK_STEPS):
+        steps = min(BLOCK_STEPS, horizon - start)
+        won = (rng.random((steps, paths)) < probs)[:, :, None]
+        path = log_wealth + np.cumsum(np.where(won, win, lose), axis=0)
+        peaks = np.maximum(peak, np.maximum.accumulate(path, axis=0))
+        max_drawdown = np.maximum(max_drawdown, (peaks - path).max(axis=0))
+        log_wealth, peak = path[-1], peaks[-1]
+
+    return (max_drawdown >= -np.log1p(-ruin_level)).mean(axis=0)
+
+
+def build_risk_grid(
+    path: Optional[str] = None,
+    odds_axis: Sequence[float] = ODDS_AXIS,
+    probability_axis: Sequence[float] = PROBABILITY_AXIS,
+    fraction_axis: Sequence[float] = FRACTION_AXIS,
+    variance_axis: Sequence[float] = VARIANCE_AXIS,
+    paths: int = 2000,
+    horizon: int = 250,
+    ruin_level: float = 0.5,
+    seed: int = 0,
+    workers: Optional[int] = None
+) -> Path:
+    """Simulate the grid and publish <path> (.npy) and its .json sidecar"""
+    path = Path(path or settings.RISK_GRID_PATH)
+    odds_axis, probability_axis = np.asarray(odds_axis, float), np.asarray(probability_axis, float)
+    fraction_axis, variance_axis = np.asarray(fraction_axis, float), np.asarray(variance_axis, float)
+
+    cells = [(o, p, v) for o in odds_axis for p in probability_axis for v in variance_axis]
+    seeds = np.random.SeedSequence(seed).spawn(len(cells))
+    tasks = [
+        (o, p, v, fraction_axis, paths, horizon, ruin_level, s)
+        for (o, p, v), s in zip(cells, seeds)
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            risks = list(pool.map(_simulate_cell, tasks, chunksize=16))
+    else:
+        risks = [_simulate_cell(task) for task in tasks]
+
+    shape = (len(odds_axis), len(probability_axis), len(fraction_axis), len(variance_axis))
+    grid = np.empty(shape + (len(CHANNELS),))
+    grid[..., 0] = np.array(risks).reshape(len(odds_axis), len(probability_axis), len(variance_axis), -1).transpose(0, 1, 3, 2)
+
+    # Expected log growth is linear in p, so the posterior mean gives it exactly
+    o = odds_axis[:, None, None, None]
+    p = probability_axis[None, :, None, None]
+    f = fraction_axis[None, None, :, None]
+    grid[..., 1] = np.broadcast_to(p * np.log1p(f * (o - 1)) + (1 - p) * np.log1p(-f), shape)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, grid)
+    meta_tmp = path.with_suffix(".tmp.json")
+    meta_tmp.write_text(json.dumps({
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "channels": list(CHANNELS),
+        "axes": {
+            "odds": odds_axis.tolist(),
+            "probability": probability_axis.tolist(),
+            "fraction": fraction_axis.tolist(),
+            "variance": variance_axis.tolist()
+        },
+        "paths": paths,
+        "horizon": horizon,
+        "ruin_level": ruin_level,
+        "seed": seed
+    }, indent=2))
+    os.replace(tmp, path)
+    os.replace(meta_tmp, path.with_suffix(".json"))
+    print(f"[RISK GRID] {len(cells)} cells x {len(fraction_axis)} fractions written to {path}")
+    return path
+
+
+class RiskGrid:
+    """
+    Memory-mapped risk grid with vectorized multilinear interpolation
+
+    Usage:
+        grid = RiskGrid.load()
+        metrics = grid.query(odds, probability, fraction, variance)
+    """
+
+    def __init__(self, values: np.ndarray, axes: Dict[str, Sequence[float]], meta: Optional[Dict] = None):
+        self.values = values
+        self._cells = np.asarray(values).reshape(-1, values.shape[-1])  # Flat view, no copy
+        self.axes = [np.asarray(axes[name], dtype=float) for name in ("odds", "probability", "fraction", "variance")]
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["RiskGrid"]:
+        """Open a published grid, or None if it has not been built"""
+        path = Path(path or settings.RISK_GRID_PATH)
+        try:
+            meta = json.loads(path.with_suffix(".json").read_text())
+            values = np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"[RISK GRID] Not available ({e}); using per-bet simulation")
+            return None
+        return cls(values, meta["axes"], meta)
+
+    def covers(self, odds, probability, fraction, variance) -> np.ndarray:
+        """Which query points lie inside the grid (outside, results are clamped)"""
+        points = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (odds, probability, fraction, variance)))
+        inside = np.ones(points[0].shape, dtype=bool)
+        for axis, x in zip(self.axes, points):
+            inside &= (x >= axis[0]) & (x <= axis[-1])
+        return inside
+
+    def query(self, odds, probability, fraction, variance) -> Dict[str, np.ndarray]:
+        """Interpolated drawdown risk, growth and doubling time (arrays broadcast together)"""
+        points = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (odds, probability, fraction, variance)))
+        shape = points[0].shape
+
+        lower, weight = [], []
+        for axis, x in zip(self.axes, points):
+            x = np.clip(x.ravel(), axis[0], axis[-1])
+            i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, max(len(axis) - 2, 0))
+            span = axis[np.minimum(i + 1, len(axis) - 1)] - axis[i]
+            lower.append(i)
+            weight.append(np.where(span > 0, (x - axis[i]) / np.where(span > 0, span, 1.0), 0.0))
+
+        # All 16 corners at once: flat cell index and weight per (point, corner)
+        corners = (np.arange(16)[:, None] >> np.arange(4)[None, :]) & 1  # (16, 4)
+        flat = np.zeros((len(lower[0]), 16), dtype=np.int64)
+        w = np.ones((len(lower[0]), 16))
+        for d in range(4):
+            idx = np.minimum(lower[d][:, None] + corners[None, :, d], len(self.axes[d]) - 1)
+            flat = flat * len(self.axes[d]) + idx
+            w *= np.where(corners[None, :, d] == 1, weight[d][:, None], 1.0 - weight[d][:, None])
+        result = np.einsum("nk,nkc->nc", w, self._cells[flat])
+
+        growth = result[:, 1].reshape(shape)
+        with np.errstate(divide="ignore"):
+            doubling = np.where(growth > 0, np.log(2) / np.where(growth > 0, growth, 1.0), np.inf)
+        return {
+            "drawdown_risk": np.clip(result[:, 0], 0.0, 1.0).reshape(shape),
+            "growth": growth,
+            "doubling_time": doubling
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed risk grid")
+    parser.add_argument("--build", action="store_true", help="Simulate and publish the grid")
+    parser.add_argument("--path", default=None, help="Output .npy path")
+    parser.add_argument("--paths", type=int, default=2000, help="Simulated paths per cell")
+    parser.add_argument("--horizon", type=int, default=250, help="Bets per path")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size")
+    args = parser.parse_args()
+
+    if args.build:
+        build_risk_grid(args.path, paths=args.paths, horizon=args.horizon, workers=args.workers)
+    else:
+        parser.print_help()
@@ -0,0 +1,294 @@
+"""
+Steam Move Detector
+
+A steam move is a coordinated, fast shift of the same outcome across
+several books, usually led by a sharp one. Detection is incremental and
+never touches history:
+1. Each (match, bookmaker, outcome) keeps a fixed-size ring buffer of
+   (time, price); quotes older than the window fall off the tail, so the
+   move over the window (implied probability now - oldest) and its
+   velocity are O(1) per update
+2. Each (match, outcome) keeps running counts of books whose window move
+   exceeds min_move up / down (and how many of them are sharp). An update
+   swaps the book's old contribution for the new one; contributions older
+   than the window expire from a time-ordered queue (amortized O(1)) back
+   to "no move", so a book with an unchanged price still counts as quoting
+3. Steam = at least min_books books moved the same way, they make up at
+   least min_agreement of the books quoting, and one of them is sharp: a
+   measured leader for the sport (services/leader_lag.py) or, where none
+   is published, BOOKMAKER_WEIGHTS >= SHARP_WEIGHT. The time the condition
+   first held is kept until it lapses
+
+Fed by every refresh of the live slate (observe(matches)); repeated reads
+of a cached response are ignored because bookmaker last_update is unchanged.
+
+Usage:
+    detector = SteamDetector()
+    detector.observe(matches)
+    signal = detector.signal(match_id, "Arsenal")
+    previous = detector.previous_price(match_id, "pinnacle", "Arsenal")
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.schemas import Match, MarketType
+from services.leader_lag import LeaderLagTable
+
+RING_SIZE = 32  # Quotes kept per (match, bookmaker, outcome)
+WINDOW_SECONDS = 30 * 60  # Moves are measured over the last 30 minutes
+MIN_MOVE = 0.02  # 2 points of implied probability
+MIN_BOOKS = 3
+MIN_AGREEMENT = 0.6  # Share of quoting books moving the same way
+SHARP_WEIGHT = 3.0  # BOOKMAKER_WEIGHTS at or above this count as sharp
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class PriceRing:
+    """Last RING_SIZE (time, price) quotes of one series, oldest first"""
+
+    __slots__ = ("times", "prices", "head", "size", "count")
+
+    def __init__(self, capacity: int = RING_SIZE):
+        self.times = [0.0] * capacity
+        self.prices = [0.0] * capacity
+        self.head = 0  # Next write position
+        self.size = 0  # Quotes inside the window
+        self.count = 0  # Quotes stored (previous_price survives window eviction)
+
+    def _index(self, k: int) -> int:
+        """Position of the k-th newest quote (0 = latest)"""
+        return (self.head - 1 - k) % len(self.times)
+
+    def push(self, t: float, price: float) -> None:
+        self.times[self.head] = t
+        self.prices[self.head] = price
+        self.head = (self.head + 1) % len(self.times)
+        self.size = min(self.size + 1, len(self.times))
+        self.count = min(self.count + 1, len(self.times))
+
+    def evict_before(self, t: float) -> None:
+        """Drop quotes older than t, always keeping the latest"""
+        while self.size > 1 and self.times[self._index(self.size - 1)] < t:
+            self.size -= 1
+
+    @property
+    def latest(self) -> Tuple[float, float]:
+        i = self._index(0)
+        return self.times[i], self.prices[i]
+
+    @property
+    def oldest(self) -> Tuple[float, float]:
+        i = self._index(self.size - 1)
+        return self.times[i], self.prices[i]
+
+    @property
+    def previous(self) -> Optional[float]:
+        """Last stored price that differs from the current one"""
+        current = self.prices[self._index(0)]
+        for k in range(1, self.count):
+            price = self.prices[self._index(k)]
+            if price != current:
+                return price
+        return None
+
+
+@dataclass
+class SteamSignal:
+    match_id: str
+    outcome: str
+    direction: int  # +1 shortening (money on the outcome), -1 drifting
+    books: int  # Books moving that way
+    agreement: float  # books / books quoting
+    velocity: float  # Mean implied-probability change per minute of the moving books
+    detected_at: datetime
+
+
+class _OutcomeState:
+    """Running cross-book agreement for one (match, outcome)"""
+
+    __slots__ = ("moves", "events", "up", "down", "sharp_up", "sharp_down", "velocity_up", "velocity_down", "since")
+
+    def __init__(self):
+        self.moves: Dict[str, Tuple[int, float, float, bool]] = {}  # book -> (sign, velocity, time, sharp)
+        self.events: Deque[Tuple[float, str]] = deque()
+        self.up = self.down = self.sharp_up = self.sharp_down = 0
+        self.velocity_up = self.velocity_down = 0.0
+        self.since: Optional[float] = None
+
+    def _apply(self, sign: int, velocity: float, sharp: bool, k: int) -> None:
+        if sign > 0:
+            self.up += k
+            self.sharp_up += k * sharp
+            self.velocity_up += k * velocity
+        elif sign < 0:
+            self.down += k
+            self.sharp_down += k * sharp
+            self.velocity_down += k * velocity
+
+    def update(self, book: str, sign: int, velocity: float, t: float, sharp: bool) -> None:
+        old = self.moves.get(book)
+        if old:
+            self._apply(old[0], old[1], old[3], -1)
+        self.moves[book] = (sign, velocity, t, sharp)
+        self._apply(sign, velocity, sharp, 1)
+        self.events.append((t, book))
+
+    def expire(self, before: float) -> None:
+        while self.events and self.events[0][0] < before:
+            t, book = self.events.popleft()
+            move = self.moves.get(book)
+            if move and move[2] == t:  # Not superseded by a newer quote
+                # The book's latest quote is still live: it now counts as quoting, not moving
+                self._apply(move[0], move[1], move[3], -1)
+                self.moves[book] = (0, 0.0, t, move[3])
+
+
+class SteamDetector:
+    """
+    Incremental steam detection over live refreshes
+
+    Usage:
+        detector = SteamDetector()
+        detector.update(match_id, "pinnacle", "Arsenal", 2.10, t)
+        detector.signal(match_id, "Arsenal")
+    """
+
+    def __init__(
+        self,
+        ring_size: int = RING_SIZE,
+        window_seconds: float = WINDOW_SECONDS,
+        min_move: float = MIN_MOVE,
+        min_books: int = MIN_BOOKS,
+        min_agreement: float = MIN_AGREEMENT,
+        sharp_books: Optional[Iterable[str]] = None,
+        leader_lag: Optional[LeaderLagTable] = None
+    ):
+        self.ring_size = ring_size
+        self.window = window_seconds
+        self.min_move = min_move
+        self.min_books = min_books
+        self.min_agreement = min_agreement
+        if sharp_books is None:
+            sharp_books = [b for b, w in settings.BOOKMAKER_WEIGHTS.items() if w >= SHARP_WEIGHT and b != "default"]
+        self.sharp_books = set(sharp_books)
+        self.leader_lag = leader_lag
+        self._leaders: Dict[str, set] = {}  # Per sport, from the leader-lag matrix
+
+        self._rings: Dict[Tuple[str, str, str], PriceRing] = {}
+        self._outcomes: Dict[Tuple[str, str], _OutcomeState] = {}
+        self._kickoffs: Dict[str, float] = {}
+
+    def _is_sharp(self, sport: Optional[str], bookmaker: str) -> bool:
+        if self.leader_lag is not None and sport:
+            if sport not in self._leaders:
+                self._leaders[sport] = set(self.leader_lag.leaders(sport))
+            if self._leaders[sport]:
+                return bookmaker in self._leaders[sport]
+        return bookmaker in self.sharp_books
+
+    def update(self, match_id: str, bookmaker: str, outcome: str, price: float, t: float,
+               sport: Optional[str] = None) -> None:
+        """Feed one quote (unix time t); quotes not newer than the series' latest are ignored"""
+        ring = self._rings.get((match_id, bookmaker, outcome))
+        if ring is None:
+            ring = self._rings[(match_id, bookmaker, outcome)] = PriceRing(self.ring_size)
+        elif t <= ring.latest[0]:
+            return
+        ring.push(t, price)
+        ring.evict_before(t - self.window)
+
+        t0, p0 = ring.oldest
+        move = 1.0 / price - 1.0 / p0
+        velocity = move / (t - t0) * 60.0 if t > t0 else 0.0
+        sign = 1 if move >= self.min_move else -1 if move <= -self.min_move else 0
+
+        state = self._outcomes.get((match_id, outcome))
+        if state is None:
+            state = self._outcomes[(match_id, outcome)] = _OutcomeState()
+        state.update(bookmaker, sign, velocity, t, self._is_sharp(sport, bookmaker))
+        state.expire(t - self.window)
+        self._check(state, t)
+
+    def observe(self, matches: List[Match], now: Optional[datetime] = None) -> None:
+        """Feed a refresh of the live slate (h2h) and drop matches that have started"""
+        for match in matches:
+            self._kickoffs[match.id] = _timestamp(match.commence_time)
+            for bookie in match.bookmakers:
+                t = _timestamp(bookie.last_update)
+                for market in bookie.markets:
+                    if market.key != MarketType.H2H:
+                        continue
+                    for outcome in market.outcomes:
+                        if 1.01 <= outcome.price <= 100.0:
+                            self.update(match.id, bookie.key, outcome.name, outcome.price, t, match.sport_key)
+        self.prune(now)
+
+    def prune(self, now: Optional[datetime] = None) -> None:
+        """Forget matches that have kicked off"""
+        cutoff = _timestamp(now)
+        started = {m for m, kickoff in self._kickoffs.items() if kickoff <= cutoff}
+        if not started:
+            return
+        self._rings = {k: v for k, v in self._rings.items() if k[0] not in started}
+        self._outcomes = {k: v for k, v in self._outcomes.items() if k[0] not in started}
+        for match_id in started:
+            del self._kickoffs[match_id]
+
+    def _check(self, state: _OutcomeState, t: float) -> None:
+        if self._direction(state) == 0:
+            state.since = None
+        elif state.since is None:
+            state.since = t
+
+    def _direction(self, state: _OutcomeState) -> int:
+        quoting = len(state.moves)
+        for direction, books, sharp in ((1, state.up, state.sharp_up), (-1, state.down, state.sharp_down)):
+            if books >= self.min_books and books >= self.min_agreement * quoting and sharp > 0:
+                return direction
+        return 0
+
+    def signal(self, match_id: str, outcome: str, now: Optional[datetime] = None) -> Optional[SteamSignal]:
+        """Current steam on an outcome, or None"""
+        state = self._outcomes.get((match_id, outcome))
+        if state is None:
+            return None
+        t = _timestamp(now)
+        state.expire(t - self.window)
+        self._check(state, t)
+        direction = self._direction(state)
+        if direction == 0:
+            return None
+
+        books = state.up if direction > 0 else state.down
+        velocity = state.velocity_up if direction > 0 else state.velocity_down
+        return SteamSignal(
+            match_id=match_id,
+            outcome=outcome,
+            direction=direction,
+            books=books,
+            agreement=books / len(state.moves),
+            velocity=velocity / books,
+            detected_at=datetime.fromtimestamp(state.since, timezone.utc)
+        )
+
+    def previous_price(self, match_id: str, bookmaker: str, outcome: str) -> Optional[float]:
+        """The book's price before it moved to the current one (None if it has not moved)"""
+        ring = self._rings.get((match_id, bookmaker, outcome))
+        return ring.previous if ring else None
@@ -0,0 +1,346 @@
+"""
+Parameter Sweep (edge thresholds, Kelly multipliers, edge penalties)
+
+Tunes the staking rules against history without re-running consensus:
+1. One backtest replay collects every positive-edge quote (Candidate)
+   with its consensus probability, std error, liquidity and fill factors
+2. Candidates become a column matrix in shared memory, sorted by
+   settlement and grouped by (match, outcome)
+3. Each grid point is a vectorized mask-and-sum: risk-adjusted edge,
+   quality grade and Kelly fraction are recomputed as arrays, the first
+   qualifying quote per (match, outcome) is the bet, and ROI / drawdown /
+   CLV are sums over the mask. Penalty/multiplier combinations are spread
+   over a process pool; thresholds are evaluated together per combination
+
+Surfaces have shape (thresholds, uncertainty weights, liquidity weights,
+multiplier sets) per sport and for all sports together. Stakes are flat
+fractions of the starting bankroll and sized per bet (no compounding or
+joint portfolio sizing), so the surfaces rank parameter sets rather than
+reproduce a backtest's bankroll exactly.
+
+Usage:
+    python -m services.sweep --sports soccer_epl --start 2025-01-01 --end 2025-07-01 --output sweep.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from services.backtest import Backtester, Candidate
+from services.dynamic_kelly import DynamicKellyCalculator, RiskTolerance
+
+THRESHOLDS = (0.0, 0.005, 0.01, 0.015, 0.02, 0.03, 0.04, 0.05)
+UNCERTAINTY_WEIGHTS = (0.0, 0.5, 1.0, 1.5, 2.0)
+LIQUIDITY_WEIGHTS = (0.0, 0.01, 0.02, 0.04)
+MULTIPLIER_SETS = (
+    {'A': 0.50, 'B': 0.25, 'C': 0.10, 'D': 0.00},  # Current
+    {'A': 0.25, 'B': 0.125, 'C': 0.05, 'D': 0.00},
+    {'A': 0.50, 'B': 0.50, 'C': 0.25, 'D': 0.00},
+    {'A': 1.00, 'B': 0.50, 'C': 0.25, 'D': 0.00},
+    {'A': 0.50, 'B': 0.25, 'C': 0.00, 'D': 0.00},
+)
+
+METRICS = ("bets", "staked", "profit", "roi", "max_drawdown", "mean_clv")
+COLUMNS = ("odds", "full_kelly", "raw_edge", "std_error", "illiquidity", "fill", "confidence",
+           "group_start", "won", "clv", "sport")
+GRADES = "ABCD"
+MAX_FRACTION = 0.10  # Same hard cap as DynamicKellyCalculator
+
+_shared: Dict[str, object] = {}  # Worker-side view of the candidate matrix
+
+
+@dataclass
+class SweepResult:
+    """ROI / drawdown / CLV surfaces over the parameter grid"""
+    thresholds: List[float]
+    uncertainty_weights: List[float]
+    liquidity_weights: List[float]
+    multiplier_sets: List[Dict[str, float]]
+    sports: List[str]
+    surfaces: Dict[str, Dict[str, np.ndarray]]  # "all" or sport -> metric -> array
+    candidates: int = 0
+    elapsed_seconds: float = 0.0
+    meta: Dict = field(default_factory=dict)
+
+    def best(self, sport: str = "all", metric: str = "roi", min_bets: int = 30, maximize: bool = True) -> Optional[Dict]:
+        """Grid point with the best metric among points with at least min_bets bets"""
+        values = np.where(self.surfaces[sport]["bets"] >= min_bets, self.surfaces[sport][metric], np.nan)
+        if np.isnan(values).all():
+            return None
+        index = np.unravel_index(np.nanargmax(values) if maximize else np.nanargmin(values), values.shape)
+        return {
+            "edge_threshold": self.thresholds[index[0]],
+            "uncertainty_weight": self.uncertainty_weights[index[1]],
+            "liquidity_weight": self.liquidity_weights[index[2]],
+            "confidence_multipliers": self.multiplier_sets[index[3]],
+            **{m: float(self.surfaces[sport][m][index]) for m in METRICS}
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "axes": {
+                "edge_threshold": self.thresholds,
+                "uncertainty_weight": self.uncertainty_weights,
+                "liquidity_weight": self.liquidity_weights,
+                "confidence_multipliers": self.multiplier_sets
+            },
+            "candidates": self.candidates,
+            "elapsed_seconds": self.elapsed_seconds,
+            **self.meta,
+            "best_roi": {sport: self.best(sport) for sport in self.surfaces},
+            "surfaces": {
+                sport: {m: np.where(np.isnan(a), None, a).tolist() for m, a in metrics.items()}
+                for sport, metrics in self.surfaces.items()
+            }
+        }
+
+    def write(self, path: str):
+        """Publish atomically (tmp file + rename)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2))
+        os.replace(tmp, path)
+
+
+def build_columns(candidates: Sequence[Candidate]) -> Tuple[np.ndarray, List[str]]:
+    """
+    (len(COLUMNS), n) float matrix, ordered by settlement then (match,
+    outcome) then time, with the best price first at equal times
+    """
+    ordered = sorted(candidates, key=lambda c: (c.settled_at, c.match_id, c.outcome, c.placed_at, -c.odds))
+    sports = sorted({c.sport for c in ordered})
+    sport_code = {s: i for i, s in enumerate(sports)}
+
+    columns = np.zeros((len(COLUMNS), len(ordered)))
+    if not ordered:
+        return columns, sports
+    odds = np.array([c.odds for c in ordered])
+    p = np.array([c.probability for c in ordered])
+    clv = np.array([np.nan if c.clv is None else c.clv for c in ordered])
+    group = [(c.match_id, c.outcome) for c in ordered]
+
+    columns[COLUMNS.index("odds")] = odds
+    columns[COLUMNS.index("full_kelly")] = np.clip((p * (odds - 1) - (1 - p)) / (odds - 1), 0.0, 0.5)
+    columns[COLUMNS.index("raw_edge")] = p * odds - 1.0
+    columns[COLUMNS.index("std_error")] = [c.std_error for c in ordered]
+    columns[COLUMNS.index("illiquidity")] = [1.0 - c.liquidity_factor for c in ordered]
+    columns[COLUMNS.index("fill")] = [c.fill_probability for c in ordered]
+    columns[COLUMNS.index("confidence")] = [GRADES.index(c.confidence) for c in ordered]
+    columns[COLUMNS.index("group_start")] = [i == 0 or group[i] != group[i - 1] for i in range(len(group))]
+    columns[COLUMNS.index("won")] = [c.won for c in ordered]
+    columns[COLUMNS.index("clv")] = clv
+    columns[COLUMNS.index("sport")] = [sport_code[c.sport] for c in ordered]
+    return columns, sports
+
+
+def evaluate(
+    columns: np.ndarray,
+    n_sports: int,
+    thresholds: Sequence[float],
+    uncertainty_weight: float,
+    liquidity_weight: float,
+    multipliers: Dict[str, float],
+    risk_multiplier: float = 1.0
+) -> np.ndarray:
+    """
+    Metrics for every threshold at one (penalties, multipliers) point
+
+    Returns (n_sports + 1, len(thresholds), len(METRICS)); row 0 is all
+    sports together.
+    """
+    c = dict(zip(COLUMNS, columns))
+    n = columns.shape[1]
+    out = np.full((n_sports + 1, len(thresholds), len(METRICS)), np.nan)
+    if n == 0:
+        return out
+
+    # AdvancedEdgeCalculator.calculate_comprehensive_edge (no CLV adjustment in replay)
+    edge = (c["raw_edge"] - uncertainty_weight * c["std_error"] - liquidity_weight * c["illiquidity"]) * c["fill"]
+
+    # EdgeAnalysis.quality_score
+    confidence = c["confidence"]
+    quality = np.select(
+        [confidence == 3, edge > 0.05, edge > 0.03, edge > 0.01],
+        [3, np.where(confidence <= 1, 0, 1), np.where(confidence == 0, 1, 2), 2],
+        default=3
+    ).astype(np.int64)
+
+    # DynamicKellyCalculator.calculate_optimal_stake
+    grade_multiplier = np.array([multipliers.get(g, 0.10) for g in GRADES])
+    fraction = np.minimum(c["full_kelly"] * grade_multiplier[quality] * risk_multiplier, MAX_FRACTION)
+
+    starts = np.flatnonzero(c["group_start"])
+    lengths = np.diff(np.append(starts, n))
+    payout = np.where(c["won"] > 0, c["odds"] - 1.0, -1.0)
+    sport = c["sport"].astype(np.int64)
+    has_clv = ~np.isnan(c["clv"])
+    clv = np.where(has_clv, c["clv"], 0.0)
+
+    for t, threshold in enumerate(thresholds):
+        qualifies = (edge > threshold) & (fraction > 1e-6)
+        # First qualifying quote per (match, outcome) group
+        seen = np.cumsum(qualifies)
+        before_group = np.repeat(seen[starts] - qualifies[starts], lengths)
+        taken = qualifies & (seen - before_group == 1)
+
+        stake = np.where(taken, fraction, 0.0)
+        pnl = stake * payout
+        for s in range(n_sports + 1):
+            mask = taken if s == 0 else taken & (sport == s - 1)
+            bets = int(mask.sum())
+            staked = float(stake[mask].sum())
+            profit = float(pnl[mask].sum())
+
+            equity = 1.0 + np.cumsum(np.where(mask, pnl, 0.0))
+            peak = np.maximum.accumulate(np.maximum(equity, 1.0))
+            drawdown = float((1.0 - equity / peak).max())
+
+            clv_mask = mask & has_clv
+            out[s, t] = (
+                bets,
+                staked,
+                profit,
+                profit / staked if staked else np.nan,
+                drawdown,
+                clv[clv_mask].mean() if clv_mask.any() else np.nan
+            )
+    return out
+
+
+def _attach(name: str, shape: Tuple[int, int]):
+    """Pool initializer: map the shared candidate matrix (no copy)"""
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm
+    _shared["columns"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _evaluate_shared(args) -> np.ndarray:
+    return evaluate(_shared["columns"], *args)
+
+
+class ParameterSweep:
+    """
+    Grid search over staking parameters on replayed history
+
+    Usage:
+        sweep = ParameterSweep()
+        result = sweep.run(["soccer_epl"], "2025-01-01", "2025-07-01")
+        print(result.best("soccer_epl"))
+    """
+
+    def __init__(self, db_path: Optional[str] = None, workers: Optional[int] = None, risk_tolerance: str = "moderate"):
+        self.db_path = str(db_path or settings.HISTORICAL_DB_PATH)
+        self.workers = workers or os.cpu_count() or 1
+        self.risk_tolerance = risk_tolerance
+
+    def load_candidates(self, sports: Optional[Sequence[str]] = None, start: str = "1970-01-01",
+                        end: str = "9999-12-31") -> List[Candidate]:
+        """One replay of history; the expensive consensus work happens here only"""
+        candidates, shards, snapshots = Backtester(
+            self.db_path, workers=self.workers, risk_tolerance=self.risk_tolerance
+        ).replay(sports, start, end, collect="candidates")
+        print(f"[SWEEP] {len(candidates):,} candidates from {shards} shards ({snapshots:,} snapshots)")
+        return candidates
+
+    def run(
+        self,
+        sports: Optional[Sequence[str]] = None,
+        start: str = "1970-01-01",
+        end: str = "9999-12-31",
+        thresholds: Sequence[float] = THRESHOLDS,
+        uncertainty_weights: Sequence[float] = UNCERTAINTY_WEIGHTS,
+        liquidity_weights: Sequence[float] = LIQUIDITY_WEIGHTS,
+        multiplier_sets: Sequence[Dict[str, float]] = MULTIPLIER_SETS,
+        candidates: Optional[List[Candidate]] = None
+    ) -> SweepResult:
+        t0 = time.perf_counter()
+        if candidates is None:
+            candidates = self.load_candidates(sports, start, end)
+        columns, sport_keys = build_columns(candidates)
+
+        risk_multiplier = DynamicKellyCalculator.RISK_MULTIPLIERS[RiskTolerance(self.risk_tolerance)]
+        points = list(itertools.product(range(len(uncertainty_weights)), range(len(liquidity_weights)), range(len(multiplier_sets))))
+        tasks = [
+            (len(sport_keys), tuple(thresholds), uncertainty_weights[u], liquidity_weights[l], multiplier_sets[m], risk_multiplier)
+            for u, l, m in points
+        ]
+
+        if self.workers > 1 and len(tasks) > 1 and columns.size:
+            shm = shared_memory.SharedMemory(create=True, size=columns.nbytes)
+            try:
+                np.ndarray(columns.shape, dtype=np.float64, buffer=shm.buf)[:] = columns
+                with ProcessPoolExecutor(
+                    max_workers=min(self.workers, len(tasks)),
+                    initializer=_attach,
+                    initargs=(shm.name, columns.shape)
+                ) as pool:
+                    results = list(pool.map(_evaluate_shared, tasks, chunksize=max(1, len(tasks) // (4 * self.workers))))
+            finally:
+                shm.close()
+                shm.unlink()
+        else:
+            results = [evaluate(columns, *task) for task in tasks]
+
+        shape = (len(thresholds), len(uncertainty_weights), len(liquidity_weights), len(multiplier_sets))
+        grid = np.full((len(sport_keys) + 1,) + shape + (len(METRICS),), np.nan)
+        for (u, l, m), result in zip(points, results):
+            grid[:, :, u, l, m, :] = result
+
+        surfaces = {
+            name: {metric: grid[s, ..., k] for k, metric in enumerate(METRICS)}
+            for s, name in enumerate(["all"] + sport_keys)
+        }
+        result = SweepResult(
+            thresholds=list(thresholds),
+            uncertainty_weights=list(uncertainty_weights),
+            liquidity_weights=list(liquidity_weights),
+            multiplier_sets=[dict(m) for m in multiplier_sets],
+            sports=sport_keys,
+            surfaces=surfaces,
+            candidates=len(candidates),
+            elapsed_seconds=time.perf_counter() - t0,
+            meta={"start": start, "end": end, "risk_tolerance": self.risk_tolerance}
+        )
+        print(f"[SWEEP] {len(tasks) * len(thresholds)} grid points over {len(candidates):,} candidates in {result.elapsed_seconds:.1f}s")
+        return result
+
+
+# Manual execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep edge thresholds, Kelly multipliers and edge penalties")
+    parser.add_argument("--db", default=None, help="Path to historical.db")
+    parser.add_argument("--sports", nargs="*", default=None, help="Sport keys (default: all)")
+    parser.add_argument("--start", default="1970-01-01", help="First kickoff date (inclusive)")
+    parser.add_argument("--end", default="9999-12-31", help="Last kickoff date (exclusive)")
+    parser.add_argument("--risk", default="moderate", choices=["conservative", "moderate", "aggressive"])
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size")
+    parser.add_argument("--min-bets", type=int, default=30, help="Ignore grid points with fewer bets")
+    parser.add_argument("--output", default=None, help="Write the surfaces as JSON")
+    args = parser.parse_args()
+
+    result = ParameterSweep(args.db, workers=args.workers, risk_tolerance=args.risk).run(args.sports, args.start, args.end)
+    for sport in result.surfaces:
+        best = result.best(sport, min_bets=args.min_bets)
+        if best:
+            print(
+                f"  {sport}: threshold {best['edge_threshold']:.3f}, uncertainty x{best['uncertainty_weight']}, "
+                f"liquidity {best['liquidity_weight']}, multipliers {best['confidence_multipliers']} -> "
+                f"ROI {best['roi']:.2%} over {best['bets']:.0f} bets, max drawdown {best['max_drawdown']:.1%}"
+            )
+    if args.output:
+        result.write(args.output)
@@ -0,0 +1,99 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from db.warehouse import ensure_schema
+from services import analytics
+from services.analytics import AnalyticsEngine, AnalyticsUnavailable, sqlite_calibration
+
+KICKOFF = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Two books on 200 settled NBA matches, snapshots on two days, settled recommendations"""
+    path = str(tmp_path / "historical.db")
+    ensure_schema(path)
+    rng = np.random.default_rng(11)
+    conn = sqlite3.connect(path)
+    with conn:
+        for i in range(200):
+            p_home = rng.uniform(0.25, 0.75)
+            kickoff = KICKOFF + timedelta(hours=3 * i)
+            conn.execute(
+                "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) "
+                "VALUES (?, 'basketball_nba', ?, 'Home', 'Away', TRUE, ?)",
+                (f"m{i}", kickoff, "home" if rng.random() < p_home else "away")
+            )
+            soft = float(np.clip(p_home + rng.normal(0, 0.1), 0.05, 0.95))
+            for book, p, margin in (("sharp", p_home, 1.02), ("soft", soft, 1.06)):
+                conn.executemany("""
+                    INSERT INTO closing_odds
+                    (match_id, bookmaker_key, market_key, outcome_name, closing_odds, snapshot_time)
+                    VALUES (?, ?, 'h2h', ?, ?, ?)
+                """, [
+                    (f"m{i}", book, "Home", 1 / (p * margin), kickoff),
+                    (f"m{i}", book, "Away", 1 / ((1 - p) * margin), kickoff),
+                ])
+        conn.executemany("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES (?, 'sharp', 'h2h', ?, ?, ?)
+        """, [
+            ("m0", "Home", 1.8, KICKOFF - timedelta(hours=30)), ("m0", "Away", 2.1, KICKOFF - timedelta(hours=30)),
+            ("m0", "Home", 1.9, KICKOFF - timedelta(hours=2)), ("m0", "Away", 2.0, KICKOFF - timedelta(hours=2)),
+        ])
+        conn.executemany("""
+            INSERT INTO recommended_bets (match_id, bookmaker_key, market_key, outcome_name, recommended_odds,
+                true_probability, edge, recommendation_time, clv, result, profit_loss)
+            VALUES (?, 'soft', 'h2h', 'Home', 2.2, 0.5, 0.1, ?, ?, ?, ?)
+        """, [
+            ("m1", KICKOFF, 0.04, "win", 12.0),
+            ("m2", KICKOFF, -0.02, "loss", -10.0),
+            ("m3", KICKOFF, 0.01, None, None),
+        ])
+    conn.close()
+    return path
+
+
+def test_calibration_matches_sqlite_baseline(db_path):
+    engine = AnalyticsEngine(db_path=db_path, threads=2)
+    duck = engine.bookmaker_calibration(sport="basketball_nba")
+    engine.close()
+    conn = sqlite3.connect(db_path)
+    lite = sqlite_calibration(conn, sport="basketball_nba")
+    conn.close()
+
+    assert [r.bookmaker_key for r in duck] == [r.bookmaker_key for r in lite] == ["sharp", "soft"]
+    for d, s in zip(duck, lite):
+        assert d.total_bets == s.total_bets == 400
+        for field in ("avg_implied_prob", "avg_actual_prob", "calibration_error", "brier_score", "log_loss", "avg_overround"):
+            assert getattr(d, field) == pytest.approx(getattr(s, field), abs=1e-9), field
+    assert duck[1].avg_overround == pytest.approx(0.06)
+
+
+def test_overround_trend_and_clv_summary(db_path):
+    engine = AnalyticsEngine(db_path=db_path)
+    trend = engine.overround_trend(sport="basketball_nba", bucket="day")
+    assert [(p.bookmaker_key, p.bucket.date().isoformat(), p.markets) for p in trend] == [
+        ("sharp", "2024-12-30", 1), ("sharp", "2024-12-31", 1)
+    ]
+    assert trend[0].avg_overround == pytest.approx(1 / 1.8 + 1 / 2.1 - 1)
+    with pytest.raises(ValueError):
+        engine.overround_trend(bucket="minute")
+
+    (clv,) = engine.clv_summary(sport="basketball_nba")
+    engine.close()
+    assert (clv.bookmaker_key, clv.total_bets) == ("soft", 3)
+    assert clv.avg_clv == pytest.approx(0.01)
+    assert clv.positive_clv_rate == pytest.approx(2 / 3)
+    assert clv.win_rate == pytest.approx(0.5)  # Unsettled bet is not counted
+    assert clv.total_profit == pytest.approx(2.0)
+
+
+def test_missing_extension_raises_without_downloading(db_path, monkeypatch):
+    monkeypatch.setattr(analytics.importlib.util, "find_spec", lambda name: None)
+    monkeypatch.setenv("HOME", str(db_path) + ".home")  # No previously installed copy either
+    with pytest.raises(AnalyticsUnavailable):
+        AnalyticsEngine(db_path=db_path)
@@ -0,0 +1,151 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from core.schemas import Bookmaker, Market, Match, Outcome
+from db.warehouse import ensure_schema
+from main import app
+from routers import odds
+from services.arbitrage import ArbScanner, find_arbs, markets_from_matches
+from services.market_state import MarketStateEngine
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _match(match_id, books, sport="soccer_epl", commence=NOW + timedelta(hours=2), market="h2h"):
+    """books: {key: ({outcome: price or (price, point)}, minutes since update)}"""
+    bookmakers = []
+    for key, (prices, age) in books.items():
+        outcomes = [
+            Outcome(name=name, price=p[0], point=p[1]) if isinstance(p, tuple) else Outcome(name=name, price=p)
+            for name, p in prices.items()
+        ]
+        bookmakers.append(Bookmaker(
+            key=key, title=key, last_update=NOW - timedelta(minutes=age),
+            markets=[Market(key=market, outcomes=outcomes)]
+        ))
+    return Match(
+        id=match_id, sport_key=sport, sport_title=sport, commence_time=commence,
+        home_team="Arsenal", away_team="Chelsea", bookmakers=bookmakers
+    )
+
+
+class FakeOddsClient:
+    def __init__(self, slates):
+        self.slates = slates
+        self.calls = []
+
+    async def get_odds(self, sport, regions, markets):
+        self.calls.append(sport)
+        if sport == "broken":
+            raise RuntimeError("boom")
+        return self.slates.get(sport, [])
+
+
+def test_best_prices_margin_and_equal_payout_stakes():
+    arb = _match("arb", {
+        "pinnacle": ({"Arsenal": 2.50, "Chelsea": 3.00, "Draw": 3.40}, 1),
+        "bet365": ({"Arsenal": 2.90, "Chelsea": 2.80, "Draw": 3.50}, 2),
+        "unibet": ({"Arsenal": 2.70, "Chelsea": 3.60, "Draw": 3.30}, 3),
+        "stale": ({"Arsenal": 9.00, "Chelsea": 9.00, "Draw": 9.00}, 120),
+    })
+    fair = _match("fair", {"pinnacle": ({"Arsenal": 2.0, "Chelsea": 3.5, "Draw": 3.4}, 1)})
+    started = _match("started", {"a": ({"Arsenal": 3.0, "Chelsea": 3.0}, 1)}, commence=NOW - timedelta(minutes=5))
+    no_draw = _match("no_draw", {"a": ({"Arsenal": 3.0, "Chelsea": 3.0}, 1), "b": ({"Draw": 0.0}, 1)})
+
+    markets = markets_from_matches([arb, fair, started, no_draw], NOW, timedelta(minutes=30))
+    assert sorted(m.match_id for m in markets) == ["arb", "fair", "no_draw"]
+
+    arbs = find_arbs(markets, total_stake=100.0)
+    assert [a.match_id for a in arbs] == ["arb"]
+    found = arbs[0]
+    assert {l.outcome: (l.bookmaker, l.odds) for l in found.legs} == {
+        "Arsenal": ("bet365", 2.90), "Chelsea": ("unibet", 3.60), "Draw": ("bet365", 3.50)
+    }
+    implied = 1 / 2.90 + 1 / 3.60 + 1 / 3.50
+    assert found.implied_total == pytest.approx(implied, abs=1e-6)
+    assert found.margin == pytest.approx(1 / implied - 1, abs=1e-6)
+    assert sum(l.stake_share for l in found.legs) == pytest.approx(1.0, abs=1e-5)
+    for leg in found.legs:  # Every outcome pays the same
+        assert leg.stake * leg.odds == pytest.approx(found.payout, abs=0.05)
+
+    assert find_arbs(markets, min_margin=found.margin + 0.01) == []
+
+
+def test_totals_pair_by_line():
+    totals = _match("totals", {
+        "a": ({"Over": (2.10, 2.5), "Under": (1.80, 2.5)}, 1),
+        "b": ({"Over": (1.70, 2.5), "Under": (2.05, 2.5)}, 1),
+        "c": ({"Over": (2.40, 3.5), "Under": (1.55, 3.5)}, 1),
+    }, market="totals")
+    markets = markets_from_matches([totals], NOW, timedelta(minutes=30))
+    assert sorted(len(m.outcomes) for m in markets) == [2, 2]
+
+    arbs = find_arbs(markets)
+    assert len(arbs) == 1  # 2.10 / 2.05 at 2.5; the 3.5 line (one book) is not an arb
+    assert {(l.outcome, l.point, l.bookmaker) for l in arbs[0].legs} == {("Over", 2.5, "a"), ("Under", 2.5, "b")}
+
+
+def test_line_markets_without_points_are_not_pooled():
+    # Over 2.5 at 2.40 and Under 3.5 at 2.40 would be a phantom arb if pooled
+    totals = _match("totals", {
+        "a": ({"Over": 2.40, "Under": 1.55}, 1),
+        "b": ({"Over": 1.55, "Under": 2.40}, 1),
+    }, market="totals")
+    assert markets_from_matches([totals], NOW, timedelta(minutes=30)) == []
+    assert len(markets_from_matches([_match("m1", {
+        "a": ({"Arsenal": 2.10, "Chelsea": 1.80}, 1),
+    })], NOW, timedelta(minutes=30))) == 1  # h2h has no point to carry
+
+
+@pytest.mark.asyncio
+async def test_live_scan_covers_every_sport_in_one_cycle():
+    client = FakeOddsClient({
+        "soccer_epl": [_match("epl", {"a": ({"Arsenal": 2.2, "Chelsea": 4.0, "Draw": 4.0}, 1)})],
+        "basketball_nba": [_match("nba", {
+            "a": ({"Arsenal": 2.10, "Chelsea": 1.80}, 1), "b": ({"Arsenal": 1.75, "Chelsea": 2.05}, 1)
+        }, sport="basketball_nba")],
+    })
+    scanner = ArbScanner(api_client=client, market_state=MarketStateEngine(":memory:"))
+    arbs = await scanner.scan(sports=["soccer_epl", "basketball_nba", "broken"])
+
+    assert sorted(client.calls) == ["basketball_nba", "broken", "soccer_epl"]
+    assert [(a.sport, a.match_id) for a in arbs] == [("soccer_epl", "epl"), ("basketball_nba", "nba")]
+    assert arbs[0].margin > arbs[1].margin
+
+
+@pytest.mark.asyncio
+async def test_arbs_endpoint_from_history(tmp_path, monkeypatch):
+    path = str(tmp_path / "historical.db")
+    ensure_schema(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES ('m1', 'basketball_nba', ?, 'Lakers', 'Celtics')",
+            (NOW + timedelta(hours=3),)
+        )
+        conn.executemany("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES ('m1', ?, 'h2h', ?, ?, ?)
+        """, [
+            ("fanduel", "Lakers", 2.15, NOW - timedelta(minutes=5)),
+            ("fanduel", "Celtics", 1.75, NOW - timedelta(minutes=5)),
+            ("draftkings", "Lakers", 1.70, NOW - timedelta(minutes=4)),
+            ("draftkings", "Celtics", 2.10, NOW - timedelta(minutes=4)),
+            ("old", "Celtics", 5.00, NOW - timedelta(hours=3)),
+        ])
+    conn.close()
+    monkeypatch.setattr(odds, "arb_scanner", ArbScanner(api_client=FakeOddsClient({}), market_state=MarketStateEngine(path)))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/api/v1/odds/arbs", params={"sport": "basketball_nba", "source": "history", "stake": 200})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["home_team"] == "Lakers"
+        assert {l["outcome"]: l["bookmaker"] for l in data[0]["legs"]} == {"Lakers": "fanduel", "Celtics": "draftkings"}
+        assert sum(l["stake"] for l in data[0]["legs"]) == pytest.approx(200, abs=0.02)
+
+        assert (await ac.get("/api/v1/odds/arbs", params={"source": "nope"})).status_code == 400
@@ -0,0 +1,85 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from services.backfill import BackfillEngine, BackfillJob, daily_schedule
+
+
+def _event(snapshot_date: str) -> dict:
+    return {
+        "id": f"evt-{snapshot_date}",
+        "sport_key": "basketball_nba",
+        "commence_time": "2025-01-10T00:00:00Z",
+        "home_team": "Boston Celtics",
+        "away_team": "Los Angeles Lakers",
+        "bookmakers": [{
+            "key": "pinnacle",
+            "title": "Pinnacle",
+            "markets": [{
+                "key": "h2h",
+                "outcomes": [
+                    {"name": "Boston Celtics", "price": 1.8},
+                    {"name": "Los Angeles Lakers", "price": 2.1},
+                ],
+            }],
+        }],
+    }
+
+
+@pytest.mark.asyncio
+async def test_backfill_is_resumable(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        date = request.url.params["date"]
+        calls.append(date)
+        return httpx.Response(
+            200,
+            json={"timestamp": date, "data": [_event(date)]},
+            headers={"x-requests-remaining": "10000"},
+        )
+
+    db_path = str(tmp_path / "historical.db")
+    now = datetime(2025, 1, 5, 18, 0, tzinfo=timezone.utc)
+    jobs = daily_schedule(["basketball_nba"], days=5, now=now)
+
+    engine = BackfillEngine(
+        db_path=db_path,
+        workers=3,
+        requests_per_second=1000,
+        transport=httpx.MockTransport(handler),
+    )
+    first = await engine.run(jobs)
+    assert first.completed == 5
+    assert len(calls) == 5
+
+    # Rerun pays for nothing already stored
+    second = await engine.run(jobs + [BackfillJob("basketball_nba", now.replace(hour=6))])
+    assert second.skipped == 5
+    assert second.completed == 1
+    assert len(calls) == 6
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM odds_snapshots").fetchone()[0] == 12
+    assert conn.execute("SELECT COUNT(*) FROM backfill_checkpoints").fetchone()[0] == 6
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_backfill_stops_when_quota_low(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"data": []}, headers={"x-requests-remaining": "5"})
+
+    engine = BackfillEngine(
+        db_path=str(tmp_path / "historical.db"),
+        workers=1,
+        requests_per_second=1000,
+        transport=httpx.MockTransport(handler),
+    )
+    now = datetime(2025, 1, 5, 18, 0, tzinfo=timezone.utc)
+    result = await engine.run(daily_schedule(["soccer_epl"], days=10, now=now))
+
+    assert result.quota_exhausted
+    assert result.completed == 1
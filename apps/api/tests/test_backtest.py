@@ -0,0 +1,171 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from db.warehouse import ensure_schema
+from services import backtest
+from services.backtest import BacktestBet, Backtester, _AsOfPriors, _pipeline, compound
+
+
+def _build_history(db_path: str):
+    """Two months of EPL: Pinnacle near fair, a soft book that sometimes overprices"""
+    ensure_schema(db_path)
+    rng = random.Random(3)
+    teams = ["Arsenal", "Chelsea", "Everton", "Fulham"]
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for i in range(24):
+            kickoff = datetime(2025, 1, 3, 15, tzinfo=timezone.utc) + timedelta(days=2 * i + i // 12 * 10)
+            home, away = rng.sample(teams, 2)
+            probs = {home: 0.45, "Draw": 0.27, away: 0.28}
+            winner = rng.choices(["home", "draw", "away"], weights=[0.45, 0.27, 0.28])[0]
+            conn.execute(
+                "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (f"m{i}", "soccer_epl", kickoff, home, away, True, winner)
+            )
+            for step in range(4):
+                snapshot = kickoff - timedelta(hours=24 - 6 * step)
+                for book, margin in (("pinnacle", 1.02), ("williamhill", 1.06)):
+                    for name, p in probs.items():
+                        odds = round(1 / (p * margin), 2)
+                        if book == "williamhill" and name == away and step == 2:
+                            odds = round(odds * 1.25, 2)
+                        conn.execute(
+                            "INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time) VALUES (?, ?, 'h2h', ?, ?, ?)",
+                            (f"m{i}", book, name, odds, snapshot)
+                        )
+    conn.close()
+
+
+def test_replay_is_deterministic_and_independent_of_workers(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    _build_history(db_path)
+
+    serial, serial_bets = Backtester(db_path, workers=1, chunk_rows=7).run(start="2025-01-01", end="2025-04-01")
+    pooled, pooled_bets = Backtester(db_path, workers=2).run(start="2025-01-01", end="2025-04-01")
+
+    assert serial.shards == 2
+    assert serial.snapshots == 24 * 4 * 6
+    assert serial.bets > 0
+    assert [b.placed_at for b in serial_bets] == [b.placed_at for b in pooled_bets]
+    assert serial.final_bankroll == pytest.approx(pooled.final_bankroll)
+
+    # Every signal is the overpriced away line, one bet per (match, outcome),
+    # placed before kickoff and beating its own book's close
+    assert len({(b.match_id, b.outcome) for b in serial_bets}) == len(serial_bets)
+    for bet in serial_bets:
+        assert bet.bookmaker == "williamhill"
+        assert bet.placed_at < bet.settled_at
+        assert bet.clv > 0
+    assert serial.final_bankroll == pytest.approx(1000.0 + serial.profit)
+
+    # Date filter: only January kickoffs
+    january, _ = Backtester(db_path, workers=1).run(start="2025-01-01", end="2025-02-01")
+    assert 0 < january.bets < serial.bets
+
+
+def test_as_of_priors_exclude_later_results(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    _build_history(db_path)
+    conn = sqlite3.connect(db_path)
+    before_all = _AsOfPriors(conn, "soccer_epl", "2025-01-01")
+    after_all = _AsOfPriors(conn, "soccer_epl", "2025-12-31")
+    conn.close()
+
+    assert before_all.get("soccer_epl", "Arsenal", "Chelsea") is None
+    total = sum(after_all.get("soccer_epl", a, b)[3] for a, b in [
+        ("Arsenal", "Chelsea"), ("Arsenal", "Everton"), ("Arsenal", "Fulham"),
+        ("Chelsea", "Everton"), ("Chelsea", "Fulham"), ("Everton", "Fulham")
+    ] if after_all.get("soccer_epl", a, b))
+    assert total == 24
+
+    before_all.add("Chelsea", "Arsenal", "home")
+    assert before_all.get("soccer_epl", "Chelsea", "Arsenal") == (1, 0, 0, 1)
+    assert before_all.get("soccer_epl", "Arsenal", "Chelsea") == (0, 1, 0, 1)
+
+
+def test_results_reach_priors_only_after_the_match_ends(tmp_path, monkeypatch):
+    """Arsenal v Chelsea at 15:00 is still being played when the 16:00 rematch is priced"""
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    first = datetime(2025, 3, 1, 15, tzinfo=timezone.utc)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) VALUES (?, 'soccer_epl', ?, ?, ?, TRUE, 'home')",
+            [("boundary", datetime(2025, 2, 28, 23, tzinfo=timezone.utc), "Everton", "Fulham"),
+             ("m0", first, "Arsenal", "Chelsea"), ("m1", first + timedelta(hours=1), "Arsenal", "Chelsea")]
+        )
+        conn.executemany(
+            "INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time) VALUES ('m1', 'pinnacle', 'h2h', ?, ?, ?)",
+            [(name, odds, first + timedelta(minutes=30)) for name, odds in (("Arsenal", 2.2), ("Draw", 3.4), ("Chelsea", 3.3))]
+        )
+
+    # A match that kicked off an hour before the shard is not settled at its start
+    priors = _pipeline(conn, "soccer_epl", "2025-03-01").bayesian.matchups
+    assert priors.get("soccer_epl", "Everton", "Fulham") is None
+    conn.close()
+
+    seen = []
+    original_get = _AsOfPriors.get
+
+    def spy(self, sport, team_a, team_b):
+        result = original_get(self, sport, team_a, team_b)
+        seen.append((team_a, team_b, result))
+        return result
+
+    monkeypatch.setattr(backtest._AsOfPriors, "get", spy)
+    Backtester(db_path, workers=1).run(start="2025-03-01", end="2025-04-01")
+    pairs = [r for r in seen if {r[0], r[1]} == {"Arsenal", "Chelsea"}]
+    assert pairs and all(r[2] is None for r in pairs)
+
+
+def test_bets_settle_into_the_bankroll_only_after_the_match_ends(tmp_path):
+    """A bet priced while an earlier match is in play is sized on equity with that stake still open"""
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    first = datetime(2025, 3, 1, 15, tzinfo=timezone.utc)
+    probs = {"Arsenal": 0.45, "Draw": 0.27, "Chelsea": 0.28}
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for match_id, kickoff in (("m0", first), ("m1", first + timedelta(hours=2, minutes=30))):
+            conn.execute(
+                "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) VALUES (?, 'soccer_epl', ?, 'Arsenal', 'Chelsea', TRUE, 'home')",
+                (match_id, kickoff)
+            )
+            for step, snapshot in enumerate((kickoff - timedelta(hours=2), kickoff - timedelta(hours=1))):
+                for book, margin in (("pinnacle", 1.02), ("williamhill", 1.06)):
+                    for name, p in probs.items():
+                        odds = round(1 / (p * margin), 2)
+                        if book == "williamhill" and name == "Chelsea" and step == 1:
+                            odds = round(odds * 1.25, 2)
+                        conn.execute(
+                            "INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time) VALUES (?, ?, 'h2h', ?, ?, ?)",
+                            (match_id, book, name, odds, snapshot)
+                        )
+    conn.close()
+
+    result, bets = Backtester(db_path, workers=1).run(start="2025-03-01", end="2025-04-01")
+    early, late = sorted(bets, key=lambda b: b.placed_at)
+    assert (early.match_id, late.match_id) == ("m0", "m1")
+    assert early.settled_at == "2025-03-01 17:00:00+00:00"  # Kickoff + 2h soccer match
+    assert late.placed_at < early.settled_at and not early.won
+    assert late.stake == pytest.approx(late.fraction * 1000.0)  # m0's loss is not known yet
+    assert result.final_bankroll == pytest.approx(1000.0 - early.stake - late.stake)
+
+
+def test_compound_stakes_from_equity_in_time_order():
+    def bet(placed, settled, fraction, odds, won):
+        return BacktestBet("soccer_epl", "m", "pinnacle", "x", odds, 0.5, 0.05, fraction, placed, settled, won)
+
+    bets = [
+        bet("2025-01-01 10:00", "2025-01-01 15:00", 0.10, 2.0, True),
+        bet("2025-01-01 11:00", "2025-01-01 15:00", 0.10, 3.0, False),  # Staked from equity incl. the open bet
+        bet("2025-01-01 15:00", "2025-01-02 15:00", 0.50, 2.0, False),  # Placed after both settle
+    ]
+    final, max_drawdown = compound(bets, 100.0)
+    assert [b.stake for b in bets] == pytest.approx([10.0, 10.0, 50.0])
+    assert final == pytest.approx(50.0)
+    assert max_drawdown == pytest.approx(1 - 50.0 / 110.0)  # Peak 110 after the first win settles
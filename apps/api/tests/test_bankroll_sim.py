@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from services.bankroll_sim import BankrollSimulator, SimulatedBet, risk_of_ruin
+
+
+def test_seeded_and_independent_of_workers():
+    bets = [SimulatedBet(1.95, 0.55, 0.04, 0.0005), SimulatedBet(3.4, 0.32, 0.01)]
+    serial = BankrollSimulator(seed=7, workers=1).run(bets, paths=60_000, horizon=200)
+    pooled = BankrollSimulator(seed=7, workers=2, parallel_threshold=0).run(bets, paths=60_000, horizon=200)
+    assert serial == pooled
+    assert serial.paths == 60_000
+
+    curve = list(serial.drawdown_curve.values())
+    assert curve == sorted(curve, reverse=True)  # Deeper drawdowns are rarer
+    assert serial.ruin_probability == serial.drawdown_curve[0.5]
+
+
+def test_matches_theory_for_known_probability():
+    # Even money, p = 0.55, full Kelly (f = 0.10): log growth per bet is
+    # 0.55 ln 1.1 + 0.45 ln 0.9
+    result = BankrollSimulator(seed=1).run([SimulatedBet(2.0, 0.55, 0.10)], paths=100_000, horizon=100)
+    expected = 0.55 * np.log(1.1) + 0.45 * np.log(0.9)
+    assert result.mean_log_growth == pytest.approx(expected, rel=0.05)
+    assert 0 < result.doubling_probability < 1
+    assert result.median_bets_to_double is not None
+
+
+def test_risk_of_ruin_fast_path():
+    assert risk_of_ruin(2.0, 0.55, 0.0) == 0.0
+    small = risk_of_ruin(2.0, 0.55, 0.02)
+    big = risk_of_ruin(2.0, 0.55, 0.15)
+    assert small < big
+    assert 0.0 <= risk_of_ruin(2.0, 0.55, 0.08, variance=0.002) <= 1.0
+    # Cached and deterministic
+    assert risk_of_ruin(2.0, 0.55, 0.15) == big
@@ -0,0 +1,90 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from db.warehouse import ensure_schema
+from services.bayesian_consensus import BayesianConsensus
+from services.book_correlation import BookCorrelation, BookCorrelationJob, residual_correlation
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _build_history(db_path, n_matches=120):
+    """bet365 and williamhill copy pinnacle's error; betfair and unibet err independently"""
+    ensure_schema(db_path)
+    rng = np.random.default_rng(3)
+    matches, snapshots = [], []
+    for m in range(n_matches):
+        kickoff = START + timedelta(hours=6 * m)
+        matches.append((f"m{m}", kickoff, f"Home{m}", f"Away{m}"))
+        p_home = rng.uniform(0.3, 0.7)
+        sharp = rng.normal(0, 0.03)
+        errors = {
+            "pinnacle": sharp,
+            "bet365": sharp + rng.normal(0, 0.005),
+            "williamhill": sharp + rng.normal(0, 0.005),
+            "betfair": rng.normal(0, 0.03),
+            "unibet": rng.normal(0, 0.03),
+        }
+        for book, error in errors.items():
+            p = float(np.clip(p_home + error, 0.05, 0.95))
+            for outcome, prob in ((f"Home{m}", p), (f"Away{m}", 1 - p)):
+                snapshots.append((f"m{m}", book, outcome, round(1 / (prob * 1.05), 4), kickoff - timedelta(hours=1)))
+                snapshots.append((f"m{m}", book, outcome, 9.0, kickoff - timedelta(hours=5)))  # Superseded quote
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES (?, 'soccer_epl', ?, ?, ?)",
+            matches
+        )
+        conn.executemany("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES (?, ?, 'h2h', ?, ?, ?)
+        """, snapshots)
+    conn.close()
+
+
+def test_masked_correlation_matches_pairwise_complete():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(200, 3))
+    x[:, 1] += x[:, 0]
+    x[rng.random((200, 3)) < 0.2] = np.nan
+    corr = residual_correlation(x, min_overlap=10)
+    both = np.isfinite(x[:, 0]) & np.isfinite(x[:, 1])
+    assert corr[0, 1] == pytest.approx(np.corrcoef(x[both, 0], x[both, 1])[0, 1])
+    assert corr[1, 0] == corr[0, 1]
+    assert (np.diag(corr) == 1.0).all()
+    assert (residual_correlation(x, min_overlap=1000) == np.eye(3)).all()  # Too little overlap
+
+
+def test_copies_count_once_in_consensus(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    matrix_path = str(tmp_path / "book_correlation.npz")
+    _build_history(db_path)
+
+    matrices = BookCorrelationJob(db_path, matrix_path, period_days=60).run(end=START + timedelta(days=40))
+    books, corr = matrices["soccer_epl"]
+    assert books == ["bet365", "betfair", "pinnacle", "unibet", "williamhill"]
+    i = {b: k for k, b in enumerate(books)}
+    assert corr[i["bet365"], i["williamhill"]] > 0.8
+    assert corr[i["pinnacle"], i["bet365"]] > 0.5
+    assert corr[i["betfair"], i["unibet"]] < 0.3
+
+    correlation = BookCorrelation(matrix_path)
+    copies = correlation.independence("soccer_epl", ["pinnacle", "bet365", "williamhill"], [1.0, 1.0, 1.0])
+    independent = correlation.independence("soccer_epl", ["betfair", "unibet"], [1.0, 1.0])
+    assert copies < 0.6 < 0.8 < independent <= 1.0
+    assert correlation.independence("basketball_nba", ["pinnacle", "bet365"], [1.0, 1.0]) == 1.0
+    assert correlation.independence("soccer_epl", ["pinnacle", "pinnacle"], [1.0, 1.0]) == pytest.approx(0.5)
+
+    odds = [{"bookie": b, "price": 2.0} for b in ("pinnacle", "bet365", "williamhill")]
+    plain = BayesianConsensus(db_path=db_path, correlation_path=str(tmp_path / "missing.npz"))
+    deduped = BayesianConsensus(db_path=db_path, correlation_path=matrix_path)
+    before = plain.calculate_true_probability("soccer_epl", "Home", "Away", "Home", odds)
+    after = deduped.calculate_true_probability("soccer_epl", "Home", "Away", "Home", odds)
+    assert after.effective_samples < before.effective_samples
+    width = lambda r: r.credible_interval[1] - r.credible_interval[0]
+    assert width(after) > width(before)
@@ -0,0 +1,99 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from db.warehouse import ensure_schema
+from services.bayesian_consensus import BayesianConsensus
+from services import analytics
+from services.calibration import BookmakerCalibrationJob
+
+
+def _seed(db_path, n_matches=400):
+    """Sharp book prices the true probability; soft book adds noise"""
+    rng = np.random.default_rng(7)
+    kickoff = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for i in range(n_matches):
+            p_home = rng.uniform(0.25, 0.75)
+            home_won = rng.random() < p_home
+            conn.execute(
+                "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) "
+                "VALUES (?, 'basketball_nba', ?, 'Home', 'Away', TRUE, ?)",
+                (f"m{i}", kickoff + timedelta(hours=i), 'home' if home_won else 'away')
+            )
+            soft = float(np.clip(p_home + rng.normal(0, 0.15), 0.05, 0.95))
+            for book, p in (("sharp", p_home), ("soft", soft)):
+                conn.executemany("""
+                    INSERT INTO closing_odds
+                    (match_id, bookmaker_key, market_key, outcome_name, closing_odds, snapshot_time)
+                    VALUES (?, ?, 'h2h', ?, ?, ?)
+                """, [
+                    (f"m{i}", book, "Home", 1 / (p * 1.04), kickoff),
+                    (f"m{i}", book, "Away", 1 / ((1 - p) * 1.04), kickoff),
+                ])
+    conn.close()
+
+
+def test_calibration_publishes_precision_used_by_consensus(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    precision_path = str(tmp_path / "precision.json")
+    ensure_schema(db_path)
+    _seed(db_path)
+
+    job = BookmakerCalibrationJob(
+        db_path=db_path, precision_path=precision_path, period_days=60, engine="sqlite"
+    )
+    rows = job.run(end=datetime(2025, 2, 1, tzinfo=timezone.utc))
+
+    by_book = {r.bookmaker_key: r for r in rows}
+    assert by_book["sharp"].total_bets == 800
+    assert by_book["sharp"].brier_score < by_book["soft"].brier_score
+
+    conn = sqlite3.connect(db_path)
+    stored = conn.execute("SELECT COUNT(*) FROM bookmaker_performance").fetchone()
+    conn.close()
+    assert stored == (2,)
+
+    table = json.loads(open(precision_path).read())["precision"]["basketball_nba"]["h2h"]
+    assert table["sharp"] == 10.0
+    assert table["soft"] < table["sharp"]
+
+    consensus = BayesianConsensus(db_path=db_path, precision_path=precision_path)
+    assert consensus._precision_for("basketball_nba", "sharp") == 10.0
+    assert consensus._precision_for("basketball_nba", "soft") == table["soft"]
+    # Unmeasured sport falls back to the defaults
+    assert consensus._precision_for("soccer_epl", "pinnacle") == 10.0
+
+
+def test_only_h2h_is_calibrated_and_duckdb_falls_back(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    _seed(db_path, n_matches=150)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("""
+            INSERT INTO closing_odds
+            (match_id, bookmaker_key, market_key, outcome_name, closing_odds, point, snapshot_time)
+            VALUES (?, 'sharp', ?, ?, 1.91, ?, ?)
+        """, [
+            (f"m{i}", market, side, point, datetime(2025, 1, 1, tzinfo=timezone.utc))
+            for i in range(150)
+            for market, side, point in (("totals", "Over", 220.5), ("totals", "Under", 220.5),
+                                        ("spreads", "Home", -3.5), ("spreads", "Away", 3.5))
+        ])
+    conn.close()
+
+    end = datetime(2025, 2, 1, tzinfo=timezone.utc)
+    duck = BookmakerCalibrationJob(db_path=db_path, precision_path=str(tmp_path / "p1.json"), period_days=60).run(end=end)
+    assert {(r.bookmaker_key, r.market_key) for r in duck} == {("sharp", "h2h"), ("soft", "h2h")}
+
+    # Without the DuckDB extension the nightly job still runs on sqlite3
+    monkeypatch.setattr(analytics.importlib.util, "find_spec", lambda name: None)
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    lite = BookmakerCalibrationJob(db_path=db_path, precision_path=str(tmp_path / "p2.json"), period_days=60).run(end=end)
+    assert [(r.bookmaker_key, r.total_bets) for r in lite] == [(r.bookmaker_key, r.total_bets) for r in duck]
+    assert lite[0].brier_score == pytest.approx(duck[0].brier_score)
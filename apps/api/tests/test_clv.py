@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from db.warehouse import ensure_schema
+from services.clv import CLVEngine, CLVLookup
+
+
+NOW = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+def test_clv_engine_settles_and_publishes_lookup(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    lookup_path = str(tmp_path / "clv.json")
+    ensure_schema(db_path)
+    kickoff = NOW - timedelta(days=1)
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("m1", "basketball_nba", kickoff, "Celtics", "Lakers", True, "home"),
+                ("m2", "basketball_nba", NOW + timedelta(days=1), "Knicks", "Heat", False, None),
+            ]
+        )
+        # Closing book: 1.90 / 1.90 (overround 1.0526 -> fair 2.00 each side)
+        conn.executemany("""
+            INSERT INTO closing_odds (match_id, bookmaker_key, market_key, outcome_name, closing_odds, snapshot_time)
+            VALUES ('m1', 'pinnacle', 'h2h', ?, 1.90, ?)
+        """, [("Celtics", kickoff), ("Lakers", kickoff)])
+        conn.executemany("""
+            INSERT INTO recommended_bets
+            (match_id, bookmaker_key, market_key, outcome_name, recommended_odds,
+             true_probability, edge, recommended_stake, recommendation_time)
+            VALUES (?, 'pinnacle', 'h2h', ?, ?, 0.5, 0.05, ?, ?)
+        """, [
+            ("m1", "Celtics", 2.10, 10.0, kickoff - timedelta(hours=5)),
+            ("m1", "Lakers", 2.20, None, kickoff - timedelta(hours=4)),
+            ("m2", "Knicks", 2.05, 10.0, NOW - timedelta(hours=1)),
+        ])
+    conn.close()
+
+    engine = CLVEngine(db_path=db_path, lookup_path=lookup_path)
+    result = engine.run(now=NOW)
+    assert result.scanned == 3
+    assert result.clv_filled == 2
+    assert result.results_filled == 2
+
+    conn = sqlite3.connect(db_path)
+    rows = {r[0]: r[1:] for r in conn.execute(
+        "SELECT outcome_name, closing_odds, clv, result, profit_loss FROM recommended_bets"
+    )}
+    conn.close()
+    assert rows["Celtics"][0] == 1.90
+    assert rows["Celtics"][1] == pytest.approx(2.10 / 2.0 - 1)
+    assert rows["Celtics"][2:] == ("win", pytest.approx(11.0))
+    assert rows["Lakers"][2:] == ("loss", -1.0)  # No stake recorded: one unit
+    assert rows["Knicks"] == (None, None, None, None)
+
+    # Only the unsettled future match is rescanned
+    assert engine.run(now=NOW).scanned == 1
+
+    lookup = CLVLookup(lookup_path)
+    expected = ((2.10 / 2.0 - 1) + (2.20 / 2.0 - 1)) / (2 + engine.shrinkage)
+    assert lookup.get("basketball_nba", "Pinnacle") == pytest.approx(expected, abs=1e-6)
+    assert lookup.get("soccer_epl", "pinnacle") is None
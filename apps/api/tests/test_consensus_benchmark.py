@@ -0,0 +1,97 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.config import settings
+from db.warehouse import ensure_schema
+from services.consensus_benchmark import (
+    ConsensusBenchmark, find_regressions, load_samples, score_predictions
+)
+
+
+def _build_db(db_path: str):
+    ensure_schema(db_path)
+    kickoff = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for i in range(6):
+            winner = "home" if i % 3 else "away"
+            conn.execute(
+                "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) VALUES (?, 'basketball_nba', ?, 'Celtics', 'Lakers', 1, ?)",
+                (f"m{i}", kickoff + timedelta(days=i), winner)
+            )
+            for book, home, away in (("pinnacle", 1.60, 2.45), ("bovada", 1.55, 2.40)):
+                conn.executemany("""
+                    INSERT INTO closing_odds (match_id, bookmaker_key, market_key, outcome_name, closing_odds, snapshot_time)
+                    VALUES (?, ?, 'h2h', ?, ?, ?)
+                """, [(f"m{i}", book, "Celtics", home, kickoff), (f"m{i}", book, "Lakers", away, kickoff)])
+        # No Pinnacle line: skipped so every model scores the same markets
+        conn.execute(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) VALUES ('m9', 'basketball_nba', ?, 'Knicks', 'Heat', 1, 'home')",
+            (kickoff,)
+        )
+        conn.execute("""
+            INSERT INTO closing_odds (match_id, bookmaker_key, market_key, outcome_name, closing_odds, snapshot_time)
+            VALUES ('m9', 'bovada', 'h2h', 'Knicks', 1.9, ?)
+        """, (kickoff,))
+    conn.close()
+
+
+def test_benchmark_scores_every_model(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    _build_db(db_path)
+
+    samples = load_samples(db_path)
+    assert [s.match_id for s in samples] == [f"m{i}" for i in range(6)]
+    assert samples[0].outcomes == ["Celtics", "Lakers"]
+    assert samples[0].winner_index == 1
+
+    bench = ConsensusBenchmark(db_path=db_path)
+    scores = bench.run(samples)
+    assert {s.model for s in scores} == {"bayesian", "power", "pinnacle", "weighted_average"}
+    assert all(s.markets == 6 and s.markets_per_sec > 0 for s in scores)
+    assert next(s for s in scores if s.model == "power").batch_markets_per_sec > 0
+
+    output = tmp_path / "bench.json"
+    bench.write(scores, str(output))
+    data = json.loads(output.read_text())
+    assert data["best_by_sport"]["basketball_nba"] in bench.models
+    assert len(data["scores"]) == 4
+
+    # Same run is never a regression; a worse log-loss is
+    assert find_regressions(data, data) == []
+    worse = json.loads(output.read_text())
+    worse["scores"][0]["log_loss"] += 0.01
+    assert len(find_regressions(worse, data)) == 1
+
+
+def test_published_tables_are_opt_in(tmp_path, monkeypatch):
+    """The tables are fitted on the closing lines the benchmark scores"""
+    db_path = str(tmp_path / "historical.db")
+    _build_db(db_path)
+    precision = tmp_path / "bookmaker_precision.json"
+    precision.write_text(json.dumps({"precision": {"basketball_nba": {"h2h": {"pinnacle": 40.0}}}}))
+    leader_lag = tmp_path / "leader_lag.json"
+    leader_lag.write_text(json.dumps({"sports": {"basketball_nba": {"leadership": {"pinnacle": 0.9}}}}))
+    monkeypatch.setattr(settings, "BOOKMAKER_PRECISION_PATH", str(precision))
+    monkeypatch.setattr(settings, "LEADER_LAG_PATH", str(leader_lag))
+
+    bench = ConsensusBenchmark(db_path=db_path)
+    bench.run(load_samples(db_path), models=["bayesian"])
+    assert bench.bayesian.measured_precision == {}  # Still empty after scoring: never reloaded
+    assert bench.bayesian.leader_lag.sports == {} and bench.bayesian.book_correlation.tables == {}
+
+    in_sample = ConsensusBenchmark(db_path=db_path, published_tables=True)
+    assert in_sample.bayesian.measured_precision["basketball_nba"]["h2h"]["pinnacle"] == 40.0
+    assert "basketball_nba" in in_sample.bayesian.leader_lag.sports
+    output = tmp_path / "bench.json"
+    in_sample.write(in_sample.run(load_samples(db_path), models=["bayesian"]), str(output))
+    assert json.loads(output.read_text())["published_tables"] is True
+
+
+def test_score_predictions():
+    log_loss, brier = score_predictions([[0.5, 0.5], [0.8, 0.2]], [0, 1])
+    assert brier == pytest.approx((0.25 + 0.25 + 0.64 + 0.64) / 4)
+    assert log_loss > 0
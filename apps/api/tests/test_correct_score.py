@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from core.config import settings
+from core.schemas import Bookmaker, Market, Match, Outcome
+from main import app
+from routers import odds
+from services import ingestion
+from services.correct_score import CorrectScoreEngine, market_masks, parse_score, score_matrix
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+HOME_RATE, AWAY_RATE, RHO = 1.6, 1.1, -0.08
+
+
+def _fair_match(match_id="m1", margin=1.05, lines=(2.5, 3.0)):
+    """Arsenal v Chelsea quoted by two books at a known Dixon-Coles model plus margin"""
+    matrix = score_matrix(HOME_RATE, AWAY_RATE, RHO)
+    masks, pushes = market_masks(lines)
+    hit = np.einsum("ij,sij->s", matrix, masks)
+    p = hit / (1 - np.einsum("ij,sij->s", matrix, pushes))
+    markets = [Market(key="h2h", outcomes=[
+        Outcome(name="Arsenal", price=1 / (p[0] * margin)),
+        Outcome(name="Draw", price=1 / (p[1] * margin)),
+        Outcome(name="Chelsea", price=1 / (p[2] * margin)),
+    ])]
+    if lines:
+        markets.append(Market(key="totals", outcomes=[
+            o for line, over in zip(lines, p[3:]) for o in (
+                Outcome(name="Over", point=line, price=1 / (over * margin)),
+                Outcome(name="Under", point=line, price=1 / ((1 - over) * margin)),
+            )
+        ]))
+    return Match(
+        id=match_id, sport_key="soccer_epl", sport_title="EPL", commence_time=NOW + timedelta(hours=3),
+        home_team="Arsenal", away_team="Chelsea",
+        bookmakers=[Bookmaker(key=k, title=k.title(), last_update=NOW, markets=markets) for k in ("pinnacle", "bet365")]
+    )
+
+
+def test_fit_recovers_goal_rates():
+    engine = CorrectScoreEngine()
+    model = engine.model(_fair_match(margin=1.0))
+    assert model.home_rate == pytest.approx(HOME_RATE, abs=0.01)
+    assert model.away_rate == pytest.approx(AWAY_RATE, abs=0.01)
+    assert model.rho == pytest.approx(RHO, abs=0.01)
+    assert model.matrix.sum() == pytest.approx(1.0)
+    assert model.probability(1, 1) == pytest.approx(score_matrix(HOME_RATE, AWAY_RATE, RHO)[1, 1], abs=1e-3)
+    assert model.probability(11, 0) == 0.0
+
+    # h2h alone still fits the goal difference; the total leans on the league average
+    h2h_only = CorrectScoreEngine().model(_fair_match(margin=1.0, lines=()))
+    assert h2h_only.home_rate > h2h_only.away_rate
+    assert h2h_only.home_rate + h2h_only.away_rate == pytest.approx(HOME_RATE + AWAY_RATE, abs=0.3)
+
+
+def test_models_are_cached_until_consensus_moves():
+    engine = CorrectScoreEngine(cache_size=1)
+    first = engine.model(_fair_match())
+    assert engine.model(_fair_match()) is first
+    moved = engine.model(_fair_match(margin=1.05, lines=(2.5,)))
+    assert moved is not first
+    engine.model(_fair_match("m2"))
+    assert list(engine._models) == ["m2"]  # Least recently used match evicted
+    assert CorrectScoreEngine().model(_fair_match()).matrix.tolist() == first.matrix.tolist()  # Deterministic
+
+
+def test_parse_score():
+    assert parse_score("2-1", "Arsenal", "Chelsea") == (2, 1)
+    assert parse_score("Arsenal 3:0", "Arsenal", "Chelsea") == (3, 0)
+    assert parse_score("Chelsea 2-1", "Arsenal", "Chelsea") == (1, 2)
+    assert parse_score("Any Other Home Win", "Arsenal", "Chelsea") is None
+
+
+def test_price_scores_quotes_against_matrix():
+    match = _fair_match()
+    engine = CorrectScoreEngine()
+    model = engine.model(match)
+    fair = 1 / model.probability(1, 0)
+    priced = engine.price(match, model, [
+        {"score": "1-0", "odds": round(fair * 1.2, 2), "bookmaker": "Bet365"},
+        {"score": "Chelsea 1-0", "odds": 5.0, "bookmaker": "Bet365"},
+        {"score": "Any Other", "odds": 50.0, "bookmaker": "Bet365"},
+    ])
+    assert [p["score"] for p in priced] == ["1-0", "0-1"]
+    assert priced[0]["edge"] == pytest.approx(20.0, abs=0.2)
+    assert priced[0]["fair_odds"] == pytest.approx(fair, abs=0.01)
+    assert priced[1]["true_probability"] == pytest.approx(model.probability(0, 1), abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_scores_endpoint_prices_every_fixture(monkeypatch):
+    matches = [_fair_match(f"m{i}") for i in range(7)]
+    requested = []
+
+    async def fake_get_odds(sport, regions, markets):
+        assert markets == "h2h,totals"
+        return matches
+
+    async def fake_correct_score_odds(sport_key, game_id):
+        requested.append(game_id)
+        return [{"score": "2-2", "odds": 40.0, "bookmaker": "Bet365"}, {"score": "1-1", "odds": 2.0, "bookmaker": "Bet365"}]
+
+    monkeypatch.setattr(settings, "THE_ODDS_API_KEY", "key")
+    monkeypatch.setattr(ingestion, "_ingestion_queue", ingestion.IngestionQueue(sinks=[]))
+    monkeypatch.setattr(odds.odds_service.api_client, "get_odds", fake_get_odds)
+    monkeypatch.setattr(odds.odds_service.advanced_markets, "get_correct_score_odds", fake_correct_score_odds)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/api/v1/odds/scores")
+    assert response.status_code == 200
+    scores = response.json()
+    assert sorted(requested) == [m.id for m in matches]  # No five-match cap
+    assert {s["match_id"] for s in scores} == {m.id for m in matches}
+    assert all(s["score"] == "2-2" and s["edge"] > 0.5 for s in scores)  # 1-1 at 2.0 is far below fair
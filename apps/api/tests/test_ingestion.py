@@ -0,0 +1,139 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.schemas import Bookmaker, Market, Match, Outcome
+from db.models.historical import HistoricalOdds
+from db.session import Base
+from db.warehouse import ensure_schema
+from services.ingestion import IngestionQueue, SQLAlchemySink, SQLiteSink, normalize_matches
+
+
+def _matches(n: int, last_update: datetime):
+    return [
+        Match(
+            id=f"m{i}",
+            sport_key="soccer_epl",
+            sport_title="EPL",
+            commence_time=last_update + timedelta(hours=3),
+            home_team="Arsenal",
+            away_team="Chelsea",
+            bookmakers=[Bookmaker(
+                key="pinnacle",
+                title="Pinnacle",
+                last_update=last_update,
+                markets=[Market(key="h2h", outcomes=[
+                    Outcome(name="Arsenal", price=2.0),
+                    Outcome(name="Draw", price=3.4),
+                    Outcome(name="Chelsea", price=3.9),
+                ])],
+            )],
+        )
+        for i in range(n)
+    ]
+
+
+class CountingSink:
+    name = "counting"
+
+    def __init__(self):
+        self.batches = []
+
+    async def write(self, batch):
+        await asyncio.sleep(0)
+        self.batches.append(len(batch))
+
+
+@pytest.mark.asyncio
+async def test_queue_batches_and_dedupes(tmp_path):
+    now = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+    sink = SQLiteSink(db_path=str(tmp_path / "historical.db"))
+    counter = CountingSink()
+    queue = IngestionQueue(sinks=[sink, counter], max_batch=50, max_latency=0.05, max_pending=10)
+
+    await queue.start()
+    records = normalize_matches(_matches(40, now))
+    assert await queue.enqueue(records) == 120
+    # Same cached response again: nothing new to write
+    assert await queue.enqueue(normalize_matches(_matches(40, now))) == 0
+    await queue.stop()
+
+    assert sum(counter.batches) == 120
+    assert max(counter.batches) <= 50
+
+    conn = sqlite3.connect(sink.db_path)
+    assert conn.execute("SELECT COUNT(*) FROM odds_snapshots").fetchone()[0] == 120
+    assert conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0] == 40
+    conn.close()
+
+
+class FailingSink:
+    name = "failing"
+
+    async def write(self, batch):
+        raise RuntimeError("database is locked")
+
+
+@pytest.mark.asyncio
+async def test_restart_does_not_duplicate_rows(tmp_path):
+    """A fresh queue has an empty dedupe window; the sinks' unique indexes skip stored rows"""
+    now = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[
+            Base.metadata.tables["historical_matches"], Base.metadata.tables["historical_odds"]
+        ])
+    sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    sink = SQLiteSink(db_path=str(tmp_path / "historical.db"))
+
+    for _ in range(2):
+        queue = IngestionQueue(sinks=[sink, SQLAlchemySink(sessions)], max_latency=0.01)
+        await queue.start()
+        assert await queue.enqueue(normalize_matches(_matches(5, now))) == 15
+        await queue.stop()
+        assert (queue.records_written, queue.write_errors) == (15, 0)
+
+    conn = sqlite3.connect(sink.db_path)
+    assert conn.execute("SELECT COUNT(*) FROM odds_snapshots").fetchone()[0] == 15
+    conn.close()
+    async with sessions() as session:
+        assert (await session.execute(select(func.count()).select_from(HistoricalOdds))).scalar() == 15
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_not_counted(tmp_path):
+    queue = IngestionQueue(sinks=[SQLiteSink(db_path=str(tmp_path / "historical.db")), FailingSink()], max_latency=0.01)
+    await queue.start()
+    await queue.enqueue(normalize_matches(_matches(2, datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc))))
+    await queue.stop()
+    assert (queue.records_written, queue.batches_written, queue.write_errors) == (0, 0, 1)
+
+
+def test_existing_duplicates_are_dropped_before_indexing(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("DROP INDEX idx_snapshots_unique")  # A database from before the index
+        conn.executemany("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, point, snapshot_time)
+            VALUES ('m1', 'pinnacle', 'totals', 'Over', 1.9, ?, '2025-03-01 12:00:00+00:00')
+        """, [(2.5,), (2.5,), (3.5,)])
+    conn.close()
+
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    assert [r[0] for r in conn.execute("SELECT point FROM odds_snapshots ORDER BY point")] == [2.5, 3.5]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, point, snapshot_time)
+            VALUES ('m1', 'pinnacle', 'totals', 'Over', 1.9, 2.5, '2025-03-01 12:00:00+00:00')
+        """)
+    conn.close()
@@ -0,0 +1,87 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from db.warehouse import ensure_schema
+from services.bayesian_consensus import BayesianConsensus
+from services.leader_lag import LeaderLagJob, LeaderLagTable, cross_correlation
+from services.steam import SteamDetector
+
+START = datetime(2025, 3, 1, tzinfo=timezone.utc)
+LAGS = {"pinnacle": 0, "bet365": 2, "unibet": 4}  # 5-minute polls behind pinnacle
+
+
+def _build_history(db_path):
+    """Pinnacle random-walks; bet365 copies it 10 minutes later, unibet 20 minutes later"""
+    ensure_schema(db_path)
+    rng = np.random.default_rng(7)
+    matches, snapshots = [], []
+    for m in range(30):
+        kickoff = START + timedelta(days=m // 3, hours=12 + m % 3)
+        matches.append((f"m{m}", kickoff, f"Home{m}", f"Away{m}"))
+        for outcome in ("home", "away"):
+            walk = 0.45 + np.cumsum(rng.normal(0, 0.01, 150) * (rng.random(150) < 0.3))
+            for step in range(144):  # Last 12 hours, every 5 minutes
+                t = kickoff - timedelta(minutes=5 * (144 - step))
+                for book, lag in LAGS.items():
+                    prob = float(np.clip(walk[max(step - lag, 0)], 0.05, 0.95))
+                    snapshots.append((f"m{m}", book, outcome, round(1 / prob, 4), t))
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES (?, 'soccer_epl', ?, ?, ?)",
+            matches
+        )
+        conn.executemany("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES (?, ?, 'h2h', ?, ?, ?)
+        """, snapshots)
+    conn.close()
+
+
+def test_fft_correlation_matches_direct_sum():
+    x = np.random.default_rng(1).normal(size=(3, 4, 50))
+    out = cross_correlation(x, max_lag=5)
+    for a in range(3):
+        for b in range(3):
+            for k in range(-5, 6):
+                direct = sum(
+                    x[a, s, t] * x[b, s, t + k] for s in range(4) for t in range(50) if 0 <= t + k < 50
+                )
+                assert out[a, b, 5 + k] == pytest.approx(direct)
+
+
+def test_job_finds_leader_and_lags(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    matrix_path = str(tmp_path / "leader_lag.json")
+    _build_history(db_path)
+
+    job = LeaderLagJob(db_path, matrix_path, period_days=30, horizon_hours=12, max_lag_minutes=30)
+    table = job.run(end=START + timedelta(days=20))
+    entry = table["soccer_epl"]
+    assert entry["bookmakers"] == ["bet365", "pinnacle", "unibet"]
+    assert entry["series"] == 60
+
+    matrix = LeaderLagTable(matrix_path)
+    assert matrix.lag_minutes("soccer_epl", "pinnacle", "bet365") == 10
+    assert matrix.lag_minutes("soccer_epl", "pinnacle", "unibet") == 20
+    assert matrix.lag_minutes("soccer_epl", "bet365", "unibet") == 10
+    assert matrix.lag_minutes("soccer_epl", "unibet", "pinnacle") == -20
+    scores = [matrix.leadership("soccer_epl", b) for b in ("pinnacle", "bet365", "unibet")]
+    assert scores[0] > scores[1] > scores[2]
+    assert matrix.leaders("soccer_epl") == ["pinnacle"]
+    assert matrix.weight("soccer_epl", "pinnacle") > 1.0 > matrix.weight("soccer_epl", "unibet")
+    assert matrix.weight("basketball_nba", "pinnacle") == 1.0
+
+    # Consensus and the steam detector read the published matrix
+    bayesian = BayesianConsensus(db_path=db_path, leader_lag_path=matrix_path)
+    plain = BayesianConsensus(db_path=db_path, leader_lag_path=str(tmp_path / "missing.json"))
+    assert bayesian._precision_for("soccer_epl", "unibet") < plain._precision_for("soccer_epl", "unibet")
+
+    detector = SteamDetector(sharp_books=["unibet"], leader_lag=matrix)
+    assert detector._is_sharp("soccer_epl", "pinnacle")
+    assert not detector._is_sharp("soccer_epl", "unibet")
+    assert detector._is_sharp("basketball_nba", "unibet")  # No matrix: configured sharp books
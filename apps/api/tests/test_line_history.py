@@ -0,0 +1,98 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from db.warehouse import ensure_schema
+from main import app
+from routers import odds
+from services.line_history import LineHistoryService, lttb
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(1000)
+    y = np.full(1000, 2.0)
+    y[437] = 3.5  # Single spike must survive downsampling
+
+    idx = lttb(x, y, 50)
+
+    assert len(idx) == 50
+    assert idx[0] == 0 and idx[-1] == 999
+    assert 437 in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint_downsamples_and_revalidates(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("""
+            INSERT INTO odds_snapshots
+            (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES ('m1', ?, 'h2h', 'Arsenal', ?, ?)
+        """, [
+            (book, 2.0 + 0.01 * (i % 7), start + timedelta(minutes=i))
+            for book in ("pinnacle", "bet365")
+            for i in range(2000)
+        ])
+    conn.close()
+    monkeypatch.setattr(odds, "history_service", LineHistoryService(db_path=db_path))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/api/v1/odds/history/m1", params={"points": 100})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["downsampled"] is True
+        assert {s["bookmaker"] for s in data["series"]} == {"pinnacle", "bet365"}
+        for series in data["series"]:
+            assert series["raw_points"] == 2000
+            assert len(series["times"]) == len(series["odds"]) == 100
+            assert series["times"][0] == int(start.timestamp())
+
+        etag = response.headers["etag"]
+        cached = await ac.get(
+            "/api/v1/odds/history/m1",
+            params={"points": 100},
+            headers={"If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+
+        missing = await ac.get("/api/v1/odds/history/unknown")
+        assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_history_is_scoped_to_market_and_bookmaker(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    insert = """
+        INSERT INTO odds_snapshots
+        (match_id, bookmaker_key, market_key, outcome_name, point, odds, snapshot_time)
+        VALUES ('m1', ?, ?, ?, ?, ?, ?)
+    """
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(insert, [
+            ("pinnacle", "h2h", "Arsenal", None, 2.0 + 0.01 * i, start + timedelta(minutes=i)) for i in range(10)
+        ])
+    monkeypatch.setattr(odds, "history_service", LineHistoryService(db_path=db_path))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/api/v1/odds/history/m1")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        assert (await ac.get("/api/v1/odds/history/m1", params={"market": "totals"})).status_code == 404
+        assert (await ac.get("/api/v1/odds/history/m1", params={"bookmaker": "bet365"})).status_code == 404
+
+        with conn:  # A newer totals quote leaves the h2h chart untouched
+            conn.execute(insert, ("pinnacle", "totals", "Over", 2.5, 1.9, start + timedelta(hours=1)))
+        conn.close()
+        cached = await ac.get("/api/v1/odds/history/m1", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
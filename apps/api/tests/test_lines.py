@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from core.config import settings
+from core.schemas import Bookmaker, Market, Match, Outcome
+from main import app
+from routers import odds
+from services import ingestion
+from services.lines import LineEngine, flatten
+from services.odds_api import TheOddsApiClient
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _match(books, market="totals"):
+    """books: {key: [(outcome, point, price), ...]}"""
+    return Match(
+        id="m1", sport_key="basketball_nba", sport_title="NBA", commence_time=NOW + timedelta(hours=2),
+        home_team="Lakers", away_team="Celtics",
+        bookmakers=[
+            Bookmaker(key=key, title=key.title(), last_update=NOW, markets=[
+                Market(key=market, outcomes=[Outcome(name=n, point=p, price=o) for n, p, o in quotes])
+            ])
+            for key, quotes in books.items()
+        ]
+    )
+
+
+TOTALS = {
+    "pinnacle": [("Over", 220.5, 1.91), ("Under", 220.5, 1.91), ("Over", 224.5, 2.30), ("Under", 224.5, 1.62)],
+    "draftkings": [("Over", 220.5, 1.90), ("Under", 220.5, 1.90), ("Over", 224.5, 2.28), ("Under", 224.5, 1.63)],
+    "fanduel": [("Over", 220.5, 1.92), ("Under", 220.5, 1.88)],
+    "bovada": [("Over", 222.5, 2.25), ("Under", 222.5, 1.60)],  # Odd line, generous over
+}
+
+
+def test_consensus_interpolates_between_alternate_lines():
+    match = _match(TOTALS)
+    quotes = flatten([match])
+    engine = LineEngine()
+    p_over = engine.consensus(quotes)
+
+    def at(book, line, side):
+        return next(
+            i for i in range(len(quotes.price))
+            if quotes.bookmaker[i][0] == book and quotes.threshold[i] == line and quotes.side[i] == side
+        )
+
+    p_low, p_mid, p_high = (p_over[at("pinnacle", 220.5, 1)], p_over[at("bovada", 222.5, 1)],
+                            p_over[at("pinnacle", 224.5, 1)])
+    assert p_low == pytest.approx(0.5, abs=0.01)
+    assert p_low > p_mid > p_high  # 222.5 has one book; its consensus comes from the neighbours
+    logit = lambda p: np.log(p / (1 - p))
+    assert logit(p_mid) == pytest.approx((logit(p_low) + logit(p_high)) / 2, abs=1e-9)
+
+    analysis = engine.analyze([match], "basketball_nba")
+    best = analysis.value_bets[0]
+    assert (best.bookmaker, best.outcome, best.point, best.market) == ("Bovada", "Over 222.5", 222.5, "totals")
+    assert best.edge == pytest.approx(p_mid * 2.25 - 1, abs=1e-6)
+    assert best.true_probability == pytest.approx(p_mid, abs=1e-6)
+
+
+def test_thin_markets_are_not_scored():
+    quotes = flatten([_match({"pinnacle": [("Over", 2.5, 1.9), ("Under", 2.5, 1.9)]})])
+    assert np.isnan(LineEngine().consensus(quotes)).all()
+    assert LineEngine().analyze([_match({})], "soccer_epl").value_bets == []
+
+
+def test_spread_middles_from_sorted_lines():
+    match = _match({
+        "pinnacle": [("Lakers", -1.5, 1.95), ("Celtics", 1.5, 1.95)],
+        "draftkings": [("Lakers", -3.5, 2.20), ("Celtics", 3.5, 1.70)],
+        "fanduel": [("Lakers", -1.5, 1.93), ("Celtics", 1.5, 1.97), ("Celtics", 3.5, 1.90)],
+    }, market="spreads")
+    quotes = flatten([match])
+    assert len(quotes.pairs) == 3  # fanduel's lone Celtics +3.5 has no partner
+    assert sorted(set(quotes.threshold[quotes.side > 0])) == [1.5, 3.5]
+
+    middles = LineEngine().middles([match], quotes)
+    assert len(middles) == 1
+    middle = middles[0]
+    # Lakers -1.5 covers on margins >= 2, Celtics +3.5 on margins <= 3
+    assert [(l.outcome, l.point, l.bookmaker) for l in middle.legs] == [
+        ("Lakers", -1.5, "Pinnacle"), ("Celtics", 3.5, "Fanduel")
+    ]
+    assert middle.middle_values == [2, 3]
+    assert middle.width == 2.0
+    implied = 1 / 1.95 + 1 / 1.90
+    assert middle.miss_return == pytest.approx(1 / implied - 1, abs=1e-6)
+    assert middle.hit_return == pytest.approx(2 / implied - 1, abs=1e-6)
+
+
+def test_parse_matches_keeps_points():
+    raw = [{
+        "id": "m1", "sport_key": "soccer_epl", "sport_title": "EPL", "commence_time": "2025-03-01T15:00:00Z",
+        "home_team": "Arsenal", "away_team": "Chelsea",
+        "bookmakers": [{"key": "pinnacle", "title": "Pinnacle", "last_update": "2025-03-01T12:00:00Z", "markets": [
+            {"key": "totals", "outcomes": [{"name": "Over", "price": 1.9, "point": 2.5}, {"name": "Under", "price": 1.9, "point": 2.5}]}
+        ]}]
+    }]
+    match = TheOddsApiClient()._parse_matches(raw)[0]
+    assert [o.point for o in match.bookmakers[0].markets[0].outcomes] == [2.5, 2.5]
+
+
+@pytest.mark.asyncio
+async def test_lines_and_middles_endpoints(monkeypatch):
+    async def fake_get_odds(sport, regions, markets):
+        assert markets == "spreads,totals"
+        return [_match(TOTALS)]
+
+    monkeypatch.setattr(settings, "THE_ODDS_API_KEY", "key")
+    monkeypatch.setattr(ingestion, "_ingestion_queue", ingestion.IngestionQueue(sinks=[]))  # Not started: no writes
+    monkeypatch.setattr(odds.odds_service.api_client, "get_odds", fake_get_odds)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        lines = (await ac.get("/api/v1/odds/lines")).json()
+        assert lines[0]["outcome"] == "Over 222.5"
+        assert lines[0]["point"] == 222.5
+        middles = (await ac.get("/api/v1/odds/middles")).json()
+        assert isinstance(middles, list)
@@ -0,0 +1,157 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from core.config import settings
+from db.warehouse import ensure_schema
+from main import app
+from routers import admin
+from services.market_state import MarketStateEngine
+
+START = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+KICKOFF = START + timedelta(hours=3)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "historical.db")
+    ensure_schema(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES (?, 'soccer_epl', ?, ?, ?)",
+            [("m1", KICKOFF, "Arsenal", "Chelsea"), ("m2", START + timedelta(hours=1), "Everton", "Fulham")]
+        )
+        rows = []
+        for step in range(6):  # Pinnacle every 30 min, Bet365 only on the first two polls
+            t = START + timedelta(minutes=30 * step)
+            rows += [("m1", "pinnacle", "Arsenal", 2.00 + 0.01 * step, t), ("m1", "pinnacle", "Chelsea", 1.90, t)]
+            if step < 2:
+                rows += [("m1", "bet365", "Arsenal", 2.10 + 0.01 * step, t)]
+            rows += [("m2", "pinnacle", "Everton", 3.0, t)]
+        conn.executemany("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES (?, ?, 'h2h', ?, ?, ?)
+        """, rows)
+    conn.close()
+    return path
+
+
+def test_as_of_keeps_stale_books_and_matches_sql(db_path):
+    engine = MarketStateEngine(db_path)
+    state = engine.match_state("m1", START + timedelta(minutes=100))
+    assert state.bookmakers == ["bet365", "pinnacle"]
+    assert state.price("pinnacle", "Arsenal") == pytest.approx(2.03)  # Poll at +90 min
+    assert state.price("bet365", "Arsenal") == pytest.approx(2.11)  # Last quoted at +30 min
+    assert state.price("bet365", "Chelsea") is None
+    assert state.quoted_at[0, 0] == int((START + timedelta(minutes=30)).timestamp())
+    assert state.best_prices()[("Arsenal", None)] == ("bet365", pytest.approx(2.11))
+
+    # The in-memory timeline agrees with the one-shot SQL query
+    sql = {(r[1], r[2]): r[4] for r in engine.quotes_as_of("m1", START + timedelta(minutes=100))}
+    assert sql == {("bet365", "Arsenal"): 2.11, ("pinnacle", "Arsenal"): 2.03, ("pinnacle", "Chelsea"): 1.90}
+
+    # Before the first quote there is nothing; many timestamps at once
+    assert np.isnan(engine.match_state("m1", START - timedelta(minutes=1)).prices).all()
+    timeline = engine.timeline("m1")
+    times = [int((START + timedelta(minutes=m)).timestamp()) for m in (0, 45, 300)]
+    prices, _ = timeline.at_many(times)
+    assert prices[:, 1, 0].tolist() == pytest.approx([2.00, 2.01, 2.05])
+    assert engine.match_state("unknown") is None
+
+
+def test_closing_odds_use_the_last_offered_line(tmp_path):
+    from collect_historical import HistoricalDataCollector
+
+    path = str(tmp_path / "historical.db")
+    collector = HistoricalDataCollector(db_path=path)
+    now = datetime.now(timezone.utc)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES ('m3', 'basketball_nba', ?, 'Lakers', 'Celtics')",
+            (now + timedelta(hours=1),)
+        )
+        conn.executemany("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, point, snapshot_time)
+            VALUES ('m3', 'pinnacle', ?, ?, ?, ?, ?)
+        """, [
+            ("totals", "Over", 1.91, 222.5, now - timedelta(hours=5)),
+            ("totals", "Under", 1.91, 222.5, now - timedelta(hours=5)),
+            ("totals", "Over", 1.95, 220.5, now - timedelta(minutes=5)),
+            ("totals", "Under", 1.87, 220.5, now - timedelta(minutes=5)),
+            ("spreads", "Lakers", 1.90, -3.5, now - timedelta(hours=5)),
+            ("spreads", "Lakers", 1.92, -2.5, now - timedelta(minutes=5)),
+        ])
+    conn.close()
+
+    assert asyncio.run(collector.collect_closing_odds())["matches"] == 1
+    conn = sqlite3.connect(path)
+    closing = {
+        (market, outcome): (odds, point) for market, outcome, odds, point in conn.execute(
+            "SELECT market_key, outcome_name, closing_odds, point FROM closing_odds WHERE match_id = 'm3'"
+        )
+    }
+    conn.close()
+    assert closing == {
+        ("totals", "Over"): (1.95, 220.5),
+        ("totals", "Under"): (1.87, 220.5),
+        ("spreads", "Lakers"): (1.92, -2.5),
+    }
+
+
+def test_timeline_cache_refreshes_on_new_snapshots(db_path):
+    engine = MarketStateEngine(db_path)
+    first = engine.timeline("m1")
+    assert engine.timeline("m1") is first
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("""
+            INSERT INTO odds_snapshots (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES ('m1', 'bet365', 'h2h', 'Arsenal', 2.25, ?)
+        """, (START + timedelta(hours=2),))
+    conn.close()
+    assert engine.timeline("m1") is not first
+    assert engine.match_state("m1", KICKOFF).price("bet365", "Arsenal") == pytest.approx(2.25)
+
+
+def test_sport_state_skips_started_matches(db_path):
+    engine = MarketStateEngine(db_path)
+    early = engine.sport_state("soccer_epl", START + timedelta(minutes=45))
+    assert [s.match_id for s in early] == ["m1", "m2"]
+    late = engine.sport_state("soccer_epl", START + timedelta(minutes=90))
+    assert [s.match_id for s in late] == ["m1"]
+    assert late[0].price("pinnacle", "Arsenal") == pytest.approx(2.03)
+    assert late[0].price("bet365", "Arsenal") == pytest.approx(2.11)
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoint_requires_key(db_path, monkeypatch):
+    monkeypatch.setattr(admin, "market_state", MarketStateEngine(db_path))
+    as_of = (START + timedelta(minutes=100)).isoformat()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", None)
+        assert (await ac.get("/api/v1/admin/market-state/match/m1")).status_code == 403
+
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "secret")
+        assert (await ac.get("/api/v1/admin/market-state/match/m1", headers={"X-Admin-Key": "nope"})).status_code == 401
+
+        headers = {"X-Admin-Key": "secret"}
+        response = await ac.get("/api/v1/admin/market-state/match/m1", params={"as_of": as_of}, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["bookmakers"] == ["bet365", "pinnacle"]
+        assert data["outcomes"] == ["Arsenal", "Chelsea"]
+        assert data["prices"] == [[2.11, None], [2.03, 1.90]]
+
+        slate = await ac.get("/api/v1/admin/market-state/sport/soccer_epl", params={"as_of": as_of}, headers=headers)
+        assert [s["match_id"] for s in slate.json()] == ["m1"]
+
+        missing = await ac.get("/api/v1/admin/market-state/match/unknown", headers=headers)
+        assert missing.status_code == 404
@@ -0,0 +1,72 @@
+import sqlite3
+
+from db.warehouse import ensure_schema
+from services.bayesian_consensus import BayesianConsensus
+from services.matchups import MatchupPriors, rebuild_matchups
+
+
+def _insert(conn, match_id, home, away):
+    conn.execute(
+        "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES (?, 'soccer_epl', '2024-01-01', ?, ?)",
+        (match_id, home, away)
+    )
+
+
+def _complete(conn, match_id, winner):
+    conn.execute("UPDATE matches SET completed = TRUE, winner = ? WHERE id = ?", (winner, match_id))
+
+
+def _matchups(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT team1, team2, team1_wins, team2_wins, draws, total_games
+        FROM historical_matchups
+    """).fetchall()
+    conn.close()
+    return rows
+
+
+def test_completion_updates_matchups_once(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        _insert(conn, "m1", "Chelsea", "Arsenal")
+        _insert(conn, "m2", "Arsenal", "Chelsea")
+        _insert(conn, "m3", "Arsenal", "Chelsea")
+        _complete(conn, "m1", "home")   # Chelsea win
+        _complete(conn, "m2", "home")   # Arsenal win
+        _complete(conn, "m3", "draw")
+        _complete(conn, "m3", "draw")   # Re-applied result is not double counted
+        conn.execute(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team, completed, winner) "
+            "VALUES ('m4', 'soccer_epl', '2024-02-01', 'Chelsea', 'Arsenal', TRUE, 'away')"
+        )
+    conn.close()
+
+    incremental = _matchups(db_path)
+    assert incremental == [("Arsenal", "Chelsea", 2, 1, 1, 4)]
+
+    assert rebuild_matchups(db_path) == 1
+    assert _matchups(db_path) == incremental
+
+
+def test_prior_reads_matchup_mirror(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for i, winner in enumerate(["home", "home", "away", "draw"]):
+            _insert(conn, f"m{i}", "Chelsea", "Arsenal")
+            _complete(conn, f"m{i}", winner)
+    conn.close()
+
+    assert MatchupPriors(db_path).get("soccer_epl", "Chelsea", "Arsenal") == (2, 1, 1, 4)
+
+    consensus = BayesianConsensus(db_path=db_path)
+    # Arsenal hosting: their record is still 1 win in 4 meetings
+    prior = consensus._get_historical_prior("soccer_epl", "Arsenal", "Chelsea", "Arsenal")
+    assert (prior.alpha, prior.beta, prior.total_games) == (1.5, 3.5, 4)
+
+    unknown = consensus._get_historical_prior("soccer_epl", "Leeds", "Everton", "Leeds")
+    assert (unknown.alpha, unknown.beta) == (1.0, 1.0)
@@ -1,5 +1,5 @@
 import pytest
-from services.math import PowerMethod
+from services.math import BatchDevig, PowerMethod
 
 def test_power_method_basic():
     # Fair coin: 2.0, 2.0 -> Prob 0.5, 0.5
@@ -32,3 +32,51 @@ def test_calculate_edge():
     # True prob 0.5, Odds 1.90 -> Edge -0.05 (-5%)
     edge = PowerMethod.calculate_edge(1.90, 0.5)
     assert edge == pytest.approx(-0.05)
+
+
+def test_batch_power_matches_single_market():
+    # Mixed lengths and an invalid row in one batch
+    markets = [[1.15, 5.50], [2.10, 3.40, 3.60], [1.5], [0.95, 2.0], [1.90, 1.90]]
+    batch = PowerMethod.calculate_true_probabilities_batch(markets)
+    assert batch[2] == [] and batch[3] == []
+    for market, probs in zip(markets, batch):
+        if probs:
+            assert len(probs) == len(market)
+            assert probs == pytest.approx(PowerMethod.calculate_true_probabilities(market))
+            assert sum(probs) == pytest.approx(1.0, abs=1e-9)
+
+def test_batch_methods_sum_to_one():
+    markets = [[1.80, 3.60, 4.50], [1.70, 2.30], [2.50, 3.10, 3.30, 9.0]]
+    for method in BatchDevig.METHODS:
+        for probs in BatchDevig.calculate(markets, method=method):
+            assert sum(probs) == pytest.approx(1.0, abs=1e-9)
+            assert all(p > 0 for p in probs)
+
+def test_two_way_closed_forms():
+    # Shin on two outcomes is the additive method
+    shin = BatchDevig.calculate([[1.70, 2.30]], method="shin")[0]
+    additive = BatchDevig.calculate([[1.70, 2.30]], method="additive")[0]
+    assert shin == pytest.approx(additive)
+
+    # Odds ratio: both sides shaded by the same ratio c = sqrt(o1 * o2)
+    p = BatchDevig.calculate([[1.70, 2.30]], method="odds_ratio")[0]
+    o1, o2 = (1 / 1.70) / (1 - 1 / 1.70), (1 / 2.30) / (1 - 1 / 2.30)
+    c = (o1 * o2) ** 0.5
+    assert p[0] == pytest.approx(o1 / (c + o1))
+
+def test_shin_three_way_known_value():
+    # Fixed point of sum(p_i(z)) = 1 for 1.80 / 3.60 / 4.50
+    probs = BatchDevig.calculate([[1.80, 3.60, 4.50]], method="shin")[0]
+    assert probs == pytest.approx([0.534275, 0.260238, 0.205487], abs=1e-6)
+
+def test_failed_rows_fall_back_individually():
+    # Additive would make the longshot negative: only that row is normalized
+    markets = [[1.01, 15.0, 200.0], [1.90, 1.90]]
+    probs = BatchDevig.calculate(markets, method="additive")
+    implied = [1 / o for o in markets[0]]
+    assert probs[0] == pytest.approx([p / sum(implied) for p in implied])
+    assert probs[1] == pytest.approx([0.5, 0.5])
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        BatchDevig.calculate([[2.0, 2.0]], method="bogus")
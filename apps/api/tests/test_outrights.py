@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from core.config import settings
+from core.schemas import Bookmaker, Market, OutrightEvent, Outcome
+from main import app
+from routers import odds
+from services.odds_api import TheOddsApiClient
+from services.outrights import OutrightsEngine, build_board
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+TRUE = np.sort(np.random.default_rng(5).dirichlet(np.full(40, 0.8)))[::-1]
+RUNNERS = [f"Team {i:02d}" for i in range(40)]
+
+
+def _book(key, overround=1.25, runners=40, boost=None):
+    """Prices for the first `runners` teams, power-method margin (pi = p^(1/k))"""
+    p = TRUE[:runners] / TRUE[:runners].sum()
+    lo, hi = 0.01, 1.0
+    for _ in range(100):  # Find k with sum(p^k) = overround
+        k = (lo + hi) / 2
+        lo, hi = (k, hi) if (p ** k).sum() > overround else (lo, k)
+    prices = 1 / p ** k
+    if boost:
+        prices[boost[0]] *= boost[1]
+    return Bookmaker(key=key, title=key.title(), last_update=NOW, markets=[Market(key="outrights", outcomes=[
+        Outcome(name=RUNNERS[i], price=round(float(prices[i]), 3)) for i in range(runners)
+    ])])
+
+
+def _event(books, event_id="e1"):
+    return OutrightEvent(
+        id=event_id, sport_key="soccer_epl_winner", sport_title="EPL Winner",
+        commence_time=NOW + timedelta(days=120), bookmakers=books
+    )
+
+
+def test_batched_consensus_recovers_field():
+    events = [
+        _event([_book("pinnacle", 1.08), _book("bet365", 1.30), _book("williamhill", 1.20, runners=34)]),  # Partial board
+        _event([_book("pinnacle", 1.10), _book("unibet", 1.25, runners=20)], "e2"),  # Unibet below MIN_COVERAGE
+    ]
+    boards = [build_board(e) for e in events]
+    engine = OutrightsEngine()
+    consensus = engine.consensus(boards)
+    assert len(consensus[0]) == 40
+    assert np.nansum(consensus[0]) == pytest.approx(1.0)
+    assert consensus[0] == pytest.approx(TRUE, abs=2e-3)
+    assert np.isnan(consensus[1]).all()  # One usable book: nothing scored
+    assert engine.analyze(events) == []  # Fairly priced everywhere
+
+
+def test_value_at_best_book():
+    events = [_event([_book("pinnacle", 1.08), _book("bet365", 1.30), _book("betfair", 1.05, boost=(3, 1.25))])]
+    bets = OutrightsEngine().analyze(events, bankroll=1000.0)
+    assert [(b.runner, b.bookmaker) for b in bets] == [("Team 03", "Betfair")]
+    bet = bets[0]
+    assert bet.books_quoted == 3 and bet.runners == 40
+    assert bet.edge == pytest.approx(bet.true_probability * bet.odds - 1, abs=1e-5)
+    assert bet.recommended_stake_amount > 0
+
+
+def test_sports_table_drives_outright_sports(tmp_path):
+    engine = OutrightsEngine(db_path=str(tmp_path / "historical.db"))
+    seeded = engine.outright_sports()
+    assert "basketball_nba_championship_winner" in seeded
+    assert engine.sync_sports([
+        {"key": "soccer_epl_winner", "title": "EPL Winner", "has_outrights": True, "active": True},
+        {"key": "basketball_nba_championship_winner", "title": "NBA Championship Winner", "has_outrights": True, "active": False},
+        {"key": "soccer_epl", "title": "EPL", "has_outrights": False, "active": True},
+    ]) == 3
+    sports = engine.outright_sports()
+    assert "soccer_epl_winner" in sports
+    assert "basketball_nba_championship_winner" not in sports
+    assert "soccer_epl" not in sports
+
+
+def test_parse_outrights():
+    raw = [{
+        "id": "e1", "sport_key": "soccer_epl_winner", "sport_title": "EPL Winner",
+        "commence_time": "2026-05-24T15:00:00Z", "home_team": None, "away_team": None,
+        "bookmakers": [{"key": "pinnacle", "title": "Pinnacle", "last_update": "2025-10-01T12:00:00Z", "markets": [
+            {"key": "outrights", "outcomes": [{"name": "Arsenal", "price": 2.6}, {"name": "Liverpool", "price": 3.1}]}
+        ]}]
+    }]
+    event = TheOddsApiClient()._parse_outrights(raw)[0]
+    assert event.id == "e1"
+    assert [o.name for o in event.bookmakers[0].markets[0].outcomes] == ["Arsenal", "Liverpool"]
+
+
+@pytest.mark.asyncio
+async def test_outrights_endpoint_is_cached(monkeypatch):
+    calls = []
+
+    async def fake_get_outrights(sport, regions="uk,eu"):
+        calls.append(sport)
+        return [_event([_book("pinnacle", 1.08), _book("bet365", 1.30), _book("betfair", 1.05, boost=(3, 1.25))])]
+
+    monkeypatch.setattr(settings, "THE_ODDS_API_KEY", "key")
+    monkeypatch.setattr(odds.odds_service, "_outrights_cache", {})
+    monkeypatch.setattr(odds.odds_service.api_client, "get_outrights", fake_get_outrights)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = (await ac.get("/api/v1/odds/outrights", params={"sport": "soccer_epl_winner"})).json()
+        second = (await ac.get("/api/v1/odds/outrights", params={"sport": "soccer_epl_winner"})).json()
+    assert first == second
+    assert first[0]["runner"] == "Team 03"
+    assert calls == ["soccer_epl_winner"]  # Second request served from the outrights cache
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from core.schemas import ValueBet
+from services.dynamic_kelly import DynamicKellyCalculator
+from services.portfolio_kelly import PortfolioBet, PortfolioKelly
+
+
+def _random_bets(n_matches: int, per_match: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    bets = []
+    for m in range(n_matches):
+        fair = rng.dirichlet([4, 4, 2])
+        for _ in range(per_match):
+            side = int(rng.integers(3))
+            price = 1.0 / fair[side] * rng.uniform(0.97, 1.08)
+            bets.append(PortfolioBet(f"m{m}", f"o{side}", float(price), float(fair[side])))
+    return bets
+
+
+def test_single_bet_is_full_kelly_under_cap():
+    # p = 0.55 at 2.0: full Kelly = (0.55 * 1 - 0.45) / 1 = 0.10
+    optimizer = PortfolioKelly(max_bet_fraction=0.5, max_total_fraction=0.5)
+    allocation = optimizer.optimize([PortfolioBet("m1", "Home", 2.0, 0.55, max_fraction=0.5)])
+    assert allocation.converged
+    assert allocation.fractions[0] == pytest.approx(0.10, abs=1e-5)
+
+    capped = PortfolioKelly(max_total_fraction=0.5).optimize([PortfolioBet("m1", "Home", 2.0, 0.55, max_fraction=0.04)])
+    assert capped.fractions[0] == pytest.approx(0.04, abs=1e-6)
+
+
+def test_same_outcome_prefers_best_price():
+    allocation = PortfolioKelly(max_bet_fraction=0.5, max_total_fraction=0.5).optimize([
+        PortfolioBet("m1", "Home", 2.05, 0.55, max_fraction=0.5),
+        PortfolioBet("m1", "Home", 2.10, 0.55, max_fraction=0.5),
+    ])
+    assert allocation.fractions[0] == pytest.approx(0.0, abs=1e-6)
+    assert allocation.fractions[1] > 0.1
+
+
+def test_caps_hold_and_match_reference_solver():
+    bets = _random_bets(10, 3)
+    optimizer = PortfolioKelly(max_total_fraction=0.15)
+    allocation = optimizer.optimize(bets)
+    f = np.array(allocation.fractions)
+    assert allocation.converged
+    assert f.min() >= 0 and f.max() <= 0.10 + 1e-9
+    assert f.sum() <= 0.15 + 1e-9
+
+    caps = np.array([b.max_fraction for b in bets])
+    problem = optimizer._build(bets, caps)
+    reference = minimize(
+        lambda x: -optimizer._growth(x, problem),
+        np.zeros(len(bets)),
+        jac=lambda x: -optimizer._derivatives(x, problem)[0],
+        bounds=list(zip(np.zeros(len(bets)), caps)),
+        constraints=[{"type": "ineq", "fun": lambda x: 0.15 - x.sum()}],
+        method="SLSQP",
+        options={"maxiter": 500, "ftol": 1e-14}
+    )
+    assert allocation.expected_log_growth == pytest.approx(-reference.fun, abs=1e-6)
+
+
+def test_large_slate_converges():
+    allocation = PortfolioKelly(max_total_fraction=0.25).optimize(_random_bets(80, 3))
+    assert allocation.converged
+    assert allocation.total_fraction <= 0.25 + 1e-9
+
+
+def test_size_portfolio_scales_back_overlapping_bets():
+    def bet(outcome, odds, prob, fraction):
+        return ValueBet(
+            match_id="m1", home_team="Arsenal", away_team="Chelsea",
+            commence_time="2025-02-01T15:00:00Z", bookmaker="Bet365", market="h2h",
+            outcome=outcome, odds=odds, true_probability=prob, edge=0.05,
+            expected_value=0.05, kelly_fraction=fraction, risk_of_ruin=0.9  # Isolated stake's risk
+        )
+
+    calculator = DynamicKellyCalculator()
+    bets = [bet("Arsenal", 2.2, 0.5, 0.08), bet("Arsenal", 2.15, 0.5, 0.08), bet("Chelsea", 4.4, 0.25, 0.05)]
+    calculator.size_portfolio(bets, bankroll=1000.0, max_total_fraction=0.10, variances=[0.001, 0.001, 0.002])
+
+    assert sum(b.kelly_fraction for b in bets) <= 0.10 + 1e-9
+    assert bets[0].kelly_fraction >= bets[1].kelly_fraction
+    assert bets[0].recommended_stake_amount == pytest.approx(1000.0 * bets[0].kelly_fraction)
+    # Risk of ruin follows the stake actually recommended
+    for b, variance in zip(bets, [0.001, 0.001, 0.002]):
+        assert b.risk_of_ruin == calculator._calculate_risk_of_ruin(
+            b.odds, b.true_probability, b.kelly_fraction, variance, target_drawdown=0.5
+        )
+
+    unknown = [bet("Arsenal", 2.2, 0.5, 0.08), bet("Arsenal", 2.15, 0.5, 0.08)]
+    calculator.size_portfolio(unknown, bankroll=1000.0, max_total_fraction=0.10)
+    assert all(b.risk_of_ruin is None for b in unknown)
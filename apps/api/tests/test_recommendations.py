@@ -0,0 +1,94 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.schemas import ValueBet
+from db.warehouse import ensure_schema
+from services.ingestion import IngestionQueue
+from services.recommendations import RecommendationRecord, RecommendationSink
+
+
+def _bet(outcome: str, odds: float) -> ValueBet:
+    now = datetime(2025, 2, 1, 12, 0, tzinfo=timezone.utc)
+    return ValueBet(
+        match_id="m1",
+        home_team="Arsenal",
+        away_team="Chelsea",
+        commence_time=now + timedelta(hours=6),
+        bookmaker="Bet365",
+        market="h2h",
+        outcome=outcome,
+        odds=odds,
+        true_probability=0.5,
+        edge=0.03,
+        expected_value=0.03,
+        timestamp=now,
+    )
+
+
+@pytest.mark.asyncio
+async def test_recommendations_are_logged_once_per_version(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    queue = IngestionQueue(sinks=[RecommendationSink(db_path)], max_latency=0.01)
+    await queue.start()
+
+    bets = [_bet("Arsenal", 2.1), _bet("Draw", 3.6)]
+    assert queue.enqueue_nowait(
+        RecommendationRecord.from_value_bet(b, "soccer_epl", "bet365", "1") for b in bets
+    ) == 2
+    # Next poll: same recommendations (new odds), then a new model version
+    queue.enqueue_nowait([RecommendationRecord.from_value_bet(_bet("Arsenal", 2.2), "soccer_epl", "bet365", "1")])
+    queue.enqueue_nowait([RecommendationRecord.from_value_bet(bets[0], "soccer_epl", "bet365", "2")])
+    await queue.stop()
+
+    # A fresh queue (no in-memory dedupe) still can't duplicate rows
+    queue = IngestionQueue(sinks=[RecommendationSink(db_path)], max_latency=0.01)
+    await queue.start()
+    queue.enqueue_nowait([RecommendationRecord.from_value_bet(bets[0], "soccer_epl", "bet365", "1")])
+    await queue.stop()
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT outcome_name, recommended_odds, analysis_version
+        FROM recommended_bets ORDER BY outcome_name, analysis_version
+    """).fetchall()
+    matches = conn.execute("SELECT COUNT(*) FROM matches").fetchone()
+    conn.close()
+    assert rows == [("Arsenal", 2.1, "1"), ("Arsenal", 2.1, "2"), ("Draw", 3.6, "1")]
+    assert matches == (1,)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_instead_of_blocking():
+    queue = IngestionQueue(sinks=[], max_pending=1)
+    records = [
+        RecommendationRecord.from_value_bet(_bet(name, 2.0), "soccer_epl", "bet365", "1")
+        for name in ("Arsenal", "Chelsea", "Draw")
+    ]
+    assert queue.enqueue_nowait(records) == 1
+    assert queue.records_dropped == 2
+
+
+def test_schema_migrates_existing_recommendations_table(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE recommended_bets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id TEXT NOT NULL, bookmaker_key TEXT NOT NULL,
+            market_key TEXT NOT NULL, outcome_name TEXT NOT NULL,
+            recommended_odds REAL NOT NULL, true_probability REAL NOT NULL,
+            edge REAL NOT NULL, kelly_fraction REAL, recommended_stake REAL,
+            recommendation_time TIMESTAMP NOT NULL, closing_odds REAL, clv REAL,
+            result TEXT, profit_loss REAL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.close()
+
+    ensure_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(recommended_bets)")]
+    conn.close()
+    assert "analysis_version" in columns
@@ -0,0 +1,85 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from db.warehouse import ensure_schema
+from services.results_sync import ResultsSync
+
+
+NOW = datetime(2025, 1, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _score_event(match_id, home, away, commence, home_score, away_score, completed=True):
+    return {
+        "id": match_id,
+        "sport_key": "soccer_epl",
+        "commence_time": commence.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "completed": completed,
+        "home_team": home,
+        "away_team": away,
+        "scores": [
+            {"name": home, "score": str(home_score)},
+            {"name": away, "score": str(away_score)},
+        ] if completed else None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_results_sync_completes_matches_once(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    kickoff = NOW - timedelta(days=1)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES (?, 'soccer_epl', ?, ?, ?)",
+            [("m1", kickoff, "Arsenal", "Chelsea"), ("m2", kickoff, "Leeds", "Everton")]
+        )
+    conn.close()
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=[
+            _score_event("m1", "Arsenal", "Chelsea", kickoff, 2, 1),
+            _score_event("m2", "Leeds", "Everton", kickoff, 1, 1),
+            _score_event("m3", "Fulham", "Wolves", kickoff + timedelta(hours=3), 0, 2),
+            _score_event("m4", "Spurs", "Brighton", NOW, 0, 0, completed=False),
+        ])
+
+    hooked = []
+    sync = ResultsSync(
+        db_path=db_path,
+        on_completed=[hooked.extend],
+        transport=httpx.MockTransport(handler)
+    )
+    result = await sync.run(["soccer_epl", "basketball_nba"], now=NOW)
+
+    # Only the sport with matches awaiting results is requested
+    assert len(requests) == 1
+    assert requests[0].url.params["daysFrom"] == "2"
+    assert sorted(hooked) == ["m1", "m2", "m3"]
+
+    conn = sqlite3.connect(db_path)
+    rows = dict((r[0], r[1:]) for r in conn.execute(
+        "SELECT id, completed, home_score, away_score, winner FROM matches"
+    ))
+    assert rows["m1"] == (1, 2, 1, "home")
+    assert rows["m2"] == (1, 1, 1, "draw")
+    assert rows["m3"] == (1, 0, 2, "away")
+    assert "m4" not in rows  # Unfinished events are left to the odds collectors
+
+    watermark = conn.execute("SELECT watermark FROM sync_watermarks WHERE sport_key = 'soccer_epl'").fetchone()
+    assert datetime.fromisoformat(watermark[0]) == kickoff + timedelta(hours=3)
+
+    # Triggers updated matchup priors in the same transaction
+    assert conn.execute("SELECT SUM(total_games) FROM historical_matchups").fetchone() == (3,)
+    conn.close()
+
+    # Nothing pending any more: no request, no double counting
+    again = await sync.run(["soccer_epl"], now=NOW + timedelta(hours=1))
+    assert again.requests == 0
+    assert len(requests) == 1
@@ -0,0 +1,108 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from db.warehouse import ensure_schema
+from services import analytics
+from services.analytics import AnalyticsEngine
+from services.retention import SnapshotRetentionJob
+
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def _seed(db_path, match_id: str, commence: datetime, prices):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO matches (id, sport_key, commence_time, home_team, away_team) VALUES (?, ?, ?, ?, ?)",
+            (match_id, "soccer_epl", commence, "Arsenal", "Chelsea")
+        )
+        for i, price in enumerate(prices):
+            conn.execute("""
+                INSERT INTO odds_snapshots
+                (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+                VALUES (?, 'pinnacle', 'h2h', 'Arsenal', ?, ?)
+            """, (match_id, price, commence - timedelta(hours=len(prices) - i)))
+        # A post-kickoff (in-play) price must not become the closing line
+        conn.execute("""
+            INSERT INTO odds_snapshots
+            (match_id, bookmaker_key, market_key, outcome_name, odds, snapshot_time)
+            VALUES (?, 'pinnacle', 'h2h', 'Arsenal', 1.20, ?)
+        """, (match_id, commence + timedelta(minutes=30)))
+    conn.close()
+
+
+def test_old_matches_become_bars(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    _seed(db_path, "old", NOW - timedelta(days=60), [2.10, 2.05, 2.05, 2.20, 1.95])
+    _seed(db_path, "recent", NOW - timedelta(days=2), [2.00, 2.10])
+
+    result = SnapshotRetentionJob(db_path=db_path, max_age_days=30, archive=False).run(now=NOW)
+
+    assert result.matches_compacted == 1
+    assert result.snapshots_removed == 6
+    assert result.bars_written == 1
+
+    conn = sqlite3.connect(db_path)
+    bar = conn.execute("""
+        SELECT open_odds, high_odds, low_odds, close_odds, changes, samples
+        FROM odds_bars WHERE match_id = 'old'
+    """).fetchone()
+    assert bar == (2.10, 2.20, 1.20, 1.20, 4, 6)
+
+    # Closing line is the last pre-kickoff price, not the in-play one
+    closing = conn.execute("SELECT closing_odds FROM closing_odds WHERE match_id = 'old'").fetchone()
+    assert closing == (1.95,)
+
+    remaining = dict(conn.execute(
+        "SELECT match_id, COUNT(*) FROM odds_snapshots GROUP BY match_id"
+    ).fetchall())
+    assert remaining == {"recent": 3}
+    conn.close()
+
+    # Nothing left to compact on a second run
+    again = SnapshotRetentionJob(db_path=db_path, max_age_days=30, archive=False).run(now=NOW)
+    assert again.matches_compacted == 0
+
+
+def test_archive_is_published_and_read_back(tmp_path):
+    db_path = str(tmp_path / "historical.db")
+    archive_dir = tmp_path / "archive"
+    ensure_schema(db_path)
+    _seed(db_path, "old", NOW - timedelta(days=60), [2.10, 2.05, 1.95])
+
+    result = SnapshotRetentionJob(
+        db_path=db_path, max_age_days=30, archive_dir=str(archive_dir), vacuum=False
+    ).run(now=NOW)
+    assert result.archived and result.archive_error is None
+    assert result.snapshots_removed == 4
+
+    month = (NOW - timedelta(days=60)).strftime("%Y-%m")
+    files = list((archive_dir / "odds_snapshots" / "sport_key=soccer_epl" / f"month={month}").glob("*.parquet"))
+    assert len(files) == 1
+    assert not list(archive_dir.glob(".staging_*"))  # Staging is removed once published
+
+    # The analytics snapshots view unions the archive back in
+    engine = AnalyticsEngine(db_path=db_path, archive_dir=str(archive_dir))
+    odds = sorted(r[0] for r in engine.conn.execute("SELECT odds FROM snapshots WHERE match_id = 'old'").fetchall())
+    engine.close()
+    assert odds == [1.20, 1.95, 2.05, 2.10]
+
+
+def test_compacts_when_archiving_is_unavailable(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "historical.db")
+    ensure_schema(db_path)
+    _seed(db_path, "old", NOW - timedelta(days=60), [2.10, 1.95])
+    _seed(db_path, "older", NOW - timedelta(days=90), [2.10, 1.95])
+
+    monkeypatch.setattr(analytics.importlib.util, "find_spec", lambda name: None)
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    result = SnapshotRetentionJob(
+        db_path=db_path, max_age_days=30, archive_dir=str(tmp_path / "archive"), batch_size=1, vacuum=False
+    ).run(now=NOW)
+    assert not result.archived
+    assert "sqlite scanner" in result.archive_error
+    assert result.matches_compacted == 2
+    assert result.snapshots_removed == 6
+    assert not list((tmp_path / "archive").glob(".staging_*"))
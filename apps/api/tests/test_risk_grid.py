@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from services.dynamic_kelly import DynamicKellyCalculator
+from services.risk_grid import RiskGrid, build_risk_grid
+
+
+@pytest.fixture
+def grid_path(tmp_path):
+    return build_risk_grid(
+        str(tmp_path / "risk_grid.npy"),
+        odds_axis=(1.8, 2.0, 2.4),
+        probability_axis=(0.45, 0.55, 0.65),
+        fraction_axis=(0.0, 0.05, 0.10),
+        variance_axis=(0.0, 0.001),
+        paths=500,
+        horizon=100,
+        workers=1
+    )
+
+
+def test_grid_round_trip_and_interpolation(grid_path):
+    grid = RiskGrid.load(str(grid_path))
+    assert isinstance(grid.values, np.memmap)
+    assert grid.values.shape == (3, 3, 3, 2, 2)
+
+    # Grid nodes come back exactly
+    node = grid.query(2.0, 0.55, 0.05, 0.0)
+    assert float(node["drawdown_risk"]) == pytest.approx(grid.values[1, 1, 1, 0, 0])
+    growth = 0.55 * np.log1p(0.05) + 0.45 * np.log1p(-0.05)
+    assert float(node["growth"]) == pytest.approx(growth)
+    assert float(node["doubling_time"]) == pytest.approx(np.log(2) / growth)
+
+    # Vectorized, and midpoints lie between their neighbours
+    risk = grid.query([2.0, 2.0, 2.0], 0.55, [0.05, 0.075, 0.10], 0.0)["drawdown_risk"]
+    assert risk.shape == (3,)
+    assert min(risk[0], risk[2]) <= risk[1] <= max(risk[0], risk[2])
+
+    # No stake, no drawdown; no edge, no growth
+    assert float(grid.query(2.4, 0.45, 0.0, 0.001)["drawdown_risk"]) == 0.0
+    assert np.isinf(grid.query(1.8, 0.45, 0.05, 0.0)["doubling_time"])
+    assert not grid.covers(5.0, 0.55, 0.05, 0.0)
+
+
+def test_calculator_uses_grid_inside_and_simulation_outside(grid_path, tmp_path):
+    grid = RiskGrid.load(str(grid_path))
+    calc = DynamicKellyCalculator(risk_grid=grid)
+    inside = calc._calculate_risk_of_ruin(2.0, 0.55, 0.05, 0.0, target_drawdown=0.5)
+    assert inside == pytest.approx(float(grid.query(2.0, 0.55, 0.05, 0.0)["drawdown_risk"]))
+
+    outside = calc._calculate_risk_of_ruin(5.0, 0.25, 0.02, 0.0, target_drawdown=0.5)
+    assert 0.0 <= outside <= 1.0
+
+    assert RiskGrid.load(str(tmp_path / "missing.npy")) is None
+    metrics = calc.risk_metrics([1.8, 2.4], [0.6, 0.5], [0.02, 0.04], [0.0, 0.001])
+    assert metrics["drawdown_risk"].shape == (2,)
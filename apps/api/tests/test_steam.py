@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.schemas import Bookmaker, Market, Match, Outcome
+from services.steam import PriceRing, SteamDetector
+
+T0 = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+KICKOFF = T0 + timedelta(hours=6)
+
+
+def _slate(minute, prices):
+    """prices: {bookmaker: Arsenal price}"""
+    return [Match(
+        id="m1", sport_key="soccer_epl", sport_title="EPL", commence_time=KICKOFF,
+        home_team="Arsenal", away_team="Chelsea",
+        bookmakers=[
+            Bookmaker(key=book, title=book, last_update=T0 + timedelta(minutes=minute), markets=[
+                Market(key="h2h", outcomes=[Outcome(name="Arsenal", price=price), Outcome(name="Chelsea", price=3.5)])
+            ])
+            for book, price in prices.items()
+        ]
+    )]
+
+
+def test_ring_keeps_last_quotes_and_window():
+    ring = PriceRing(capacity=3)
+    for t, price in enumerate([2.0, 2.1, 2.2, 2.3]):
+        ring.push(float(t), price)
+    assert ring.latest == (3.0, 2.3)
+    assert ring.oldest == (1.0, 2.1)  # Capacity 3: the first quote was overwritten
+    ring.evict_before(2.5)
+    assert ring.oldest == ring.latest
+    assert ring.previous == 2.2  # Still available after leaving the window
+
+
+def test_coordinated_sharp_move_is_flagged_with_first_time():
+    detector = SteamDetector(sharp_books=["pinnacle"])
+    opening = {"pinnacle": 2.20, "bet365": 2.20, "unibet": 2.25, "williamhill": 2.20}
+    detector.observe(_slate(0, opening), now=T0)
+    detector.observe(_slate(0, opening), now=T0)  # Cached response: same last_update, ignored
+    assert detector.previous_price("m1", "pinnacle", "Arsenal") is None
+
+    detector.observe(_slate(5, {**opening, "pinnacle": 2.00, "bet365": 2.05}), now=T0)
+    assert detector.signal("m1", "Arsenal", now=T0 + timedelta(minutes=5)) is None  # Two books only
+
+    detector.observe(_slate(8, {"pinnacle": 2.00, "bet365": 2.05, "unibet": 2.05, "williamhill": 2.20}), now=T0)
+    signal = detector.signal("m1", "Arsenal", now=T0 + timedelta(minutes=8))
+    assert signal.direction == 1
+    assert signal.books == 3
+    assert signal.agreement == pytest.approx(0.75)
+    assert signal.detected_at == T0 + timedelta(minutes=8)
+    # Every book re-quoted at minute 8, so each move is measured over 8 minutes
+    assert signal.velocity == pytest.approx(((1 / 2.00 - 1 / 2.20) + (1 / 2.05 - 1 / 2.20) + (1 / 2.05 - 1 / 2.25)) / 3 / 8)
+    assert detector.previous_price("m1", "pinnacle", "Arsenal") == 2.20
+    assert detector.signal("m1", "Chelsea", now=T0 + timedelta(minutes=8)) is None
+
+    # Contributions expire with the window
+    assert detector.signal("m1", "Arsenal", now=T0 + timedelta(minutes=40)) is None
+
+
+def test_soft_books_alone_are_not_steam():
+    detector = SteamDetector(sharp_books=["pinnacle"])
+    detector.observe(_slate(0, {"pinnacle": 2.2, "bet365": 2.2, "unibet": 2.2, "williamhill": 2.2}), now=T0)
+    detector.observe(_slate(5, {"pinnacle": 2.2, "bet365": 2.0, "unibet": 2.0, "williamhill": 2.0}), now=T0)
+    assert detector.signal("m1", "Arsenal", now=T0 + timedelta(minutes=5)) is None
+
+
+def test_quiet_books_still_count_as_quoting():
+    """Ten books quote 2.00; three shorten 25 minutes later and the other seven never re-quote"""
+    detector = SteamDetector(sharp_books=["pinnacle"])
+    books = ["pinnacle", "bet365", "unibet"] + [f"book{i}" for i in range(7)]
+    detector.observe(_slate(0, {book: 2.00 for book in books}), now=T0)
+    detector.observe(_slate(25, {book: 1.80 for book in books[:3]}), now=T0)
+    assert detector.signal("m1", "Arsenal", now=T0 + timedelta(minutes=25)) is None
+
+    # The quiet books' opening quotes leave the window but are still their prices: 3 / 10 agree
+    assert detector.signal("m1", "Arsenal", now=T0 + timedelta(minutes=35)) is None
+    assert len(detector._outcomes[("m1", "Arsenal")].moves) == 10
+
+
+def test_started_matches_are_forgotten():
+    detector = SteamDetector()
+    detector.observe(_slate(0, {"pinnacle": 2.2}), now=T0)
+    detector.observe([], now=KICKOFF)
+    assert detector.previous_price("m1", "pinnacle", "Arsenal") is None
+    assert detector.signal("m1", "Arsenal", now=T0) is None
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from services.backtest import Backtester
+from services.sweep import METRICS, ParameterSweep, build_columns, evaluate
+from test_backtest import _build_history
+
+CURRENT = {'A': 0.50, 'B': 0.25, 'C': 0.10, 'D': 0.00}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "historical.db")
+    _build_history(path)
+    return path
+
+
+def test_current_parameters_reproduce_backtest_signals(db_path):
+    sweep = ParameterSweep(db_path, workers=1)
+    candidates = sweep.load_candidates(start="2025-01-01", end="2025-04-01")
+    _, bets = Backtester(db_path, workers=1).run(start="2025-01-01", end="2025-04-01")
+
+    # soccer_epl threshold 0.01, default penalties and multipliers
+    columns, sports = build_columns(candidates)
+    metrics = dict(zip(METRICS, evaluate(columns, len(sports), [0.01], 1.0, 0.01, CURRENT)[0, 0]))
+    assert metrics["bets"] == len(bets)
+    assert metrics["mean_clv"] == pytest.approx(np.mean([b.clv for b in bets]))
+
+
+def test_surfaces_are_independent_of_workers(db_path):
+    candidates = ParameterSweep(db_path, workers=1).load_candidates()
+    kwargs = dict(
+        thresholds=(0.0, 0.01, 0.2), uncertainty_weights=(0.0, 1.0),
+        liquidity_weights=(0.01,), multiplier_sets=(CURRENT, {'A': 0.5, 'B': 0.0, 'C': 0.0, 'D': 0.0}),
+        candidates=candidates
+    )
+    serial = ParameterSweep(db_path, workers=1).run(**kwargs)
+    pooled = ParameterSweep(db_path, workers=2).run(**kwargs)
+
+    assert set(serial.surfaces) == {"all", "soccer_epl"}
+    for metric in METRICS:
+        assert serial.surfaces["all"][metric].shape == (3, 2, 1, 2)
+        np.testing.assert_allclose(serial.surfaces["all"][metric], pooled.surfaces["all"][metric])
+
+    bets = serial.surfaces["all"]["bets"]
+    assert (np.diff(bets, axis=0) <= 0).all()  # Higher thresholds never add bets
+    assert bets[-1].max() == 0  # Nothing clears a 20% risk-adjusted edge
+    best = serial.best(min_bets=1)
+    assert best["edge_threshold"] in (0.0, 0.01)
+    assert best["roi"] == np.nanmax(np.where(bets >= 1, serial.surfaces["all"]["roi"], np.nan))